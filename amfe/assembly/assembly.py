@@ -108,6 +108,38 @@ class Assembly:
         """
         pass
 
+    def assemble_f_int(self, nodes_df, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., f_glob=None):
+        """
+        Assemble the nonlinear internal force vector only.
+
+        Assemblies should override this method with a routine that does not compute the tangential stiffness matrix.
+        The default implementation calls assemble_k_and_f and discards the stiffness matrix.
+
+        Parameters
+        ----------
+        nodes_df : pandas.DataFrame
+            Node Coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        f_glob : ndarray
+            preallocated ndarray
+
+        Returns
+        --------
+        f : ndarray
+            global internal force vector
+        """
+        return self.assemble_k_and_f(nodes_df, ele_objects, connectivities, elements2dofs, dofvalues, t,
+                                     f_glob=f_glob)[1]
+
     @abc.abstractmethod
     def assemble_m(self, nodes_df, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0, M_csr=None):
         """
@@ -141,6 +173,80 @@ class Assembly:
         """
         pass
 
+    def assemble_m_k_f(self, nodes_df, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., M_csr=None,
+                       K_csr=None, f_glob=None):
+        """
+        Assemble the mass matrix, the tangential stiffness matrix and the internal force vector.
+
+        Assemblies should override this method with a routine that evaluates the elements only once. The default
+        implementation calls assemble_m and assemble_k_and_f.
+
+        Parameters
+        ----------
+        nodes_df : pandas.DataFrame
+            Node Coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        M_csr : csr_matrix
+            preallocated csr_matrix for M
+        K_csr : csr_matrix
+            preallocated csr_matrix for K
+        f_glob : ndarray
+            preallocated ndarray
+
+        Returns
+        --------
+        M : csr_matrix
+            global mass matrix
+        K : csr_matrix
+            global stiffness matrix
+        f : ndarray
+            global internal force vector
+        """
+        M = self.assemble_m(nodes_df, ele_objects, connectivities, elements2dofs, dofvalues, t, M_csr)
+        K, f = self.assemble_k_and_f(nodes_df, ele_objects, connectivities, elements2dofs, dofvalues, t, K_csr, f_glob)
+        return M, K, f
+
+    @abc.abstractmethod
+    def assemble_m_lumped(self, nodes_df, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0, m_glob=None,
+                          method='row_sum'):
+        """
+        Assembles the lumped (diagonal) mass matrix of the given mesh and element as vector.
+
+        Parameters
+        ----------
+        nodes_df : pandas.Dataframe
+            Node Coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        m_glob : ndarray
+            if a preallocated ndarray for m exist, it can be passed here
+        method : {'row_sum', 'hrz'}
+            lumping technique of the element mass matrices
+
+        Returns
+        --------
+        m : ndarray
+            diagonal of the unconstrained lumped mass matrix
+        """
+        pass
+
     @abc.abstractmethod
     def assemble_k_f_S_E(self, nodes_df, ele_objects, connectivities, elements2dofs, elements_on_node, dofvalues=None, t=0, K_csr=None, f_glob=None):
         """
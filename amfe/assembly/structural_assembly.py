@@ -14,30 +14,123 @@ stiffness matrix. Some parts of the code --- mostly the indexing of the sparse m
 routines, as they allow for a huge speedup.
 """
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from copy import copy
+from functools import partial
+
 import numpy as np
-import time
 from scipy.sparse import csr_matrix
 
 from .assembly import Assembly
-from .tools import fill_csr_matrix
+from .tools import get_csr_pattern, get_csr_scatter_map
 
 __all__ = [
+    'AssemblyPlan',
     'StructuralAssembly'
 ]
 
 
+class AssemblyPlan:
+    """
+    Precomputed assembly data of a fixed set of elements.
+
+    The plan contains everything that only depends on the element objects, the connectivities and the dofs of the
+    elements, i.e. the element groups, the contiguous connectivity and dof arrays of every group and the scatter maps
+    into the preallocated matrices. A plan is created by StructuralAssembly.create_plan and can be passed to all
+    assemble methods of the same elements, which then skip the grouping, the gathering of the element index lists
+    and the comparison of the dofs for the scatter map lookup.
+
+    Attributes
+    ----------
+    ele_objects : ndarray
+        Element objects of the planned elements
+    connectivities : list of ndarrays
+        Connectivity of the elements mapping to the indices of nodes ndarray
+    elements2dofs : list of ndarrays
+        Mapping the elements to their global dofs
+    elements2dofs_flat : ndarray
+        concatenated global dofs of all elements
+    groups : list of tuple
+        element groups, see StructuralAssembly._get_element_groups
+    group_connectivities : list of ndarray
+        connectivities of the elements of every group, shape: (no_of_elements_in_group, no_of_nodes_per_element)
+    group_dofs : list of ndarray
+        global dofs of the elements of every group, shape: (no_of_elements_in_group, no_of_dofs_per_element)
+    """
+    def __init__(self, ele_objects, connectivities, elements2dofs, groups):
+        self.ele_objects = ele_objects
+        self.connectivities = connectivities
+        self.elements2dofs = elements2dofs
+        if len(elements2dofs) > 0:
+            self.elements2dofs_flat = np.concatenate(elements2dofs).astype(int, copy=False)
+        else:
+            self.elements2dofs_flat = np.array([], dtype=int)
+        self.groups = groups
+        self.group_connectivities = [np.array([connectivities[i] for i in positions], dtype=int)
+                                     for _, positions, _, _ in groups]
+        self.group_dofs = [np.array([elements2dofs[i] for i in positions], dtype=int)
+                           for _, positions, _, _ in groups]
+        # scatter maps of the elements into preallocated matrices, keys are the ids of the indices of the matrices
+        self._scatter_maps = OrderedDict()
+
+    @property
+    def no_of_elements(self):
+        return len(self.elements2dofs)
+
+
 class StructuralAssembly(Assembly):
     """
     Class handling assembly of elements for structures.
+
+    The element routines of assemble_k_and_f, assemble_m and assemble_m_lumped can be evaluated in parallel. The
+    elements are split into partitions, each worker evaluates the local matrices of one partition and writes them into
+    its own part of the assembly buffers. The buffers are scattered into the global matrices afterwards in one reduction, thus the workers
+    never write into the same memory and no coloring of the elements is needed.
+
+    Attributes
+    ----------
+    no_of_workers : int
+        Number of workers for the parallel evaluation of the elements. With 1 the elements are evaluated serially.
+    executor : {'thread', 'process'}
+        Kind of the worker pool. Threads are suited for the batched NumPy element kernels which release the GIL
+        (K, f_int and M of elements providing gauss_dN_dxi and gauss_NN), processes for element routines which hold
+        the GIL, e.g. the fallback loops over the elements without batched routines.
+    _executor : concurrent.futures.Executor or None
+        Worker pool, created when it is needed for the first time
+    _process_ele_objects : dict
+        Element objects sent to the workers of the process pool by its initializer, the keys are their ids. The pool
+        is recreated, if element objects that have not been sent are evaluated. Call shutdown after changing the
+        element objects in place to send the changed objects.
+    _scatter_maps : OrderedDict
+        Cache for the scatter maps of the preallocated matrices, see get_csr_scatter_map. The keys are the ids of the
+        indices arrays of the csr matrices, the values are tuples (indices, elements2dofs_flat, scatter_map).
     """
+    # maximum number of sparsity patterns whose scatter maps are cached at the same time
+    SCATTER_MAP_CACHE_SIZE = 4
+    # minimum number of elements in a partition that is evaluated by one worker
+    MIN_ELEMENTS_PER_PARTITION = 64
 
-    def __init__(self):
+    def __init__(self, no_of_workers=1, executor='thread'):
         """
         Parameters
         ----------
+        no_of_workers : int, optional
+            Number of workers for the parallel evaluation of the elements. Default: 1 (serial evaluation)
+        executor : {'thread', 'process'}, optional
+            Kind of the worker pool. Threads only scale for element objects with batched routines, see the
+            attribute executor. Default: 'thread'
         """
 
         super().__init__()
+        if executor not in ('thread', 'process'):
+            raise ValueError('Unknown executor {}. Choose \'thread\' or \'process\''.format(executor))
+        self.no_of_workers = no_of_workers
+        self.executor = executor
+        self._executor = None
+        self._executor_config = None
+        self._process_ele_objects = dict()
+        self._scatter_maps = OrderedDict()
         # compute nodes_frequency for stress recovery
         # TODO: move this to another class
         # if connectivity is not None:
@@ -47,6 +140,49 @@ class StructuralAssembly(Assembly):
         #     self.elements_on_node = None
         return
 
+    def __getstate__(self):
+        # worker pools cannot be copied or pickled, a new one is created on demand
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_executor_config'] = None
+        state['_process_ele_objects'] = dict()
+        return state
+
+    def shutdown(self):
+        """
+        Shut down the worker pool of the parallel assembly.
+
+        A new pool is created, if parallel assembly is used again afterwards.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._executor_config = None
+        self._process_ele_objects = dict()
+
+    def _get_executor(self, ele_objects=()):
+        config = (self.executor, self.no_of_workers)
+        if self._executor is not None and self._executor_config != config:
+            self.shutdown()
+        if self.executor == 'process':
+            # the element objects are sent once to every worker, new element objects require a new pool
+            process_ele_objects = self._process_ele_objects.copy()
+            process_ele_objects.update((id(ele_obj), ele_obj) for ele_obj in ele_objects)
+            if len(process_ele_objects) > len(self._process_ele_objects):
+                self.shutdown()
+            self._process_ele_objects = process_ele_objects
+        if self._executor is None:
+            if self.executor == 'thread':
+                self._executor = ThreadPoolExecutor(max_workers=self.no_of_workers)
+            elif self.executor == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.no_of_workers,
+                                                     initializer=_init_process_worker,
+                                                     initargs=(self._process_ele_objects,))
+            else:
+                raise ValueError('Unknown executor {}. Choose \'thread\' or \'process\''.format(self.executor))
+            self._executor_config = config
+        return self._executor
+
     def preallocate(self, no_of_dofs, elements2global):
         """
         Compute the sparsity pattern of the assembled matrices and store an empty matrix in self.C_csr.
@@ -67,49 +203,332 @@ class StructuralAssembly(Assembly):
 
         Notes
         -----
-        This pre-allocation routine can take some while for large matrices. Furthermore it is not implemented
-        memory-efficient, so for large systems and low RAM this might become an issue...
+        The sparsity pattern is computed with whole-array operations. It needs memory for all index pairs of the
+        local element matrices at once, so for large systems and low RAM this might become an issue...
         """
-
-        t1 = time.clock()
-
         # NOTE
         # the following algorithm only works under the following constraints:
         #   - the mapping starts at zero
         #   - if there are gaps in the mapping, they will not be pre-allocated
+        indptr, indices = get_csr_pattern(no_of_dofs, elements2global)
 
-        max_dofs_per_element = max((len(i) for i in elements2global))
+        # fill C_csr matrix with explicit zeros in those places where matrix will be filled in assembly
+        C_csr = csr_matrix((np.zeros(len(indices), dtype=float), indices, indptr), shape=(no_of_dofs, no_of_dofs))
+        return C_csr
 
-        # Auxiliary Help-Matrix H which is the blueprint of the local element stiffness matrix
-        H = np.zeros((max_dofs_per_element, max_dofs_per_element))
+    def _get_scatter_map(self, C_csr, elements2dofs, plan=None):
+        """
+        Return the scatter map of the elements into the data array of a preallocated csr matrix.
 
-        # pre-allocate the CSR-matrix
+        The scatter map is computed once per sparsity pattern and elements2dofs and is cached afterwards. If an
+        assembly plan of the elements is passed, the scatter map is cached in the plan as well and looked up there
+        by the sparsity pattern only.
 
-        # pre-allocate row_global with maximal possible size for pre-alloc. C_csr
-        row_global = np.zeros(len(elements2global) * max_dofs_per_element ** 2, dtype=int)
-        # pre-allocate col_global with maximal possible size for pre-alloc. C_csr
-        col_global = row_global.copy()
-        # set 'dummy' values
-        vals_global = np.zeros_like(col_global, dtype=bool)
+        Parameters
+        ----------
+        C_csr : csr_matrix
+            preallocated csr_matrix
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        plan : AssemblyPlan, optional
+            assembly plan of the elements
+
+        Returns
+        -------
+        elements2dofs_flat : ndarray
+            concatenated global dofs of all elements
+        scatter_map : ndarray
+            scatter map of the flattened local element matrices into C_csr.data
+        """
+        key = id(C_csr.indices)
+        if plan is not None:
+            cached = plan._scatter_maps.get(key)
+            if cached is not None and cached[0] is C_csr.indices:
+                return plan.elements2dofs_flat, cached[1]
+            elements2dofs_flat = plan.elements2dofs_flat
+        else:
+            elements2dofs_flat = np.concatenate(elements2dofs).astype(int, copy=False)
+        cached = self._scatter_maps.get(key)
+        if cached is None or cached[0] is not C_csr.indices or not np.array_equal(cached[1], elements2dofs_flat):
+            if not C_csr.has_sorted_indices:
+                C_csr.sort_indices()
+            scatter_map = get_csr_scatter_map(C_csr.indptr, C_csr.indices, elements2dofs)
+            cached = (C_csr.indices, elements2dofs_flat, scatter_map)
+            self._scatter_maps[key] = cached
+            if len(self._scatter_maps) > self.SCATTER_MAP_CACHE_SIZE:
+                self._scatter_maps.popitem(last=False)
+        if plan is not None:
+            plan._scatter_maps[key] = (C_csr.indices, cached[2])
+            if len(plan._scatter_maps) > self.SCATTER_MAP_CACHE_SIZE:
+                plan._scatter_maps.popitem(last=False)
+        return cached[1], cached[2]
 
-        # calculate row_global and col_global
-        for i, global_dofs_of_current_element in enumerate(elements2global):
-            l = len(global_dofs_of_current_element)
-            # insert global-dof-ids in l rows (l rows have equal entries)
-            H[:l, :l] = global_dofs_of_current_element
-            # calculate row_global and col_global such that every possible combination of indices_of_one_element can be
-            # returned by (row_global[k], col_global[k]) for all k
-            row_global[i * max_dofs_per_element ** 2:(i + 1) * max_dofs_per_element ** 2] = H.reshape(-1)
-            col_global[i * max_dofs_per_element ** 2:(i + 1) * max_dofs_per_element ** 2] = H.T.reshape(-1)
+    @staticmethod
+    def _get_element_groups(ele_objects, elements2dofs):
+        """
+        Group the elements by their element objects.
 
-        # fill C_csr matrix with dummy entries in those places where matrix will be filled in assembly
-        C_csr = csr_matrix((vals_global, (row_global, col_global)), shape=(no_of_dofs, no_of_dofs), dtype=float)
+        Elements sharing one element object have the same shape and material. Hence, they can be evaluated by one call
+        of the batched element routines.
 
-        t2 = time.clock()
-        return C_csr
+        Parameters
+        ----------
+        ele_objects : ndarray
+            Ndarray with Element objects
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+
+        Returns
+        -------
+        groups : list of tuple
+            One tuple (ele_obj, positions, k_indices, f_indices) per group. positions are the indices of the elements
+            of the group in ele_objects, k_indices and f_indices are the positions of the flattened local matrices
+            and vectors of these elements in the buffers that are scattered with the scatter map.
+        """
+        no_of_element_dofs = np.array([len(dofs) for dofs in elements2dofs], dtype=int)
+        f_offsets = np.cumsum(no_of_element_dofs) - no_of_element_dofs
+        k_offsets = np.cumsum(no_of_element_dofs**2) - no_of_element_dofs**2
+        _, first_positions, group_ids = np.unique([id(ele_obj) for ele_obj in ele_objects], return_index=True,
+                                                  return_inverse=True)
+        groups = []
+        for group_id, first_position in enumerate(first_positions):
+            positions = np.flatnonzero(group_ids == group_id)
+            ndof = no_of_element_dofs[first_position]
+            k_indices = k_offsets[positions, np.newaxis] + np.arange(ndof**2)
+            f_indices = f_offsets[positions, np.newaxis] + np.arange(ndof)
+            groups.append((ele_objects[first_position], positions, k_indices, f_indices))
+        return groups
+
+    def create_plan(self, ele_objects, connectivities, elements2dofs):
+        """
+        Create an assembly plan of the given elements.
+
+        The plan can be passed to the assemble methods as long as the element objects, the connectivities and the
+        dofs of the elements do not change.
+
+        Parameters
+        ----------
+        ele_objects : ndarray
+            Ndarray with Element objects
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+
+        Returns
+        -------
+        plan : AssemblyPlan
+            assembly plan of the elements
+        """
+        if len(elements2dofs) == 0:
+            groups = []
+        else:
+            groups = self._get_element_groups(ele_objects, elements2dofs)
+        return AssemblyPlan(ele_objects, connectivities, elements2dofs, groups)
+
+    def _get_plan(self, plan, ele_objects, connectivities, elements2dofs):
+        # a temporary plan is created for assemblies without a plan
+        if plan is None:
+            return self.create_plan(ele_objects, connectivities, elements2dofs)
+        return plan
+
+    def _evaluate_element_groups(self, batch_function, plan, nodes, dofvalues, t, reference_geometries=None):
+        """
+        Evaluate batch_function(ele_obj, X, u, t[, reference_geometry]) for the elements of all groups.
+
+        The elements of every group are split into partitions. If no_of_workers > 1, the partitions are evaluated by
+        the workers in parallel.
+
+        Parameters
+        ----------
+        batch_function : callable
+            module level function evaluating a stack of elements, e.g. _k_and_f_int_batch
+        plan : AssemblyPlan
+            assembly plan of the elements, see create_plan
+        nodes : ndarray
+            Node Coordinates (rows = nodes, columns = x,y(,z) coordinates
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time
+        reference_geometries : list, optional
+            precomputed reference geometry (B0_tilde, det_w) or None for every group. If it is given for a group, the
+            rows of the partition are passed to batch_function as additional argument.
+
+        Returns
+        -------
+        results : list of tuple
+            One tuple (group_id, partition, result) per partition. partition contains the indices of the elements in
+            the positions of the group, result is the return value of batch_function.
+        """
+        parallel = self.no_of_workers > 1
+        tasks = []
+        for group_id, (ele_obj, positions, _, _) in enumerate(plan.groups):
+            if parallel:
+                no_of_partitions = min(self.no_of_workers,
+                                       int(np.ceil(len(positions) / self.MIN_ELEMENTS_PER_PARTITION)))
+            else:
+                no_of_partitions = 1
+            for partition in np.array_split(np.arange(len(positions)), no_of_partitions):
+                # X - undeformed positions and u - displacements of the elements, one row per element
+                X = nodes[plan.group_connectivities[group_id][partition]].reshape(len(partition), -1)
+                u = dofvalues[plan.group_dofs[group_id][partition]]
+                args = (X, u, t)
+                if reference_geometries is not None and reference_geometries[group_id] is not None:
+                    if no_of_partitions == 1:
+                        args += (reference_geometries[group_id],)
+                    else:
+                        args += (tuple(values[partition] for values in reference_geometries[group_id]),)
+                tasks.append((group_id, partition, ele_obj, args))
+
+        if parallel and len(tasks) > 1:
+            executor = self._get_executor([ele_obj for _, _, ele_obj, _ in tasks])
+            if self.executor == 'process':
+                # the workers own the element objects sent by the initializer, only their ids are submitted
+                futures = [executor.submit(_process_batch_function, batch_function, id(ele_obj), *args)
+                           for _, _, ele_obj, args in tasks]
+            else:
+                # the element objects store intermediate results, hence every thread gets its own copy
+                futures = [executor.submit(batch_function, _private_copy(ele_obj), *args)
+                           for _, _, ele_obj, args in tasks]
+            results = [future.result() for future in futures]
+        else:
+            results = [batch_function(ele_obj, *args) for _, _, ele_obj, args in tasks]
+        return [(group_id, partition, result) for (group_id, partition, _, _), result in zip(tasks, results)]
+
+    def compute_reference_geometry(self, nodes, ele_objects, connectivities, elements2dofs, plan=None):
+        """
+        Compute the spatial derivatives of the shape functions and the integration weights in the reference
+        configuration of all elements that provide them.
+
+        The result can be passed to assemble_k_and_f as reference_geometry to skip the recomputation of these
+        quantities, which only depend on the undeformed node coordinates, in every assembly.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates (rows = nodes, columns = x,y(,z) coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan
+
+        Returns
+        -------
+        reference_geometry : dict
+            The keys are the ids of the element objects, the values are tuples (ele_obj, positions, B0_tilde, det_w)
+            with the indices of the elements in ele_objects and the contiguous arrays of dN_dX and det(J)*w of these
+            elements at the gauss points, see Element.reference_geometry_batch.
+        """
+        reference_geometry = dict()
+        if len(elements2dofs) == 0:
+            return reference_geometry
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        for (ele_obj, positions, _, _), connectivity in zip(plan.groups, plan.group_connectivities):
+            if not hasattr(ele_obj, 'reference_geometry_batch'):
+                continue
+            X = nodes[connectivity].reshape(len(positions), -1)
+            geometry = ele_obj.reference_geometry_batch(X)
+            if geometry is not None:
+                reference_geometry[id(ele_obj)] = (ele_obj, positions) + tuple(geometry)
+        return reference_geometry
+
+    @staticmethod
+    def _get_group_reference_geometry(reference_geometry, ele_obj, element_indices):
+        """
+        Return the rows of the cached reference geometry of the elements element_indices or None if not all of them
+        are cached.
+        """
+        cached = reference_geometry.get(id(ele_obj))
+        if cached is None or cached[0] is not ele_obj:
+            return None
+        cached_positions = cached[1]
+        if len(cached_positions) == len(element_indices) and np.array_equal(cached_positions, element_indices):
+            return cached[2:]
+        rows = np.searchsorted(cached_positions, element_indices)
+        if np.any(rows >= len(cached_positions)) or not np.array_equal(cached_positions[rows], element_indices):
+            return None
+        return tuple(values[rows] for values in cached[2:])
+
+    def _get_groups_reference_geometries(self, groups, reference_geometry, element_indices=None):
+        """
+        Look up the cached reference geometry of every element group.
+
+        Parameters
+        ----------
+        groups : list
+            element groups, see _get_element_groups
+        reference_geometry : dict or None
+            precomputed reference geometry, see compute_reference_geometry
+        element_indices : ndarray, optional
+            indices of the grouped elements in the element list the reference geometry has been computed for
+
+        Returns
+        -------
+        reference_geometries : list or None
+            reference geometry of each group or None if no reference geometry is passed
+        """
+        if not reference_geometry:
+            return None
+        return [self._get_group_reference_geometry(reference_geometry, ele_obj, positions
+                                                   if element_indices is None
+                                                   else element_indices[positions])
+                for ele_obj, positions, _, _ in groups]
+
+    def _compute_k_and_f_values(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues, t, K_vals, f_vals,
+                                weights=None, reference_geometry=None, element_indices=None, plan=None):
+        """
+        Evaluate the local stiffness matrices and force vectors of all elements group-wise with the batched element
+        routines and store them flattened in K_vals and f_vals in the order of elements2dofs.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates (rows = nodes, columns = x,y(,z) coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time
+        K_vals : ndarray
+            buffer for the flattened local stiffness matrices
+        f_vals : ndarray
+            buffer for the local force vectors
+        weights : ndarray, optional
+            weights the local matrices and vectors are multiplied with, one per element
+        reference_geometry : dict, optional
+            precomputed reference geometry, see compute_reference_geometry
+        element_indices : ndarray, optional
+            indices of the passed elements in the element list the reference geometry has been computed for. Default:
+            the elements are the same.
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan
+        """
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        reference_geometries = self._get_groups_reference_geometries(plan.groups, reference_geometry, element_indices)
+        for group_id, partition, (K_local, f_local) in self._evaluate_element_groups(_k_and_f_int_batch, plan, nodes,
+                                                                                    dofvalues, t,
+                                                                                    reference_geometries):
+            _, positions, k_indices, f_indices = plan.groups[group_id]
+            if weights is not None:
+                K_local = K_local * weights[positions[partition], np.newaxis, np.newaxis]
+                f_local = f_local * weights[positions[partition], np.newaxis]
+            K_vals[k_indices[partition]] = K_local.reshape(len(partition), -1)
+            f_vals[f_indices[partition]] = f_local
 
     def assemble_k_and_f(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., K_csr=None,
-                         f_glob=None):
+                         f_glob=None, reference_geometry=None, plan=None):
         """
         Assemble the tangential stiffness matrix and nonliner internal or external force vector.
 
@@ -130,6 +549,15 @@ class StructuralAssembly(Assembly):
             current values of all dofs (at time t)
         t : float
             time. Default: 0.
+        K_csr : csr_matrix, optional
+            A preallocated csr_matrix can be passed for faster assembly
+        f_glob : ndarray, optional
+            A preallocated ndarray can be passed for faster assembly
+        reference_geometry : dict, optional
+            Reference geometry of the elements computed by compute_reference_geometry for the same elements
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan. It replaces the grouping of the elements in every
+            assembly.
 
         Returns
         --------
@@ -148,7 +576,7 @@ class StructuralAssembly(Assembly):
             dofvalues = np.zeros(maxdof + 1)
 
         if K_csr is None:
-            no_of_dofs = np.max(elements2dofs) + 1
+            no_of_dofs = np.concatenate(elements2dofs).max() + 1
             K_csr = self.preallocate(no_of_dofs, elements2dofs)
 
         if f_glob is None:
@@ -156,23 +584,202 @@ class StructuralAssembly(Assembly):
 
         K_csr.data[:] = 0.0
         f_glob[:] = 0.0
+        if len(elements2dofs) == 0:
+            return K_csr, f_glob
 
-        # loop over all elements
-        # (i - element index, indices - DOF indices of the element)
-        for ele_obj, connectivity, globaldofindices in zip(ele_objects, connectivities, elements2dofs):
-            # X - undeformed positions of the i-th element
-            X_local = nodes[connectivity, :].reshape(-1)
-            # displacements of the i-th element
-            u_local = dofvalues[globaldofindices]
-            # computation of the element tangential stiffness matrix and nonlinear force
-            K_local, f_local = ele_obj.k_and_f_int(X_local, u_local, t)
-            # adding the local force to the global one
-            f_glob[globaldofindices] += f_local
-            # this is equal to K_csr[globaldofindices, globaldofindices] += K_local
-            fill_csr_matrix(K_csr.indptr, K_csr.indices, K_csr.data, K_local, globaldofindices)
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        elements2dofs_flat, scatter_map = self._get_scatter_map(K_csr, elements2dofs, plan)
+        K_vals = np.empty(len(scatter_map))
+        f_vals = np.empty(len(elements2dofs_flat))
+        self._compute_k_and_f_values(nodes, ele_objects, connectivities, elements2dofs, dofvalues, t, K_vals, f_vals,
+                                     reference_geometry=reference_geometry, plan=plan)
+
+        # this is equal to K_csr[globaldofindices, globaldofindices] += K_local for all elements
+        K_csr.data[:] = np.bincount(scatter_map, weights=K_vals, minlength=K_csr.nnz)
+        f_glob += np.bincount(elements2dofs_flat, weights=f_vals, minlength=len(f_glob))
         return K_csr, f_glob
 
-    def assemble_m(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0, M_csr=None):
+    def assemble_m_k_f(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., M_csr=None,
+                       K_csr=None, f_glob=None, reference_geometry=None, plan=None):
+        """
+        Assemble the mass matrix, the tangential stiffness matrix and the internal force vector in one traversal of
+        the elements.
+
+        The local coordinates and displacements of the elements are gathered once per element group and the element
+        routines return all three quantities of a group at once.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates (rows = nodes, columns = x,y(,z) coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        M_csr : csr_matrix, optional
+            A preallocated csr_matrix for M can be passed for faster assembly
+        K_csr : csr_matrix, optional
+            A preallocated csr_matrix for K can be passed for faster assembly
+        f_glob : ndarray, optional
+            A preallocated ndarray can be passed for faster assembly
+        reference_geometry : dict, optional
+            Reference geometry of the elements computed by compute_reference_geometry for the same elements
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan. It replaces the grouping of the elements in every
+            assembly.
+
+        Returns
+        --------
+        M : csr_matrix
+            global mass matrix
+        K : csr_matrix
+            global stiffness matrix
+        f : ndarray
+            global internal force vector
+        """
+        if K_csr is None or M_csr is None:
+            no_of_dofs = np.concatenate(elements2dofs).max() + 1
+            if K_csr is None:
+                K_csr = self.preallocate(no_of_dofs, elements2dofs)
+            if M_csr is None:
+                M_csr = self.preallocate(no_of_dofs, elements2dofs)
+
+        if dofvalues is None:
+            dofvalues = np.zeros(K_csr.shape[1])
+
+        if f_glob is None:
+            f_glob = np.zeros(K_csr.shape[1], dtype=float)
+
+        M_csr.data[:] = 0.0
+        K_csr.data[:] = 0.0
+        f_glob[:] = 0.0
+        if len(elements2dofs) == 0:
+            return M_csr, K_csr, f_glob
+
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        elements2dofs_flat, scatter_map_k = self._get_scatter_map(K_csr, elements2dofs, plan)
+        _, scatter_map_m = self._get_scatter_map(M_csr, elements2dofs, plan)
+        M_vals = np.empty(len(scatter_map_m))
+        K_vals = np.empty(len(scatter_map_k))
+        f_vals = np.empty(len(elements2dofs_flat))
+
+        reference_geometries = self._get_groups_reference_geometries(plan.groups, reference_geometry)
+        for group_id, partition, (M_local, K_local, f_local) in self._evaluate_element_groups(
+                _m_k_and_f_int_batch, plan, nodes, dofvalues, t, reference_geometries):
+            _, _, k_indices, f_indices = plan.groups[group_id]
+            M_vals[k_indices[partition]] = M_local.reshape(len(partition), -1)
+            K_vals[k_indices[partition]] = K_local.reshape(len(partition), -1)
+            f_vals[f_indices[partition]] = f_local
+
+        M_csr.data[:] = np.bincount(scatter_map_m, weights=M_vals, minlength=M_csr.nnz)
+        K_csr.data[:] = np.bincount(scatter_map_k, weights=K_vals, minlength=K_csr.nnz)
+        f_glob += np.bincount(elements2dofs_flat, weights=f_vals, minlength=len(f_glob))
+        return M_csr, K_csr, f_glob
+
+    def _compute_f_values(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues, t, f_vals,
+                          weights=None, reference_geometry=None, element_indices=None, plan=None):
+        """
+        Evaluate the local internal force vectors of all elements group-wise with the batched element routines and
+        store them flattened in f_vals in the order of elements2dofs. The tangential stiffness matrices are not
+        computed.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates (rows = nodes, columns = x,y(,z) coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time
+        f_vals : ndarray
+            buffer for the local force vectors
+        weights : ndarray, optional
+            weights the local vectors are multiplied with, one per element
+        reference_geometry : dict, optional
+            precomputed reference geometry, see compute_reference_geometry
+        element_indices : ndarray, optional
+            indices of the passed elements in the element list the reference geometry has been computed for. Default:
+            the elements are the same.
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan
+        """
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        reference_geometries = self._get_groups_reference_geometries(plan.groups, reference_geometry, element_indices)
+        for group_id, partition, f_local in self._evaluate_element_groups(_f_int_batch, plan, nodes, dofvalues, t,
+                                                                          reference_geometries):
+            _, positions, _, f_indices = plan.groups[group_id]
+            if weights is not None:
+                f_local = f_local * weights[positions[partition], np.newaxis]
+            f_vals[f_indices[partition]] = f_local
+
+    def assemble_f_int(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., f_glob=None,
+                       reference_geometry=None, plan=None):
+        """
+        Assemble the nonlinear internal force vector without computing the tangential stiffness matrix.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates (rows = nodes, columns = x,y(,z) coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        f_glob : ndarray, optional
+            A preallocated ndarray can be passed for faster assembly
+        reference_geometry : dict, optional
+            Reference geometry of the elements computed by compute_reference_geometry for the same elements
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan. It replaces the grouping of the elements in every
+            assembly.
+
+        Returns
+        --------
+        f : ndarray
+            global internal force vector
+        """
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        elements2dofs_flat = plan.elements2dofs_flat
+
+        if dofvalues is None:
+            maxdof = np.max(elements2dofs_flat)
+            dofvalues = np.zeros(maxdof + 1)
+
+        if f_glob is None:
+            f_glob = np.zeros(len(dofvalues), dtype=float)
+
+        f_glob[:] = 0.0
+        if len(elements2dofs) == 0:
+            return f_glob
+
+        f_vals = np.empty(len(elements2dofs_flat))
+        self._compute_f_values(nodes, ele_objects, connectivities, elements2dofs, dofvalues, t, f_vals,
+                               reference_geometry=reference_geometry, plan=plan)
+        f_glob += np.bincount(elements2dofs_flat, weights=f_vals, minlength=len(f_glob))
+        return f_glob
+
+    def assemble_m(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0, M_csr=None,
+                   reference_geometry=None, plan=None):
         """
         Assembles the mass matrix of the given mesh and element.
 
@@ -192,6 +799,11 @@ class StructuralAssembly(Assembly):
             time. Default: 0.
         M_csr : csr_matrix
             if a preallocated csr_matrix for M exist, it can be passed here
+        reference_geometry : dict, optional
+            Reference geometry of the elements computed by compute_reference_geometry for the same elements
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan. It replaces the grouping of the elements in every
+            assembly.
 
         Returns
         --------
@@ -208,18 +820,85 @@ class StructuralAssembly(Assembly):
             dofvalues = np.zeros(maxdof + 1)
 
         if M_csr is None:
-            no_of_dofs = np.max(elements2dofs) + 1
+            no_of_dofs = np.concatenate(elements2dofs).max() + 1
             M_csr = self.preallocate(no_of_dofs, elements2dofs)
 
         M_csr.data[:] = 0.0
+        if len(elements2dofs) == 0:
+            return M_csr
 
-        for ele_obj, connectivity, globaldofindices in zip(ele_objects, connectivities, elements2dofs):
-            X_local = nodes[connectivity, :].reshape(-1)
-            u_local = dofvalues[globaldofindices]
-            M_local = ele_obj.m_int(X_local, u_local, t)
-            fill_csr_matrix(M_csr.indptr, M_csr.indices, M_csr.data, M_local, globaldofindices)
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        _, scatter_map = self._get_scatter_map(M_csr, elements2dofs, plan)
+        M_vals = np.empty(len(scatter_map))
+
+        reference_geometries = self._get_groups_reference_geometries(plan.groups, reference_geometry)
+        for group_id, partition, M_local in self._evaluate_element_groups(_m_int_batch, plan, nodes, dofvalues, t,
+                                                                          reference_geometries):
+            m_indices = plan.groups[group_id][2]
+            M_vals[m_indices[partition]] = M_local.reshape(len(partition), -1)
+
+        M_csr.data[:] = np.bincount(scatter_map, weights=M_vals, minlength=M_csr.nnz)
         return M_csr
 
+    def assemble_m_lumped(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0, m_glob=None,
+                          method='row_sum', reference_geometry=None, plan=None):
+        """
+        Assemble the lumped (diagonal) mass matrix as vector.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        m_glob : ndarray, optional
+            A preallocated ndarray can be passed for faster assembly
+        method : {'row_sum', 'hrz'}, optional
+            lumping technique of the element mass matrices, see Element.m_lumped_int. Default: 'row_sum'
+        reference_geometry : dict, optional
+            Reference geometry of the elements computed by compute_reference_geometry for the same elements
+        plan : AssemblyPlan, optional
+            assembly plan of the passed elements, see create_plan. It replaces the grouping of the elements in every
+            assembly.
+
+        Returns
+        --------
+        m : ndarray
+            diagonal of the lumped mass matrix
+        """
+        plan = self._get_plan(plan, ele_objects, connectivities, elements2dofs)
+        elements2dofs_flat = plan.elements2dofs_flat
+
+        if dofvalues is None:
+            maxdof = np.max(elements2dofs_flat)
+            dofvalues = np.zeros(maxdof + 1)
+
+        if m_glob is None:
+            m_glob = np.zeros(len(dofvalues), dtype=float)
+
+        m_glob[:] = 0.0
+        if len(elements2dofs) == 0:
+            return m_glob
+
+        m_vals = np.empty(len(elements2dofs_flat))
+        reference_geometries = self._get_groups_reference_geometries(plan.groups, reference_geometry)
+        for group_id, partition, m_local in self._evaluate_element_groups(partial(_m_lumped_int_batch, method=method),
+                                                                          plan, nodes, dofvalues, t,
+                                                                          reference_geometries):
+            m_indices = plan.groups[group_id][3]
+            m_vals[m_indices[partition]] = m_local
+
+        m_glob += np.bincount(elements2dofs_flat, weights=m_vals, minlength=len(m_glob))
+        return m_glob
+
     def assemble_k_f_S_E(self, nodes, ele_objects, connectivities, elements2dofs, elements_on_node, dofvalues=None, t=0, K_csr=None, f_glob=None ):
         """
         Assemble the stiffness matrix with stress recovery of the given mesh and element.
@@ -259,7 +938,7 @@ class StructuralAssembly(Assembly):
 
         # Allocate K and f
         if K_csr is None:
-            no_of_dofs = np.max(elements2dofs) + 1
+            no_of_dofs = np.concatenate(elements2dofs).max() + 1
             K_csr = self.preallocate(no_of_dofs, elements2dofs)
 
         if f_glob is None:
@@ -272,6 +951,15 @@ class StructuralAssembly(Assembly):
         S = np.zeros((no_of_nodes, 6))  # ['Sxx', 'Syy', 'Szz', 'Syz', 'Sxz', 'Sxy']
         E = np.zeros((no_of_nodes, 6))  # ['Exx', 'Eyy', 'Ezz', 'Eyz', 'Exz', 'Exy']
 
+        if len(elements2dofs) == 0:
+            return K_csr, f_glob, S, E
+
+        elements2dofs_flat, scatter_map = self._get_scatter_map(K_csr, elements2dofs)
+        K_vals = np.empty(len(scatter_map))
+        f_vals = np.empty(len(elements2dofs_flat))
+        k_start = 0
+        f_start = 0
+
         # Loop over all elements
         # (i - element index, indices - DOF indices of the element)
         for ele_obj, connectivity, globaldofindices in zip(ele_objects, connectivities, elements2dofs):
@@ -281,13 +969,18 @@ class StructuralAssembly(Assembly):
             u_local = dofvalues[globaldofindices]
             # computation of the element tangential stiffness matrix and nonlinear force
             K_local, f_local, S_local, E_local = ele_obj.k_f_S_E_int(X_local, u_local, t)
-            # adding the local force to the global one
-            f_glob[globaldofindices] += f_local
-            # this is equal to K_csr[globaldofindices, globaldofindices] += K_local
-            fill_csr_matrix(K_csr.indptr, K_csr.indices, K_csr.data, K_local, globaldofindices)
+            # store the local values, they are scattered into K_csr and f_glob after the loop
+            K_vals[k_start:k_start + K_local.size] = K_local.reshape(-1)
+            f_vals[f_start:f_start + f_local.size] = f_local
+            k_start += K_local.size
+            f_start += f_local.size
             E[connectivity, :] += E_local
             S[connectivity, :] += S_local
 
+        # this is equal to K_csr[globaldofindices, globaldofindices] += K_local for all elements
+        K_csr.data[:] = np.bincount(scatter_map, weights=K_vals, minlength=K_csr.nnz)
+        f_glob += np.bincount(elements2dofs_flat, weights=f_vals, minlength=len(f_glob))
+
         # Correct strains such, that average is taken at the elements
         E = np.divide(E.T, elements_on_node).T
         S = np.divide(S.T, elements_on_node).T
@@ -349,3 +1042,103 @@ class StructuralAssembly(Assembly):
             # adding the local force to the global one
             f_glob[globaldofindices] += f_local
         return f_glob
+
+
+def _k_and_f_int_batch(ele_obj, X, u, t, reference_geometry=None):
+    """
+    Call the batched element routine of ele_obj or loop over k_and_f_int for element objects without one.
+    """
+    if hasattr(ele_obj, 'k_and_f_int_batch'):
+        if reference_geometry is not None:
+            return ele_obj.k_and_f_int_batch(X, u, t, reference_geometry)
+        return ele_obj.k_and_f_int_batch(X, u, t)
+    no_of_elements, no_of_element_dofs = u.shape
+    K = np.zeros((no_of_elements, no_of_element_dofs, no_of_element_dofs))
+    f = np.zeros((no_of_elements, no_of_element_dofs))
+    for i, (X_local, u_local) in enumerate(zip(X, u)):
+        K[i], f[i] = ele_obj.k_and_f_int(X_local, u_local, t)
+    return K, f
+
+
+def _m_k_and_f_int_batch(ele_obj, X, u, t, reference_geometry=None):
+    """
+    Call the combined batched element routine of ele_obj or loop over m_int and k_and_f_int for element objects
+    without one.
+    """
+    if hasattr(ele_obj, 'm_k_and_f_int_batch'):
+        if reference_geometry is not None:
+            return ele_obj.m_k_and_f_int_batch(X, u, t, reference_geometry)
+        return ele_obj.m_k_and_f_int_batch(X, u, t)
+    K, f = _k_and_f_int_batch(ele_obj, X, u, t)
+    return _m_int_batch(ele_obj, X, u, t), K, f
+
+
+def _f_int_batch(ele_obj, X, u, t, reference_geometry=None):
+    """
+    Call the batched force routine of ele_obj or loop over f_int for element objects without one.
+    """
+    if hasattr(ele_obj, 'f_int_batch'):
+        if reference_geometry is not None:
+            return ele_obj.f_int_batch(X, u, t, reference_geometry)
+        return ele_obj.f_int_batch(X, u, t)
+    f = np.zeros(u.shape)
+    for i, (X_local, u_local) in enumerate(zip(X, u)):
+        f[i] = ele_obj.f_int(X_local, u_local, t)
+    return f
+
+
+def _m_int_batch(ele_obj, X, u, t, reference_geometry=None):
+    """
+    Call the batched mass routine of ele_obj or loop over m_int for element objects without one.
+    """
+    if hasattr(ele_obj, 'm_int_batch'):
+        if reference_geometry is not None:
+            return ele_obj.m_int_batch(X, u, t, reference_geometry)
+        return ele_obj.m_int_batch(X, u, t)
+    no_of_elements, no_of_element_dofs = u.shape
+    M = np.zeros((no_of_elements, no_of_element_dofs, no_of_element_dofs))
+    for i, (X_local, u_local) in enumerate(zip(X, u)):
+        M[i] = ele_obj.m_int(X_local, u_local, t)
+    return M
+
+
+def _m_lumped_int_batch(ele_obj, X, u, t, reference_geometry=None, method='row_sum'):
+    """
+    Call the batched lumped mass routine of ele_obj or loop over m_lumped_int for element objects without one.
+    """
+    if hasattr(ele_obj, 'm_lumped_int_batch'):
+        return ele_obj.m_lumped_int_batch(X, u, t, method, reference_geometry)
+    m = np.zeros(u.shape)
+    for i, (X_local, u_local) in enumerate(zip(X, u)):
+        m[i] = ele_obj.m_lumped_int(X_local, u_local, t, method)
+    return m
+
+
+def _private_copy(ele_obj):
+    """
+    Return a copy of the element object that shares the material but not the arrays for intermediate results.
+    """
+    ele_copy = copy(ele_obj)
+    for name, value in vars(ele_obj).items():
+        if isinstance(value, np.ndarray):
+            setattr(ele_copy, name, value.copy())
+    return ele_copy
+
+
+# element objects of a worker of the process pool, keys are the ids of the element objects in the main process
+_worker_ele_objects = dict()
+
+
+def _init_process_worker(ele_objects):
+    """
+    Store the element objects in a worker of the process pool, see StructuralAssembly._get_executor.
+    """
+    _worker_ele_objects.clear()
+    _worker_ele_objects.update(ele_objects)
+
+
+def _process_batch_function(batch_function, ele_id, *args):
+    """
+    Call batch_function with the element object with id ele_id stored in the worker of the process pool.
+    """
+    return batch_function(_worker_ele_objects[ele_id], *args)
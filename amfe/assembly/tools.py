@@ -11,9 +11,13 @@ Tools for assembly module.
 
 __all__ = [
     'get_index_of_csr_data',
-    'fill_csr_matrix'
+    'fill_csr_matrix',
+    'get_csr_pattern',
+    'get_csr_scatter_map'
 ]
 
+import numpy as np
+
 
 # try to import the fortran routines
 use_fortran = False
@@ -102,6 +106,140 @@ def fill_csr_matrix(indptr, indices, vals, K, k_indices):
     return
 
 
+def _group_elements_by_ndofs(elements2dofs):
+    """
+    Group the elements by their number of dofs and stack the dofs of each group into a 2D array.
+
+    Parameters
+    ----------
+    elements2dofs : list of ndarrays or ndarray
+        Mapping the elements to their global dofs. If a 2D int array is passed, all elements have the same number of
+        dofs and no grouping is necessary.
+
+    Returns
+    -------
+    groups : list of tuples
+        list with tuples (positions, dofs). positions is an int array containing the positions of the elements in
+        elements2dofs, dofs is an int array with shape (no_of_elements_in_group, no_of_dofs_per_element)
+    """
+    if isinstance(elements2dofs, np.ndarray) and elements2dofs.ndim == 2 and elements2dofs.dtype != object:
+        return [(np.arange(elements2dofs.shape[0]), elements2dofs.astype(int, copy=False))]
+
+    ndofs = np.array([len(dofs) for dofs in elements2dofs], dtype=int)
+    groups = list()
+    for ndof in np.unique(ndofs):
+        positions = np.nonzero(ndofs == ndof)[0]
+        dofs = np.array([elements2dofs[position] for position in positions], dtype=int).reshape(-1, ndof)
+        groups.append((positions, dofs))
+    return groups
+
+
+def _get_rows_and_cols(dofs):
+    """
+    Return the global row and column indices of all entries of the local element matrices of a group of elements.
+
+    Parameters
+    ----------
+    dofs : ndarray
+        int array with shape (no_of_elements, no_of_dofs_per_element)
+
+    Returns
+    -------
+    rows : ndarray
+        global row indices, shape (no_of_elements, no_of_dofs_per_element**2). The entries are ordered like the
+        row-major flattened local matrices, i.e. entry (i, j) of the local matrix is at position i*ndof + j
+    cols : ndarray
+        global column indices with the same shape and ordering as rows
+    """
+    ndof = dofs.shape[1]
+    rows = np.repeat(dofs, ndof, axis=1)
+    cols = np.tile(dofs, (1, ndof))
+    return rows, cols
+
+
+def get_csr_pattern(no_of_dofs, elements2dofs):
+    """
+    Compute the sparsity pattern of a matrix that is assembled from local element matrices.
+
+    The pattern is computed with whole-array operations, i.e. without any loop over the elements.
+
+    Parameters
+    ----------
+    no_of_dofs : int
+        number of rows and columns of the assembled matrix
+    elements2dofs : list of ndarrays or ndarray
+        Mapping the elements to their global dofs
+
+    Returns
+    -------
+    indptr : ndarray
+        index-ptr-Array of the CSR-Matrix
+    indices : ndarray
+        indices array of the CSR-Matrix with sorted column indices in each row
+    """
+    keys = [np.zeros(0, dtype=np.int64)]
+    for _, dofs in _group_elements_by_ndofs(elements2dofs):
+        rows, cols = _get_rows_and_cols(dofs.astype(np.int64))
+        keys.append(np.unique(rows*no_of_dofs + cols))
+    keys = np.unique(np.concatenate(keys))
+
+    index_dtype = np.int32 if len(keys) < np.iinfo(np.int32).max else np.int64
+    indices = (keys % no_of_dofs).astype(index_dtype)
+    indptr = np.zeros(no_of_dofs + 1, dtype=index_dtype)
+    np.cumsum(np.bincount(keys // no_of_dofs, minlength=no_of_dofs), out=indptr[1:])
+    return indptr, indices
+
+
+def get_csr_scatter_map(indptr, indices, elements2dofs):
+    """
+    Compute the scatter map that sends every entry of the local element matrices to its position in the data array
+    of a preallocated CSR-Matrix.
+
+    With the scatter map the assembly of all elements can be done by one single call:
+    data[:] = np.bincount(scatter_map, weights=local_values, minlength=len(data)), where local_values contains the
+    row-major flattened local element matrices in the order of elements2dofs.
+
+    Parameters
+    ----------
+    indptr : ndarray
+        index-ptr-Array of a preallocated CSR-Matrix
+    indices : ndarray
+        indices array of a preallocated CSR-Matrix. The column indices of each row must be sorted.
+    elements2dofs : list of ndarrays or ndarray
+        Mapping the elements to their global dofs
+
+    Returns
+    -------
+    scatter_map : ndarray
+        int array that contains the indices of the data array of the CSR-Matrix for all entries of the flattened
+        local element matrices. The entries of element e are stored directly after the entries of element e-1.
+
+    Raises
+    ------
+    ValueError
+        If an entry of an element matrix is not preallocated in the CSR-Matrix
+    """
+    ndofs = np.array([len(dofs) for dofs in elements2dofs], dtype=np.int64)
+    offsets = np.zeros(len(ndofs) + 1, dtype=np.int64)
+    np.cumsum(ndofs**2, out=offsets[1:])
+    scatter_map = np.zeros(offsets[-1], dtype=np.int64)
+
+    no_of_cols = np.int64(len(indptr) - 1)
+    if len(indices) > 0:
+        no_of_cols = max(no_of_cols, np.int64(indices.max()) + 1)
+    rowids = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+    keys = rowids*no_of_cols + indices
+
+    for positions, dofs in _group_elements_by_ndofs(elements2dofs):
+        rows, cols = _get_rows_and_cols(dofs.astype(np.int64))
+        requested_keys = rows*no_of_cols + cols
+        datapositions = np.searchsorted(keys, requested_keys)
+        if np.any(datapositions == len(keys)) or not np.array_equal(keys[datapositions], requested_keys):
+            raise ValueError('The indices of the element matrices are not preallocated in the csr matrix')
+        scatter_map[offsets[positions][:, None] + np.arange(dofs.shape[1]**2)] = datapositions
+    return scatter_map
+
+
 if use_fortran:
     ###########################################################################
     # Fortran routine that will override the functions above for massive speedup.
@@ -4,6 +4,8 @@
 #
 # Distributed under 3-Clause BSD license. See LICENSE file for more information.
 #
+from scipy.sparse import csr_matrix
+
 from amfe.constraint.constraint_manager import *
 
 
@@ -64,26 +66,31 @@ class ComponentConnector:
         if slave_nodeids.size != 0 and master_nodeids.size != 0:
             slave_dofids = np.reshape(slave_component.mapping.get_dofs_by_nodeids(slave_nodeids), -1)
             master_dofids = np.reshape(master_component.mapping.get_dofs_by_nodeids(master_nodeids), -1)
-            
-            slave_constraints = ConstraintManager(slave_component.mapping.no_of_dofs)
-            constraint = slave_constraints.create_dirichlet_constraint()
-            name = 'Compatibility' + str(loc_master_id) + str(loc_slave_id)
-            for dof in slave_dofids:
-                slave_constraints.add_constraint(name, constraint, np.array([dof], dtype=int))
-            X = slave_component.X
-            u = np.zeros(X.shape)
-
-            self.constraints[slave_key] = -slave_constraints.B(X, u, 0)
-            
-            master_constraints = ConstraintManager(master_component.mapping.no_of_dofs)
-            constraint = master_constraints.create_dirichlet_constraint()
-            name = 'Compatibility' + str(loc_slave_id) + str(loc_master_id)
-            for dof in master_dofids:
-                master_constraints.add_constraint(name, constraint, np.array([dof], dtype=int))
-            X = master_component.X
-            u = np.zeros(X.shape)
-
-            self.constraints[master_key] = master_constraints.B(X, u, 0)
+
+            self.constraints[slave_key] = -self._boolean_constraint_matrix(slave_dofids,
+                                                                           slave_component.mapping.no_of_dofs)
+            self.constraints[master_key] = self._boolean_constraint_matrix(master_dofids,
+                                                                           master_component.mapping.no_of_dofs)
+
+    @staticmethod
+    def _boolean_constraint_matrix(dofids, no_of_dofs):
+        """
+        Returns the constraint matrix that selects the given dofs, i.e. one row with a single 1-entry per dof
+
+        Parameters
+        ----------
+        dofids : ndarray
+            dofs that are selected by the rows of the constraint matrix
+        no_of_dofs : int
+            number of dofs of the component
+
+        Returns
+        -------
+        B : csr_matrix
+            constraint matrix with shape (len(dofids), no_of_dofs)
+        """
+        dofids = np.asarray(dofids, dtype=int)
+        return csr_matrix((np.ones(len(dofids)), (np.arange(len(dofids)), dofids)), shape=(len(dofids), no_of_dofs))
 
     def delete_connection(self, key):
         """
@@ -101,51 +108,47 @@ class ComponentConnector:
         del self.constraints[key]
 
     def _assemble_constraint_matrices(self, component_ids, component_n_dofs):
-        constraints_assembled = np.array([]).reshape(0, np.sum(component_n_dofs))
+        """
+        Assembles the constraint matrices of all interfaces to one sparse constraint matrix of the composite
+
+        Parameters
+        ----------
+        component_ids : ndarray
+            ids of the components in the order of their dofs in the composite
+        component_n_dofs : ndarray
+            number of dofs of each component
+
+        Returns
+        -------
+        B : csr_matrix
+            assembled constraint matrix with one block row per interface
+        """
+        dof_offsets = np.concatenate(([0], np.cumsum(component_n_dofs))).astype(int)
+        rows = []
+        columns = []
+        data = []
+        n_rows_assembled = 0
         used_keys = []
 
-        def _assemble_matrices_rowwise_and_fill_with_zeros(left_idx, left_key, right_idx, right_key):
-            start_zeros = np.array([]).reshape(n_rows, 0)
-            middle_zeros = np.array([]).reshape(n_rows, 0)
-            end_zeros = np.array([]).reshape(n_rows, 0)
-
-            if int(left_key[0]) != component_ids[0]:
-                n_fill_dofs = np.sum(component_n_dofs[0: left_idx])
-                start_zeros = np.zeros((n_rows, n_fill_dofs))
-            if int(right_key[0]) != component_ids[left_idx + 1]:
-                n_fill_dofs = np.sum(component_n_dofs[left_idx + 1: right_idx])
-                middle_zeros = np.zeros((n_rows, n_fill_dofs))
-            if int(right_key[0]) != component_ids[-1]:
-                n_fill_dofs = np.sum(component_n_dofs[right_idx + 1: len(component_n_dofs)])
-                end_zeros = np.zeros((n_rows, n_fill_dofs))
-
-            return np.hstack((start_zeros, self.constraints[left_key].todense(),
-                              middle_zeros, self.constraints[right_key].todense(), end_zeros))
-
-        for idx, compid in enumerate(component_ids):
+        for compid in component_ids:
             for key in self.constraints:
                 if key[-1] == compid and key not in used_keys:
                     key_neighbor = (key[-1], key[0])
-
-                    neighbor_idx = int(np.where(component_ids == int(key_neighbor[-1]))[0])
-
-                    n_rows = int(self.constraints[key].shape[0])
-
-                    if neighbor_idx > idx:
-                        constraint_row_assembled = _assemble_matrices_rowwise_and_fill_with_zeros(idx, key,
-                                                                                                  neighbor_idx,
-                                                                                                  key_neighbor)
-                    else:
-                        constraint_row_assembled = _assemble_matrices_rowwise_and_fill_with_zeros(neighbor_idx,
-                                                                                                  key_neighbor, idx,
-                                                                                                  key)
-
-                    constraints_assembled = np.vstack((constraints_assembled, constraint_row_assembled))
+                    for block_key in (key, key_neighbor):
+                        block = self.constraints[block_key].tocoo()
+                        component_idx = int(np.where(component_ids == int(block_key[-1]))[0])
+                        rows.append(block.row + n_rows_assembled)
+                        columns.append(block.col + dof_offsets[component_idx])
+                        data.append(block.data)
+                    n_rows_assembled += int(self.constraints[key].shape[0])
 
                     used_keys.append(key)
                     used_keys.append(key_neighbor)
 
-        return constraints_assembled
+        if len(data) == 0:
+            return csr_matrix((0, dof_offsets[-1]))
+        return csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(columns))),
+                          shape=(n_rows_assembled, dof_offsets[-1]))
 
 
 class MeshTying:
@@ -161,6 +164,8 @@ class MeshTying:
         Method, that checks, if nodes of two components with meshes are approximately at the same position. This is only
         based on the reference-coordinates. So no check during a simulation is yet supported.
 
+        All nodes of mesh_a are matched at once by a k-d tree search in mesh_b (see Mesh.get_nodeids_by_coordinates).
+
         Parameters
         ----------
         mesh_a : Mesh
@@ -178,23 +183,11 @@ class MeshTying:
         nodeids_b : ndarray
             node-ids of component_b, that match nodeids_a of component_a
         """
-        nodeids_a_full = mesh_a.nodes_df.index.values
-        nodeids_a = np.array([], dtype=int)
-        nodeids_b = np.array([], dtype=int)
-
-        for node_a in nodeids_a_full:
-            node_a_coord = mesh_a.nodes_df.loc[node_a]
-            if mesh_a.dimension == 2:
-                matching_nodeid_b = mesh_b.get_nodeid_by_coordinates(node_a_coord['x'], node_a_coord['y'],
-                                                                     epsilon=tol)
-            elif mesh_a.dimension == 3:
-                matching_nodeid_b = mesh_b.get_nodeid_by_coordinates(node_a_coord['x'], node_a_coord['y'],
-                                                                     node_a_coord['z'], epsilon=tol)
-            else:
-                raise ValueError('Mesh must be dimension 2 or 3')
-            
-            if matching_nodeid_b is not None:
-                nodeids_b = np.append(nodeids_b, matching_nodeid_b)
-                nodeids_a = np.append(nodeids_a, node_a)
-                
+        if mesh_a.dimension not in (2, 3):
+            raise ValueError('Mesh must be dimension 2 or 3')
+        matching_nodeids_b = mesh_b.get_nodeids_by_coordinates(mesh_a.nodes, epsilon=tol)
+        matches = matching_nodeids_b != -1
+        nodeids_a = mesh_a.nodes_df.index.values[matches].astype(int)
+        nodeids_b = matching_nodeids_b[matches]
+
         return nodeids_a, nodeids_b
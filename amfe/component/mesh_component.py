@@ -36,6 +36,8 @@ class MeshComponent(ComponentBase):
         self._neumann = NeumannManager()
         self._assembly = Assembly()
         self._constraints = ConstraintManager()
+        self._preallocated_nodal2global = None
+        self._constraints_nodal2global = None
 
     # -- PROPERTIES --------------------------------------------------------------------------------------
     @property
@@ -78,6 +80,30 @@ class MeshComponent(ComponentBase):
     def mapping(self):
         return self._mapping
 
+    @property
+    def ordering(self):
+        """
+        Fill-reducing ordering {'rcm', 'minimum_degree', 'nested_dissection'} of the global dofs or None.
+
+        Setting the ordering renumbers the dofs of the component immediately, see reorder. None restores the
+        numbering of the mapping algorithm.
+        """
+        return self._mapping.ordering
+
+    @ordering.setter
+    def ordering(self, ordering):
+        ordering_old = self._mapping.ordering
+        self._mapping.ordering = ordering
+        if len(self._ele_obj_df) == 0:
+            return
+        try:
+            self._update_mapping()
+        except ValueError:
+            self._mapping.ordering = ordering_old
+            self._update_mapping()
+            raise
+        self._preallocate()
+
     @property
     def neumann(self):
         return self._neumann
@@ -115,9 +141,13 @@ class MeshComponent(ComponentBase):
         self._ele_obj_df['fk_mapping'] = self._ele_obj_df['fk_mapping'].astype(int)
         self._ele_obj_df['fk_mesh'] = self._ele_obj_df['fk_mesh'].astype(int)
         self._update_mapping()
+        self._preallocate()
+
+    def _preallocate(self):
         self._C_csr = self._assembly.preallocate(self._mapping.no_of_dofs, self._mapping.elements2global)
         self._M_csr = self._C_csr.copy()
         self._f_glob_int = np.zeros(self._C_csr.shape[1])
+        self._preallocated_nodal2global = self._mapping.nodal2global
 
     # -- ASSIGN NEUMANN CONDITION METHODS -----------------------------------------------------------------
     def assign_neumann(self, name, condition, tag_values, tag='_groups', ignore_nonexistent=False):
@@ -197,6 +227,8 @@ class MeshComponent(ComponentBase):
         if dofidxs.size == 0 and Xidxs.size == 0:
             print('No constraint applied!')
         else:
+            # the dofs of the existing constraints have to refer to the current numbering as well
+            self._renumber_constraint_dofs()
             self._constraints.add_constraint(name, constraint, dofidxs, Xidxs)
 
     # -- MAPPING METHODS -----------------------------------------------------------------------------------
@@ -224,9 +256,71 @@ class MeshComponent(ComponentBase):
         # call update_mapping
         self._mapping.update_mapping(fields, nodeids, connectivities, dofs_by_elements, callbacks, callbackargs)
         self._constraints.no_of_dofs_unconstrained = self._mapping.no_of_dofs
+        self._renumber_constraint_dofs()
+        self._mapping_changed()
+
+    def reorder(self, method='rcm'):
+        """
+        Renumber the global dofs of the component by a fill-reducing ordering, see MappingBase.reorder.
+
+        The dofs of the assigned constraints are renumbered, and the preallocated matrices and all data that depend on
+        the numbering of the dofs are renewed.
+
+        Parameters
+        ----------
+        method : str {'rcm', 'minimum_degree', 'nested_dissection'}
+            ordering algorithm: reverse Cuthill-McKee, minimum degree or nested dissection
+
+        Returns
+        -------
+        new_dofs : ndarray
+            new global dof of each old global dof, i.e. u_new[new_dofs] = u_old
+        """
+        new_dofs = self._mapping.reorder(method)
+        self._renumber_constraint_dofs()
+        self._mapping_changed()
+        self._preallocate()
+        return new_dofs
+
+    def _mapping_changed(self):
+        """
+        Hook that is called after the global dofs have been changed. Subclasses reset their cached data here.
+        """
+        pass
+
+    def _check_mapping(self):
+        """
+        Renumber the constraints and renew the preallocated matrices if the global dofs have been changed on the
+        mapping directly, e.g. by mapping.reorder
+        """
+        if self._preallocated_nodal2global is None:
+            return
+        self._renumber_constraint_dofs()
+        if self._mapping.nodal2global is not self._preallocated_nodal2global:
+            self._mapping_changed()
+            self._preallocate()
+
+    def _renumber_constraint_dofs(self):
+        """
+        Renumber the dofs of the assigned constraints from the numbering they have been assigned with, i.e. the last
+        nodal2global they have been renumbered to, to the current numbering of the mapping
+        """
+        nodal2global_old = self._constraints_nodal2global
+        self._constraints_nodal2global = self._mapping.nodal2global
+        if nodal2global_old is None or nodal2global_old is self._constraints_nodal2global or \
+                self._constraints.no_of_constraint_definitions == 0:
+            return
+        old_dofs = nodal2global_old.values
+        new_dofs_by_node = self._mapping.nodal2global.reindex(index=nodal2global_old.index,
+                                                             columns=nodal2global_old.columns,
+                                                             fill_value=-1).values
+        mapped = old_dofs >= 0
+        new_dofs = np.full(np.max(old_dofs[mapped], initial=-1) + 1, -1, dtype=int)
+        new_dofs[old_dofs[mapped]] = new_dofs_by_node[mapped]
+        self._constraints.renumber_dofs(new_dofs)
 
     def write_mapping_key(self, fk, local_id):
-        self._ele_obj_df.at[local_id, 'fk_mapping'] = fk
+        self._ele_obj_df.loc[local_id, 'fk_mapping'] = fk
         
     def get_physics(self):
         return self._ele_obj_df['physics'].unique()
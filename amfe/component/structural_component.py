@@ -3,6 +3,7 @@
 # Distributed under BSD-3-Clause License. See LICENSE-File for more information
 #
 
+import numpy as np
 from scipy.sparse import csc_matrix
 
 from .mesh_component import MeshComponent
@@ -23,7 +24,10 @@ class StructuralComponent(MeshComponent):
 
     def __init__(self, mesh=Mesh()):
         super().__init__(mesh)
-        self.rayleigh_damping = None
+        self._rayleigh_damping = None
+        self._rayleigh_damping_linearized = False
+        self._rayleigh_damping_reference = (None, 0.)
+        self._D_rayleigh = None
         self._assembly = StructuralAssembly()
         self._M_constr = None
         self._D_constr = None
@@ -31,6 +35,206 @@ class StructuralComponent(MeshComponent):
         self._M_csr = None
         self._f_glob_int = None
         self._f_glob_ext = None
+        self._cache_reference_geometry = False
+        self._reference_geometry = None
+        self._assembly_plan = None
+        self._neumann_plan = None
+        self._neumann_separable_plan = None
+        self._neumann_separable_loads = None
+        self._assembly_plan_key = None
+
+    @property
+    def rayleigh_damping(self):
+        """
+        Rayleigh damping coefficients (alpha, beta) with D = alpha*M + beta*K or None for an undamped component.
+
+        Setting the coefficients directly evaluates the damping matrix with the tangential stiffness matrix at the
+        current state in every call. Use apply_rayleigh_damping to assemble it once around a reference state.
+        """
+        return self._rayleigh_damping
+
+    @rayleigh_damping.setter
+    def rayleigh_damping(self, rayleigh_damping):
+        self._rayleigh_damping = rayleigh_damping
+        self._rayleigh_damping_linearized = False
+        self._D_rayleigh = None
+
+    def apply_rayleigh_damping(self, alpha, beta, linearized=True, q_ref=None, t_ref=0.):
+        """
+        Apply Rayleigh damping D = alpha*M + beta*K to the component.
+
+        Parameters
+        ----------
+        alpha : float
+            Coefficient of the mass matrix
+        beta : float
+            Coefficient of the stiffness matrix
+        linearized : bool, optional
+            If True (default), M and K are evaluated at the reference state (q_ref, t_ref) and the damping matrix is
+            assembled once and reused in every call of D, f_int and K_and_f_int until update_damping is called.
+            If False, D is evaluated with the tangential stiffness matrix of the current state in every call.
+        q_ref : ndarray, optional
+            Reference displacement of the linearization. Default: zero displacement
+        t_ref : float, optional
+            Reference time of the linearization. Default: 0.
+
+        Returns
+        -------
+        None
+        """
+        self.rayleigh_damping = (alpha, beta)
+        self._rayleigh_damping_linearized = linearized
+        self._rayleigh_damping_reference = (q_ref, t_ref)
+
+    def apply_no_damping(self):
+        """
+        Remove the damping of the component.
+
+        Returns
+        -------
+        None
+        """
+        self.rayleigh_damping = None
+
+    def update_damping(self, q_ref=None, t_ref=None):
+        """
+        Reassemble the cached linearized Rayleigh damping matrix, e.g. after a change of the reference state.
+
+        Parameters
+        ----------
+        q_ref : ndarray, optional
+            New reference displacement. Default: keep the current reference displacement
+        t_ref : float, optional
+            New reference time. Default: keep the current reference time
+
+        Returns
+        -------
+        None
+        """
+        q_ref_old, t_ref_old = self._rayleigh_damping_reference
+        self._rayleigh_damping_reference = (q_ref_old if q_ref is None else q_ref,
+                                            t_ref_old if t_ref is None else t_ref)
+        self._D_rayleigh = None
+        if self._rayleigh_damping is not None and self._rayleigh_damping_linearized:
+            q_ref, t_ref = self._rayleigh_damping_reference
+            if q_ref is None:
+                q_ref = np.zeros(self._mapping.no_of_dofs)
+            # assemble into new matrices to keep the preallocated K and M of the current state untouched
+            alpha, beta = self._rayleigh_damping
+            plan = self._get_assembly_plan()
+            M = self._assembly.assemble_m(self._mesh.nodes, plan.ele_objects, plan.connectivities, plan.elements2dofs,
+                                          q_ref, t_ref, plan=plan)
+            K = self._assemble_k_and_f(q_ref, t_ref, preallocated=False)[0]
+            self._D_rayleigh = alpha * M + beta * K
+
+    def reorder(self, method='rcm'):
+        """
+        Renumber the global dofs of the component, see MeshComponent.reorder. The reference state of a linearized
+        rayleigh damping is renumbered as well.
+        """
+        new_dofs = super().reorder(method)
+        q_ref, t_ref = self._rayleigh_damping_reference
+        if q_ref is not None:
+            q_ref_new = np.empty_like(q_ref)
+            q_ref_new[new_dofs] = q_ref
+            self._rayleigh_damping_reference = (q_ref_new, t_ref)
+        return new_dofs
+
+    def _mapping_changed(self):
+        self._D_rayleigh = None
+        self._assembly_plan_key = None
+        self._assembly_plan = None
+
+    def _get_assembly_plan(self):
+        """
+        Return the assembly plan of the elements of the component, see StructuralAssembly.create_plan.
+
+        The plan and the connectivities and dofs of the neumann elements are looked up once and reused until the
+        iconnectivity of the mesh, the mapping, the element objects or the assembly change. The neumann elements are
+        split into time separable ones, whose loads are assembled once, and all others.
+        """
+        self._check_mapping()
+        # the iconnectivity of the mesh and the blocks of the mapping are replaced by new objects on every change
+        key = (self._mesh.iconnectivity, self._mapping.elements2global_blocks, self._ele_obj_df, self._assembly)
+        if self._assembly_plan_key is None or any(new is not old for new, old in zip(key, self._assembly_plan_key)):
+            connectivities = self._mesh.get_iconnectivity_by_elementids(self._ele_obj_df['fk_mesh'].values)
+            elements2dofs = self._mapping.get_dofs_by_ids(self._ele_obj_df['fk_mapping'].values)
+            self._assembly_plan = self._assembly.create_plan(self.ele_obj, connectivities, elements2dofs)
+            neumann_elements, neumann_mesh_fk, neumann_mapping_fk = self._neumann.get_ele_obj_fk_mesh_and_fk_mapping()
+            neumann_connectivities = self._mesh.get_iconnectivity_by_elementids(neumann_mesh_fk)
+            neumann_dofs = self._mapping.get_dofs_by_ids(neumann_mapping_fk)
+            separable = np.array([neumann_obj.time_separable for neumann_obj in neumann_elements], dtype=bool)
+            if np.any(separable):
+                self._neumann_plan = (neumann_elements[~separable], neumann_connectivities[~separable],
+                                      neumann_dofs[~separable])
+                self._neumann_separable_plan = (neumann_elements[separable], neumann_connectivities[separable],
+                                                neumann_dofs[separable])
+            else:
+                self._neumann_plan = (neumann_elements, neumann_connectivities, neumann_dofs)
+                self._neumann_separable_plan = None
+            self._neumann_separable_loads = None
+            self._assembly_plan_key = key
+        return self._assembly_plan
+
+    @property
+    def cache_reference_geometry(self):
+        """
+        Flag if the reference geometry of the elements is cached.
+
+        If it is set, the spatial derivatives of the shape functions and det(J)*w at the gauss points of all elements
+        are computed once when materials are assigned and reused in every assembly of K and f_int. This needs memory
+        for no_of_elements*no_of_gauss_points*(no_of_nodes*no_of_dims + 1) floats. After moving nodes of the mesh,
+        update_reference_geometry has to be called.
+        """
+        return self._cache_reference_geometry
+
+    @cache_reference_geometry.setter
+    def cache_reference_geometry(self, cache):
+        self._cache_reference_geometry = cache
+        if cache:
+            self.update_reference_geometry()
+        else:
+            self._reference_geometry = None
+
+    def update_reference_geometry(self):
+        """
+        Recompute the cached reference geometry of the elements, see cache_reference_geometry.
+        """
+        if not self._cache_reference_geometry:
+            return
+        plan = self._get_assembly_plan()
+        self._reference_geometry = self._assembly.compute_reference_geometry(self._mesh.nodes, plan.ele_objects,
+                                                                             plan.connectivities, plan.elements2dofs,
+                                                                             plan=plan)
+
+    def _assign_material_by_eleids(self, materialobj, eleids, physics):
+        super()._assign_material_by_eleids(materialobj, eleids, physics)
+        self.update_reference_geometry()
+
+    def _assemble_k_and_f(self, q, t, preallocated=True):
+        """
+        Assemble the unconstrained tangential stiffness matrix and internal force vector into the preallocated
+        self._C_csr and self._f_glob_int or into new arrays if preallocated is False.
+        """
+        kwargs = dict()
+        if self._reference_geometry is not None:
+            kwargs['reference_geometry'] = self._reference_geometry
+        plan = self._get_assembly_plan()
+        K_csr, f_glob = (self._C_csr, self._f_glob_int) if preallocated else (None, None)
+        return self._assembly.assemble_k_and_f(self._mesh.nodes, plan.ele_objects, plan.connectivities,
+                                               plan.elements2dofs, q, t, K_csr, f_glob, plan=plan, **kwargs)
+
+    def _assemble_f_int(self, q, t):
+        """
+        Assemble the unconstrained internal force vector into the preallocated self._f_glob_int without computing the
+        tangential stiffness matrix.
+        """
+        kwargs = dict()
+        if self._reference_geometry is not None:
+            kwargs['reference_geometry'] = self._reference_geometry
+        plan = self._get_assembly_plan()
+        return self._assembly.assemble_f_int(self._mesh.nodes, plan.ele_objects, plan.connectivities,
+                                             plan.elements2dofs, q, t, self._f_glob_int, plan=plan, **kwargs)
 
     def g_holo(self, q, t):
         """
@@ -49,6 +253,7 @@ class StructuralComponent(MeshComponent):
             Residual of the holonomic constraint function
 
         """
+        self._check_mapping()
         return self._constraints.g(self._mesh.nodes.reshape(-1), q, t)
 
     def B(self, q, t):
@@ -68,6 +273,7 @@ class StructuralComponent(MeshComponent):
         B : csr_matrix
             Constraint matrix B
         """
+        self._check_mapping()
         return self._constraints.B(self._mesh.nodes.reshape(-1), q, t)
 
     def b(self, q, t):
@@ -87,6 +293,7 @@ class StructuralComponent(MeshComponent):
         b : ndarray
             Rheonomic part b on velocity level
         """
+        self._check_mapping()
         return self._constraints.b(self._mesh.nodes.reshape(-1), q, t)
 
     def a(self, q, dq, t):
@@ -109,6 +316,7 @@ class StructuralComponent(MeshComponent):
         a : ndarray
             Part a of the constraint equation above
         """
+        self._check_mapping()
         return self._constraints.a(self._mesh.nodes.reshape(-1), q, dq, t)
 
     def M(self, q, dq, t):
@@ -133,19 +341,73 @@ class StructuralComponent(MeshComponent):
         -----
             M is by definition independent of ddq
         """
-        self._M_csr = self._assembly.assemble_m(self._mesh.nodes, self.ele_obj,
-                                                self._mesh.get_iconnectivity_by_elementids(
-                                                    self._ele_obj_df['fk_mesh'].values),
-                                                self._mapping.get_dofs_by_ids(self._ele_obj_df['fk_mapping'].values),
-                                                q, t, self._M_csr)
+        plan = self._get_assembly_plan()
+        self._M_csr = self._assembly.assemble_m(self._mesh.nodes, plan.ele_objects, plan.connectivities,
+                                                plan.elements2dofs, q, t, self._M_csr,
+                                                reference_geometry=self._reference_geometry, plan=plan)
         return self._M_csr
 
+    def M_lumped(self, q, dq, t, method='row_sum'):
+        """
+        Compute and return the unconstrained lumped (diagonal) mass matrix of the structural component as vector.
+
+        Parameters
+        ----------
+        q : ndarray
+            Displacement field in voigt notation.
+        dq : ndarray
+            Velocity field in voigt notation.
+        t : float
+            Time.
+        method : {'row_sum', 'hrz'}, optional
+            Lumping technique of the element mass matrices, see Element.m_lumped_int. Default: 'row_sum'
+
+        Returns
+        -------
+        m : ndarray
+            Diagonal of the lumped mass matrix without applied constraints.
+        """
+        plan = self._get_assembly_plan()
+        return self._assembly.assemble_m_lumped(self._mesh.nodes, plan.ele_objects, plan.connectivities,
+                                                plan.elements2dofs, q, t, method=method,
+                                                reference_geometry=self._reference_geometry, plan=plan)
+
+    def critical_timestep(self):
+        """
+        Estimate the critical timestep of explicit time integration schemes with lumped mass matrices.
+
+        The estimate is the minimum over all elements of the smallest distance between two nodes of an element divided
+        by the wave speed of its material (Courant condition). Elements whose material does not provide a wave_speed
+        are skipped.
+
+        Returns
+        -------
+        dt_crit : float
+            Estimated critical timestep
+        """
+        nodes = self._mesh.nodes
+        plan = self._get_assembly_plan()
+        dt_crit = np.inf
+        for (ele_obj, _, _, _), connectivities in zip(plan.groups, plan.group_connectivities):
+            wave_speed = getattr(ele_obj.material, 'wave_speed', None)
+            if wave_speed is None:
+                continue
+            X = nodes[connectivities]
+            no_of_nodes = X.shape[1]
+            # loop over the node pairs, vectorized over the elements
+            min_distance = np.inf
+            for i in range(no_of_nodes):
+                for j in range(i + 1, no_of_nodes):
+                    min_distance = min(min_distance, np.min(np.linalg.norm(X[:, i] - X[:, j], axis=1)))
+            dt_crit = min(dt_crit, min_distance / wave_speed)
+        return dt_crit
+
     def D(self, q, dq, t):
         """
         Compute and return the unconstrained damping matrix of the mechanical system. At the moment either no damping
-        (rayleigh_damping = False) or simple Rayleigh damping applied to the system linearized around zero
-        displacement (rayleigh_damping = True) are possible. They are set via the functions apply_no_damping() and
-        apply_rayleigh_damping(alpha, beta).
+        or Rayleigh damping are possible. They are set via the functions apply_no_damping() and
+        apply_rayleigh_damping(alpha, beta). Linearized Rayleigh damping is assembled once around the reference state
+        and reused until update_damping() is called.
 
         Parameters
         ----------
@@ -161,11 +423,26 @@ class StructuralComponent(MeshComponent):
         D : scipy.sparse.sparse_matrix
             Damping matrix with applied constraints in sparse CSR format.
         """
-        if self.rayleigh_damping:
-            self._D_constr = self.rayleigh_damping[0] * self.M(q, dq, t) + self.rayleigh_damping[1] * self.K(q, dq, t)
-        else:
+        return self._D(q, dq, t)
+
+    def _D(self, q, dq, t, K=None, M=None):
+        if self._rayleigh_damping:
+            if not self._rayleigh_damping_linearized:
+                alpha, beta = self._rayleigh_damping
+                if K is None:
+                    K = self.K(q, dq, t)
+                if M is None:
+                    M = self.M(q, dq, t)
+                self._D_constr = alpha * M + beta * K
+            else:
+                if self._D_rayleigh is None:
+                    self.update_damping()
+                self._D_constr = self._D_rayleigh
+        elif self._D_constr is None or self._D_constr.shape[0] != self._constraints.no_of_dofs_unconstrained:
             self._D_constr = csc_matrix(
                 (self._constraints.no_of_dofs_unconstrained, self._constraints.no_of_dofs_unconstrained))
+        elif self._D_constr.nnz > 0:
+            self._D_constr = csc_matrix(self._D_constr.shape)
 
         return self._D_constr
 
@@ -187,13 +464,7 @@ class StructuralComponent(MeshComponent):
         f_int : ndarray
             Nonlinear internal force vector after constraints have been applied
         """
-        self._f_glob_int = self._assembly.assemble_k_and_f(self._mesh.nodes, self.ele_obj,
-                                                           self._mesh.get_iconnectivity_by_elementids(
-                                                           self._ele_obj_df['fk_mesh'].values),
-                                                           self._mapping.get_dofs_by_ids(
-                                                           self._ele_obj_df['fk_mapping'].values),
-                                                           q, t,
-                                                           self._C_csr, self._f_glob_int)[1]
+        self._f_glob_int = self._assemble_f_int(q, t)
         return self._f_glob_int + self.D(q, dq, t).dot(dq)
 
     def K(self, q, dq, t):
@@ -214,12 +485,7 @@ class StructuralComponent(MeshComponent):
         K : sp.sparse.sparse_matrix
             Stiffness matrix with applied constraints in sparse CSR format.
         """
-        self._C_csr = self._assembly.assemble_k_and_f(self._mesh.nodes, self.ele_obj,
-                                                      self._mesh.get_iconnectivity_by_elementids(
-                                                          self._ele_obj_df['fk_mesh'].values),
-                                                      self._mapping.get_dofs_by_ids(
-                                                          self._ele_obj_df['fk_mapping'].values), q, t,
-                                                      self._C_csr, self._f_glob_int)[0]
+        self._C_csr = self._assemble_k_and_f(q, t)[0]
         return self._C_csr
 
     def K_and_f_int(self, q, dq, t):
@@ -243,19 +509,72 @@ class StructuralComponent(MeshComponent):
         f : ndarray
             Internal nonlinear force vector after constraints have been applied
         """
-        self._C_csr, self._f_glob_int = self._assembly.assemble_k_and_f(self._mesh.nodes, self.ele_obj,
-                                                                        self._mesh.get_iconnectivity_by_elementids(
-                                                                        self._ele_obj_df['fk_mesh'].values),
-                                                                        self._mapping.get_dofs_by_ids(
-                                                                        self._ele_obj_df['fk_mapping'].values),
-                                                                        q, t,
-                                                                        self._C_csr, self._f_glob_int)
-        return self._C_csr, self._f_glob_int + self.D(q, dq, t).dot(dq)
+        self._C_csr, self._f_glob_int = self._assemble_k_and_f(q, t)
+        return self._C_csr, self._f_glob_int + self._D(q, dq, t, self._C_csr).dot(dq)
+
+    def M_K_and_f_int(self, q, dq, t):
+        """
+        Compute and return the unconstrained mass matrix, tangential stiffness matrix and internal force vector of
+        the structural component in one traversal of the elements.
+
+        Parameters
+        ----------
+        q : ndarray
+            Displacement field in voigt notation.
+        dq : ndarray
+            Velocity field in voigt notation.
+        t : float
+            Time.
+
+        Returns
+        -------
+        M : sp.sparse.sparse_matrix
+            Mass matrix without applied constraints in sparse CSR format.
+        K : sp.sparse.sparse_matrix
+            Stiffness matrix without applied constraints in sparse CSR format.
+        f : ndarray
+            Internal nonlinear force vector without applied constraints
+        """
+        kwargs = dict()
+        if self._reference_geometry is not None:
+            kwargs['reference_geometry'] = self._reference_geometry
+        plan = self._get_assembly_plan()
+        self._M_csr, self._C_csr, self._f_glob_int = self._assembly.assemble_m_k_f(
+            self._mesh.nodes, plan.ele_objects, plan.connectivities, plan.elements2dofs, q, t, self._M_csr,
+            self._C_csr, self._f_glob_int, plan=plan, **kwargs)
+        return self._M_csr, self._C_csr, self._f_glob_int + self._D(q, dq, t, self._C_csr, self._M_csr).dot(dq)
+
+    def _get_time_separable_neumann_loads(self):
+        """
+        Return the spatial load vectors of the time separable neumann conditions, see NeumannBase.time_separable.
+
+        The vectors are assembled once per neumann element object, i.e. per condition and element shape.
+
+        Returns
+        -------
+        neumann_objects : list
+            neumann element objects providing the time amplitude of each load vector
+        loads : ndarray
+            spatial load vectors as columns, shape: (no_of_dofs, no_of_neumann_objects)
+        """
+        if self._neumann_separable_loads is None:
+            neumann_elements, neumann_connectivities, neumann_dofs = self._neumann_separable_plan
+            nodes = self._mesh.nodes
+            neumann_objects = list({id(neumann_obj): neumann_obj for neumann_obj in neumann_elements}.values())
+            columns = {id(neumann_obj): column for column, neumann_obj in enumerate(neumann_objects)}
+            loads = np.zeros((self._mapping.no_of_dofs, len(neumann_objects)))
+            for neumann_obj, connectivity, dofs in zip(neumann_elements, neumann_connectivities, neumann_dofs):
+                loads[dofs, columns[id(neumann_obj)]] += neumann_obj.f_ext_spatial(nodes[connectivity, :].reshape(-1))
+            self._neumann_separable_loads = (neumann_objects, loads)
+        return self._neumann_separable_loads
 
     def f_ext(self, q, dq, t):
         """
         Compute and return external unconstrained force vector
 
+        The loads of time separable neumann conditions are assembled once and only scaled by their time amplitude,
+        all other neumann conditions are assembled in every call.
+
         Parameters
         ----------
         q : ndarray
@@ -270,10 +589,12 @@ class StructuralComponent(MeshComponent):
         f_ext : ndarray
             external force vector after contraints have been applied
         """
-        neumann_elements, neumann_mesh_fk, neumann_mapping_fk = self._neumann.get_ele_obj_fk_mesh_and_fk_mapping()
-        neumann_connectivities = self._mesh.get_iconnectivity_by_elementids(neumann_mesh_fk)
-        neumann_dofs = self._mapping.get_dofs_by_ids(neumann_mapping_fk)
+        self._get_assembly_plan()
+        neumann_elements, neumann_connectivities, neumann_dofs = self._neumann_plan
         self._f_glob_ext = self._assembly.assemble_f_ext(self._mesh.nodes, neumann_elements,
                                                          neumann_connectivities, neumann_dofs, q, t,
                                                          f_glob=self._f_glob_ext)
+        if self._neumann_separable_plan is not None:
+            neumann_objects, loads = self._get_time_separable_neumann_loads()
+            self._f_glob_ext += loads @ np.array([neumann_obj.time_amplitude(t) for neumann_obj in neumann_objects])
         return self._f_glob_ext
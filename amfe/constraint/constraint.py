@@ -58,8 +58,20 @@ __all__ = ['NonholonomicConstraintBase',
 
 
 class NonholonomicConstraintBase:
+    """
+    Base class for nonholonomic constraints
+
+    Attributes
+    ----------
+    NO_OF_CONSTRAINTS: int
+        number of constraint equations that are described by one assignment of the constraint
+    CONSTANT_B: bool
+        flag that indicates that B does neither depend on the coordinates X, the displacements u nor the time t
+        (scleronomic linear constraint). The ConstraintManager assembles B only once for such constraints.
+    """
 
     NO_OF_CONSTRAINTS = 0
+    CONSTANT_B = False
 
     def __init__(self):
         return
@@ -153,6 +165,72 @@ class NonholonomicConstraintBase:
         raise NotImplementedError('The total time derivative of the partial time derivative is not implemented for this'
                                   'constraint')
 
+    def B_batch(self, X, u, t):
+        """
+        Evaluates B for several assignments of the constraint at once
+
+        The default implementation loops over the assignments. Derived classes can overwrite this method with a
+        vectorized version.
+
+        Parameters
+        ----------
+        X: ndarray
+            local node coordinates of the assignments stacked row-wise, shape (no_of_assignments, no_of_Xidxs)
+        u: ndarray
+            local displacements of the assignments stacked row-wise, shape (no_of_assignments, no_of_dofidxs)
+        t: float
+            current time
+
+        Returns
+        -------
+        B: ndarray
+            flattened local B of each assignment stacked row-wise
+        """
+        return np.array([self.B(X_i, u_i, t).reshape(-1) for X_i, u_i in zip(X, u)], dtype=float).reshape(len(u), -1)
+
+    def b_batch(self, X, u, t):
+        """
+        Evaluates b for several assignments of the constraint at once
+
+        Parameters
+        ----------
+        X: ndarray
+            local node coordinates of the assignments stacked row-wise, shape (no_of_assignments, no_of_Xidxs)
+        u: ndarray
+            local displacements of the assignments stacked row-wise, shape (no_of_assignments, no_of_dofidxs)
+        t: float
+            time
+
+        Returns
+        -------
+        b: ndarray
+            b of each assignment stacked row-wise, shape (no_of_assignments, NO_OF_CONSTRAINTS)
+        """
+        return np.array([self.b(X_i, u_i, t) for X_i, u_i in zip(X, u)], dtype=float).reshape(len(u), -1)
+
+    def a_batch(self, X, u, du, t):
+        """
+        Evaluates a for several assignments of the constraint at once
+
+        Parameters
+        ----------
+        X: ndarray
+            local node coordinates of the assignments stacked row-wise, shape (no_of_assignments, no_of_Xidxs)
+        u: ndarray
+            local displacements of the assignments stacked row-wise, shape (no_of_assignments, no_of_dofidxs)
+        du: ndarray
+            local velocities of the assignments stacked row-wise, shape (no_of_assignments, no_of_dofidxs)
+        t: float
+            time
+
+        Returns
+        -------
+        a: ndarray
+            a of each assignment stacked row-wise, shape (no_of_assignments, NO_OF_CONSTRAINTS)
+        """
+        return np.array([self.a(X_i, u_i, du_i, t) for X_i, u_i, du_i in zip(X, u, du)],
+                        dtype=float).reshape(len(u), -1)
+
 
 class HolonomicConstraintBase(NonholonomicConstraintBase):
 
@@ -252,6 +330,29 @@ class HolonomicConstraintBase(NonholonomicConstraintBase):
         """
         raise NotImplementedError('The constraint function has not been implemented for this constraint')
 
+    def g_batch(self, X, u, t):
+        """
+        Evaluates the residual g for several assignments of the constraint at once
+
+        The default implementation loops over the assignments. Derived classes can overwrite this method with a
+        vectorized version.
+
+        Parameters
+        ----------
+        X: ndarray
+            local node coordinates of the assignments stacked row-wise, shape (no_of_assignments, no_of_Xidxs)
+        u: ndarray
+            local displacements of the assignments stacked row-wise, shape (no_of_assignments, no_of_dofidxs)
+        t: float
+            time
+
+        Returns
+        -------
+        g: ndarray
+            residual of each assignment stacked row-wise, shape (no_of_assignments, NO_OF_CONSTRAINTS)
+        """
+        return np.array([self.g(X_i, u_i, t) for X_i, u_i in zip(X, u)], dtype=float).reshape(len(u), -1)
+
 
 class DirichletConstraint(HolonomicConstraintBase):
     """
@@ -268,6 +369,7 @@ class DirichletConstraint(HolonomicConstraintBase):
     """
 
     NO_OF_CONSTRAINTS = 1
+    CONSTANT_B = True
 
     def __init__(self, U=(lambda t: 0.), dU=(lambda t: 0.), ddU=(lambda t: 0.)):
         """
@@ -394,6 +496,30 @@ class DirichletConstraint(HolonomicConstraintBase):
         """
         return np.array([-self._ddU(t)], ndmin=1)
 
+    def g_batch(self, X, u, t):
+        """
+        Vectorized version of g, c.f. HolonomicConstraintBase.g_batch
+        """
+        return np.array(u - self._U(t), dtype=float)
+
+    def B_batch(self, X, u, t):
+        """
+        Vectorized version of B, c.f. NonholonomicConstraintBase.B_batch
+        """
+        return np.ones(u.shape, dtype=float)
+
+    def b_batch(self, X, u, t):
+        """
+        Vectorized version of b, c.f. NonholonomicConstraintBase.b_batch
+        """
+        return np.full((u.shape[0], 1), -self._dU(t), dtype=float)
+
+    def a_batch(self, X, u, du, t):
+        """
+        Vectorized version of a, c.f. NonholonomicConstraintBase.a_batch
+        """
+        return np.full((u.shape[0], 1), -self._ddU(t), dtype=float)
+
 
 class FixedDistanceConstraint(HolonomicConstraintBase):
     """
@@ -1041,6 +1167,7 @@ class EqualDisplacementConstraint(HolonomicConstraintBase):
     Class to define a fixed distance between two nodes.
     """
     NO_OF_CONSTRAINTS = 1
+    CONSTANT_B = True
 
     def __init__(self):
         super().__init__()
@@ -1134,6 +1261,30 @@ class EqualDisplacementConstraint(HolonomicConstraintBase):
         """
         return np.array([0.0], ndmin=1)
 
+    def g_batch(self, X, u, t):
+        """
+        Vectorized version of g, c.f. HolonomicConstraintBase.g_batch
+        """
+        return np.array(u[:, 1] - u[:, 0], dtype=float).reshape(-1, 1)
+
+    def B_batch(self, X, u, t):
+        """
+        Vectorized version of B, c.f. NonholonomicConstraintBase.B_batch
+        """
+        return np.tile(np.array([-1.0, 1.0], dtype=float), (u.shape[0], 1))
+
+    def b_batch(self, X, u, t):
+        """
+        Vectorized version of b, c.f. NonholonomicConstraintBase.b_batch
+        """
+        return np.zeros((u.shape[0], 1), dtype=float)
+
+    def a_batch(self, X, u, du, t):
+        """
+        Vectorized version of a, c.f. NonholonomicConstraintBase.a_batch
+        """
+        return np.zeros((u.shape[0], 1), dtype=float)
+
 
 class FixedDistanceToPlaneConstraint(HolonomicConstraintBase):
     """
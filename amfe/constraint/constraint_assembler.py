@@ -190,3 +190,65 @@ class ConstraintAssembler:
         if len(values) != 0:
             g[:] = np.concatenate(values)
         return g
+
+    def assemble_g_by_groups(self, residuals, dofs, positions, args, g):
+        """
+        Assemble the holonomic constraint function from groups of constraints that are evaluated at once
+
+        Parameters
+        ----------
+        residuals: list
+            list of function handles returning the stacked residuals of each group
+        dofs : list
+            list of two dimensional ndarrays (dtype int) containing the coordinate indices of each assignment row-wise
+            that must be picked from the global arrays in args
+        positions : list
+            list of two dimensional ndarrays (dtype int) containing the rows of g of each assignment row-wise
+        args : list
+            list of full global arrays whose local coordinates needs to be passed to the residuals
+        g : ndarray
+            preallocated ndarray where the result shall be written to
+
+        Returns
+        -------
+        g : ndarray
+            assembled holonomic constraint function
+        """
+        return self._build_g_by_groups(residuals, dofs, positions, args, g)
+
+    def assemble_B_by_groups(self, jacobians, dofs, positions, args, B):
+        """
+        Assembles the Jacobians of a holonomic constraint function from groups of constraints that are evaluated at once
+
+        Parameters
+        ----------
+        jacobians : list
+            list of function handles returning the stacked flattened local B of each group
+        dofs : list
+            list of two dimensional ndarrays (dtype int) containing the coordinate indices of each assignment row-wise
+            that must be picked from the global arrays in args
+        positions : list
+            list of two dimensional ndarrays (dtype int) containing the positions in B.data of each assignment row-wise
+        args : list
+            list of full global arrays whose local coordinates needs to be passed to the jacobians
+        B : csr_matrix
+            preallocated csr_matrix where the result shall be written to
+
+        Returns
+        -------
+        B : csr_matrix
+            assembled B
+        """
+        return self._build_B_by_groups(jacobians, dofs, positions, args, B)
+
+    @staticmethod
+    def _build_B_by_groups(jacobians, dofs, positions, args, B):
+        for jac, dofs_i, positions_i in zip(jacobians, dofs, positions):
+            B.data[positions_i] = jac(*(arg[dofs_i] for arg in args)).reshape(positions_i.shape)
+        return B
+
+    @staticmethod
+    def _build_g_by_groups(residuals, dofs, positions, args, g):
+        for res, dofs_i, positions_i in zip(residuals, dofs, positions):
+            g[positions_i] = res(*(arg[dofs_i] for arg in args)).reshape(positions_i.shape)
+        return g
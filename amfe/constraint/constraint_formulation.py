@@ -340,6 +340,31 @@ class ConstraintFormulationBase:
         """
         raise NotImplementedError('K is not implemented')
 
+    def K_and_f_int(self, x, dx, t):
+        r"""
+        Returns the constrained stiffness matrix and the constrained f_int vector of one state
+
+        f_int is evaluated first, such that a memoized stiffness of the unconstrained system is reused for K.
+
+        Parameters
+        ----------
+        x: numpy.array
+            Global state vector of the system
+        dx: numpy.array
+            First time derivative of global state vector of the constrained system
+        t: float
+            time
+
+        Returns
+        -------
+        K: csr_matrix
+            Constrained stiffness matrix
+        f_int: numpy.array
+            Constrained f_int vector
+        """
+        f_int = self.f_int(x, dx, t)
+        return self.K(x, dx, t), f_int
+
     def D(self, x, dx, t):
         r"""
         Returns the constrained damping matrix
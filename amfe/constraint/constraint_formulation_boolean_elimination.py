@@ -6,7 +6,7 @@
 #
 
 import numpy as np
-from scipy.sparse import identity, issparse
+from scipy.sparse import csr_matrix, identity, issparse
 
 from amfe.linalg.tools import isboolean
 from .constraint_formulation import ConstraintFormulationBase
@@ -23,6 +23,13 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
         Matrix that is able to eliminate the constrained dofs by applying :math:`L^T A L` to a matrices A
     _L_changed: bool
         Internal flag that indicates if L must be updated when it is asked for the next time
+    _free_dofs: ndarray
+        indices of the dofs that are not constrained, i.e. the columns of the unconstrained system that are kept by L
+    _reduction_maps: dict
+        maps to reduce csr matrices by slicing their data array, one per matrix function (M, K, D). Each entry is a
+        tuple (indptr, indices, data_map, reduced) where indptr and indices are copies of the sparsity pattern the map
+        is computed for, data_map contains the positions in the data array of the entries that are kept and reduced
+        is the preallocated reduced csr_matrix
 
     Notes
     -----
@@ -36,6 +43,8 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
                          jac_h_u, jac_h_du, jac_p_u, jac_p_du,
                          g_func, b_func, a_func)
         self._L = None
+        self._free_dofs = None
+        self._reduction_maps = dict()
         self._L_changed = True  # Setting flag for lazy evaluation
 
     @property
@@ -65,6 +74,21 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
             self._L_changed = False
         return self._L
 
+    @property
+    def free_dofs(self):
+        """
+        Returns the indices of the dofs of the unconstrained system that are not constrained
+
+        Returns
+        -------
+        free_dofs: ndarray
+            indices of the unconstrained dofs, i.e. u[free_dofs] = x
+        """
+        if self._L_changed:
+            self._compute_L()
+            self._L_changed = False
+        return self._free_dofs
+
     def update(self):
         """
         Function that is called by observers if state has changed
@@ -93,6 +117,8 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
         t = 0.0
         B = self._B_func(q, t)
         constrained_dofs = self._get_constrained_dofs_by_B(B)
+        self._free_dofs = np.delete(np.arange(B.shape[1]), constrained_dofs)
+        self._reduction_maps = dict()
         if issparse(B):
             self._L = self._get_L_by_constrained_dofs(constrained_dofs, B.shape[1], format='csr')
         else:
@@ -166,6 +192,77 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
         else:
             raise ValueError('Only csr or dense format allowed')
 
+    def _expand(self, x):
+        """
+        Returns the vector of the unconstrained system L x by scattering x to the free dofs
+        """
+        u = np.zeros(self.L.shape[0], dtype=np.result_type(x, float))
+        u[self.free_dofs] = x
+        return u
+
+    def _reduce_matrix(self, name, A):
+        r"""
+        Returns :math:`L^T A L` by extracting the rows and columns of the free dofs of A
+
+        For csr matrices the positions of the kept entries in A.data are computed once per sparsity pattern and the
+        result is written into a preallocated reduced csr_matrix that is returned on every call with the same name.
+
+        Parameters
+        ----------
+        name: str
+            name of the matrix function (e.g. 'M', 'K' or 'D'), each name has its own reduction map
+        A: ndarray or sparse matrix
+            matrix of the unconstrained system
+
+        Returns
+        -------
+        A_reduced: ndarray or csr_matrix
+            reduced matrix
+        """
+        free_dofs = self.free_dofs
+        if not issparse(A):
+            return np.asarray(A)[np.ix_(free_dofs, free_dofs)]
+        if not isinstance(A, csr_matrix):
+            A = A.tocsr()
+        reduction_map = self._reduction_maps.get(name)
+        if reduction_map is None or not (np.array_equal(reduction_map[0], A.indptr)
+                                         and np.array_equal(reduction_map[1], A.indices)):
+            reduction_map = self._compute_reduction_map(A, free_dofs)
+            self._reduction_maps[name] = reduction_map
+        _, _, data_map, reduced = reduction_map
+        np.take(A.data, data_map, out=reduced.data)
+        return reduced
+
+    @staticmethod
+    def _compute_reduction_map(A, free_dofs):
+        """
+        Computes the positions of the entries of a csr_matrix A that belong to the rows and columns of the free dofs
+        and preallocates the reduced csr_matrix
+
+        Parameters
+        ----------
+        A: csr_matrix
+            matrix of the unconstrained system
+        free_dofs: ndarray
+            sorted indices of the free dofs
+
+        Returns
+        -------
+        reduction_map: tuple
+            (indptr, indices, data_map, reduced), c.f. attribute _reduction_maps
+        """
+        new_index = np.full(A.shape[1], -1, dtype=int)
+        new_index[free_dofs] = np.arange(len(free_dofs))
+        rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+        keep = (new_index[rows] >= 0) & (new_index[A.indices] >= 0)
+        data_map = np.flatnonzero(keep)
+        indptr = np.zeros(len(free_dofs) + 1, dtype=A.indptr.dtype)
+        np.cumsum(np.bincount(new_index[rows[keep]], minlength=len(free_dofs)), out=indptr[1:])
+        indices = new_index[A.indices[keep]].astype(A.indices.dtype)
+        reduced = csr_matrix((np.zeros(len(data_map), dtype=np.result_type(A.dtype, float)), indices, indptr),
+                             shape=(len(free_dofs), len(free_dofs)))
+        return A.indptr.copy(), A.indices.copy(), data_map, reduced
+
     def u(self, x, t):
         """
 
@@ -182,7 +279,7 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
             recovered displacements of the unconstrained system
 
         """
-        return self.L.dot(x)
+        return self._expand(x)
 
     def du(self, x, dx, t):
         """
@@ -202,7 +299,7 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
             recovered velocities of the unconstrained system
 
         """
-        return self.L.dot(dx)
+        return self._expand(dx)
 
     def ddu(self, x, dx, ddx, t):
         """
@@ -224,7 +321,7 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
             recovered accelerations of the unconstrained system
 
         """
-        return self.L.dot(ddx)
+        return self._expand(ddx)
 
     def lagrange_multiplier(self, x, t):
         """
@@ -273,7 +370,7 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
         """
         u = self.u(x, t)
         du = self.du(x, dx, t)
-        return self.L.T.dot(self._M_func(u, du, t)).dot(self.L)
+        return self._reduce_matrix('M', self._M_func(u, du, t))
 
     def f_int(self, x, dx, t):
         r"""
@@ -304,7 +401,7 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
 
         u = self.u(x, t)
         du = self.du(x, dx, t)
-        return self.L.T.dot(self._h_func(u, du, t))
+        return self._h_func(u, du, t)[self.free_dofs]
 
     def f_ext(self, x, dx, t):
         r"""
@@ -335,7 +432,7 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
 
         u = self.u(x, t)
         du = self.du(x, dx, t)
-        return self.L.T.dot(self._p_func(u, du, t))
+        return self._p_func(u, du, t)[self.free_dofs]
 
     def K(self, x, dx, t):
         r"""
@@ -367,9 +464,9 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
         du = self.du(x, dx, t)
         if self._jac_h_u is not None:
             if self._jac_p_u is not None:
-                return self.L.T.dot(self._jac_h_u(u, du, t) - self._jac_p_u(u, du, t)).dot(self.L)
+                return self._reduce_matrix('K', self._jac_h_u(u, du, t) - self._jac_p_u(u, du, t))
             else:
-                return self.L.T.dot(self._jac_h_u(u, du, t)).dot(self.L)
+                return self._reduce_matrix('K', self._jac_h_u(u, du, t))
         else:
             raise NotImplementedError('Numerical differentiation of h is not implemented yet')
 
@@ -403,8 +500,8 @@ class BooleanEliminationConstraintFormulation(ConstraintFormulationBase):
         du = self.du(x, dx, t)
         if self._jac_h_du is not None:
             if self._jac_p_du is not None:
-                return self.L.T.dot(self._jac_h_du(u, du, t) - self._jac_p_du(u, du, t)).dot(self.L)
+                return self._reduce_matrix('D', self._jac_h_du(u, du, t) - self._jac_p_du(u, du, t))
             else:
-                return self.L.T.dot(self._jac_h_du(u, du, t)).dot(self.L)
+                return self._reduce_matrix('D', self._jac_h_du(u, du, t))
         else:
             raise NotImplementedError('Numerical differentiation of h is not implemented yet')
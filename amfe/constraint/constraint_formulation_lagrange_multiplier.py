@@ -6,9 +6,7 @@
 #
 
 import numpy as np
-from scipy.sparse import csr_matrix, issparse
-from scipy.sparse import hstack as sphstack
-from scipy.sparse import vstack as spvstack
+from scipy.sparse import coo_matrix, csr_matrix, issparse
 
 from .constraint_formulation import ConstraintFormulationBase
 
@@ -86,7 +84,12 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
     _D_full: csr_matrix
         Preallocated csr_matrix for D
     _K_full: csr_matrix
-        Preallocated csr_matrix for K
+        Preallocated csr_matrix for K with the combined sparsity pattern of K_raw, B, B^T and B^T B
+    _K_map: tuple
+        patterns of K_raw and B the preallocated K_full belongs to and the positions of their entries in K_full.data,
+        c.f. _compute_K_map
+    _BTB: tuple
+        copy of the last B and the related product B^T B for the penalization
     _f_int_full: csr_matrix
         Preallocated ndarray for f_int
     _f_ext_full: csr_matrix
@@ -107,6 +110,8 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
         self._M_full = None
         self._D_full = None
         self._K_full = None
+        self._K_map = None
+        self._BTB = None
         self._f_int_full = None
         self._f_ext_full = None
         self._scaling = 1.0
@@ -126,14 +131,10 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
         M_full: csr_matrix
             preallocated matrix that will be returned after constraints are applied
         """
-        if not isinstance(M, csr_matrix):
-            if issparse(M):
-                M = M.tocsr()
-            else:
-                M = csr_matrix(M)
+        M = self._tocsr(M)
         indptr = np.concatenate((M.indptr, np.ones(self._no_of_constraints, dtype=M.indptr.dtype) * M.indptr[-1]))
-        return csr_matrix((M.data * 0.0, M.indices, indptr), shape=(M.shape[0] + self._no_of_constraints,
-                                                                    M.shape[1] + self._no_of_constraints))
+        return csr_matrix((M.data * 0.0, M.indices.copy(), indptr), shape=(M.shape[0] + self._no_of_constraints,
+                                                                           M.shape[1] + self._no_of_constraints))
 
     def _preallocate_D(self, D):
         """
@@ -151,6 +152,129 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
         """
         return self._preallocate_M(D)
 
+    @staticmethod
+    def _tocsr(A):
+        """
+        Returns A as csr_matrix
+        """
+        if isinstance(A, csr_matrix):
+            return A
+        elif issparse(A):
+            return A.tocsr()
+        return csr_matrix(A)
+
+    @staticmethod
+    def _has_pattern(A, indptr, indices):
+        """
+        Checks if the csr_matrix A has the sparsity pattern described by indptr and indices
+        """
+        return (A.indptr is indptr or np.array_equal(A.indptr, indptr)) and \
+            (A.indices is indices or np.array_equal(A.indices, indices))
+
+    def _embed(self, A_full, A):
+        """
+        Writes the values of the unconstrained matrix A into the upper left block of the preallocated matrix A_full
+
+        A_full is preallocated again if it does not exist or the sparsity pattern of A has changed.
+
+        Parameters
+        ----------
+        A_full: csr_matrix or None
+            preallocated matrix
+        A: csr_matrix
+            matrix of the unconstrained system
+
+        Returns
+        -------
+        A_full: csr_matrix
+            matrix with the values of A
+        """
+        A = self._tocsr(A)
+        if A_full is None or A_full.shape[0] != A.shape[0] + self._no_of_constraints or \
+                not self._has_pattern(A, A_full.indptr[:A.shape[0] + 1], A_full.indices):
+            A_full = self._preallocate_M(A)
+        np.copyto(A_full.data, A.data)
+        return A_full
+
+    @staticmethod
+    def _canonical(A):
+        """
+        Returns A with sorted indices and without duplicate entries
+        """
+        if not A.has_canonical_format:
+            A = A.copy()
+            A.sum_duplicates()
+        return A
+
+    @staticmethod
+    def _pattern_keys(A):
+        """
+        Returns the entries of a canonical csr_matrix A as sorted keys row * no_of_columns + column
+        """
+        rows = np.repeat(np.arange(A.shape[0], dtype=np.int64), np.diff(A.indptr))
+        return rows * A.shape[1] + A.indices
+
+    def _compute_K_map(self, K, B):
+        """
+        Computes the combined sparsity pattern of the constrained stiffness matrix and the positions of the entries
+        of K_raw, B and B^T in its data array
+
+        If a penalty is applied, the pattern additionally contains the structural pattern of B^T B.
+
+        Parameters
+        ----------
+        K: csr_matrix
+            stiffness matrix of the unconstrained system in canonical format
+        B: csr_matrix
+            constraint matrix in canonical format
+
+        Returns
+        -------
+        K_full: csr_matrix
+            preallocated constrained stiffness matrix
+        K_map: tuple
+            (K.indptr, K.indices, B.indptr, B.indices, penalty_applied, keys, positions_K, positions_B, positions_BT)
+            where keys are the pattern keys of K_full
+        """
+        ndof = self._no_of_dofs_unconstrained
+        dimension = ndof + self._no_of_constraints
+        rows_K = np.repeat(np.arange(K.shape[0]), np.diff(K.indptr))
+        rows_B = np.repeat(np.arange(B.shape[0]), np.diff(B.indptr))
+        rows = [rows_K, B.indices, rows_B + ndof]
+        columns = [K.indices, rows_B + ndof, B.indices]
+        if self._penalty is not None:
+            B_pattern = csr_matrix((np.ones(len(B.indices)), B.indices, B.indptr), shape=B.shape)
+            BTB_pattern = B_pattern.T.dot(B_pattern).tocoo()
+            rows.append(BTB_pattern.row)
+            columns.append(BTB_pattern.col)
+        rows = np.concatenate(rows)
+        columns = np.concatenate(columns)
+        K_full = coo_matrix((np.ones(len(rows)), (rows, columns)), shape=(dimension, dimension)).tocsr()
+        K_full.sum_duplicates()
+        K_full.data[:] = 0.0
+        keys = self._pattern_keys(K_full)
+
+        def positions(rows, columns):
+            return np.searchsorted(keys, rows.astype(np.int64) * dimension + columns)
+
+        return K_full, (K.indptr.copy(), K.indices.copy(), B.indptr.copy(), B.indices.copy(),
+                        self._penalty is not None, keys, positions(rows_K, K.indices),
+                        positions(rows_B + ndof, B.indices), positions(B.indices, rows_B + ndof))
+
+    def _penalty_matrix(self, B, keys):
+        """
+        Returns B^T B and the positions of its entries in the data array of the preallocated K_full
+
+        B^T B is only recomputed if B changes.
+        """
+        if self._BTB is None or not (self._has_pattern(B, self._BTB[0].indptr, self._BTB[0].indices) and
+                                     np.array_equal(B.data, self._BTB[0].data)):
+            BTB = self._canonical(B.T.dot(B).tocsr())
+            rows = np.repeat(np.arange(BTB.shape[0], dtype=np.int64), np.diff(BTB.indptr))
+            positions = np.searchsorted(keys, rows * self.dimension + BTB.indices)
+            self._BTB = (B.copy(), BTB, positions)
+        return self._BTB[1], self._BTB[2]
+
     def _preallocate_f(self):
         """
         internal function for preallocation of f_int and f_ext vector
@@ -205,6 +329,13 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
         None
         """
         self._no_of_constraints = len(self._g_func(np.zeros(self._no_of_dofs_unconstrained), 0.0))
+        self._M_full = None
+        self._D_full = None
+        self._K_full = None
+        self._K_map = None
+        self._BTB = None
+        self._f_int_full = None
+        self._f_ext_full = None
 
     def u(self, x, t):
         """
@@ -314,17 +445,7 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
 
         """
         M = self._M_func(self.u(x, t), self.du(x, dx, t), t)
-        if self._M_full is None:
-            self._M_full = self._preallocate_M(M)
-        if not isinstance(M, csr_matrix):
-            if issparse(M):
-                M = M.tocsr()
-            else:
-                M = csr_matrix(M)
-        self._M_full.indptr = np.concatenate((M.indptr, np.ones(self._no_of_constraints,
-                                                                dtype=M.indptr.dtype) * M.indptr[-1]))
-        self._M_full.indices = M.indices
-        self._M_full.data = M.data
+        self._M_full = self._embed(self._M_full, M)
         return self._M_full
 
     def D(self, x, dx, t):
@@ -364,14 +485,7 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
                 D = self._jac_h_du(u, du, t)
         else:
             raise NotImplementedError('Numerical differentiation of h is not implemented yet')
-        if self._D_full is None:
-            self._D_full = self._preallocate_D(D)
-        if not isinstance(D, csr_matrix):
-            D = D.tocsr()
-        self._D_full.indptr = np.concatenate((D.indptr, np.ones(self._no_of_constraints,
-                                                                dtype=D.indptr.dtype) * D.indptr[-1]))
-        self._D_full.indices = D.indices
-        self._D_full.data = D.data
+        self._D_full = self._embed(self._D_full, D)
         return self._D_full
 
     def f_int(self, x, dx, t):
@@ -483,13 +597,25 @@ class SparseLagrangeMultiplierConstraintFormulation(ConstraintFormulationBase):
 
         Attention: d(B.T@g)/dq is evaluated as = B.T@dg/dq, which means that dB/dq is assumed to be zero.
         This is done because dB/dq could be expensive to evaluate.
+
+        The combined sparsity pattern is computed once and the returned csr_matrix is filled in place on every call
+        as long as the sparsity patterns of K_raw and B do not change.
         """
-        B = self._B_func(self.u(x, t), t)
-        K = self._jac_h_u(self.u(x, t), self.du(x, dx, t), t)
+        B = self._canonical(self._tocsr(self._B_func(self.u(x, t), t)))
+        K = self._canonical(self._tocsr(self._jac_h_u(self.u(x, t), self.du(x, dx, t), t)))
+        K_map = self._K_map
+        if K_map is None or K_map[4] != (self._penalty is not None) or \
+                not (self._has_pattern(K, K_map[0], K_map[1]) and self._has_pattern(B, K_map[2], K_map[3])):
+            self._K_full, self._K_map = self._compute_K_map(K, B)
+            K_map = self._K_map
+            self._BTB = None
+        keys, positions_K, positions_B, positions_BT = K_map[5:]
+        data = self._K_full.data
+        data[:] = 0.0
+        data[positions_K] = K.data
+        data[positions_B] = self._scaling * B.data
+        data[positions_BT] = self._scaling * B.data
         if self._penalty is not None:
-            K += self._penalty * self._scaling * B.T.dot(B)
-
-        return spvstack((sphstack((K, self._scaling * B.T), format='csr'),
-                         sphstack((self._scaling * B, csr_matrix((self._no_of_constraints,
-                                                                  self._no_of_constraints))), format='csr')),
-                        format='csr')
+            BTB, positions_BTB = self._penalty_matrix(B, keys)
+            data[positions_BTB] += self._penalty * self._scaling * BTB.data
+        return self._K_full
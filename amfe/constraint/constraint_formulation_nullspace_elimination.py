@@ -6,11 +6,11 @@
 #
 
 import numpy as np
-from scipy.linalg import null_space
-from scipy.sparse import csr_matrix, identity
+from scipy.sparse import csr_matrix
 from scipy.sparse import vstack as spvstack
 
 from .constraint_formulation import ConstraintFormulationBase
+from .tools import sparse_null_space
 
 
 class NullspaceConstraintFormulation(ConstraintFormulationBase):
@@ -46,6 +46,8 @@ class NullspaceConstraintFormulation(ConstraintFormulationBase):
     ----------
     _L: csr_matrix
         internal storage of the L matrix (nullspace of last asked B)
+    _B_of_L: csr_matrix
+        copy of the B the stored L has been computed for. L is only recomputed if B changes.
     _D_full: csr_matrix
         internal storage of the linearized viscous damping matrix D
     _scaling: float
@@ -65,6 +67,7 @@ class NullspaceConstraintFormulation(ConstraintFormulationBase):
 
             self._a_func = a_func_zero
         self._L = None
+        self._B_of_L = None
         self._D_full = None
         self._scaling = 1.0
 
@@ -101,15 +104,27 @@ class NullspaceConstraintFormulation(ConstraintFormulationBase):
         -------
         L: csr_matrix
             nullspace of B(x, t)
+
+        Notes
+        -----
+        The sparse basis is computed by amfe.constraint.tools.sparse_null_space and is only recomputed if B has
+        changed since the last call.
         """
         u = self.u(x, t)
-        B = self._B_func(u, t)
-        if B.shape[0] > 0:
-            self._L = csr_matrix(null_space(B.todense()))
-        else:
-            self._L = identity(self._no_of_dofs_unconstrained, format='csr')
+        B = csr_matrix(self._B_func(u, t))
+        if self._L is None or not self._is_B_of_L(B):
+            self._L = sparse_null_space(B)
+            self._B_of_L = B.copy()
         return self._L
 
+    def _is_B_of_L(self, B):
+        """
+        Checks if B equals the B the stored L has been computed for
+        """
+        B_of_L = self._B_of_L
+        return (B.shape == B_of_L.shape and np.array_equal(B.indptr, B_of_L.indptr)
+                and np.array_equal(B.indices, B_of_L.indices) and np.array_equal(B.data, B_of_L.data))
+
     @property
     def dimension(self):
         """
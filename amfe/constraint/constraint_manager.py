@@ -12,6 +12,8 @@ Gould, N.I.M. e.a. (1998) - On the Solution of Equality Constrained Quadratic Pr
 Optimization
 """
 
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
 
@@ -43,6 +45,13 @@ class ConstraintManager:
         preallocated csr_matrix to assemble global B
     _g: numpy.array
         preallocated numpy.array to assemble global g (holonomic constraint function)
+    _groups: list
+        constraint assignments grouped by their constraint objects that are evaluated at once,
+        c.f. _group_constraints
+    _B_constant: bool
+        flag that indicates that B of all assigned constraints is constant and thus only assembled once
+    _B_assembled: bool
+        flag that indicates that the preallocated B has been assembled since the last update
     _update_flag: bool
         internal flag that indicates if some things must be updated when they are asked for or not
     """
@@ -66,6 +75,9 @@ class ConstraintManager:
 
         self._B = None
         self._g = None
+        self._groups = []
+        self._B_constant = False
+        self._B_assembled = False
         self._update_flag = True
         return
 
@@ -236,6 +248,31 @@ class ConstraintManager:
         self._remove_constraint_by_indices(indices)
         self._update_flag = True
         
+    def renumber_dofs(self, new_dofs):
+        """
+        Renumber the dofs the constraints are applied to, e.g. after the global dofs have been reordered
+
+        Parameters
+        ----------
+        new_dofs : ndarray
+            new global dof of each old global dof
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            if a dof of the constraints has no new dof, i.e. new_dofs is negative for it
+        """
+        new_dofs = np.asarray(new_dofs, dtype=int)
+        dofidxs_new = [new_dofs[dofidxs] for dofidxs in self._constraints_df['dofidxs'].values]
+        if any(np.any(dofidxs < 0) for dofidxs in dofidxs_new):
+            raise ValueError('The new numbering does not contain all dofs the constraints are applied to')
+        self._constraints_df['dofidxs'] = dofidxs_new
+        self._update_flag = True
+
     def _remove_constraint_by_indices(self, indices):
         self._constraints_df = self._constraints_df.drop(indices)
         self._constraints_df = self._constraints_df.reset_index(drop=True)
@@ -251,6 +288,49 @@ class ConstraintManager:
         self._g, self._B = self._constraint_assembler.preallocate_g_and_B(self._no_of_dofs_unconstrained,
                                                                           self._dofidxs(),
                                                                           self._no_of_constraints_by_object())
+        self._groups = self._group_constraints()
+        self._B_constant = all(group[0].CONSTANT_B for group in self._groups)
+        self._B_assembled = False
+        self._update_flag = False
+
+    def _group_constraints(self):
+        """
+        Groups the assigned constraints by their constraint objects and the number of passed dofidxs and Xidxs
+
+        The assignments of one group are evaluated at once by the batch methods of the constraint object.
+
+        Returns
+        -------
+        groups: list
+            list of tuples (constraint_obj, dofidxs, Xidxs, g_positions, B_positions) where dofidxs and Xidxs contain
+            the indices of the assignments row-wise, g_positions the rows in g and B_positions the positions in B.data
+            that belong to the assignments
+        """
+        groups = OrderedDict()
+        row_offset = 0
+        data_offset = 0
+        for _, const in self._constraints_df.iterrows():
+            constraint_obj = const['constraint_obj']
+            dofidxs = const['dofidxs']
+            Xidxs = const['Xidxs']
+            no_of_rows = constraint_obj.NO_OF_CONSTRAINTS
+            key = (id(constraint_obj), len(dofidxs), len(Xidxs))
+            if key not in groups:
+                groups[key] = (constraint_obj, [], [], [], [])
+            group = groups[key]
+            group[1].append(dofidxs)
+            group[2].append(Xidxs)
+            group[3].append(np.arange(row_offset, row_offset + no_of_rows))
+            group[4].append(np.arange(data_offset, data_offset + no_of_rows * len(dofidxs)))
+            row_offset += no_of_rows
+            data_offset += no_of_rows * len(dofidxs)
+
+        return [(constraint_obj, np.array(dofidxs, dtype=int).reshape(len(dofidxs), no_of_dofidxs),
+                 np.array(Xidxs, dtype=int).reshape(len(Xidxs), no_of_Xidxs),
+                 np.array(g_positions, dtype=int).reshape(len(g_positions), -1),
+                 np.array(B_positions, dtype=int).reshape(len(B_positions), -1))
+                for (_, no_of_dofidxs, no_of_Xidxs), (constraint_obj, dofidxs, Xidxs, g_positions, B_positions)
+                in groups.items()]
 
     def _no_of_constraints_by_object(self):
         """
@@ -274,10 +354,19 @@ class ConstraintManager:
         """
         return [const['dofidxs'] for i, const in self._constraints_df.iterrows()]
 
+    def _group_dofidxs(self):
+        return [group[1] for group in self._groups]
+
+    def _group_g_positions(self):
+        return [group[3] for group in self._groups]
+
+    def _group_B_positions(self):
+        return [group[4] for group in self._groups]
+
     def _Bs(self, X, t):
         """
-        Returns the B functions that now only have u as input function because u must be separated to local dofs
-        defined by the dofidxs
+        Returns the batch B functions of the constraint groups that now only have u as input function because u must
+        be separated to local dofs defined by the dofidxs
 
         Parameters
         ----------
@@ -291,17 +380,17 @@ class ConstraintManager:
         jacs: generator
             generator object that yields the B function with correct signature for the assembler
         """
-        for i, const in self._constraints_df.iterrows():
-            X_local = X[const['Xidxs']]
+        for constraint_obj, _, Xidxs, _, _ in self._groups:
+            X_local = X[Xidxs]
 
             def B(u):
-                return const['constraint_obj'].B(X_local, u, t)
+                return constraint_obj.B_batch(X_local, u, t)
             yield B
 
     def _gs(self, X, t):
         """
-        Returns the holonomic g functions that now only have u as input function because u must be separated to local
-        dofs defined by the dofidxs
+        Returns the batch g functions of the constraint groups that now only have u as input function because u must
+        be separated to local dofs defined by the dofidxs
 
         Parameters
         ----------
@@ -315,18 +404,18 @@ class ConstraintManager:
         ress: generator
             generator object that yields the g functions with correct signature for the assembler
         """
-        for i, const in self._constraints_df.iterrows():
-            X_local = X[const['Xidxs']]
+        for constraint_obj, _, Xidxs, _, _ in self._groups:
+            X_local = X[Xidxs]
 
             def g(u):
-                return const['constraint_obj'].g(X_local, u, t)
+                return constraint_obj.g_batch(X_local, u, t)
 
             yield g
 
     def _as(self, X, t):
         """
-        Returns the a functions that now only have u and du as input function because these must be separated to local
-        dofs defined by the dofidxs
+        Returns the batch a functions of the constraint groups that now only have u and du as input function because
+        these must be separated to local dofs defined by the dofidxs
 
         Parameters
         ----------
@@ -338,20 +427,20 @@ class ConstraintManager:
         Returns
         -------
         ress: generator
-            generator object that yields the g functions with correct signature for the assembler
+            generator object that yields the a functions with correct signature for the assembler
         """
-        for i, const in self._constraints_df.iterrows():
-            X_local = X[const['Xidxs']]
+        for constraint_obj, _, Xidxs, _, _ in self._groups:
+            X_local = X[Xidxs]
 
             def a(u, du):
-                return const['constraint_obj'].a(X_local, u, du, t)
+                return constraint_obj.a_batch(X_local, u, du, t)
 
             yield a
 
     def _bs(self, X, t):
         """
-        Returns the b functions that now only have u as input function because u must be separated to local
-        dofs defined by the dofidxs
+        Returns the batch b functions of the constraint groups that now only have u as input function because u must
+        be separated to local dofs defined by the dofidxs
 
         Parameters
         ----------
@@ -363,16 +452,29 @@ class ConstraintManager:
         Returns
         -------
         ress: generator
-            generator object that yields the g functions with correct signature for the assembler
+            generator object that yields the b functions with correct signature for the assembler
         """
-        for i, const in self._constraints_df.iterrows():
-            X_local = X[const['Xidxs']]
+        for constraint_obj, _, Xidxs, _, _ in self._groups:
+            X_local = X[Xidxs]
 
             def b(u):
-                return const['constraint_obj'].b(X_local, u, t)
+                return constraint_obj.b_batch(X_local, u, t)
 
             yield b
 
+    def _assemble_B(self, X, u, t):
+        """
+        Assembles B into the preallocated B. If B of all constraints is constant, it is assembled only once.
+
+        The same csr_matrix is returned on every call and its data is overwritten by the next assembly of a non
+        constant B. Thus, the returned B must not be changed in place and must be copied if it is kept.
+        """
+        if not (self._B_constant and self._B_assembled):
+            self._constraint_assembler.assemble_B_by_groups(self._Bs(X, t), self._group_dofidxs(),
+                                                            self._group_B_positions(), (u,), self._B)
+            self._B_assembled = True
+        return self._B
+
     def g_and_B(self, X, u, t):
         """
         Parameters
@@ -393,8 +495,10 @@ class ConstraintManager:
         """
         if self._update_flag:
             self.update()
-        g, B = self._constraint_assembler.assemble_g_and_B(self._gs(X, t), self._Bs(X, t),
-                                                           self._dofidxs(), (u,), self._g, self._B)
+        B = self._assemble_B(X, u, t)
+        g = self._constraint_assembler.assemble_g_by_groups(self._gs(X, t), self._group_dofidxs(),
+                                                            self._group_g_positions(), (u,),
+                                                            np.zeros_like(self._g))
         return g, B
 
     def B(self, X, u, t):
@@ -416,7 +520,7 @@ class ConstraintManager:
         """
         if self._update_flag:
             self.update()
-        return self._constraint_assembler.assemble_B(self._Bs(X, t, ), self._dofidxs(), (u,), self._B)
+        return self._assemble_B(X, u, t)
 
     def g(self, X, u, t):
         """
@@ -437,7 +541,9 @@ class ConstraintManager:
         """
         if self._update_flag:
             self.update()
-        return self._constraint_assembler.assemble_g(self._gs(X, t), self._dofidxs(), (u,), self._g)
+        return self._constraint_assembler.assemble_g_by_groups(self._gs(X, t), self._group_dofidxs(),
+                                                               self._group_g_positions(), (u,),
+                                                               np.zeros_like(self._g))
 
     def a(self, X, u, du, t):
         """
@@ -460,9 +566,9 @@ class ConstraintManager:
         """
         if self._update_flag:
             self.update()
-        a = self._g.copy()
-        a *= 0.0
-        a = self._constraint_assembler.assemble_g(self._as(X, t), self._dofidxs(), (u, du), a)
+        a = np.zeros_like(self._g)
+        a = self._constraint_assembler.assemble_g_by_groups(self._as(X, t), self._group_dofidxs(),
+                                                            self._group_g_positions(), (u, du), a)
         return a
 
     def b(self, X, u, t):
@@ -484,7 +590,7 @@ class ConstraintManager:
         """
         if self._update_flag:
             self.update()
-        b = self._g.copy()
-        b *= 0.0
-        b = self._constraint_assembler.assemble_g(self._bs(X, t), self._dofidxs(), (u, ), b)
+        b = np.zeros_like(self._g)
+        b = self._constraint_assembler.assemble_g_by_groups(self._bs(X, t), self._group_dofidxs(),
+                                                            self._group_g_positions(), (u, ), b)
         return b
@@ -6,10 +6,13 @@
 #
 
 import numpy as np
-from scipy.linalg import eigvalsh
+from scipy.linalg import eigvalsh, qr, solve_triangular
+from scipy.sparse import csr_matrix, coo_matrix
+from scipy.sparse.csgraph import connected_components
 
 __all__ = ['constraints_scaling_factor',
            'validate_constraints_independent',
+           'sparse_null_space',
            ]
 
 
@@ -85,3 +88,100 @@ def validate_constraints_independent(B, tol=1E-10):
               "this tolerance. That means the system cannot be solved",
               "with these constraints and this tolerance.")
         return False
+
+
+def sparse_null_space(B, tol=1E-10):
+    r"""
+    Computes a sparse basis of the nullspace of a sparse constraint matrix B by coordinate partitioning
+
+    Rows of B with only one nonzero entry (e.g. Dirichlet constraints) fix the related dof which is therefore
+    removed from the basis without any factorization. The remaining rows are split into independent blocks, i.e. the
+    connected components of the graph of :math:`B^T B`. For each block, dependent coordinates :math:`u_d` are
+    selected by a QR decomposition with column pivoting of its rows restricted to the columns they touch and are
+    expressed by the independent coordinates :math:`u_i` of the block:
+
+    .. math::
+        u_d = - R_{11}^{-1} R_{12} u_i
+
+    Thus L stays as sparse as the coupling of the constraints.
+
+    Parameters
+    ----------
+    B: scipy.sparse matrix
+        constraint matrix with shape (no_of_constraints, no_of_dofs)
+    tol: float, optional
+        relative tolerance for the diagonal of the R factor of each block below which rows are considered as
+        linearly dependent
+
+    Returns
+    -------
+    L: csr_matrix
+        basis of the nullspace of B with shape (no_of_dofs, no_of_dofs - rank(B)). The columns are not orthonormal
+        but each column belongs to one independent coordinate of the unconstrained system.
+    """
+    B = csr_matrix(B, copy=True)
+    B.eliminate_zeros()
+    no_of_dofs = B.shape[1]
+    nnz_per_row = np.diff(B.indptr)
+
+    # Fast path: rows with one entry fix a dof
+    selection_rows = nnz_per_row == 1
+    fixed = np.zeros(no_of_dofs, dtype=bool)
+    fixed[B.indices[B.indptr[:-1][selection_rows]]] = True
+    free_dofs = np.flatnonzero(~fixed)
+
+    # Coordinate partitioning of the general rows block by block
+    B_general = B[np.flatnonzero(nnz_per_row > 1)][:, free_dofs].tocsr()
+    B_general.eliminate_zeros()
+    B_general = B_general[np.flatnonzero(np.diff(B_general.indptr) > 0)]
+    dependent = []
+    independent_coupled = []
+    T_rows = []
+    T_columns = []
+    T_data = []
+    if B_general.shape[0] > 0:
+        no_of_blocks, labels = connected_components(B_general.T @ B_general, directed=False)
+        touched = np.zeros(len(free_dofs), dtype=bool)
+        touched[B_general.indices] = True
+        column_labels = np.where(touched, labels, -1)
+        row_labels = labels[B_general.indices[B_general.indptr[:-1]]]
+        # the untouched columns are sorted to the front and form the first split
+        columns_by_block = np.split(np.argsort(column_labels, kind='stable'),
+                                    np.count_nonzero(~touched) + np.concatenate(
+                                        ([0], np.cumsum(np.bincount(column_labels[touched],
+                                                                    minlength=no_of_blocks))[:-1])))
+        rows_by_block = np.split(np.argsort(row_labels, kind='stable'),
+                                 np.cumsum(np.bincount(row_labels, minlength=no_of_blocks))[:-1])
+        for block_rows, block_columns in zip(rows_by_block, columns_by_block[1:]):
+            if len(block_rows) == 0:
+                continue
+            _, R, P = qr(B_general[block_rows][:, block_columns].toarray(), mode='economic', pivoting=True)
+            diagonal = np.abs(np.diag(R))
+            rank = int(np.sum(diagonal > tol * diagonal[0]))
+            block_dependent = free_dofs[block_columns[P[:rank]]]
+            block_independent = free_dofs[block_columns[P[rank:]]]
+            T = solve_triangular(R[:rank, :rank], R[:rank, rank:])
+            dependent.append(block_dependent)
+            independent_coupled.append(block_independent)
+            T_rows.append(np.repeat(block_dependent, len(block_independent)))
+            T_columns.append(np.tile(block_independent, len(block_dependent)))
+            T_data.append(-T.reshape(-1))
+    dependent = np.concatenate(dependent) if dependent else np.array([], dtype=int)
+    T_rows = np.concatenate(T_rows) if T_rows else np.array([], dtype=int)
+    T_columns = np.concatenate(T_columns) if T_columns else np.array([], dtype=int)
+    T_data = np.concatenate(T_data) if T_data else np.array([])
+
+    is_independent = ~fixed
+    is_independent[dependent] = False
+    independent = np.flatnonzero(is_independent)
+    columns_of_independent = np.full(no_of_dofs, -1, dtype=int)
+    columns_of_independent[independent] = np.arange(len(independent))
+
+    # identity part for the independent coordinates and -T for the dependent ones
+    rows = [independent, T_rows]
+    columns = [np.arange(len(independent)), columns_of_independent[T_columns]]
+    data = [np.ones(len(independent)), T_data]
+    L = coo_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(columns))),
+                   shape=(no_of_dofs, len(independent))).tocsr()
+    L.eliminate_zeros()
+    return L
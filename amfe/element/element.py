@@ -15,6 +15,8 @@ __all__ = [
 
 import numpy as np
 
+from .tools import compute_f_batch, compute_k_and_f_batch, compute_m_batch, compute_reference_geometry_batch
+
 # try to import Fortran routines
 use_fortran = False
 try:
@@ -36,6 +38,19 @@ class Element:
     name : str
         Name for the postprocessing tool to identify the characteristics of the
         element
+    gauss_dN_dxi : ndarray or None
+        Derivatives of the shape functions w.r.t. the natural coordinates at
+        the gauss points, shape: (no_of_gauss_points, no_of_nodes, no_of_dims).
+        Set by isoparametric Total Lagrangian elements to enable the vectorized
+        k_and_f_int_batch.
+    gauss_weights : ndarray or None
+        Integration weights of the gauss points including the volume of the
+        reference element, shape: (no_of_gauss_points,)
+    gauss_NN : ndarray or None
+        Products N N^T of the shape functions at the gauss points, shape:
+        (no_of_gauss_points, no_of_nodes, no_of_nodes). Enables the vectorized
+        m_int_batch. Elements with a constant Jacobian may store the integral
+        of N N^T over the reference element divided by its volume instead.
     """
     name = None
 
@@ -51,6 +66,9 @@ class Element:
         self.f = None
         self.S = None
         self.E = None
+        self.gauss_dN_dxi = None
+        self.gauss_weights = None
+        self.gauss_NN = None
 
     @staticmethod
     def fields():
@@ -137,6 +155,205 @@ class Element:
         self._compute_tensors(X, u, t)
         return self.K, self.f
 
+    def reference_geometry_batch(self, X):
+        '''
+        Returns the spatial derivatives of the shape functions and the
+        integration weights in the reference configuration of a batch of
+        elements which share this element object.
+
+        The result only depends on X and can be passed to k_and_f_int_batch
+        to skip its recomputation.
+
+        Parameters
+        ----------
+        X : ndarray
+            nodal coordinates of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+
+        Returns
+        -------
+        reference_geometry : tuple or None
+            (B0_tilde, det_w) with the derivatives dN_dX of shape
+            (no_of_elements, no_of_gauss_points, no_of_nodes, no_of_dims) and
+            det(dX_dxi)*w of shape (no_of_elements, no_of_gauss_points).
+            None for elements without gauss_dN_dxi.
+
+        '''
+        if self.gauss_dN_dxi is None:
+            return None
+        return compute_reference_geometry_batch(self.gauss_dN_dxi, self.gauss_weights, X)
+
+    def k_and_f_int_batch(self, X, u, t=0, reference_geometry=None):
+        '''
+        Returns the tangential stiffness matrices and the internal nodal forces
+        of a batch of elements which share this element object, i.e. the
+        same shape and material.
+
+        For isoparametric elements providing gauss_dN_dxi and gauss_weights
+        all elements and gauss points are evaluated vectorized, otherwise
+        k_and_f_int is called for every element.
+
+        Parameters
+        ----------
+        X : ndarray
+            nodal coordinates of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        u : ndarray
+            nodal displacements of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        t : float
+            time
+        reference_geometry : tuple, optional
+            precomputed result of reference_geometry_batch(X). It is computed
+            from X if it is not passed.
+
+        Returns
+        -------
+        k_int : ndarray
+            The tangential stiffness matrices,
+            shape: (no_of_elements, no_of_element_dofs, no_of_element_dofs)
+        f_int : ndarray
+            The nodal force vectors, shape: (no_of_elements, no_of_element_dofs)
+
+        '''
+        if self.gauss_dN_dxi is None:
+            no_of_elements, no_of_element_dofs = u.shape
+            K = np.zeros((no_of_elements, no_of_element_dofs, no_of_element_dofs))
+            f = np.zeros((no_of_elements, no_of_element_dofs))
+            for i, (X_local, u_local) in enumerate(zip(X, u)):
+                K[i], f[i] = self.k_and_f_int(X_local, u_local, t)
+            return K, f
+
+        if reference_geometry is None:
+            reference_geometry = self.reference_geometry_batch(X)
+        B0_tilde, det_w = reference_geometry
+        if self.gauss_dN_dxi.shape[2] == 2:
+            return compute_k_and_f_batch(B0_tilde, det_w * self.material.thickness, u,
+                                         self.material.S_Sv_and_C_2d_batch)
+        return compute_k_and_f_batch(B0_tilde, det_w, u, self.material.S_Sv_and_C_batch)
+
+    def f_int_batch(self, X, u, t=0, reference_geometry=None):
+        '''
+        Returns the internal nodal forces of a batch of elements which share
+        this element object without computing their tangential stiffness
+        matrices.
+
+        Parameters
+        ----------
+        X : ndarray
+            nodal coordinates of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        u : ndarray
+            nodal displacements of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        t : float
+            time
+        reference_geometry : tuple, optional
+            precomputed result of reference_geometry_batch(X). It is computed
+            from X if it is not passed.
+
+        Returns
+        -------
+        f_int : ndarray
+            The nodal force vectors, shape: (no_of_elements, no_of_element_dofs)
+
+        '''
+        if self.gauss_dN_dxi is None:
+            f = np.zeros(u.shape)
+            for i, (X_local, u_local) in enumerate(zip(X, u)):
+                f[i] = self.f_int(X_local, u_local, t)
+            return f
+
+        if reference_geometry is None:
+            reference_geometry = self.reference_geometry_batch(X)
+        B0_tilde, det_w = reference_geometry
+        if self.gauss_dN_dxi.shape[2] == 2:
+            return compute_f_batch(B0_tilde, det_w * self.material.thickness, u,
+                                   self.material.S_Sv_and_C_2d_batch)
+        return compute_f_batch(B0_tilde, det_w, u, self.material.S_Sv_and_C_batch)
+
+    def m_k_and_f_int_batch(self, X, u, t=0, reference_geometry=None):
+        '''
+        Returns the mass matrices, the tangential stiffness matrices and the
+        internal nodal forces of a batch of elements which share this element
+        object from one evaluation of the element batch.
+
+        Parameters
+        ----------
+        X : ndarray
+            nodal coordinates of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        u : ndarray
+            nodal displacements of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        t : float
+            time
+        reference_geometry : tuple, optional
+            precomputed result of reference_geometry_batch(X). It is computed
+            from X if it is not passed.
+
+        Returns
+        -------
+        m_int : ndarray
+            The consistent mass matrices,
+            shape: (no_of_elements, no_of_element_dofs, no_of_element_dofs)
+        k_int : ndarray
+            The tangential stiffness matrices,
+            shape: (no_of_elements, no_of_element_dofs, no_of_element_dofs)
+        f_int : ndarray
+            The nodal force vectors, shape: (no_of_elements, no_of_element_dofs)
+
+        '''
+        if reference_geometry is None:
+            reference_geometry = self.reference_geometry_batch(X)
+        K, f = self.k_and_f_int_batch(X, u, t, reference_geometry)
+        return self.m_int_batch(X, u, t, reference_geometry), K, f
+
+    def m_int_batch(self, X, u, t=0, reference_geometry=None):
+        '''
+        Returns the mass matrices of a batch of elements which share this
+        element object.
+
+        For isoparametric elements providing gauss_NN the mass matrices of all
+        elements are integrated at once from det(J)*w of the reference
+        geometry.
+
+        Parameters
+        ----------
+        X : ndarray
+            nodal coordinates of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        u : ndarray
+            nodal displacements of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        t : float
+            time
+        reference_geometry : tuple, optional
+            precomputed result of reference_geometry_batch(X). It is computed
+            from X if it is not passed.
+
+        Returns
+        -------
+        m_int : ndarray
+            The consistent mass matrices,
+            shape: (no_of_elements, no_of_element_dofs, no_of_element_dofs)
+
+        '''
+        if self.gauss_dN_dxi is None or self.gauss_NN is None:
+            no_of_elements, no_of_element_dofs = u.shape
+            M = np.zeros((no_of_elements, no_of_element_dofs, no_of_element_dofs))
+            for i, (X_local, u_local) in enumerate(zip(X, u)):
+                M[i] = self.m_int(X_local, u_local, t)
+            return M
+
+        if reference_geometry is None:
+            reference_geometry = self.reference_geometry_batch(X)
+        det_w = reference_geometry[1]
+        no_of_dims = self.gauss_dN_dxi.shape[2]
+        if no_of_dims == 2:
+            det_w = det_w * self.material.thickness
+        return compute_m_batch(self.gauss_NN, det_w, self.material.rho, no_of_dims)
+
     def k_int(self, X, u, t=0):
         '''
         Returns the tangential stiffness matrix of the Element.
@@ -179,9 +396,19 @@ class Element:
         f_int : ndarray
             The nodal force vector (numpy.ndarray of dimension (ndim,))
 
+        Notes
+        -----
+        Isoparametric elements providing gauss_dN_dxi only evaluate the
+        stresses, the tangential stiffness matrix is not computed. Elements
+        whose _compute_tensors has been overloaded by a fortran routine keep
+        using it, as it outperforms the batched python evaluation for a
+        single element.
+
         '''
-        self._compute_tensors(X, u, t)
-        return self.f
+        if self.gauss_dN_dxi is None or hasattr(type(self), '_compute_tensors_python'):
+            self._compute_tensors(X, u, t)
+            return self.f
+        return self.f_int_batch(X[np.newaxis], u[np.newaxis], t)[0]
 
     def m_and_vec_int(self, X, u, t=0):
         '''
@@ -232,6 +459,94 @@ class Element:
         '''
         return self._m_int(X, u, t)
 
+    def m_lumped_int(self, X, u, t=0, method='row_sum'):
+        '''
+        Returns the lumped (diagonal) mass matrix of the element as vector.
+
+        Parameters
+        ----------
+        X : ndarray
+            nodal coordinates given in Voigt notation (i.e. a 1-D-Array of
+            type [x_1, y_1, z_1, x_2, y_2, z_2 etc.])
+        u : ndarray
+            nodal displacements given in Voigt notation
+        t : float, optional
+            time, default value: 0.
+        method : {'row_sum', 'hrz'}, optional
+            lumping technique. 'row_sum' sums up the rows of the consistent
+            mass matrix. 'hrz' (Hinton, Rock and Zienkiewicz) scales the
+            diagonal of the consistent mass matrix such that the total mass
+            of every field (e.g. 'ux') is preserved. For quadratic elements
+            row summing can lead to zero or negative masses, hence 'hrz' is
+            recommended for them. Default: 'row_sum'
+
+        Returns
+        -------
+        m_lumped : ndarray
+            The diagonal of the lumped mass matrix (numpy.ndarray of
+            dimension (ndim,))
+
+        '''
+        M = self.m_int(X, u, t)
+        if method == 'row_sum':
+            return M.sum(axis=1)
+        elif method == 'hrz':
+            m_lumped = np.diag(M).copy()
+            fields = np.array([dof[2] for dof in self.dofs()])
+            for field in np.unique(fields):
+                mask = fields == field
+                diagonal_sum = m_lumped[mask].sum()
+                if diagonal_sum != 0.0:
+                    m_lumped[mask] *= M[np.ix_(mask, mask)].sum() / diagonal_sum
+            return m_lumped
+        else:
+            raise ValueError('Unknown lumping method {}. Choose \'row_sum\' or \'hrz\''.format(method))
+
+    def m_lumped_int_batch(self, X, u, t=0, method='row_sum', reference_geometry=None):
+        '''
+        Returns the lumped mass matrices of a batch of elements which share
+        this element object as vectors, see m_lumped_int.
+
+        Parameters
+        ----------
+        X : ndarray
+            nodal coordinates of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        u : ndarray
+            nodal displacements of the elements, one row per element,
+            shape: (no_of_elements, no_of_element_dofs)
+        t : float
+            time
+        method : {'row_sum', 'hrz'}, optional
+            lumping technique, see m_lumped_int. Default: 'row_sum'
+        reference_geometry : tuple, optional
+            precomputed result of reference_geometry_batch(X). It is computed
+            from X if it is not passed.
+
+        Returns
+        -------
+        m_lumped : ndarray
+            The diagonals of the lumped mass matrices,
+            shape: (no_of_elements, no_of_element_dofs)
+
+        '''
+        M = self.m_int_batch(X, u, t, reference_geometry)
+        if method == 'row_sum':
+            return M.sum(axis=2)
+        elif method == 'hrz':
+            m_lumped = np.diagonal(M, axis1=1, axis2=2).copy()
+            fields = np.array([dof[2] for dof in self.dofs()])
+            for field in np.unique(fields):
+                mask = fields == field
+                diagonal_sum = m_lumped[:, mask].sum(axis=1)
+                total_mass = M[:, mask][:, :, mask].sum(axis=(1, 2))
+                scaling = np.divide(total_mass, diagonal_sum, out=np.ones_like(total_mass),
+                                    where=diagonal_sum != 0.0)
+                m_lumped[:, mask] *= scaling[:, np.newaxis]
+            return m_lumped
+        else:
+            raise ValueError('Unknown lumping method {}. Choose \'row_sum\' or \'hrz\''.format(method))
+
     def k_f_S_E_int(self, X, u, t=0):
         '''
         Returns the tangential stiffness matrix, the internal nodal force,
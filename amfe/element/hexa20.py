@@ -130,6 +130,12 @@ class Hexa20(Element):
             [-p,p,n,p,f,-l,n,-l,l,q,p,-n,p,f,-l,-n,-l,m,-p,p,n,p,f,-l,n,-l,l],
             [n,p,-p,-l,f,p,l,-l,n,-n,p,q,-l,f,p,m,-l,-n,n,p,-p,-l,f,p,l,-l,n]])
 
+        # shape function derivatives, weights and products N N^T at the gauss points for the batched element routines
+        self.gauss_dN_dxi = np.array([self._dN_dxi(xi, eta, zeta) for xi, eta, zeta, w in self.gauss_points])
+        self.gauss_weights = np.array([w for xi, eta, zeta, w in self.gauss_points])
+        self.gauss_NN = np.array([np.outer(self._N(xi, eta, zeta), self._N(xi, eta, zeta))
+                                  for xi, eta, zeta, w in self.gauss_points])
+
     @staticmethod
     def fields():
         return ('ux', 'uy', 'uz')
@@ -156,6 +162,87 @@ class Hexa20(Element):
                 ('N', 18, 'ux'), ('N', 18, 'uy'), ('N', 18, 'uz'),
                 ('N', 19, 'ux'), ('N', 19, 'uy'), ('N', 19, 'uz'))
 
+    @staticmethod
+    def _N(xi, eta, zeta):
+        """
+        Shape functions at the natural coordinates.
+        """
+        return 1/8*np.array([(eta-1)*(xi-1)*(zeta-1)*(eta+xi+zeta+2),
+                             -(eta-1)*(xi+1)*(zeta-1)*(eta-xi+zeta+2),
+                             -(eta+1)*(xi+1)*(zeta-1)*(eta+xi-zeta-2),
+                             -(eta+1)*(xi-1)*(zeta-1)*(-eta+xi+zeta+2),
+                             -(eta-1)*(xi-1)*(zeta+1)*(eta+xi-zeta+2),
+                             (eta-1)*(xi+1)*(zeta+1)*(eta-xi-zeta+2),
+                             (eta+1)*(xi+1)*(zeta+1)*(eta+xi+zeta-2),
+                             -(eta+1)*(xi-1)*(zeta+1)*(eta-xi+zeta-2),
+                             -2*(eta-1)*(xi**2-1)*(zeta-1),
+                             2*(eta**2-1)*(xi+1)*(zeta-1),
+                             2*(eta+1)*(xi**2-1)*(zeta-1),
+                             -2*(eta**2-1)*(xi-1)*(zeta-1),
+                             2*(eta-1)*(xi**2-1)*(zeta+1),
+                             -2*(eta**2-1)*(xi+1)*(zeta+1),
+                             -2*(eta+1)*(xi**2-1)*(zeta+1),
+                             2*(eta**2-1)*(xi-1)*(zeta+1),
+                             -2*(eta-1)*(xi-1)*(zeta**2-1),
+                             2*(eta-1)*(xi+1)*(zeta**2-1),
+                             -2*(eta+1)*(xi+1)*(zeta**2-1),
+                             2*(eta+1)*(xi-1)*(zeta**2-1)])
+
+    @staticmethod
+    def _dN_dxi(xi, eta, zeta):
+        """
+        Derivatives of the shape functions w.r.t. the natural coordinates.
+        """
+        return 1/8*np.array([
+            [ (eta-1)*(zeta-1)*(eta+2*xi+zeta+1),
+             (xi-1)*(zeta-1)*(2*eta+xi+zeta+1),
+             (eta-1)*(xi-1)*(eta+xi+2*zeta+1)],
+            [(eta-1)*(zeta-1)*(-eta+2*xi-zeta-1),
+             (xi+1)*(zeta-1)*(-2*eta+xi-zeta-1),
+             (eta-1)*(xi+1)*(-eta+xi-2*zeta-1)],
+            [(eta+1)*(zeta-1)*(-eta-2*xi+zeta+1),
+             (xi+1)*(zeta-1)*(-2*eta-xi+zeta+1),
+             (eta+1)*(xi+1)*(-eta-xi+2*zeta+1)],
+            [ (eta+1)*(zeta-1)*(eta-2*xi-zeta-1),
+             (xi-1)*(zeta-1)*(2*eta-xi-zeta-1),
+             (eta+1)*(xi-1)*(eta-xi-2*zeta-1)],
+            [(eta-1)*(zeta+1)*(-eta-2*xi+zeta-1),
+             (xi-1)*(zeta+1)*(-2*eta-xi+zeta-1),
+             (eta-1)*(xi-1)*(-eta-xi+2*zeta-1)],
+            [ (eta-1)*(zeta+1)*(eta-2*xi-zeta+1),
+             (xi+1)*(zeta+1)*(2*eta-xi-zeta+1),
+             (eta-1)*(xi+1)*(eta-xi-2*zeta+1)],
+            [ (eta+1)*(zeta+1)*(eta+2*xi+zeta-1),
+             (xi+1)*(zeta+1)*(2*eta+xi+zeta-1),
+             (eta+1)*(xi+1)*(eta+xi+2*zeta-1)],
+            [(eta+1)*(zeta+1)*(-eta+2*xi-zeta+1),
+             (xi-1)*(zeta+1)*(-2*eta+xi-zeta+1),
+             (eta+1)*(xi-1)*(-eta+xi-2*zeta+1)],
+            [-4*xi*(eta-1)*(zeta-1), -2*(xi**2-1)*(zeta-1),
+             -2*(eta-1)*(xi**2-1)],
+            [ 2*(eta**2-1)*(zeta-1), 4*eta*(xi+1)*(zeta-1),
+             2*(eta**2-1)*(xi+1)],
+            [ 4*xi*(eta+1)*(zeta-1),  2*(xi**2-1)*(zeta-1),
+             2*(eta+1)*(xi**2-1)],
+            [-2*(eta**2-1)*(zeta-1),-4*eta*(xi-1)*(zeta-1),
+             -2*(eta**2-1)*(xi-1)],
+            [ 4*xi*(eta-1)*(zeta+1),  2*(xi**2-1)*(zeta+1),
+             2*(eta-1)*(xi**2-1)],
+            [-2*(eta**2-1)*(zeta+1),-4*eta*(xi+1)*(zeta+1),
+             -2*(eta**2-1)*(xi+1)],
+            [-4*xi*(eta+1)*(zeta+1), -2*(xi**2-1)*(zeta+1),
+             -2*(eta+1)*(xi**2-1)],
+            [ 2*(eta**2-1)*(zeta+1), 4*eta*(xi-1)*(zeta+1),
+             2*(eta**2-1)*(xi-1)],
+            [-2*(eta-1)*(zeta**2-1), -2*(xi-1)*(zeta**2-1),
+             -4*zeta*(eta-1)*(xi-1)],
+            [ 2*(eta-1)*(zeta**2-1),  2*(xi+1)*(zeta**2-1),
+             4*zeta*(eta-1)*(xi+1)],
+            [-2*(eta+1)*(zeta**2-1), -2*(xi+1)*(zeta**2-1),
+             -4*zeta*(eta+1)*(xi+1)],
+            [ 2*(eta+1)*(zeta**2-1),  2*(xi-1)*(zeta**2-1),
+             4*zeta*(eta+1)*(xi-1)]])
+
     def _compute_tensors(self, X, u, t):
         X_mat = X.reshape(20, 3)
         u_mat = u.reshape(20, 3)
@@ -167,55 +254,7 @@ class Hexa20(Element):
 
         for n_gauss, (xi, eta, zeta, w) in enumerate(self.gauss_points):
 
-            dN_dxi = 1/8*np.array([
-                                [ (eta-1)*(zeta-1)*(eta+2*xi+zeta+1),
-                                 (xi-1)*(zeta-1)*(2*eta+xi+zeta+1),
-                                 (eta-1)*(xi-1)*(eta+xi+2*zeta+1)],
-                                [(eta-1)*(zeta-1)*(-eta+2*xi-zeta-1),
-                                 (xi+1)*(zeta-1)*(-2*eta+xi-zeta-1),
-                                 (eta-1)*(xi+1)*(-eta+xi-2*zeta-1)],
-                                [(eta+1)*(zeta-1)*(-eta-2*xi+zeta+1),
-                                 (xi+1)*(zeta-1)*(-2*eta-xi+zeta+1),
-                                 (eta+1)*(xi+1)*(-eta-xi+2*zeta+1)],
-                                [ (eta+1)*(zeta-1)*(eta-2*xi-zeta-1),
-                                 (xi-1)*(zeta-1)*(2*eta-xi-zeta-1),
-                                 (eta+1)*(xi-1)*(eta-xi-2*zeta-1)],
-                                [(eta-1)*(zeta+1)*(-eta-2*xi+zeta-1),
-                                 (xi-1)*(zeta+1)*(-2*eta-xi+zeta-1),
-                                 (eta-1)*(xi-1)*(-eta-xi+2*zeta-1)],
-                                [ (eta-1)*(zeta+1)*(eta-2*xi-zeta+1),
-                                 (xi+1)*(zeta+1)*(2*eta-xi-zeta+1),
-                                 (eta-1)*(xi+1)*(eta-xi-2*zeta+1)],
-                                [ (eta+1)*(zeta+1)*(eta+2*xi+zeta-1),
-                                 (xi+1)*(zeta+1)*(2*eta+xi+zeta-1),
-                                 (eta+1)*(xi+1)*(eta+xi+2*zeta-1)],
-                                [(eta+1)*(zeta+1)*(-eta+2*xi-zeta+1),
-                                 (xi-1)*(zeta+1)*(-2*eta+xi-zeta+1),
-                                 (eta+1)*(xi-1)*(-eta+xi-2*zeta+1)],
-                                [-4*xi*(eta-1)*(zeta-1), -2*(xi**2-1)*(zeta-1),
-                                 -2*(eta-1)*(xi**2-1)],
-                                [ 2*(eta**2-1)*(zeta-1), 4*eta*(xi+1)*(zeta-1),
-                                 2*(eta**2-1)*(xi+1)],
-                                [ 4*xi*(eta+1)*(zeta-1),  2*(xi**2-1)*(zeta-1),
-                                 2*(eta+1)*(xi**2-1)],
-                                [-2*(eta**2-1)*(zeta-1),-4*eta*(xi-1)*(zeta-1),
-                                 -2*(eta**2-1)*(xi-1)],
-                                [ 4*xi*(eta-1)*(zeta+1),  2*(xi**2-1)*(zeta+1),
-                                 2*(eta-1)*(xi**2-1)],
-                                [-2*(eta**2-1)*(zeta+1),-4*eta*(xi+1)*(zeta+1),
-                                 -2*(eta**2-1)*(xi+1)],
-                                [-4*xi*(eta+1)*(zeta+1), -2*(xi**2-1)*(zeta+1),
-                                 -2*(eta+1)*(xi**2-1)],
-                                [ 2*(eta**2-1)*(zeta+1), 4*eta*(xi-1)*(zeta+1),
-                                 2*(eta**2-1)*(xi-1)],
-                                [-2*(eta-1)*(zeta**2-1), -2*(xi-1)*(zeta**2-1),
-                                 -4*zeta*(eta-1)*(xi-1)],
-                                [ 2*(eta-1)*(zeta**2-1),  2*(xi+1)*(zeta**2-1),
-                                 4*zeta*(eta-1)*(xi+1)],
-                                [-2*(eta+1)*(zeta**2-1), -2*(xi+1)*(zeta**2-1),
-                                 -4*zeta*(eta+1)*(xi+1)],
-                                [ 2*(eta+1)*(zeta**2-1),  2*(xi-1)*(zeta**2-1),
-                                 4*zeta*(eta+1)*(xi-1)]])
+            dN_dxi = self._dN_dxi(xi, eta, zeta)
 
             dX_dxi = X_mat.T @ dN_dxi
             dxi_dX = np.linalg.inv(dX_dxi)
@@ -248,81 +287,14 @@ class Hexa20(Element):
         rho = self.material.rho
 
         for n_gauss, (xi, eta, zeta, w) in enumerate(self.gauss_points):
-            N = 1/8*np.array([[  (eta-1)*(xi-1)*(zeta-1)*(eta+xi+zeta+2)],
-                              [ -(eta-1)*(xi+1)*(zeta-1)*(eta-xi+zeta+2)],
-                              [ -(eta+1)*(xi+1)*(zeta-1)*(eta+xi-zeta-2)],
-                              [-(eta+1)*(xi-1)*(zeta-1)*(-eta+xi+zeta+2)],
-                              [ -(eta-1)*(xi-1)*(zeta+1)*(eta+xi-zeta+2)],
-                              [  (eta-1)*(xi+1)*(zeta+1)*(eta-xi-zeta+2)],
-                              [  (eta+1)*(xi+1)*(zeta+1)*(eta+xi+zeta-2)],
-                              [ -(eta+1)*(xi-1)*(zeta+1)*(eta-xi+zeta-2)],
-                              [            -2*(eta-1)*(xi**2-1)*(zeta-1)],
-                              [             2*(eta**2-1)*(xi+1)*(zeta-1)],
-                              [             2*(eta+1)*(xi**2-1)*(zeta-1)],
-                              [            -2*(eta**2-1)*(xi-1)*(zeta-1)],
-                              [             2*(eta-1)*(xi**2-1)*(zeta+1)],
-                              [            -2*(eta**2-1)*(xi+1)*(zeta+1)],
-                              [            -2*(eta+1)*(xi**2-1)*(zeta+1)],
-                              [             2*(eta**2-1)*(xi-1)*(zeta+1)],
-                              [            -2*(eta-1)*(xi-1)*(zeta**2-1)],
-                              [             2*(eta-1)*(xi+1)*(zeta**2-1)],
-                              [            -2*(eta+1)*(xi+1)*(zeta**2-1)],
-                              [             2*(eta+1)*(xi-1)*(zeta**2-1)]])
-
-            dN_dxi = 1/8*np.array([
-                                [ (eta-1)*(zeta-1)*(eta+2*xi+zeta+1),
-                                 (xi-1)*(zeta-1)*(2*eta+xi+zeta+1),
-                                 (eta-1)*(xi-1)*(eta+xi+2*zeta+1)],
-                                [(eta-1)*(zeta-1)*(-eta+2*xi-zeta-1),
-                                 (xi+1)*(zeta-1)*(-2*eta+xi-zeta-1),
-                                 (eta-1)*(xi+1)*(-eta+xi-2*zeta-1)],
-                                [(eta+1)*(zeta-1)*(-eta-2*xi+zeta+1),
-                                 (xi+1)*(zeta-1)*(-2*eta-xi+zeta+1),
-                                 (eta+1)*(xi+1)*(-eta-xi+2*zeta+1)],
-                                [ (eta+1)*(zeta-1)*(eta-2*xi-zeta-1),
-                                 (xi-1)*(zeta-1)*(2*eta-xi-zeta-1),
-                                 (eta+1)*(xi-1)*(eta-xi-2*zeta-1)],
-                                [(eta-1)*(zeta+1)*(-eta-2*xi+zeta-1),
-                                 (xi-1)*(zeta+1)*(-2*eta-xi+zeta-1),
-                                 (eta-1)*(xi-1)*(-eta-xi+2*zeta-1)],
-                                [ (eta-1)*(zeta+1)*(eta-2*xi-zeta+1),
-                                 (xi+1)*(zeta+1)*(2*eta-xi-zeta+1),
-                                 (eta-1)*(xi+1)*(eta-xi-2*zeta+1)],
-                                [ (eta+1)*(zeta+1)*(eta+2*xi+zeta-1),
-                                 (xi+1)*(zeta+1)*(2*eta+xi+zeta-1),
-                                 (eta+1)*(xi+1)*(eta+xi+2*zeta-1)],
-                                [(eta+1)*(zeta+1)*(-eta+2*xi-zeta+1),
-                                 (xi-1)*(zeta+1)*(-2*eta+xi-zeta+1),
-                                 (eta+1)*(xi-1)*(-eta+xi-2*zeta+1)],
-                                [-4*xi*(eta-1)*(zeta-1), -2*(xi**2-1)*(zeta-1),
-                                 -2*(eta-1)*(xi**2-1)],
-                                [ 2*(eta**2-1)*(zeta-1), 4*eta*(xi+1)*(zeta-1),
-                                 2*(eta**2-1)*(xi+1)],
-                                [ 4*xi*(eta+1)*(zeta-1),  2*(xi**2-1)*(zeta-1),
-                                 2*(eta+1)*(xi**2-1)],
-                                [-2*(eta**2-1)*(zeta-1),-4*eta*(xi-1)*(zeta-1),
-                                 -2*(eta**2-1)*(xi-1)],
-                                [ 4*xi*(eta-1)*(zeta+1),  2*(xi**2-1)*(zeta+1),
-                                 2*(eta-1)*(xi**2-1)],
-                                [-2*(eta**2-1)*(zeta+1),-4*eta*(xi+1)*(zeta+1),
-                                 -2*(eta**2-1)*(xi+1)],
-                                [-4*xi*(eta+1)*(zeta+1), -2*(xi**2-1)*(zeta+1),
-                                 -2*(eta+1)*(xi**2-1)],
-                                [ 2*(eta**2-1)*(zeta+1), 4*eta*(xi-1)*(zeta+1),
-                                 2*(eta**2-1)*(xi-1)],
-                                [-2*(eta-1)*(zeta**2-1), -2*(xi-1)*(zeta**2-1),
-                                 -4*zeta*(eta-1)*(xi-1)],
-                                [ 2*(eta-1)*(zeta**2-1),  2*(xi+1)*(zeta**2-1),
-                                 4*zeta*(eta-1)*(xi+1)],
-                                [-2*(eta+1)*(zeta**2-1), -2*(xi+1)*(zeta**2-1),
-                                 -4*zeta*(eta+1)*(xi+1)],
-                                [ 2*(eta+1)*(zeta**2-1),  2*(xi-1)*(zeta**2-1),
-                                 4*zeta*(eta+1)*(xi-1)]])
+            N = self._N(xi, eta, zeta)
+
+            dN_dxi = self._dN_dxi(xi, eta, zeta)
 
             dX_dxi = X_mat.T @ dN_dxi
             det = np.linalg.det(dX_dxi)
 
-            M_small = N @ N.T * det * rho * w
+            M_small = np.outer(N, N) * det * rho * w
             self.M += scatter_matrix(M_small, 3)
 
         return self.M
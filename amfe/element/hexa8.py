@@ -84,6 +84,12 @@ class Hexa8(Element):
                                               [e, d, b, e, b, e, c, b],
                                               [d, e, e, b, e, b, b, c]])
 
+        # shape function derivatives, weights and products N N^T at the gauss points for the batched element routines
+        self.gauss_dN_dxi = np.array([self._dN_dxi(xi, eta, zeta) for xi, eta, zeta, w in self.gauss_points])
+        self.gauss_weights = np.array([w for xi, eta, zeta, w in self.gauss_points])
+        self.gauss_NN = np.array([np.outer(self._N(xi, eta, zeta), self._N(xi, eta, zeta))
+                                  for xi, eta, zeta, w in self.gauss_points])
+
     @staticmethod
     def fields():
         return ('ux', 'uy', 'uz')
@@ -114,6 +120,35 @@ class Hexa8(Element):
                 ('N', 7, 'uy'),
                 ('N', 7, 'uz'))
 
+    @staticmethod
+    def _N(xi, eta, zeta):
+        """
+        Shape functions at the natural coordinates.
+        """
+        return np.array([(-eta + 1)*(-xi + 1)*(-zeta + 1)/8,
+                         (-eta + 1)*(xi + 1)*(-zeta + 1)/8,
+                         (eta + 1)*(xi + 1)*(-zeta + 1)/8,
+                         (eta + 1)*(-xi + 1)*(-zeta + 1)/8,
+                         (-eta + 1)*(-xi + 1)*(zeta + 1)/8,
+                         (-eta + 1)*(xi + 1)*(zeta + 1)/8,
+                         (eta + 1)*(xi + 1)*(zeta + 1)/8,
+                         (eta + 1)*(-xi + 1)*(zeta + 1)/8])
+
+    @staticmethod
+    def _dN_dxi(xi, eta, zeta):
+        """
+        Derivatives of the shape functions w.r.t. the natural coordinates.
+        """
+        return 1/8*np.array([
+            [-(-eta+1)*(-zeta+1), -(-xi+1)*(-zeta+1), -(-eta+1)*(-xi+1)],
+            [ (-eta+1)*(-zeta+1),  -(xi+1)*(-zeta+1),  -(-eta+1)*(xi+1)],
+            [  (eta+1)*(-zeta+1),   (xi+1)*(-zeta+1),   -(eta+1)*(xi+1)],
+            [ -(eta+1)*(-zeta+1),  (-xi+1)*(-zeta+1),  -(eta+1)*(-xi+1)],
+            [ -(-eta+1)*(zeta+1),  -(-xi+1)*(zeta+1),  (-eta+1)*(-xi+1)],
+            [  (-eta+1)*(zeta+1),   -(xi+1)*(zeta+1),   (-eta+1)*(xi+1)],
+            [   (eta+1)*(zeta+1),    (xi+1)*(zeta+1),    (eta+1)*(xi+1)],
+            [  -(eta+1)*(zeta+1),   (-xi+1)*(zeta+1),   (eta+1)*(-xi+1)]])
+
     def _compute_tensors(self, X, u, t):
         X_mat = X.reshape(8, 3)
         u_mat = u.reshape(8, 3)
@@ -125,15 +160,7 @@ class Hexa8(Element):
 
         for n_gauss, (xi, eta, zeta, w) in enumerate(self.gauss_points):
 
-            dN_dxi = 1/8*np.array([
-                [-(-eta+1)*(-zeta+1), -(-xi+1)*(-zeta+1), -(-eta+1)*(-xi+1)],
-                [ (-eta+1)*(-zeta+1),  -(xi+1)*(-zeta+1),  -(-eta+1)*(xi+1)],
-                [  (eta+1)*(-zeta+1),   (xi+1)*(-zeta+1),   -(eta+1)*(xi+1)],
-                [ -(eta+1)*(-zeta+1),  (-xi+1)*(-zeta+1),  -(eta+1)*(-xi+1)],
-                [ -(-eta+1)*(zeta+1),  -(-xi+1)*(zeta+1),  (-eta+1)*(-xi+1)],
-                [  (-eta+1)*(zeta+1),   -(xi+1)*(zeta+1),   (-eta+1)*(xi+1)],
-                [   (eta+1)*(zeta+1),    (xi+1)*(zeta+1),    (eta+1)*(xi+1)],
-                [  -(eta+1)*(zeta+1),   (-xi+1)*(zeta+1),   (eta+1)*(-xi+1)]])
+            dN_dxi = self._dN_dxi(xi, eta, zeta)
             dX_dxi = X_mat.T @ dN_dxi
             dxi_dX = np.linalg.inv(dX_dxi)
             det = np.linalg.det(dX_dxi)
@@ -165,29 +192,13 @@ class Hexa8(Element):
         rho = self.material.rho
 
         for n_gauss, (xi, eta, zeta, w) in enumerate(self.gauss_points):
-            N = np.array([
-                            [(-eta + 1)*(-xi + 1)*(-zeta + 1)/8],
-                            [ (-eta + 1)*(xi + 1)*(-zeta + 1)/8],
-                            [  (eta + 1)*(xi + 1)*(-zeta + 1)/8],
-                            [ (eta + 1)*(-xi + 1)*(-zeta + 1)/8],
-                            [ (-eta + 1)*(-xi + 1)*(zeta + 1)/8],
-                            [  (-eta + 1)*(xi + 1)*(zeta + 1)/8],
-                            [   (eta + 1)*(xi + 1)*(zeta + 1)/8],
-                            [  (eta + 1)*(-xi + 1)*(zeta + 1)/8]])
-
-            dN_dxi = 1/8*np.array([
-                [-(-eta+1)*(-zeta+1), -(-xi+1)*(-zeta+1), -(-eta+1)*(-xi+1)],
-                [ (-eta+1)*(-zeta+1),  -(xi+1)*(-zeta+1),  -(-eta+1)*(xi+1)],
-                [  (eta+1)*(-zeta+1),   (xi+1)*(-zeta+1),   -(eta+1)*(xi+1)],
-                [ -(eta+1)*(-zeta+1),  (-xi+1)*(-zeta+1),  -(eta+1)*(-xi+1)],
-                [ -(-eta+1)*(zeta+1),  -(-xi+1)*(zeta+1),  (-eta+1)*(-xi+1)],
-                [  (-eta+1)*(zeta+1),   -(xi+1)*(zeta+1),   (-eta+1)*(xi+1)],
-                [   (eta+1)*(zeta+1),    (xi+1)*(zeta+1),    (eta+1)*(xi+1)],
-                [  -(eta+1)*(zeta+1),   (-xi+1)*(zeta+1),   (eta+1)*(-xi+1)]])
+            N = self._N(xi, eta, zeta)
+
+            dN_dxi = self._dN_dxi(xi, eta, zeta)
             dX_dxi = X_mat.T @ dN_dxi
             det = np.linalg.det(dX_dxi)
 
-            M_small = N @ N.T * det * rho * w
+            M_small = np.outer(N, N) * det * rho * w
             self.M += scatter_matrix(M_small, 3)
 
         return self.M
@@ -74,6 +74,11 @@ class Quad4(Element):
             [1-np.sqrt(3)/2, -1/2, 1+np.sqrt(3)/2, -1/2],
             [-1/2, 1-np.sqrt(3)/2, -1/2, 1+np.sqrt(3)/2]]).T
 
+        # shape function derivatives, weights and products N N^T at the gauss points for the batched element routines
+        self.gauss_dN_dxi = np.array([self._dN_dxi(xi, eta) for xi, eta, w in self.gauss_points])
+        self.gauss_weights = np.array([w for xi, eta, w in self.gauss_points])
+        self.gauss_NN = np.array([np.outer(self._N(xi, eta), self._N(xi, eta)) for xi, eta, w in self.gauss_points])
+
     @staticmethod
     def fields():
         return ('ux', 'uy')
@@ -88,6 +93,26 @@ class Quad4(Element):
                 ('N', 3, 'ux'),
                 ('N', 3, 'uy'))
 
+    @staticmethod
+    def _N(xi, eta):
+        """
+        Shape functions at the natural coordinates.
+        """
+        return np.array([(-eta + 1)*(-xi + 1)/4,
+                         (-eta + 1)*(xi + 1)/4,
+                         (eta + 1)*(xi + 1)/4,
+                         (eta + 1)*(-xi + 1)/4])
+
+    @staticmethod
+    def _dN_dxi(xi, eta):
+        """
+        Derivatives of the shape functions w.r.t. the natural coordinates.
+        """
+        return np.array([ [ eta/4 - 1/4,  xi/4 - 1/4],
+                          [-eta/4 + 1/4, -xi/4 - 1/4],
+                          [ eta/4 + 1/4,  xi/4 + 1/4],
+                          [-eta/4 - 1/4, -xi/4 + 1/4]])
+
     def _compute_tensors(self, X, u, t):
         """
         Compute the tensors.
@@ -105,10 +130,7 @@ class Quad4(Element):
 
         for n_gauss, (xi, eta, w) in enumerate(self.gauss_points):
 
-            dN_dxi = np.array([ [ eta/4 - 1/4,  xi/4 - 1/4],
-                                [-eta/4 + 1/4, -xi/4 - 1/4],
-                                [ eta/4 + 1/4,  xi/4 + 1/4],
-                                [-eta/4 - 1/4, -xi/4 + 1/4]])
+            dN_dxi = self._dN_dxi(xi, eta)
 
             dX_dxi = X_mat.T @ dN_dxi
             det = dX_dxi[0,0]*dX_dxi[1,1] - dX_dxi[1,0]*dX_dxi[0,1]
@@ -144,11 +166,8 @@ class Quad4(Element):
                        - X2*Y4*eta - X2*Y4*xi - X3*Y1*eta + X3*Y1*xi
                        - X3*Y2*xi - X3*Y2 + X3*Y4*eta + X3*Y4 - X4*Y1*xi
                        + X4*Y1 + X4*Y2*eta + X4*Y2*xi - X4*Y3*eta - X4*Y3)
-            N = np.array([  [(-eta + 1)*(-xi + 1)/4],
-                            [ (-eta + 1)*(xi + 1)/4],
-                            [  (eta + 1)*(xi + 1)/4],
-                            [ (eta + 1)*(-xi + 1)/4]])
-            self.M_small += N.dot(N.T) * det * rho * t * w
+            N = self._N(xi, eta)
+            self.M_small += np.outer(N, N) * det * rho * t * w
 
         self.M = scatter_matrix(self.M_small, 2)
         return self.M
@@ -74,6 +74,11 @@ class Quad8(Element):
          [ 0, 0, 0, 0, -sqrt(15)/6 + 5/6, 0, sqrt(15)/6 + 5/6, 0, -2/3],
          [ 0, 0, 0, 0, 0, -sqrt(15)/6 + 5/6, 0, sqrt(15)/6 + 5/6, -2/3]])
 
+        # shape function derivatives, weights and products N N^T at the gauss points for the batched element routines
+        self.gauss_dN_dxi = np.array([self._dN_dxi(xi, eta) for xi, eta, w in self.gauss_points])
+        self.gauss_weights = np.array([w for xi, eta, w in self.gauss_points])
+        self.gauss_NN = np.array([np.outer(self._N(xi, eta), self._N(xi, eta)) for xi, eta, w in self.gauss_points])
+
     @staticmethod
     def fields():
         return ('ux', 'uy')
@@ -88,6 +93,35 @@ class Quad8(Element):
                 ('N', 6, 'ux'), ('N', 6, 'uy'),
                 ('N', 7, 'ux'), ('N', 7, 'uy'))
 
+    @staticmethod
+    def _N(xi, eta):
+        """
+        Shape functions at the natural coordinates.
+        """
+        return np.array([(-eta + 1)*(-xi + 1)*(-eta - xi - 1)/4,
+                         (-eta + 1)*(xi + 1)*(-eta + xi - 1)/4,
+                         (eta + 1)*(xi + 1)*(eta + xi - 1)/4,
+                         (eta + 1)*(-xi + 1)*(eta - xi - 1)/4,
+                         (-eta + 1)*(-xi**2 + 1)/2,
+                         (-eta**2 + 1)*(xi + 1)/2,
+                         (eta + 1)*(-xi**2 + 1)/2,
+                         (-eta**2 + 1)*(-xi + 1)/2])
+
+    @staticmethod
+    def _dN_dxi(xi, eta):
+        """
+        Derivatives of the shape functions w.r.t. the natural coordinates.
+        """
+        return np.array([
+            [-(eta - 1)*(eta + 2*xi)/4, -(2*eta + xi)*(xi - 1)/4],
+            [ (eta - 1)*(eta - 2*xi)/4,  (2*eta - xi)*(xi + 1)/4],
+            [ (eta + 1)*(eta + 2*xi)/4,  (2*eta + xi)*(xi + 1)/4],
+            [-(eta + 1)*(eta - 2*xi)/4, -(2*eta - xi)*(xi - 1)/4],
+            [             xi*(eta - 1),            xi**2/2 - 1/2],
+            [          -eta**2/2 + 1/2,            -eta*(xi + 1)],
+            [            -xi*(eta + 1),           -xi**2/2 + 1/2],
+            [           eta**2/2 - 1/2,             eta*(xi - 1)]])
+
     def _compute_tensors(self, X, u, t):
         # X1, Y1, X2, Y2, X3, Y3, X4, Y4, X5, Y5, X6, Y6, X7, Y7, X8, Y8 = X
         X_mat = X.reshape(-1, 2)
@@ -102,15 +136,7 @@ class Quad8(Element):
 
         for n_gauss, (xi, eta, w) in enumerate(self.gauss_points):
             # this is now the standard procedure for Total Lagrangian behavior
-            dN_dxi = np.array([
-                [-(eta - 1)*(eta + 2*xi)/4, -(2*eta + xi)*(xi - 1)/4],
-                [ (eta - 1)*(eta - 2*xi)/4,  (2*eta - xi)*(xi + 1)/4],
-                [ (eta + 1)*(eta + 2*xi)/4,  (2*eta + xi)*(xi + 1)/4],
-                [-(eta + 1)*(eta - 2*xi)/4, -(2*eta - xi)*(xi - 1)/4],
-                [             xi*(eta - 1),            xi**2/2 - 1/2],
-                [          -eta**2/2 + 1/2,            -eta*(xi + 1)],
-                [            -xi*(eta + 1),           -xi**2/2 + 1/2],
-                [           eta**2/2 - 1/2,             eta*(xi - 1)]])
+            dN_dxi = self._dN_dxi(xi, eta)
             dX_dxi = X_mat.T @ dN_dxi
             det = dX_dxi[0,0]*dX_dxi[1,1] - dX_dxi[1,0]*dX_dxi[0,1]
             dxi_dX = 1/det*np.array([[ dX_dxi[1,1], -dX_dxi[0,1]],
@@ -144,27 +170,12 @@ class Quad8(Element):
         self.M_small *= 0
 
         for xi, eta, w in self.gauss_points:
-            N = np.array([  [(-eta + 1)*(-xi + 1)*(-eta - xi - 1)/4],
-                            [ (-eta + 1)*(xi + 1)*(-eta + xi - 1)/4],
-                            [   (eta + 1)*(xi + 1)*(eta + xi - 1)/4],
-                            [  (eta + 1)*(-xi + 1)*(eta - xi - 1)/4],
-                            [             (-eta + 1)*(-xi**2 + 1)/2],
-                            [              (-eta**2 + 1)*(xi + 1)/2],
-                            [              (eta + 1)*(-xi**2 + 1)/2],
-                            [             (-eta**2 + 1)*(-xi + 1)/2]])
-
-            dN_dxi = np.array([
-                [-(eta - 1)*(eta + 2*xi)/4, -(2*eta + xi)*(xi - 1)/4],
-                [ (eta - 1)*(eta - 2*xi)/4,  (2*eta - xi)*(xi + 1)/4],
-                [ (eta + 1)*(eta + 2*xi)/4,  (2*eta + xi)*(xi + 1)/4],
-                [-(eta + 1)*(eta - 2*xi)/4, -(2*eta - xi)*(xi - 1)/4],
-                [             xi*(eta - 1),            xi**2/2 - 1/2],
-                [          -eta**2/2 + 1/2,            -eta*(xi + 1)],
-                [            -xi*(eta + 1),           -xi**2/2 + 1/2],
-                [           eta**2/2 - 1/2,             eta*(xi - 1)]])
+            N = self._N(xi, eta)
+
+            dN_dxi = self._dN_dxi(xi, eta)
             dX_dxi = X_mat.T @ dN_dxi
             det = dX_dxi[0,0]*dX_dxi[1,1] - dX_dxi[1,0]*dX_dxi[0,1]
-            self.M_small += N @ N.T * det * rho * t * w
+            self.M_small += np.outer(N, N) * det * rho * t * w
 
         self.M = scatter_matrix(self.M_small, 2)
         return self.M
@@ -91,6 +91,14 @@ class Tet10(Element):
              [c2, c2, c1, c2, m2, m1, m1, m2, m2, m1],
              [c2, c2, c2, c1, m2, m2, m2, m1, m1, m1]]).T
 
+        # shape function derivatives w.r.t. the volume coordinates (L2, L3, L4), weights and products N N^T at the
+        # gauss points for the batched element routines
+        self.gauss_dN_dxi = np.array([self._dN_dL(L1, L2, L3, L4)[:, 1:] - self._dN_dL(L1, L2, L3, L4)[:, :1]
+                                      for L1, L2, L3, L4, w in self.gauss_points])
+        self.gauss_weights = np.array([w/6 for L1, L2, L3, L4, w in self.gauss_points])
+        self.gauss_NN = np.array([np.outer(self._N(L1, L2, L3, L4), self._N(L1, L2, L3, L4))
+                                  for L1, L2, L3, L4, w in self.gauss_points])
+
     @staticmethod
     def fields():
         return ('ux', 'uy', 'uz')
@@ -107,6 +115,38 @@ class Tet10(Element):
                 ('N', 8, 'ux'), ('N', 8, 'uy'), ('N', 8, 'uz'),
                 ('N', 9, 'ux'), ('N', 9, 'uy'), ('N', 9, 'uz'))
 
+    @staticmethod
+    def _N(L1, L2, L3, L4):
+        """
+        Shape functions at the volume coordinates.
+        """
+        return np.array([L1*(2*L1 - 1),
+                         L2*(2*L2 - 1),
+                         L3*(2*L3 - 1),
+                         L4*(2*L4 - 1),
+                         4*L1*L2,
+                         4*L2*L3,
+                         4*L1*L3,
+                         4*L1*L4,
+                         4*L2*L4,
+                         4*L3*L4])
+
+    @staticmethod
+    def _dN_dL(L1, L2, L3, L4):
+        """
+        Derivatives of the shape functions w.r.t. the volume coordinates.
+        """
+        return np.array([[4*L1 - 1,        0,        0,        0],
+                         [       0, 4*L2 - 1,        0,        0],
+                         [       0,        0, 4*L3 - 1,        0],
+                         [       0,        0,        0, 4*L4 - 1],
+                         [    4*L2,     4*L1,        0,        0],
+                         [       0,     4*L3,     4*L2,        0],
+                         [    4*L3,        0,     4*L1,        0],
+                         [    4*L4,        0,        0,     4*L1],
+                         [       0,     4*L4,        0,     4*L2],
+                         [       0,        0,     4*L4,     4*L3]])
+
     def _compute_tensors(self, X, u, t):
 
         X1, Y1, Z1, \
@@ -234,18 +274,8 @@ class Tet10(Element):
                  - Jx3*Jy4*Jz1 + Jx3*Jy4*Jz2 + Jx4*Jy1*Jz2 - Jx4*Jy1*Jz3 \
                  - Jx4*Jy2*Jz1 + Jx4*Jy2*Jz3 + Jx4*Jy3*Jz1 - Jx4*Jy3*Jz2
 
-            N = np.array([  [L1*(2*L1 - 1)],
-                            [L2*(2*L2 - 1)],
-                            [L3*(2*L3 - 1)],
-                            [L4*(2*L4 - 1)],
-                            [      4*L1*L2],
-                            [      4*L2*L3],
-                            [      4*L1*L3],
-                            [      4*L1*L4],
-                            [      4*L2*L4],
-                            [      4*L3*L4]])
-
-            M_small = N.dot(N.T) * det/6 * rho * w
+            N = self._N(L1, L2, L3, L4)
+            M_small = np.outer(N, N) * det/6 * rho * w
             self.M += scatter_matrix(M_small, 3)
         return self.M
 
@@ -41,6 +41,13 @@ class Tet4(Element):
         self.S = np.zeros((4,6))
         self.E = np.zeros((4,6))
 
+        # shape function derivatives w.r.t. the volume coordinates (L2, L3, L4) and the weight of the single gauss
+        # point for k_and_f_int_batch
+        self.gauss_dN_dxi = np.array([[[-1, -1, -1], [1, 0, 0], [0, 1, 0], [0, 0, 1]]], dtype=float)
+        self.gauss_weights = np.array([1/6])
+        # integral of N N^T over the element divided by its volume for the batched mass matrices
+        self.gauss_NN = ((np.ones((4, 4)) + np.eye(4)) / 20)[np.newaxis]
+
     @staticmethod
     def fields():
         return ('ux', 'uy', 'uz')
@@ -11,6 +11,11 @@ Tools for all elements.
 
 __all__ = [
     'compute_B_matrix',
+    'compute_B_matrix_batch',
+    'compute_f_batch',
+    'compute_k_and_f_batch',
+    'compute_m_batch',
+    'compute_reference_geometry_batch',
     'scatter_matrix'
 ]
 
@@ -114,6 +119,207 @@ def compute_B_matrix(B_tilde, F):
     return B
 
 
+def compute_B_matrix_batch(B_tilde, F):
+    """
+    Compute the B-matrices used in Total Lagrangian Finite Elements for a stack of points.
+
+    This is the vectorized counterpart of compute_B_matrix. All leading dimensions of B_tilde and F are broadcast, i.e.
+    the B-matrices of all gauss points of all elements of one shape can be computed in one call.
+
+    Parameters
+    ----------
+    B_tilde : ndarray
+        Spatial derivatives of the shape functions dN_dX, shape: (..., no_of_nodes, no_of_dims)
+    F : ndarray
+        deformation gradients (dx_dX), shape: (..., no_of_dims, no_of_dims)
+
+    Returns
+    -------
+    B : ndarray
+        B matrices such that {delta_E} = B @ {delta_u^e}, shape: (..., no_of_voigt_entries, no_of_nodes*no_of_dims)
+    """
+    no_of_nodes, no_of_dims = B_tilde.shape[-2:]
+    if no_of_dims == 2:
+        voigt_rows = np.array([0, 1, 0])
+        voigt_cols = np.array([0, 1, 1])
+    else:
+        voigt_rows = np.array([0, 1, 2, 1, 2, 0])
+        voigt_cols = np.array([0, 1, 2, 2, 0, 1])
+    # P[..., a, b, i, j] = F[j, a] * dN_i/dX_b
+    P = np.einsum('...ja,...ib->...abij', F, B_tilde)
+    B = P[..., voigt_rows, voigt_cols, :, :]
+    shear = voigt_rows != voigt_cols
+    B[..., shear, :, :] += P[..., voigt_cols[shear], voigt_rows[shear], :, :]
+    return B.reshape(B.shape[:-2] + (no_of_nodes*no_of_dims,))
+
+
+def compute_reference_geometry_batch(dN_dxi, weights, X):
+    """
+    Compute the spatial derivatives of the shape functions and the integration weights in the reference configuration
+    for a batch of isoparametric elements of the same shape.
+
+    These quantities only depend on the undeformed configuration X. Hence, they can be computed once and reused for
+    every evaluation of compute_k_and_f_batch.
+
+    Parameters
+    ----------
+    dN_dxi : ndarray
+        Derivatives of the shape functions w.r.t. the natural coordinates evaluated at the gauss points,
+        shape: (no_of_gauss_points, no_of_nodes, no_of_dims)
+    weights : ndarray
+        Integration weights of the gauss points including the volume factor of the reference element (e.g. 1/6 for
+        tetrahedra), shape: (no_of_gauss_points,)
+    X : ndarray
+        nodal coordinates of the elements, shape: (no_of_elements, no_of_nodes*no_of_dims)
+
+    Returns
+    -------
+    B0_tilde : ndarray
+        Spatial derivatives of the shape functions dN_dX at the gauss points,
+        shape: (no_of_elements, no_of_gauss_points, no_of_nodes, no_of_dims)
+    det_w : ndarray
+        Determinant of the Jacobian dX_dxi times the integration weight at the gauss points,
+        shape: (no_of_elements, no_of_gauss_points)
+    """
+    no_of_elements = X.shape[0]
+    no_of_nodes, no_of_dims = dN_dxi.shape[1:]
+    X_mat = X.reshape(no_of_elements, no_of_nodes, no_of_dims)
+
+    dX_dxi = np.einsum('eni,gnj->egij', X_mat, dN_dxi)
+    det_w = np.linalg.det(dX_dxi) * weights
+    dxi_dX = np.linalg.inv(dX_dxi)
+    B0_tilde = np.einsum('gni,egij->egnj', dN_dxi, dxi_dX)
+    return B0_tilde, det_w
+
+
+def compute_m_batch(gauss_NN, det_w, rho, no_of_dims):
+    """
+    Compute the consistent mass matrices of a batch of isoparametric elements of the same shape from their reference
+    geometry.
+
+    Parameters
+    ----------
+    gauss_NN : ndarray
+        Products N N^T of the shape functions at the gauss points, shape: (no_of_gauss_points, no_of_nodes, no_of_nodes)
+    det_w : ndarray
+        Determinant of the Jacobian times the integration weight at the gauss points, for 2D elements multiplied with
+        the thickness, shape: (no_of_elements, no_of_gauss_points)
+    rho : float
+        density
+    no_of_dims : int
+        number of displacement dofs per node
+
+    Returns
+    -------
+    M : ndarray
+        mass matrices, shape: (no_of_elements, no_of_nodes*no_of_dims, no_of_nodes*no_of_dims)
+    """
+    M_small = rho * np.einsum('eg,gnm->enm', det_w, gauss_NN)
+    M = np.einsum('enm,ij->enimj', M_small, np.eye(no_of_dims))
+    no_of_element_dofs = M_small.shape[1] * no_of_dims
+    return M.reshape(M_small.shape[0], no_of_element_dofs, no_of_element_dofs)
+
+
+def compute_k_and_f_batch(B0_tilde, det_w, u, S_Sv_and_C_batch):
+    """
+    Compute the tangential stiffness matrices and internal force vectors of a batch of isoparametric Total Lagrangian
+    elements of the same shape.
+
+    The deformation gradients, strains and stresses of all elements and all gauss points are evaluated at once, the
+    integration over the gauss points is done by einsum.
+
+    Parameters
+    ----------
+    B0_tilde : ndarray
+        Spatial derivatives of the shape functions dN_dX at the gauss points,
+        shape: (no_of_elements, no_of_gauss_points, no_of_nodes, no_of_dims)
+    det_w : ndarray
+        Determinant of the Jacobian times the integration weight at the gauss points, for 2D elements multiplied with
+        the thickness, shape: (no_of_elements, no_of_gauss_points)
+    u : ndarray
+        nodal displacements of the elements, shape: (no_of_elements, no_of_nodes*no_of_dims)
+    S_Sv_and_C_batch : callable
+        Batched material routine returning S, S_v and C_SE for a stack of Green-Lagrange strain tensors, e.g.
+        material.S_Sv_and_C_batch or material.S_Sv_and_C_2d_batch
+
+    Returns
+    -------
+    K : ndarray
+        tangential stiffness matrices, shape: (no_of_elements, no_of_nodes*no_of_dims, no_of_nodes*no_of_dims)
+    f : ndarray
+        internal nodal force vectors, shape: (no_of_elements, no_of_nodes*no_of_dims)
+
+    See Also
+    --------
+    compute_reference_geometry_batch
+    """
+    no_of_dims = B0_tilde.shape[-1]
+    F, S, S_v, C_SE = _compute_stresses_batch(B0_tilde, u, S_Sv_and_C_batch)
+    B0 = compute_B_matrix_batch(B0_tilde, F)
+
+    K_geo_small = np.einsum('egni,egij,egmj,eg->enm', B0_tilde, S, B0_tilde, det_w, optimize=True)
+    K_geo = np.einsum('enm,ij->enimj', K_geo_small, np.eye(no_of_dims))
+    K_mat = np.einsum('egvi,egvj->eij', B0 * det_w[:, :, None, None], C_SE @ B0)
+    K = K_mat + K_geo.reshape(K_mat.shape)
+    f = np.einsum('egvi,egv->ei', B0, S_v * det_w[:, :, None])
+    return K, f
+
+
+def compute_f_batch(B0_tilde, det_w, u, S_Sv_and_C_batch):
+    """
+    Compute the internal force vectors of a batch of isoparametric Total Lagrangian elements of the same shape without
+    the tangential stiffness matrices.
+
+    Parameters
+    ----------
+    B0_tilde : ndarray
+        Spatial derivatives of the shape functions dN_dX at the gauss points,
+        shape: (no_of_elements, no_of_gauss_points, no_of_nodes, no_of_dims)
+    det_w : ndarray
+        Determinant of the Jacobian times the integration weight at the gauss points, for 2D elements multiplied with
+        the thickness, shape: (no_of_elements, no_of_gauss_points)
+    u : ndarray
+        nodal displacements of the elements, shape: (no_of_elements, no_of_nodes*no_of_dims)
+    S_Sv_and_C_batch : callable
+        Batched material routine returning S, S_v and C_SE for a stack of Green-Lagrange strain tensors, e.g.
+        material.S_Sv_and_C_batch or material.S_Sv_and_C_2d_batch
+
+    Returns
+    -------
+    f : ndarray
+        internal nodal force vectors, shape: (no_of_elements, no_of_nodes*no_of_dims)
+
+    See Also
+    --------
+    compute_k_and_f_batch
+    """
+    F, _, S_v, _ = _compute_stresses_batch(B0_tilde, u, S_Sv_and_C_batch)
+    B0 = compute_B_matrix_batch(B0_tilde, F)
+    return np.einsum('egvi,egv->ei', B0, S_v * det_w[:, :, None])
+
+
+def _compute_stresses_batch(B0_tilde, u, S_Sv_and_C_batch):
+    """
+    Compute the deformation gradients and the stresses at the gauss points of a batch of elements.
+
+    Returns
+    -------
+    F : ndarray
+        deformation gradients, shape: (no_of_elements, no_of_gauss_points, no_of_dims, no_of_dims)
+    S, S_v, C_SE : ndarray
+        results of S_Sv_and_C_batch for the Green-Lagrange strains of F
+    """
+    no_of_elements, _, no_of_nodes, no_of_dims = B0_tilde.shape
+    u_mat = u.reshape(no_of_elements, no_of_nodes, no_of_dims)
+
+    H = np.einsum('eni,egnj->egij', u_mat, B0_tilde)
+    H_T = np.swapaxes(H, -1, -2)
+    F = H + np.eye(no_of_dims)
+    E = 1/2*(H + H_T + H_T @ H)
+    S, S_v, C_SE = S_Sv_and_C_batch(E)
+    return F, S, S_v, C_SE
+
+
 # overloading routines with fortran routines
 if use_fortran:
     compute_B_matrix = amfe.f90_element.compute_b_matrix
@@ -61,6 +61,13 @@ class Tri3(Element):
         self.S = np.zeros((3,6))
         self.E = np.zeros((3,6))
 
+        # shape function derivatives w.r.t. the area coordinates (L2, L3) and the weight of the single gauss point
+        # for k_and_f_int_batch
+        self.gauss_dN_dxi = np.array([[[-1, -1], [1, 0], [0, 1]]], dtype=float)
+        self.gauss_weights = np.array([1/2])
+        # integral of N N^T over the element divided by its area for the batched mass matrices
+        self.gauss_NN = ((np.ones((3, 3)) + np.eye(3)) / 12)[np.newaxis]
+
     @staticmethod
     def fields():
         return ('ux', 'uy')
@@ -78,6 +78,14 @@ class Tri6(Element):
 
         self.gauss_points = self.gauss_points2
 
+        # shape function derivatives w.r.t. the area coordinates (L2, L3), weights and products N N^T at the
+        # gauss points for the batched element routines
+        self.gauss_dN_dxi = np.array([self._dN_dL(L1, L2, L3)[:, 1:] - self._dN_dL(L1, L2, L3)[:, :1]
+                                      for L1, L2, L3, w in self.gauss_points])
+        self.gauss_weights = np.array([w/2 for L1, L2, L3, w in self.gauss_points])
+        self.gauss_NN = np.array([np.outer(self._N(L1, L2, L3), self._N(L1, L2, L3))
+                                  for L1, L2, L3, w in self.gauss_points])
+
     @staticmethod
     def fields():
         return ('ux', 'uy')
@@ -90,6 +98,30 @@ class Tri6(Element):
                 ('N', 4, 'ux'), ('N', 4, 'uy'),
                 ('N', 5, 'ux'), ('N', 5, 'uy'))
 
+    @staticmethod
+    def _N(L1, L2, L3):
+        """
+        Shape functions at the area coordinates.
+        """
+        return np.array([L1*(2*L1 - 1),
+                         L2*(2*L2 - 1),
+                         L3*(2*L3 - 1),
+                         4*L1*L2,
+                         4*L2*L3,
+                         4*L1*L3])
+
+    @staticmethod
+    def _dN_dL(L1, L2, L3):
+        """
+        Derivatives of the shape functions w.r.t. the area coordinates.
+        """
+        return np.array([[4*L1 - 1,        0,        0],
+                         [       0, 4*L2 - 1,        0],
+                         [       0,        0, 4*L3 - 1],
+                         [    4*L2,     4*L1,        0],
+                         [       0,     4*L3,     4*L2],
+                         [    4*L3,        0,     4*L1]])
+
     def _compute_tensors(self, X, u, t):
         """
         Tensor computation the same way as in the Tri3 element
@@ -105,12 +137,7 @@ class Tri6(Element):
         self.S *= 0
         for n_gauss, (L1, L2, L3, w) in enumerate(self.gauss_points):
 
-            dN_dL = np.array([  [4*L1 - 1,        0,        0],
-                                [       0, 4*L2 - 1,        0],
-                                [       0,        0, 4*L3 - 1],
-                                [    4*L2,     4*L1,        0],
-                                [       0,     4*L3,     4*L2],
-                                [    4*L3,        0,     4*L1]])
+            dN_dL = self._dN_dL(L1, L2, L3)
 
             # the entries in the jacobian dX_dL
             Jx1 = 4*L2*X4 + 4*L3*X6 + X1*(4*L1 - 1)
@@ -162,14 +189,8 @@ class Tri6(Element):
 
             det = Jx1*Jy2 - Jx1*Jy3 - Jx2*Jy1 + Jx2*Jy3 + Jx3*Jy1 - Jx3*Jy2
 
-            N = np.array([  [L1*(2*L1 - 1)],
-                            [L2*(2*L2 - 1)],
-                            [L3*(2*L3 - 1)],
-                            [      4*L1*L2],
-                            [      4*L2*L3],
-                            [      4*L1*L3]])
-
-            self.M_small += N.dot(N.T) * det/2 * rho * t * w
+            N = self._N(L1, L2, L3)
+            self.M_small += np.outer(N, N) * det/2 * rho * t * w
 
         self.M = scatter_matrix(self.M_small, 2)
         return self.M
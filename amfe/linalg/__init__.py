@@ -2,4 +2,6 @@ from .linearsolvers import *
 from .eigen import *
 from .norms import *
 from .orth import *
+from .ordering import *
+from .preconditioners import *
 from .MKLutils import *
\ No newline at end of file
@@ -181,22 +181,12 @@ class PardisoWrapper(object):
 
         self.ctypes_dtype = ctypeslib.ndpointer(self.dtype)
 
-        if not isinstance(A, sp.csr_matrix):
-            try:
-                A = A.tocsr()
-            except:
-                raise ValueError('A must be in csr-format or at least convertible to csr format')
-
-        # If A is symmetric, store only the upper triangular portion 
-        if self.mtype in [2, -2, 4, -4, 6]:
-            A = sp.triu(A, format='csr')
-
-        if not A.has_sorted_indices:
-            A.sort_indices()
+        A = self._prepare_matrix(A)
 
-        self.a = A.data
-        self.ia = A.indptr
-        self.ja = A.indices
+        # own copies, such that in place changes of A do not affect the stored matrix
+        self.a = A.data.copy()
+        self.ia = A.indptr.copy()
+        self.ja = A.indices.copy()
 
         self._MKL_a = self.a.ctypes.data_as(self.ctypes_dtype)
         self._MKL_ia = self.ia.ctypes.data_as(POINTER(c_int))
@@ -232,6 +222,69 @@ class PardisoWrapper(object):
         if iparm is not None:
             self.set_iparms(iparm)
 
+    def _prepare_matrix(self, A):
+        """
+        Returns A in the csr format that is passed to pardiso, i.e. sorted indices, 32 bit integer index arrays and
+        only the upper triangular portion for symmetric matrix types
+        """
+        if not isinstance(A, sp.csr_matrix):
+            try:
+                A = A.tocsr()
+            except:
+                raise ValueError('A must be in csr-format or at least convertible to csr format')
+
+        # If A is symmetric, store only the upper triangular portion
+        if self.mtype in [2, -2, 4, -4, 6]:
+            A = sp.triu(A, format='csr')
+
+        if not A.has_sorted_indices:
+            A = A.copy()
+            A.sort_indices()
+
+        return sp.csr_matrix((np.ascontiguousarray(A.data, dtype=self.dtype),
+                              np.ascontiguousarray(A.indices, dtype=np.int32),
+                              np.ascontiguousarray(A.indptr, dtype=np.int32)), shape=A.shape)
+
+    def has_pattern(self, A):
+        """
+        Checks if the matrix A has the same sparsity pattern as the matrix the wrapper has been created for
+
+        Parameters
+        ----------
+        A : scipy.sparse.csr.csr_matrix
+            sparse matrix
+
+        Returns
+        -------
+        flag : bool
+            True if the sparsity patterns are equal
+        """
+        return self._has_prepared_pattern(self._prepare_matrix(A))
+
+    def _has_prepared_pattern(self, A):
+        return A.shape[0] == self.n and np.array_equal(A.indptr, self.ia) and np.array_equal(A.indices, self.ja)
+
+    def update_values(self, A):
+        """
+        Overwrites the values of the stored matrix by the values of A in place
+
+        The sparsity pattern of A must equal the stored pattern. Afterwards a numerical factorization (phase 22) can
+        reuse the symbolic analysis (phase 11) of the stored matrix.
+
+        Parameters
+        ----------
+        A : scipy.sparse.csr.csr_matrix
+            sparse matrix with the same sparsity pattern
+
+        Returns
+        -------
+        None
+        """
+        A = self._prepare_matrix(A)
+        if not self._has_prepared_pattern(A):
+            raise ValueError('The sparsity pattern of A differs from the stored sparsity pattern')
+        np.copyto(self.a, A.data)
+
     def set_mtype(self, mtype):
         if mtype in [1, 3]:
             msg = "mtype = 1/3 - structurally symmetric matrices not supported"
@@ -258,9 +311,21 @@ class PardisoWrapper(object):
         '''
         self.run_pardiso(phase=-1)
 
+    def analyze(self):
+        """
+        Runs the symbolic analysis (reordering and symbolic factorization) of the stored matrix
+        """
+        self.run_pardiso(phase=11)
+
     def factor(self):
         out = self.run_pardiso(phase=12)
 
+    def refactor(self):
+        """
+        Runs the numerical factorization of the stored matrix and reuses the symbolic analysis
+        """
+        self.run_pardiso(phase=22)
+
     def solve(self, rhs):
         x = self.run_pardiso(phase=33, rhs=rhs)
         return x
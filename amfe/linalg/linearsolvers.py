@@ -8,8 +8,8 @@ Module contains linear equation solvers
 """
 
 from scipy.linalg import solve as scipysolve
-from scipy.sparse import csr_matrix, issparse
-from scipy.sparse.linalg import spsolve, cg
+from scipy.sparse import csc_matrix, csr_matrix, issparse
+from scipy.sparse.linalg import spsolve, splu, cg, minres, gmres
 from .lib import PardisoWrapper
 from copy import deepcopy
 import numpy as np
@@ -18,7 +18,11 @@ import logging
 
 __all__ = [
     'ScipySparseLinearSolver',
+    'ScipySparseLULinearSolver',
     'ScipyConjugateGradientLinearSolver',
+    'PreconditionedConjugateGradientLinearSolver',
+    'PreconditionedMinresLinearSolver',
+    'PreconditionedGmresLinearSolver',
     'PardisoLinearSolver',
     'ResidualbasedConjugateGradient',
     'solve_sparse'
@@ -97,6 +101,76 @@ class ScipySparseLinearSolver(LinearSolverBase):
         return x
 
 
+class ScipySparseLULinearSolver(LinearSolverBase):
+    """
+    Scipy Sparse LU Solver that keeps the LU factors of the last factorization
+
+    The factors computed by scipy.sparse.linalg.splu can be reused for further right hand sides,
+    e.g. in modified Newton iterations.
+    """
+    AVAILABLE_OPTIONS = {'permc_spec': 'How to permute the columns of the matrix for sparsity preservation'
+                                       'Allowed Values: NATURAL, MMD_ATA, MMD_AT_PLUS_A, COLAMD',
+                         'diag_pivot_thresh': 'Threshold used for a diagonal entry to be an acceptable pivot',
+                         'options': 'Dictionary with further SuperLU options'
+                         }
+
+    def __init__(self):
+        super().__init__()
+        self._lu = None
+
+    def factorize(self, A, **kwargs):
+        """
+        Computes and stores the LU factorization of A
+
+        Parameters
+        ----------
+        A : {ndarray, sparse_matrix}
+            Matrix A
+        kwargs : dict
+            options passed to scipy.sparse.linalg.splu, see AVAILABLE_OPTIONS
+
+        Returns
+        -------
+        None
+        """
+        self._lu = splu(csc_matrix(A), **kwargs)
+
+    def solve(self, A, b, reuse_factorization=False, **kwargs):
+        """
+        Solve a linear system A x = b
+
+        Parameters
+        ----------
+        A : {ndarray, sparse_matrix}
+            Matrix A
+        b : ndarray
+            right hand side
+        reuse_factorization : bool
+            If True, the factorization of the last call is used without factorizing A again (solve-only mode).
+            The caller is responsible for A being unchanged. If no factorization exists, A is factorized.
+        kwargs : dict
+            options passed to scipy.sparse.linalg.splu, see AVAILABLE_OPTIONS
+
+        Returns
+        -------
+        x : ndarray
+            Solution vector
+        """
+        if not reuse_factorization or self._lu is None:
+            self.factorize(A, **kwargs)
+        return self._lu.solve(np.asarray(b))
+
+    def release(self):
+        """
+        Releases the stored factorization
+
+        Returns
+        -------
+        None
+        """
+        self._lu = None
+
+
 class ScipyConjugateGradientLinearSolver(LinearSolverBase):
     def __init__(self):
         super().__init__()
@@ -131,6 +205,117 @@ class ScipyConjugateGradientLinearSolver(LinearSolverBase):
         return x
 
 
+class PreconditionedKrylovLinearSolverBase(LinearSolverBase):
+    """
+    Base class for preconditioned Krylov subspace solvers
+
+    The preconditioner (see amfe.linalg.preconditioners) is built at the first solve and reused for all further
+    solves, e.g. across Newton iterations and time steps. It is rebuilt if the shape of the matrix changes, if a
+    rebuild is requested or if the iteration does not converge with the reused preconditioner.
+
+    Parameters
+    ----------
+    preconditioner : PreconditionerBase, optional
+        preconditioner, None for an unpreconditioned iteration
+    """
+    def __init__(self, preconditioner=None):
+        super().__init__()
+        self.preconditioner = preconditioner
+        self.info = 0
+        self.logger = logging.getLogger('amfe.linalg.linearsolvers.' + type(self).__name__)
+
+    def solve(self, A, b, x0=None, tol=1e-08, maxiter=None, atol=None, callback=None, rebuild_preconditioner=False):
+        """
+        Solve a linear system A x = b
+
+        Parameters
+        ----------
+        A : {sparse_matrix, dense_matrix, LinearOperator}
+            Matrix A
+        b : ndarray
+            Right hand side
+        x0 : ndarray
+            starting guess for the solution
+        tol, atol : float, optional
+            Tolerances for convergence norm(residual) <= max(tol*norm(b), atol)
+        maxiter : int
+            maximum number of iterations
+        callback : function
+            User-supplied function to call after each iteration.
+            Signature callback(xk), where xk is the current solution vector
+        rebuild_preconditioner : bool
+            flag to force a rebuild of the preconditioner
+
+        Returns
+        -------
+        x : ndarray
+            solution vector
+        """
+        b = np.ravel(b)
+        if atol is None:
+            atol = tol * np.linalg.norm(b)
+        M = None
+        if self.preconditioner is not None:
+            self.preconditioner.update(A, rebuild_preconditioner)
+            M = self.preconditioner.aslinearoperator()
+        x, info = self._iterate(A, b, x0, tol, maxiter, M, callback, atol)
+        if info > 0 and self.preconditioner is not None and not rebuild_preconditioner:
+            # the reused preconditioner may belong to an outdated matrix
+            self.preconditioner.update(A, rebuild=True)
+            x, info = self._iterate(A, b, x, tol, maxiter, self.preconditioner.aslinearoperator(), callback, atol)
+        if info != 0:
+            self.logger.warning('The Krylov solver did not converge (info = {})'.format(info))
+        self.info = info
+        return x
+
+    def _iterate(self, A, b, x0, tol, maxiter, M, callback, atol):
+        """
+        Runs the Krylov iteration with the preconditioner M and returns the solution and the info flag of scipy
+        """
+        raise NotImplementedError('The Krylov iteration has not been implemented for this linear solver')
+
+
+class PreconditionedConjugateGradientLinearSolver(PreconditionedKrylovLinearSolverBase):
+    """
+    Preconditioned conjugate gradient solver for symmetric positive definite systems
+    """
+    def _iterate(self, A, b, x0, tol, maxiter, M, callback, atol):
+        return cg(A, b, x0=x0, tol=tol, maxiter=maxiter, M=M, callback=callback, atol=atol)
+
+
+class PreconditionedMinresLinearSolver(PreconditionedKrylovLinearSolverBase):
+    """
+    Preconditioned MINRES solver for symmetric (indefinite) systems, the preconditioner must be symmetric positive
+    definite
+    """
+    def _iterate(self, A, b, x0, tol, maxiter, M, callback, atol):
+        # minres only provides a relative tolerance
+        norm_b = np.linalg.norm(b)
+        if norm_b > 0.0:
+            tol = max(tol, atol / norm_b)
+        return minres(A, b, x0=x0, tol=tol, maxiter=maxiter, M=M, callback=callback)
+
+
+class PreconditionedGmresLinearSolver(PreconditionedKrylovLinearSolverBase):
+    """
+    Preconditioned restarted GMRES solver for general systems
+
+    Parameters
+    ----------
+    preconditioner : PreconditionerBase, optional
+        preconditioner, None for an unpreconditioned iteration
+    restart : int
+        number of iterations between restarts. Default: 30
+    """
+    def __init__(self, preconditioner=None, restart=30):
+        super().__init__(preconditioner)
+        self.restart = restart
+
+    def _iterate(self, A, b, x0, tol, maxiter, M, callback, atol):
+        return gmres(A, b, x0=x0, tol=tol, restart=self.restart, maxiter=maxiter, M=M, callback=callback,
+                     atol=atol)
+
+
 class PardisoLinearSolver(LinearSolverBase):
 
     MTYPES = {'sym': 1,
@@ -155,8 +340,53 @@ class PardisoLinearSolver(LinearSolverBase):
     def __init__(self):
         super().__init__()
         self.wrapper_class = None
+        self._mtype = None
+        self._iparms = None
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+    def factorize(self, A, mtype='nonsym', **iparms):
+        """
+        Factorizes the matrix A and keeps the factorization for subsequent solves
+
+        The symbolic analysis (pardiso phase 11) is only run if the sparsity pattern, the matrix type or the iparms
+        differ from the ones of the last factorization. Otherwise the values are updated in place and only the
+        numerical factorization (pardiso phase 22) is run.
+
+        Parameters
+        ----------
+        A : csr_matrix or ndarray
+            Matrix A
+        mtype : {'sid', 'sym', 'spd', 'nonsym'}
+            Matrix type (symmetric indefinite, symmetric, symmetric positive definite, nonsymmetric)
+        iparms : dict
+            e.g. {'transposed': 1, 'scaling': 1}
 
-    def solve(self, A, b, mtype='nonsym', **iparms):
+        Returns
+        -------
+        None
+        """
+        A = csr_matrix(A)
+        mtype = self.MTYPES[mtype]
+        iparms = self._parse_iparms(iparms)
+        if self.wrapper_class is not None and mtype == self._mtype and iparms == self._iparms \
+                and self.wrapper_class.has_pattern(A):
+            self.wrapper_class.update_values(A)
+        else:
+            self.release()
+            # Notes:
+            # saddle point problem: use iparms: scaling and maximum_weighted_matching
+            self.wrapper_class = PardisoWrapper(A, mtype=mtype, iparm=iparms)
+            self._mtype = mtype
+            self._iparms = iparms
+            self.wrapper_class.analyze()
+        self.wrapper_class.refactor()
+
+    def solve(self, A, b, mtype='nonsym', reuse_factorization=False, **iparms):
         """
 
         Parameters
@@ -167,6 +397,9 @@ class PardisoLinearSolver(LinearSolverBase):
             Right hand side
         mtype : {'sid', 'sym', 'spd', 'nonsym'}
             Matrix type (symmetric indefinite, symmetric, symmetric positive definite, nonsymmetric)
+        reuse_factorization : bool
+            If True, the factorization of the last call is used without factorizing A again (solve-only mode).
+            The caller is responsible for A being unchanged. If no factorization exists, A is factorized.
         iparms : dict
             e.g. {'transposed': 1, 'scaling': 1}
 
@@ -175,18 +408,23 @@ class PardisoLinearSolver(LinearSolverBase):
         x : ndarray
             solution
         """
-        A = csr_matrix(A)
-        # Notes:
-        # saddle point problem: use iparms: scaling and maximum_weighted_matching
-        self.wrapper_class = PardisoWrapper(A, mtype=self.MTYPES[mtype], iparm=self._parse_iparms(iparms))
-
-        # Notes:
-        # Check if wrapper_class object is already factorized
-        # return self.wrapper_class.solve(b)
-        # Solve in one step
-        x = self.wrapper_class.run_pardiso(13, b)
-        self.wrapper_class.clear()
-        return x
+        if not reuse_factorization or self.wrapper_class is None:
+            self.factorize(A, mtype, **iparms)
+        return self.wrapper_class.solve(b)
+
+    def release(self):
+        """
+        Releases the memory of the stored factorization
+
+        Returns
+        -------
+        None
+        """
+        if self.wrapper_class is not None:
+            self.wrapper_class.clear()
+        self.wrapper_class = None
+        self._mtype = None
+        self._iparms = None
 
     def _parse_iparms(self, iparms):
         return dict([(self.IPARM_DICT[key], iparms[key]) for key in iparms])
@@ -318,6 +556,7 @@ def solve_sparse(A, b, matrix_type='sid'):
         # if use_pardiso:
         solver = PardisoLinearSolver()
         x = solver.solve(A, b, matrix_type)
+        solver.release()
         # else:
         # use scipy solver instead
         # x = spsolve(A, b)
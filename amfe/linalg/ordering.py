@@ -0,0 +1,174 @@
+# Copyright (c) 2018, Lehrstuhl fuer Angewandte Mechanik, Technische
+# Universitaet Muenchen.
+#
+# Distributed under BSD-3-Clause License. See LICENSE-File for more information
+#
+"""
+Module contains fill-reducing orderings of sparse symmetric graphs
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix, diags
+from scipy.sparse.linalg import spilu
+from scipy.sparse.csgraph import connected_components, dijkstra, reverse_cuthill_mckee
+
+
+__all__ = [
+    'reverse_cuthill_mckee_ordering',
+    'minimum_degree_ordering',
+    'nested_dissection_ordering',
+    'compute_ordering'
+]
+
+
+def _symmetric_pattern(graph):
+    """
+    Returns the symmetric pattern of a graph without self loops as csr_matrix with ones as entries
+    """
+    graph = coo_matrix(graph)
+    offdiagonal = graph.row != graph.col
+    rows = np.concatenate((graph.row[offdiagonal], graph.col[offdiagonal]))
+    columns = np.concatenate((graph.col[offdiagonal], graph.row[offdiagonal]))
+    graph = csr_matrix((np.ones(len(rows)), (rows, columns)), shape=graph.shape)
+    graph.data[:] = 1.0
+    return graph
+
+
+def reverse_cuthill_mckee_ordering(graph):
+    """
+    Returns the reverse Cuthill-McKee ordering of a graph
+
+    The ordering reduces the bandwidth of matrices with the sparsity pattern of the graph.
+
+    Parameters
+    ----------
+    graph : scipy.sparse matrix
+        square matrix whose nonzero pattern describes the graph
+
+    Returns
+    -------
+    order : numpy.ndarray
+        vertices in their new order, i.e. order[i] is the old index of the vertex that gets the new index i
+    """
+    graph = _symmetric_pattern(graph)
+    return np.asarray(reverse_cuthill_mckee(graph, symmetric_mode=True), dtype=int)
+
+
+def minimum_degree_ordering(graph):
+    """
+    Returns a minimum degree ordering of a graph
+
+    The ordering is the multiple minimum degree ordering of SuperLU, which is computed on the symmetric pattern of an
+    M-matrix with the pattern of the graph. Only an incomplete factorization that drops all off-diagonal entries is
+    computed along with it.
+
+    Parameters
+    ----------
+    graph : scipy.sparse matrix
+        square matrix whose nonzero pattern describes the graph
+
+    Returns
+    -------
+    order : numpy.ndarray
+        vertices in their new order, i.e. order[i] is the old index of the vertex that gets the new index i
+    """
+    graph = _symmetric_pattern(graph)
+    no_of_vertices = graph.shape[0]
+    if no_of_vertices == 0:
+        return np.zeros(0, dtype=int)
+    # diagonally dominant matrix with the pattern of the graph, hence the diagonal pivots are kept
+    degrees = np.asarray(graph.sum(axis=1)).ravel()
+    matrix = (diags(degrees + 1.0) - graph).tocsc()
+    factorization = spilu(matrix, permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.0, drop_tol=1.0, fill_factor=1.0,
+                          options={'SymmetricMode': True})
+    return np.argsort(factorization.perm_c)
+
+
+def _level_structure_separator(graph):
+    """
+    Returns the parts and the separator of a connected graph that are found by a level structure rooted at a
+    pseudo peripheral vertex
+    """
+    distances = dijkstra(graph, unweighted=True, indices=0)
+    for _ in range(2):
+        root = int(np.argmax(distances))
+        distances = dijkstra(graph, unweighted=True, indices=root)
+    levels = distances.astype(int)
+    no_of_levels = levels.max() + 1
+    if no_of_levels < 3:
+        return None
+    cumulated = np.cumsum(np.bincount(levels, minlength=no_of_levels))
+    separator_level = int(np.searchsorted(cumulated, graph.shape[0] / 2))
+    separator_level = min(max(separator_level, 1), no_of_levels - 2)
+    first = np.flatnonzero(levels < separator_level)
+    second = np.flatnonzero(levels > separator_level)
+    separator = np.flatnonzero(levels == separator_level)
+    return first, second, separator
+
+
+def _nested_dissection(graph, vertices, leaf_size):
+    if len(vertices) <= leaf_size:
+        return vertices[reverse_cuthill_mckee_ordering(graph)]
+    no_of_components, labels = connected_components(graph, directed=False)
+    if no_of_components > 1:
+        orders = []
+        for component in range(no_of_components):
+            subvertices = np.flatnonzero(labels == component)
+            orders.append(_nested_dissection(graph[subvertices][:, subvertices], vertices[subvertices], leaf_size))
+        return np.concatenate(orders)
+    partition = _level_structure_separator(graph)
+    if partition is None:
+        return vertices[reverse_cuthill_mckee_ordering(graph)]
+    orders = [_nested_dissection(graph[part][:, part], vertices[part], leaf_size) for part in partition[:2]]
+    # the separator is numbered last
+    orders.append(vertices[partition[2]])
+    return np.concatenate(orders)
+
+
+def nested_dissection_ordering(graph, leaf_size=64):
+    """
+    Returns a nested dissection ordering of a graph
+
+    The graph is bisected recursively by level structure separators which are numbered after the two parts they
+    separate. Parts with at most leaf_size vertices are ordered by reverse Cuthill-McKee.
+
+    Parameters
+    ----------
+    graph : scipy.sparse matrix
+        square matrix whose nonzero pattern describes the graph
+    leaf_size : int
+        maximum number of vertices of a part that is not dissected any further
+
+    Returns
+    -------
+    order : numpy.ndarray
+        vertices in their new order, i.e. order[i] is the old index of the vertex that gets the new index i
+    """
+    graph = _symmetric_pattern(graph)
+    return _nested_dissection(graph, np.arange(graph.shape[0]), leaf_size)
+
+
+def compute_ordering(graph, method='rcm'):
+    """
+    Returns a fill-reducing ordering of a graph
+
+    Parameters
+    ----------
+    graph : scipy.sparse matrix
+        square matrix whose nonzero pattern describes the graph
+    method : str {'rcm', 'minimum_degree', 'nested_dissection'}
+        ordering algorithm: reverse Cuthill-McKee, minimum degree or nested dissection
+
+    Returns
+    -------
+    order : numpy.ndarray
+        vertices in their new order, i.e. order[i] is the old index of the vertex that gets the new index i
+    """
+    if method == 'rcm':
+        return reverse_cuthill_mckee_ordering(graph)
+    elif method == 'minimum_degree':
+        return minimum_degree_ordering(graph)
+    elif method == 'nested_dissection':
+        return nested_dissection_ordering(graph)
+    else:
+        raise ValueError('Unknown ordering method {}. Use rcm, minimum_degree or nested_dissection'.format(method))
@@ -0,0 +1,454 @@
+# Copyright (c) 2018, Lehrstuhl fuer Angewandte Mechanik, Technische
+# Universitaet Muenchen.
+#
+# Distributed under BSD-3-Clause License. See LICENSE-File for more information
+#
+"""
+Module contains preconditioners for iterative linear solvers
+
+All preconditioners are built once by update(A) and reused for further matrices until a rebuild is requested, e.g.
+across Newton iterations and time steps.
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, diags
+from scipy.sparse.linalg import LinearOperator, spilu, splu
+
+
+__all__ = [
+    'JacobiPreconditioner',
+    'BlockJacobiPreconditioner',
+    'ILUPreconditioner',
+    'SmoothedAggregationPreconditioner',
+    'rigid_body_modes',
+]
+
+
+def rigid_body_modes(nodes, nodal_dofs=None, no_of_dofs=None):
+    """
+    Returns the rigid body modes of a structure with nodal displacement dofs
+
+    Parameters
+    ----------
+    nodes : numpy.ndarray
+        nodal coordinates, shape (no_of_nodes, dimension) with dimension 2 or 3
+    nodal_dofs : numpy.ndarray, optional
+        global dof indices of the displacements of each node, shape (no_of_nodes, dimension), -1 for unmapped dofs,
+        e.g. component.mapping.get_dofs_by_nodeids(component.mesh.nodes_df.index, ('ux', 'uy', 'uz')).
+        Default: the dofs are numbered node by node
+    no_of_dofs : int, optional
+        number of global dofs. Default: largest index of nodal_dofs plus one
+
+    Returns
+    -------
+    modes : numpy.ndarray
+        rigid body modes, shape (no_of_dofs, 3) in 2D and (no_of_dofs, 6) in 3D
+    """
+    nodes = np.asarray(nodes, dtype=float)
+    no_of_nodes, dimension = nodes.shape
+    if nodal_dofs is None:
+        nodal_dofs = np.arange(no_of_nodes * dimension).reshape(no_of_nodes, dimension)
+    nodal_dofs = np.asarray(nodal_dofs, dtype=int)
+    if no_of_dofs is None:
+        no_of_dofs = nodal_dofs.max() + 1
+    # centered coordinates improve the conditioning of the rotational modes
+    x = nodes - nodes.mean(axis=0)
+    nodal_modes = np.zeros((no_of_nodes, dimension, 3 if dimension == 2 else 6))
+    nodal_modes[:, range(dimension), range(dimension)] = 1.0
+    if dimension == 2:
+        nodal_modes[:, 0, 2] = -x[:, 1]
+        nodal_modes[:, 1, 2] = x[:, 0]
+    elif dimension == 3:
+        nodal_modes[:, 1, 3], nodal_modes[:, 2, 3] = -x[:, 2], x[:, 1]
+        nodal_modes[:, 0, 4], nodal_modes[:, 2, 4] = x[:, 2], -x[:, 0]
+        nodal_modes[:, 0, 5], nodal_modes[:, 1, 5] = -x[:, 1], x[:, 0]
+    else:
+        raise ValueError('Rigid body modes are only defined for dimension 2 or 3')
+    mapped = nodal_dofs >= 0
+    modes = np.zeros((no_of_dofs, nodal_modes.shape[2]))
+    modes[nodal_dofs[mapped]] = nodal_modes[mapped]
+    return modes
+
+
+def _consecutive_blocks(no_of_dofs, block_size):
+    """
+    Returns blocks of block_size consecutive dofs, the last block is padded with -1
+    """
+    no_of_blocks = -(-no_of_dofs // block_size)
+    blocks = np.arange(no_of_blocks * block_size).reshape(no_of_blocks, block_size)
+    blocks[blocks >= no_of_dofs] = -1
+    return blocks
+
+
+def _row_max(S, values, empty):
+    """
+    Returns the maximum of values over the column indices of each row of the csr_matrix S, empty for empty rows
+    """
+    result = np.full(S.shape[0], empty, dtype=np.asarray(values).dtype)
+    nonempty = np.diff(S.indptr) > 0
+    if np.any(nonempty):
+        result[nonempty] = np.maximum.reduceat(values[S.indices], S.indptr[:-1][nonempty])
+    return result
+
+
+def _inverse_diagonal(A):
+    """
+    Returns the inverse of the diagonal of A, zero diagonal entries are treated as ones
+    """
+    diagonal = np.asarray(A.diagonal(), dtype=float)
+    diagonal[diagonal == 0.0] = 1.0
+    return 1.0 / diagonal
+
+
+class PreconditionerBase:
+    """
+    Base class for preconditioners M which approximate the inverse of a matrix A
+    """
+    def __init__(self):
+        self.shape = None
+        self.no_of_builds = 0
+
+    @property
+    def built(self):
+        return self.shape is not None
+
+    def update(self, A, rebuild=False):
+        """
+        Builds the preconditioner for A if it has not been built yet, if the shape of A has changed or if a
+        rebuild is requested. Otherwise the former preconditioner is reused.
+
+        Parameters
+        ----------
+        A : {ndarray, sparse_matrix}
+            Matrix A
+        rebuild : bool
+            flag to force a rebuild
+
+        Returns
+        -------
+        None
+        """
+        if rebuild or not self.built or A.shape != self.shape:
+            self._build(A)
+            self.shape = A.shape
+            self.no_of_builds += 1
+
+    def release(self):
+        """
+        Releases the preconditioner, the next update builds it again
+        """
+        self.shape = None
+
+    def solve(self, r):
+        """
+        Applies the preconditioner M to the vector r
+
+        Parameters
+        ----------
+        r : ndarray
+            vector, e.g. residual
+
+        Returns
+        -------
+        z : ndarray
+            M r
+        """
+        raise NotImplementedError('The solve method has not been implemented for this preconditioner')
+
+    def aslinearoperator(self):
+        """
+        Returns the preconditioner as scipy.sparse.linalg.LinearOperator
+        """
+        return LinearOperator(self.shape, matvec=self.solve, dtype=float)
+
+    def _build(self, A):
+        raise NotImplementedError('The build of this preconditioner has not been implemented')
+
+
+class JacobiPreconditioner(PreconditionerBase):
+    """
+    Jacobi (diagonal) preconditioner
+    """
+    def __init__(self):
+        super().__init__()
+        self._inverse_diagonal = None
+
+    def _build(self, A):
+        self._inverse_diagonal = _inverse_diagonal(A)
+
+    def solve(self, r):
+        return self._inverse_diagonal * np.ravel(r)
+
+
+class BlockJacobiPreconditioner(PreconditionerBase):
+    """
+    Block Jacobi preconditioner, e.g. with the 3x3 blocks of the nodal displacements in 3D
+
+    Parameters
+    ----------
+    block_size : int
+        size of the blocks of consecutive dofs. Default: 3
+    blocks : numpy.ndarray, optional
+        dof indices of each block, shape (no_of_blocks, block_size), -1 for missing dofs, e.g. the nodal dofs of a
+        mapping. Dofs that are not contained in any block are treated by a Jacobi preconditioner.
+        Default: blocks of block_size consecutive dofs
+    """
+    def __init__(self, block_size=3, blocks=None):
+        super().__init__()
+        self.block_size = block_size
+        self.blocks = blocks
+        self._blocks = None
+        self._inverse_blocks = None
+        self._inverse_diagonal = None
+
+    def _build(self, A):
+        no_of_dofs = A.shape[0]
+        if self.blocks is None:
+            blocks = _consecutive_blocks(no_of_dofs, self.block_size)
+        else:
+            blocks = np.asarray(self.blocks, dtype=int)
+        no_of_blocks, block_size = blocks.shape
+        mapped = blocks >= 0
+        block_of_dof = np.full(no_of_dofs, -1, dtype=int)
+        local_of_dof = np.zeros(no_of_dofs, dtype=int)
+        block_of_dof[blocks[mapped]] = np.nonzero(mapped)[0]
+        local_of_dof[blocks[mapped]] = np.nonzero(mapped)[1]
+
+        A = coo_matrix(A)
+        in_block = (block_of_dof[A.row] == block_of_dof[A.col]) & (block_of_dof[A.row] >= 0)
+        block_matrices = np.zeros((no_of_blocks, block_size, block_size))
+        np.add.at(block_matrices, (block_of_dof[A.row[in_block]], local_of_dof[A.row[in_block]],
+                                   local_of_dof[A.col[in_block]]), A.data[in_block])
+        # padded positions are decoupled identities
+        unmapped_blocks, unmapped_locals = np.nonzero(~mapped)
+        block_matrices[unmapped_blocks, unmapped_locals, unmapped_locals] = 1.0
+
+        self._blocks = np.where(mapped, blocks, no_of_dofs)
+        self._inverse_blocks = np.linalg.inv(block_matrices)
+        self._inverse_diagonal = _inverse_diagonal(A)
+        self._inverse_diagonal[block_of_dof >= 0] = 0.0
+
+    def solve(self, r):
+        r = np.ravel(r)
+        # the padded positions refer to an additional zero entry
+        r_blocks = np.append(r, 0.0)[self._blocks]
+        z = self._inverse_diagonal * r
+        z_blocks = np.einsum('bij,bj->bi', self._inverse_blocks, r_blocks)
+        z = np.append(z, 0.0)
+        z[self._blocks] += z_blocks
+        return z[:-1]
+
+
+class ILUPreconditioner(PreconditionerBase):
+    """
+    Incomplete LU preconditioner based on scipy.sparse.linalg.spilu
+
+    Parameters
+    ----------
+    drop_tol : float
+        drop tolerance of the incomplete factorization. Default: 1e-4
+    fill_factor : float
+        upper bound of the ratio of the number of nonzeros of the factors and of A. Default: 10
+    kwargs : dict
+        further options passed to scipy.sparse.linalg.spilu
+    """
+    def __init__(self, drop_tol=1e-4, fill_factor=10, **kwargs):
+        super().__init__()
+        self.drop_tol = drop_tol
+        self.fill_factor = fill_factor
+        self.kwargs = kwargs
+        self._ilu = None
+
+    def _build(self, A):
+        self._ilu = spilu(csc_matrix(A), drop_tol=self.drop_tol, fill_factor=self.fill_factor, **self.kwargs)
+
+    def solve(self, r):
+        return self._ilu.solve(np.ravel(r))
+
+
+class SmoothedAggregationPreconditioner(PreconditionerBase):
+    """
+    Smoothed aggregation algebraic multigrid preconditioner, applied as one V-cycle
+
+    The nodes are aggregated by means of the strength of the couplings of the nodal blocks of A. The tentative
+    prolongator of each aggregate is an orthonormal basis of the near nullspace (e.g. the rigid body modes) restricted
+    to the aggregate. It is smoothed by one damped Jacobi step. Damped Jacobi smoothing before and after the coarse
+    grid correction keeps the preconditioner symmetric, such that it can be used with the CG method.
+
+    Parameters
+    ----------
+    near_nullspace : numpy.ndarray, optional
+        near nullspace of A, e.g. the rigid body modes, see rigid_body_modes. For a system created from a structural
+        component use amfe.solver.create_near_nullspace_from_component, which returns the near nullspace and the
+        nodal_dofs of the system. Default: the translations of the nodal blocks
+    nodal_dofs : numpy.ndarray, optional
+        dof indices of each node, shape (no_of_nodes, block_size), -1 for missing dofs.
+        Default: nodes of block_size consecutive dofs, which do not fit 2D meshes or eliminated constraints
+    block_size : int
+        number of dofs per node if nodal_dofs is not given. Default: 3
+    theta : float
+        strength of connection threshold: nodes i, j are strongly coupled if
+        norm(A_ij) > theta * sqrt(norm(A_ii) * norm(A_jj)). Default: 0.0
+    max_coarse : int
+        maximum number of dofs on the coarsest level, which is solved directly. Default: 500
+    max_levels : int
+        maximum number of levels. Default: 10
+    """
+    def __init__(self, near_nullspace=None, nodal_dofs=None, block_size=3, theta=0.0, max_coarse=500,
+                 max_levels=10):
+        super().__init__()
+        self.near_nullspace = near_nullspace
+        self.nodal_dofs = nodal_dofs
+        self.block_size = block_size
+        self.theta = theta
+        self.max_coarse = max_coarse
+        self.max_levels = max_levels
+        self._levels = []
+        self._coarse_solver = None
+
+    @property
+    def no_of_levels(self):
+        return len(self._levels) + 1
+
+    def _build(self, A):
+        A = csr_matrix(A, dtype=float)
+        no_of_dofs = A.shape[0]
+        if self.nodal_dofs is None:
+            nodal_dofs = _consecutive_blocks(no_of_dofs, self.block_size)
+        else:
+            nodal_dofs = np.asarray(self.nodal_dofs, dtype=int)
+        if self.near_nullspace is None:
+            B = np.zeros((no_of_dofs, nodal_dofs.shape[1]))
+            nodes, components = np.nonzero(nodal_dofs >= 0)
+            B[nodal_dofs[nodes, components], components] = 1.0
+        else:
+            B = np.asarray(self.near_nullspace, dtype=float)
+
+        self._levels = []
+        while A.shape[0] > self.max_coarse and len(self._levels) < self.max_levels - 1:
+            aggregates, no_of_aggregates = self._aggregate(A, nodal_dofs)
+            P_tentative, B_coarse = self._tentative_prolongator(nodal_dofs, aggregates, no_of_aggregates, B,
+                                                                A.shape[0])
+            if P_tentative.shape[1] >= A.shape[0]:
+                break
+            inverse_diagonal = _inverse_diagonal(A)
+            omega = 4.0 / (3.0 * self._spectral_radius(A, inverse_diagonal))
+            P = P_tentative - omega * diags(inverse_diagonal).dot(A.dot(P_tentative))
+            P = csr_matrix(P)
+            A_coarse = csr_matrix(P.T.dot(A.dot(P)))
+            # coarse dofs without support (aggregates smaller than the near nullspace) are decoupled identities
+            A_coarse = A_coarse + diags((A_coarse.diagonal() == 0.0).astype(float))
+            self._levels.append((A, P, omega * inverse_diagonal))
+            A = csr_matrix(A_coarse)
+            B = B_coarse
+            nodal_dofs = np.arange(A.shape[0]).reshape(no_of_aggregates, B.shape[1])
+        self._coarse_solver = splu(csc_matrix(A))
+
+    def _aggregate(self, A, nodal_dofs):
+        """
+        Returns the aggregate of each node and the number of aggregates
+        """
+        no_of_nodes = nodal_dofs.shape[0]
+        node_of_dof = np.full(A.shape[0], -1, dtype=int)
+        mapped = nodal_dofs >= 0
+        node_of_dof[nodal_dofs[mapped]] = np.nonzero(mapped)[0]
+        A = coo_matrix(A)
+        coupled = (node_of_dof[A.row] >= 0) & (node_of_dof[A.col] >= 0)
+        S = csr_matrix((A.data[coupled] ** 2, (node_of_dof[A.row[coupled]], node_of_dof[A.col[coupled]])),
+                       shape=(no_of_nodes, no_of_nodes))
+        S.sum_duplicates()
+        S.data = np.sqrt(S.data)
+        diagonal = S.diagonal()
+        S = coo_matrix(S)
+        strong = (S.row != S.col) & (S.data > self.theta * np.sqrt(diagonal[S.row] * diagonal[S.col]))
+        S = csr_matrix((np.ones(np.count_nonzero(strong)), (S.row[strong], S.col[strong])),
+                       shape=(no_of_nodes, no_of_nodes))
+        S = csr_matrix(S + S.T)
+        S.data[:] = 1.0
+
+        # pass 1: the roots of the aggregates are a maximal independent set of the graph of the nodes with distance
+        # at most two, they form an aggregate with their neighbours
+        roots = self._distance_two_independent_set(S)
+        aggregates = np.full(no_of_nodes, -1, dtype=int)
+        aggregates[roots] = np.arange(np.count_nonzero(roots))
+        no_of_aggregates = np.count_nonzero(roots)
+        aggregates = np.where(roots, aggregates, _row_max(S, aggregates, -1))
+        # pass 2: the remaining nodes join an aggregate of a neighbour
+        aggregates = np.where(aggregates >= 0, aggregates, _row_max(S, aggregates, -1))
+        # pass 3: isolated nodes form aggregates of their own
+        isolated = np.flatnonzero(aggregates < 0)
+        aggregates[isolated] = no_of_aggregates + np.arange(len(isolated))
+        no_of_aggregates += len(isolated)
+        return aggregates, no_of_aggregates
+
+    @staticmethod
+    def _distance_two_independent_set(S):
+        """
+        Returns a maximal independent set of the graph with the nodes of distance at most two in S as boolean mask
+
+        In every round of the Luby type algorithm, all undecided nodes whose random weight is larger than the weights
+        of their undecided neighbours are selected at once.
+        """
+        no_of_nodes = S.shape[0]
+        S2 = S + S.dot(S)
+        S2 = csr_matrix(S2 - diags(S2.diagonal()))
+        S2.eliminate_zeros()
+        weights = np.random.RandomState(0).permutation(no_of_nodes) + 1
+        selected = np.zeros(no_of_nodes, dtype=bool)
+        undecided = np.ones(no_of_nodes, dtype=bool)
+        while np.any(undecided):
+            undecided_weights = np.where(undecided, weights, 0)
+            new = undecided & (undecided_weights > _row_max(S2, undecided_weights, 0))
+            selected |= new
+            undecided &= ~new & (S2.dot(new.astype(float)) == 0.0)
+        return selected
+
+    @staticmethod
+    def _tentative_prolongator(nodal_dofs, aggregates, no_of_aggregates, B, no_of_dofs):
+        """
+        Returns the tentative prolongator and the near nullspace on the coarse level
+        """
+        no_of_modes = B.shape[1]
+        order = np.argsort(aggregates, kind='mergesort')
+        bounds = np.searchsorted(aggregates[order], np.arange(no_of_aggregates + 1))
+        rows = []
+        columns = []
+        values = []
+        B_coarse = np.zeros((no_of_aggregates * no_of_modes, no_of_modes))
+        for aggregate in range(no_of_aggregates):
+            dofs = nodal_dofs[order[bounds[aggregate]:bounds[aggregate+1]]].ravel()
+            dofs = dofs[dofs >= 0]
+            Q, R = np.linalg.qr(B[dofs])
+            rank = Q.shape[1]
+            rows.append(np.repeat(dofs, rank))
+            columns.append(np.tile(aggregate * no_of_modes + np.arange(rank), len(dofs)))
+            values.append(Q.ravel())
+            B_coarse[aggregate * no_of_modes:aggregate * no_of_modes + rank] = R
+        P = csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+                       shape=(no_of_dofs, no_of_aggregates * no_of_modes))
+        return P, B_coarse
+
+    @staticmethod
+    def _spectral_radius(A, inverse_diagonal, iterations=15):
+        """
+        Estimates the spectral radius of D^-1 A by power iterations
+        """
+        x = np.random.RandomState(0).rand(A.shape[0])
+        rho = 1.0
+        for _ in range(iterations):
+            y = inverse_diagonal * A.dot(x)
+            rho = np.linalg.norm(y) / np.linalg.norm(x)
+            x = y / np.linalg.norm(y)
+        return rho
+
+    def solve(self, r):
+        return self._cycle(0, np.ravel(r))
+
+    def _cycle(self, level, b):
+        if level == len(self._levels):
+            return self._coarse_solver.solve(b)
+        A, P, smoother = self._levels[level]
+        x = smoother * b
+        x += P.dot(self._cycle(level + 1, P.T.dot(b - A.dot(x))))
+        x += smoother * (b - A.dot(x))
+        return x
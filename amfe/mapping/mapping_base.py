@@ -8,19 +8,48 @@ from abc import ABC, abstractmethod
 
 import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix
+
+from amfe.linalg.ordering import compute_ordering
 
 __all__ = ['MappingBase']
 
 
 class MappingBase(ABC):
-    def __init__(self):
+    def __init__(self, ordering=None):
+        """
+        Parameters
+        ----------
+        ordering : str or None
+            fill-reducing ordering {'rcm', 'minimum_degree', 'nested_dissection'} that is applied to the global dofs
+            after each update of the mapping. None keeps the numbering of the mapping algorithm.
+        """
         self._nodal2global = None
+        self._ordering = ordering
 
         self._elements2global = pd.DataFrame({'global_dofs': []})
+        self._elements2global_blocks = []
+        self._no_of_dofs = None
 
     @property
     def no_of_dofs(self):
-        return len(np.unique(np.concatenate(self._elements2global['global_dofs'].values)))
+        if self._no_of_dofs is None:
+            self._no_of_dofs = len(np.unique(np.concatenate(self._elements2global['global_dofs'].values)))
+        return self._no_of_dofs
+
+    @property
+    def ordering(self):
+        """
+        Fill-reducing ordering of the global dofs that is applied in update_mapping.
+
+        Setting it takes effect at the next update of the mapping. Use the ordering property of the component to
+        renumber the dofs of an assembled component immediately.
+        """
+        return self._ordering
+
+    @ordering.setter
+    def ordering(self, ordering):
+        self._ordering = ordering
 
     @property
     def nodal2global(self):
@@ -37,6 +66,21 @@ class MappingBase(ABC):
     @elements2global.setter
     def elements2global(self, elements2global):
         self._elements2global = elements2global
+        self._elements2global_blocks = []
+        self._no_of_dofs = None
+
+    @property
+    def elements2global_blocks(self):
+        """
+        Global dofs of the elements grouped by their dof layout
+
+        Returns
+        -------
+        blocks : list of tuple
+            list of tuples (ids, global_dofs) where ids is an array with the mapping ids of the elements of one dof
+            layout and global_dofs is a dense int array of shape (no_of_elements, no_of_element_dofs)
+        """
+        return self._elements2global_blocks
 
     def get_dofs_by_ids(self, ids):
         return self._elements2global.loc[ids, 'global_dofs'].values
@@ -80,10 +124,11 @@ class MappingBase(ABC):
             iterable containing the dofs as strings per element
             e.g. [(('N', 0, 'ux'), ('N', 0, 'uy'), ('E', 0, 'T'), ('N', 1, 'ux')), ( ..same for 2nd element ), ... )
         callbacks : list
-            callback function with signature void: callback(int: id, *args) for writing the information about the mapping id
-            that has been inserted in the dataframe of the mapping class
-        callbackargs : list of lists
-            lists containing arguments that are passd to the callbackfunction as *args
+            callback function per element with signature void: callback(ndarray: ids, ndarray: args) for writing the
+            information about the mapping ids that have been inserted in the dataframe of the mapping class.
+            Each distinct callback is called once with the ids and args of all elements it is associated with
+        callbackargs : list
+            arguments that are passed to the callbackfunction (one per element)
         kwargs : dict
             keyword value list for future implementations
 
@@ -92,6 +137,75 @@ class MappingBase(ABC):
         None
         """
         self._set_standard_mapping(fields, nodeids, connectivity, dofs_by_element, callbacks, callbackargs, **kwargs)
+        if self._ordering is not None:
+            self.reorder(self._ordering)
+
+    def reorder(self, method='rcm'):
+        """
+        Renumber the global dofs by a fill-reducing ordering of the nodal graph of the elements
+
+        The ordering is computed for the nodes, such that the dofs of a node stay consecutive. The permutation is
+        applied to nodal2global and elements2global, thus every quantity that is assembled or evaluated by means of
+        the mapping follows the new numbering. Quantities that store global dofs outside of the mapping, like the
+        dofs of constraints, must be renumbered with the returned new_dofs. For the mapping of a component use the
+        reorder method of the component, which renumbers its constraints and renews its preallocated matrices as well.
+
+        Parameters
+        ----------
+        method : str {'rcm', 'minimum_degree', 'nested_dissection'}
+            ordering algorithm: reverse Cuthill-McKee, minimum degree or nested dissection
+
+        Returns
+        -------
+        new_dofs : ndarray
+            new global dof of each old global dof, i.e. u_new[new_dofs] = u_old
+        """
+        nodal2global = self._nodal2global.values
+        element_dofs = self._elements2global['global_dofs'].values
+        no_of_dofs = self.no_of_dofs
+        if no_of_dofs == 0:
+            return np.zeros(0, dtype=int)
+
+        # nodal graph of the elements from the element node incidence
+        mapped = nodal2global >= 0
+        dof2node = np.empty(no_of_dofs, dtype=int)
+        dof2node[nodal2global[mapped]] = np.nonzero(mapped)[0]
+        no_of_element_dofs = np.fromiter(map(len, element_dofs), dtype=int, count=len(element_dofs))
+        rows = np.repeat(np.arange(len(element_dofs)), no_of_element_dofs)
+        columns = dof2node[np.concatenate(element_dofs).astype(int)]
+        incidence = csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(element_dofs), len(nodal2global)))
+        order = compute_ordering(incidence.T @ incidence, method)
+
+        # number the dofs node by node in the new node order
+        old_dofs = nodal2global[order][mapped[order]]
+        new_dofs = np.empty(no_of_dofs, dtype=int)
+        new_dofs[old_dofs] = np.arange(len(old_dofs))
+        self._apply_dof_permutation(new_dofs)
+        return new_dofs
+
+    def _apply_dof_permutation(self, new_dofs):
+        """
+        Apply a renumbering of the global dofs to nodal2global and elements2global
+
+        Parameters
+        ----------
+        new_dofs : ndarray
+            new global dof of each old global dof
+        """
+        nodal2global = self._nodal2global.values
+        self._nodal2global = pd.DataFrame(np.where(nodal2global >= 0, new_dofs[nodal2global], -1),
+                                          index=self._nodal2global.index, columns=self._nodal2global.columns)
+        self._elements2global_blocks = [(ids, new_dofs[global_dofs]) for ids, global_dofs
+                                        in self._elements2global_blocks]
+        elements2global = np.empty(len(self._elements2global), dtype=object)
+        if len(self._elements2global_blocks) > 0:
+            for ids, global_dofs in self._elements2global_blocks:
+                for index, element_global_dofs in zip(ids, global_dofs):
+                    elements2global[index] = element_global_dofs
+        else:
+            for index, element_global_dofs in enumerate(self._elements2global['global_dofs'].values):
+                elements2global[index] = new_dofs[element_global_dofs]
+        self._elements2global = pd.DataFrame({'global_dofs': elements2global}, index=self._elements2global.index)
 
     @abstractmethod
     def _set_standard_mapping(self, fields, nodeids, connectivity, dofs_by_element, callbacks, callbackargs, **kwargs):
@@ -117,10 +231,11 @@ class MappingBase(ABC):
             iterable containing the dofs as strings per element
             e.g. [(('N', 0, 'ux'), ('N', 0, 'uy'), ('E', 0, 'T'), ('N', 1, 'ux')), ( ..same for 2nd element ), ... )
         callbacks : list
-            callback function with signature void: callback(int: id, *args) for writing the information about the mapping id
-            that has been inserted in the dataframe of the mapping class
-        callbackargs : list of lists
-            lists containing arguments that are passd to the callbackfunction as *args
+            callback function per element with signature void: callback(ndarray: ids, ndarray: args) for writing the
+            information about the mapping ids that have been inserted in the dataframe of the mapping class.
+            Each distinct callback is called once with the ids and args of all elements it is associated with
+        callbackargs : list
+            arguments that are passed to the callbackfunction (one per element)
         kwargs : dict
             keyword value list for future implementations (important for subclassing)
 
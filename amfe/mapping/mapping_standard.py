@@ -27,6 +27,8 @@ class StandardMapping(MappingBase):
     _elements2global : pandas.DataFrame
         DataFrame containing Mapping Information for any kind of entity.
         In this case it is the mapping of the local dofs of elements to global dofs
+    _elements2global_blocks : list of tuple
+        The same mapping as dense int arrays (ids, global_dofs) per dof layout of the elements
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -46,11 +48,12 @@ class StandardMapping(MappingBase):
         dofs_by_element : numpy.array
             Array containing the tuples with the dofs information of the elements
         callbacks : numpy.array
-            Array containing pointers for callback functions that are called after a global dof entry has been
-            associated with the element
+            Array containing pointers for callback functions that are called after the global dof entries have been
+            associated with the elements. Each distinct callback is called once with an array of the mapping ids and
+            an array of the callbackargs of its elements
         callbackargs : list
-            argument list, that are passed to the callback function that is called after a global dof entry has been
-            associated with the element
+            argument list, that are passed to the callback function that is called after the global dof entries have
+            been associated with the elements
         kwargs : None
             not used here
 
@@ -58,47 +61,70 @@ class StandardMapping(MappingBase):
         -------
         None
         """
-        # make empty pandas Dataframe for nodes2global
-        data = -1*np.ones(len(nodeids), dtype=int)
-        self._nodal2global = pd.DataFrame({key: data for key in fields}, index=nodeids)
-        # allocate list for elements2global
-        self._elements2global = pd.DataFrame([None]*len(connectivity), columns=['global_dofs'])
-
-        # collect node dofs
-        current_global = 0
+        nodeids = np.asarray(nodeids)
+        fields = list(fields)
+        no_of_fields = len(fields)
         no_of_elements = len(connectivity)
-        # iterate over all elements
-        for index, (element_connectivity, element_dofinfos, callback, callbackarg) in enumerate(zip(connectivity,
-                                                                                                    dofs_by_element,
-                                                                                                    callbacks,
-                                                                                                    callbackargs)):
-
-            print('Added element {:10d} of {:10d}'.format(index, no_of_elements))
-            # iterate over dofs of element
-            global_dofs_for_element = []
-            for localdofnumber, dofinfo in enumerate(element_dofinfos):
-                # investigate current dof
-                localnodenumber = dofinfo[1]  # or local elementdof number
-                field = dofinfo[2]  # physical field (e.g. 'ux')
-                # check if dof is a nodal dof
-                if dofinfo[0] == 'N':
-                    nodeid = element_connectivity[localnodenumber]
-                    # check if node already has a global dof for this field
-                    stored_global = self._nodal2global.at[nodeid, field]
-                    if stored_global == -1:
-                        # set a global dof for this node and field combination
-                        self._nodal2global.at[nodeid, field] = current_global
-                        global_dofs_for_element.append(current_global)
-                        # increment current_global dof number
-                        current_global += 1
-                    else:
-                        global_dofs_for_element.append(stored_global)
-                # elif check if dof is elemental dof
-                elif dofinfo[0] == 'E':
-                    raise NotImplementedError('The mapping for elemental degrees of freedom is not implemented in'
-                                              'this mapping class')
-                else:
-                    raise ValueError('Doftype must be E or N')
-            # Get global dof numbers of element
-            self._elements2global.at[index, 'global_dofs'] = np.array(global_dofs_for_element, dtype=int)
-            callback(index, callbackarg)
+
+        # group the elements by their dof layout, elements with the same layout are mapped at once
+        layouts = dict()
+        for index, element_dofinfos in enumerate(dofs_by_element):
+            layouts.setdefault(tuple(element_dofinfos), []).append(index)
+
+        no_of_element_dofs = np.zeros(no_of_elements, dtype=int)
+        for element_dofinfos, indices in layouts.items():
+            no_of_element_dofs[indices] = len(element_dofinfos)
+        offsets = np.zeros(no_of_elements + 1, dtype=int)
+        np.cumsum(no_of_element_dofs, out=offsets[1:])
+
+        # Compute a key (node row * no_of_fields + field) for every local dof of every element
+        sorter = np.argsort(nodeids, kind='mergesort')
+        sorted_nodeids = nodeids[sorter]
+        keys = np.empty(offsets[-1], dtype=int)
+        blocks = []
+        for element_dofinfos, indices in layouts.items():
+            indices = np.array(indices, dtype=int)
+            doftypes = [dofinfo[0] for dofinfo in element_dofinfos]
+            if 'E' in doftypes:
+                raise NotImplementedError('The mapping for elemental degrees of freedom is not implemented in'
+                                          'this mapping class')
+            if any(doftype != 'N' for doftype in doftypes):
+                raise ValueError('Doftype must be E or N')
+            localnodenumbers = np.array([dofinfo[1] for dofinfo in element_dofinfos], dtype=int)
+            fieldnumbers = np.array([fields.index(dofinfo[2]) for dofinfo in element_dofinfos], dtype=int)
+
+            element_nodeids = np.array([connectivity[index] for index in indices], dtype=int).reshape(len(indices), -1)
+            element_nodeids = element_nodeids[:, localnodenumbers]
+            noderows = np.searchsorted(sorted_nodeids, element_nodeids)
+            noderows[noderows == len(sorted_nodeids)] = 0
+            if len(sorted_nodeids) == 0 or np.any(sorted_nodeids[noderows] != element_nodeids):
+                raise KeyError('Nodeids {} of the connectivity are not mapped'.format(
+                    np.setdiff1d(element_nodeids, nodeids)))
+            dofpositions = offsets[indices, np.newaxis] + np.arange(len(element_dofinfos))
+            keys[dofpositions] = sorter[noderows] * no_of_fields + fieldnumbers
+            blocks.append((indices, dofpositions))
+
+        # number the global dofs in the order of their first occurence in the elements
+        unique_keys, first_occurence, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        global_numbers = np.empty(len(unique_keys), dtype=int)
+        global_numbers[np.argsort(first_occurence, kind='mergesort')] = np.arange(len(unique_keys))
+        global_dofs = global_numbers[inverse]
+
+        nodal2global = -1*np.ones((len(nodeids), no_of_fields), dtype=int)
+        nodal2global.reshape(-1)[unique_keys] = global_numbers
+        self._nodal2global = pd.DataFrame(nodal2global, index=nodeids, columns=fields)
+
+        self._elements2global_blocks = [(indices, global_dofs[dofpositions]) for indices, dofpositions in blocks]
+        elements2global = np.empty(no_of_elements, dtype=object)
+        for i, element_global_dofs in enumerate(np.split(global_dofs, offsets[1:-1]) if no_of_elements > 0 else []):
+            elements2global[i] = element_global_dofs
+        self._elements2global = pd.DataFrame({'global_dofs': elements2global})
+        self._no_of_dofs = len(unique_keys)
+
+        # write the mapping keys of the elements in one call per callback
+        if no_of_elements > 0:
+            callbackargs = np.asarray(callbackargs)
+            callback_codes, unique_callbacks = pd.factorize(pd.Series(list(callbacks), dtype=object))
+            for code, callback in enumerate(unique_callbacks):
+                indices = np.flatnonzero(callback_codes == code)
+                callback(indices, callbackargs[indices])
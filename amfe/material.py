@@ -117,6 +117,18 @@ class BeamMaterial(ShellMaterial):
         """
         return self.I_y + self.I_z
 
+    @property
+    def wave_speed(self):
+        """
+        Speed of longitudinal waves in the beam
+
+        Returns
+        -------
+        c: float
+            longitudinal wave speed
+        """
+        return np.sqrt(self.E_modulus / self.rho)
+
 
 class HyperelasticMaterial(Material):
     '''
@@ -177,6 +189,77 @@ class HyperelasticMaterial(Material):
         '''
         pass
 
+    def S_Sv_and_C_batch(self, E):
+        '''
+        Compute 2nd Piola Kirchhoff stress tensors in matrix form and voigt
+        notation as well as material tangent moduli for a stack of strain
+        tensors.
+
+        The default implementation loops over S_Sv_and_C. Materials with a
+        closed form expression may override it with a vectorized version.
+
+        Parameters
+        ----------
+        E : ndarray
+            Green-Lagrange strain tensors, shape: (..., 3, 3)
+
+        Returns
+        -------
+        S : ndarray
+            2nd Piola Kirchhoff stress tensors in matrix representation,
+            shape: (..., 3, 3)
+        Sv : ndarray
+            2nd Piola Kirchhoff stress tensors in voigt notation,
+            shape: (..., 6)
+        C_SE : ndarray
+            tangent moduli between Green-Lagrange strain tensor and 2nd Piola
+            Kirchhoff stress tensor, shape (..., 6, 6)
+
+        '''
+        return self._loop_batch(self.S_Sv_and_C, E, 6)
+
+    def S_Sv_and_C_2d_batch(self, E):
+        '''
+        Compute 2nd Piola Kirchhoff stress tensors in matrix form and voigt
+        notation as well as material tangent moduli for a stack of strain
+        tensors of 2D-Problems.
+
+        The default implementation loops over S_Sv_and_C_2d. Materials with a
+        closed form expression may override it with a vectorized version.
+
+        Parameters
+        ----------
+        E : ndarray
+            Green-Lagrange strain tensors, shape: (..., 2, 2)
+
+        Returns
+        -------
+        S : ndarray
+            2nd Piola Kirchhoff stress tensors in matrix representation,
+            shape: (..., 2, 2)
+        Sv : ndarray
+            2nd Piola Kirchhoff stress tensors in voigt notation,
+            shape: (..., 3)
+        C_SE : ndarray
+            tangent moduli between Green-Lagrange strain tensor and 2nd Piola
+            Kirchhoff stress tensor, shape (..., 3, 3)
+
+        '''
+        return self._loop_batch(self.S_Sv_and_C_2d, E, 3)
+
+    @staticmethod
+    def _loop_batch(func, E, no_of_voigt_entries):
+        batch_shape = E.shape[:-2]
+        ndim = E.shape[-1]
+        E_flat = E.reshape((-1, ndim, ndim))
+        S = np.zeros(E_flat.shape)
+        S_v = np.zeros((E_flat.shape[0], no_of_voigt_entries))
+        C_SE = np.zeros((E_flat.shape[0], no_of_voigt_entries, no_of_voigt_entries))
+        for i, E_i in enumerate(E_flat):
+            S[i], S_v[i], C_SE[i] = func(E_i)
+        return (S.reshape(E.shape), S_v.reshape(batch_shape + (no_of_voigt_entries,)),
+                C_SE.reshape(batch_shape + (no_of_voigt_entries, no_of_voigt_entries)))
+
 
 class KirchhoffMaterial(HyperelasticMaterial):
     r'''
@@ -310,6 +393,13 @@ class KirchhoffMaterial(HyperelasticMaterial):
         self._update_variables()
         self.notify()
 
+    @property
+    def wave_speed(self):
+        '''
+        Speed of dilatational waves in the undeformed material.
+        '''
+        return np.sqrt(self.C_SE[0, 0] / self.rho)
+
     def S_Sv_and_C(self, E):
         '''
         '''
@@ -329,6 +419,25 @@ class KirchhoffMaterial(HyperelasticMaterial):
         S = np.array([[S_v[0], S_v[2]], [S_v[2], S_v[1]]])
         return S, S_v, self.C_SE_2d
 
+    def S_Sv_and_C_batch(self, E):
+        '''
+        Vectorized version of S_Sv_and_C for a stack of strain tensors.
+        '''
+        E_v = np.stack((E[..., 0, 0], E[..., 1, 1], E[..., 2, 2],
+                        2*E[..., 1, 2], 2*E[..., 0, 2], 2*E[..., 0, 1]), axis=-1)
+        S_v = E_v @ self.C_SE.T
+        S = S_v[..., [[0, 5, 4], [5, 1, 3], [4, 3, 2]]]
+        return S, S_v, np.broadcast_to(self.C_SE, E.shape[:-2] + (6, 6))
+
+    def S_Sv_and_C_2d_batch(self, E):
+        '''
+        Vectorized version of S_Sv_and_C_2d for a stack of strain tensors.
+        '''
+        E_v = np.stack((E[..., 0, 0], E[..., 1, 1], 2*E[..., 0, 1]), axis=-1)
+        S_v = E_v @ self.C_SE_2d.T
+        S = S_v[..., [[0, 2], [2, 1]]]
+        return S, S_v, np.broadcast_to(self.C_SE_2d, E.shape[:-2] + (3, 3))
+
 # For simplicity: rename KirchhoffMaterial
 LinearMaterial = KirchhoffMaterial
 
@@ -428,6 +537,12 @@ within the NeoHookean material!')
             self._plane_stress = plane_stress
             self.notify()
 
+    @property
+    def wave_speed(self):
+        '''
+        Speed of dilatational waves in the undeformed material.
+        '''
+        return np.sqrt((self.kappa + 4/3*self.mu) / self.rho)
 
     def S_Sv_and_C(self, E):
         ''' '''
@@ -13,6 +13,7 @@ This module provides a mesh class that handles the mesh information: nodes, mesh
 import numpy as np
 import pandas as pd
 from collections.abc import Iterable
+from scipy.spatial import cKDTree
 
 __all__ = [
     'Mesh'
@@ -91,9 +92,12 @@ class Mesh:
 
         # Flag for lazy evaluation of iconnectivity
         self._changed_iconnectivity = True
-        # Cache for lazy evaluation of iconnectivity
-        self._iconnectivity_df_cached = pd.DataFrame(columns=('iconnectivity',))
-        
+        # Cache for lazy evaluation of iconnectivity, see _update_iconnectivity
+        self._iconnectivity_cached = None
+        # Caches for the vectorized lookup of row indices by ids, see _get_rows_by_ids
+        self._node_lookup = None
+        self._element_lookup = None
+
     @property
     def el_df(self):
         return self._el_df
@@ -119,22 +123,23 @@ class Mesh:
     def connectivity(self):
         return self._el_df['connectivity'].values
 
-    @property
-    def _iconnectivity_df(self):
+    def _get_iconnectivity_cache(self):
         """
         Handles the lazy evaluation of the iconnectivity
-        Always access the iconnectivity df by this property
+        Always access the iconnectivity by this method
 
         Returns
         -------
-        iconnectivity_df : pandas.DataFrame
-            DataFrame containint the iconnectivity inormation of the elements,
-            i.e. the connectivity w.r.t. row indices of a nodes ndarray
+        iconnectivity_cache : dict
+            Dictionary containing the iconnectivity information of the elements, i.e. the connectivity w.r.t. row
+            indices of a nodes ndarray, see _update_iconnectivity
         """
-        if self._changed_iconnectivity:
+        cache = self._iconnectivity_cached
+        if self._changed_iconnectivity or cache is None or cache['el_df'] is not self._el_df \
+                or cache['nodes_index'] is not self.nodes_df.index:
             self._update_iconnectivity()
             self._changed_iconnectivity = False
-        return self._iconnectivity_df_cached
+        return self._iconnectivity_cached
 
     @property
     def iconnectivity(self):
@@ -146,7 +151,46 @@ class Mesh:
         iconnectivity : ndarray
             iconnectivity
         """
-        return self._iconnectivity_df['iconnectivity'].values
+        return self._get_iconnectivity_cache()['iconnectivity']
+
+    @property
+    def iconnectivity_csr(self):
+        """
+        Get the iconnectivity of all elements in compressed sparse row format
+
+        The iconnectivity of the element in row i of the el_df is indices[offsets[i]:offsets[i+1]].
+
+        Returns
+        -------
+        offsets : ndarray
+            start of the iconnectivity of every element in indices and the total length at the end,
+            shape: (no_of_all_elements + 1,)
+        indices : ndarray
+            concatenated iconnectivities of all elements
+        """
+        cache = self._get_iconnectivity_cache()
+        return cache['offsets'], cache['indices']
+
+    def get_iconnectivity_by_shape(self, shape):
+        """
+        Get the iconnectivity of all elements with the given shape as dense array
+
+        Parameters
+        ----------
+        shape : str
+            element shape, e.g. 'Tet4'
+
+        Returns
+        -------
+        elementidxs : ndarray
+            row indices of the elements in the el_df
+        iconnectivity : ndarray
+            iconnectivity of the elements, shape: (no_of_elements_with_shape, no_of_nodes_per_element)
+        """
+        shape_cache = self._get_iconnectivity_cache()['by_shape']
+        if shape not in shape_cache:
+            return np.array([], dtype=int), np.zeros((0, 0), dtype=int)
+        return shape_cache[shape]
 
     @property
     def nodes(self):
@@ -247,7 +291,10 @@ class Mesh:
             list containing the index based connectivity of the desired elements
             i.e. the row indices of the nodes ndarray
         """
-        return self._iconnectivity_df.loc[elementids, 'iconnectivity'].values
+        iconnectivity = self._get_iconnectivity_cache()['iconnectivity']
+        if np.ndim(elementids) == 0:
+            return iconnectivity[self.get_elementidxs_by_elementids([elementids])[0]]
+        return iconnectivity[self.get_elementidxs_by_elementids(elementids)]
 
     def get_elementidxs_by_groups(self, groups):
         """
@@ -263,7 +310,7 @@ class Mesh:
             indices of the elements in the connectivity array
         """
         elementids = self.get_elementids_by_groups(groups)
-        return np.array([self._el_df.index.get_loc(elementid) for elementid in elementids], dtype=int)
+        return self.get_elementidxs_by_elementids(elementids)
 
     def get_elementids_by_groups(self, groups):
         """
@@ -301,7 +348,9 @@ class Mesh:
         -------
             indices of the elements in the connectivity array
         """
-        return np.array([self._el_df.index.get_loc(elementid) for elementid in elementids], dtype=int)
+        if self._element_lookup is None or self._element_lookup[0] is not self._el_df.index:
+            self._element_lookup = self._create_id_lookup(self._el_df.index)
+        return self._get_rows_by_ids(self._element_lookup, elementids)
 
     def get_elementids_by_elementidxs(self, elementidxs):
         """
@@ -340,14 +389,45 @@ class Mesh:
         if self.dimension == 2:
             if z is not None:
                 print('Warning: z coordinate is ignored in get_nodeid_by_coordinates')
-            nodeid = (self.nodes_df[['x', 'y']] - (x, y)).apply(np.linalg.norm, axis=1).idxmin()
-            if np.linalg.norm(self.nodes_df.loc[nodeid, ['x', 'y']] - (x, y)) > epsilon:
-                nodeid = None
+            coordinates = np.array([x, y], dtype=float)
         else:
-            nodeid = (self.nodes_df[['x', 'y', 'z']] - (x, y, z)).apply(np.linalg.norm, axis=1).idxmin()
-            if np.linalg.norm(self.nodes_df.loc[nodeid, ['x', 'y', 'z']] - (x, y, z)) > epsilon:
-                nodeid = None
-        return nodeid
+            coordinates = np.array([x, y, z], dtype=float)
+        distances = np.linalg.norm(self.nodes_df[['x', 'y', 'z'][:self.dimension]].values - coordinates, axis=1)
+        idx = np.argmin(distances)
+        if distances[idx] > epsilon:
+            return None
+        return self.nodes_df.index[idx]
+
+    def get_nodeids_by_coordinates(self, coordinates, epsilon=1e-12):
+        """
+        Returns the nodeids of the nodes that are located at several given coordinates
+
+        The nearest nodes are searched by a k-d tree of the node coordinates, i.e. the costs are
+        O((no_of_nodes + no_of_coordinates) log(no_of_nodes)) instead of O(no_of_nodes no_of_coordinates) for calling
+        get_nodeid_by_coordinates for each coordinate.
+
+        Parameters
+        ----------
+        coordinates : ndarray
+            coordinates of the searched nodes row-wise, shape (no_of_coordinates, dimension)
+        epsilon : float (optional, default 1e-12)
+            Allowed tolerance (distance)
+
+        Returns
+        -------
+        nodeids : ndarray
+            nodeids of the nearest nodes with the given coordinates. If no node is located within the tolerance,
+            the nodeid is -1.
+        """
+        coordinates = np.array(coordinates, dtype=float, ndmin=2)
+        nodeids = np.full(coordinates.shape[0], -1, dtype=int)
+        if self.no_of_nodes == 0 or coordinates.shape[0] == 0:
+            return nodeids
+        tree = cKDTree(self.nodes_df[['x', 'y', 'z'][:self.dimension]].values)
+        distances, idxs = tree.query(coordinates[:, :self.dimension])
+        found = distances <= epsilon
+        nodeids[found] = self.nodes_df.index.values[idxs[found]]
+        return nodeids
 
     def get_nodeids_by_x_coordinates(self, x, epsilon):
         """
@@ -542,8 +622,61 @@ class Mesh:
         nodeidxs: ndarray
             rowindices of nodes in nodes dataframe
         """
-        nodeidxs = np.array([self.nodes_df.index.get_loc(nodeid) for nodeid in nodeids], dtype=int)
-        return nodeidxs
+        if self._node_lookup is None or self._node_lookup[0] is not self.nodes_df.index:
+            self._node_lookup = self._create_id_lookup(self.nodes_df.index)
+        return self._get_rows_by_ids(self._node_lookup, nodeids)
+
+    @staticmethod
+    def _create_id_lookup(index):
+        """
+        Create a lookup for the row indices of ids in a pandas index
+
+        Parameters
+        ----------
+        index : pandas.Index
+            index of nodes_df or el_df
+
+        Returns
+        -------
+        lookup : tuple
+            (index, sorted_ids, sorter), the index is kept to detect changes of the dataframe
+        """
+        ids = np.asarray(index.values, dtype=int)
+        sorter = np.argsort(ids, kind='mergesort')
+        return index, ids[sorter], sorter
+
+    @staticmethod
+    def _get_rows_by_ids(lookup, ids):
+        """
+        Vectorized lookup of the row indices of ids by a binary search in the sorted ids
+
+        Parameters
+        ----------
+        lookup : tuple
+            lookup created by _create_id_lookup
+        ids : iterable
+            ids whose row indices are searched
+
+        Returns
+        -------
+        rows : ndarray
+            row indices of the ids
+
+        Raises
+        ------
+        KeyError
+            if an id is not in the index
+        """
+        _, sorted_ids, sorter = lookup
+        ids = np.asarray(ids, dtype=int).reshape(-1)
+        if len(ids) == 0:
+            return np.array([], dtype=int)
+        positions = np.searchsorted(sorted_ids, ids)
+        positions[positions == len(sorted_ids)] = 0
+        missing = len(sorted_ids) == 0 or np.any(sorted_ids[positions] != ids)
+        if missing:
+            raise KeyError('Ids {} not found'.format(ids[~np.isin(ids, sorted_ids)]))
+        return sorter[positions]
 
     def get_nodeids_by_nodeidxs(self, nodeidxs):
         """
@@ -733,7 +866,7 @@ class Mesh:
         """
         
         rows = self.get_elementids_by_tags(tag_names, tag_values, opt_larger)
-        return np.array([self._el_df.index.get_loc(row) for row in rows], dtype=int)
+        return self.get_elementidxs_by_elementids(rows)
     
     def get_uniques_by_tag(self, tag):
         """
@@ -1128,10 +1261,39 @@ class Mesh:
         Triggers update mechanism for the iconnectivity, i.e. the connectivity of the elements
         but w.r.t to the row indices in a node ndarray instead of the real nodes_df indices
 
+        The iconnectivity is stored in integer arrays: in compressed sparse row format (offsets and indices) for all
+        elements and as dense array for the elements of every shape. The list of the iconnectivities of the single
+        elements contains views on the indices array.
+
         Returns
         -------
         None
         """
-        self._iconnectivity_df_cached = pd.DataFrame(self._el_df['connectivity'].apply(self.get_nodeidxs_by_nodeids),
-                                                     index=self._el_df.index)
-        self._iconnectivity_df_cached.columns = ['iconnectivity']
+        connectivity = self._el_df['connectivity'].values
+        no_of_elements = len(connectivity)
+        lengths = np.fromiter((len(nodeids) for nodeids in connectivity), dtype=int, count=no_of_elements)
+        offsets = np.zeros(no_of_elements + 1, dtype=int)
+        np.cumsum(lengths, out=offsets[1:])
+        if no_of_elements > 0:
+            indices = self.get_nodeidxs_by_nodeids(np.concatenate(connectivity))
+        else:
+            indices = np.array([], dtype=int)
+
+        iconnectivity = np.empty(no_of_elements, dtype=object)
+        for i, element_indices in enumerate(np.split(indices, offsets[1:-1])):
+            iconnectivity[i] = element_indices
+
+        by_shape = dict()
+        shapes = self._el_df['shape'].values
+        for shape in pd.unique(shapes):
+            elementidxs = np.flatnonzero(shapes == shape)
+            no_of_nodes = lengths[elementidxs[0]]
+            if np.all(lengths[elementidxs] == no_of_nodes):
+                by_shape[shape] = (elementidxs, indices[offsets[elementidxs, np.newaxis] + np.arange(no_of_nodes)])
+
+        self._iconnectivity_cached = {'el_df': self._el_df,
+                                      'nodes_index': self.nodes_df.index,
+                                      'offsets': offsets,
+                                      'indices': indices,
+                                      'iconnectivity': iconnectivity,
+                                      'by_shape': by_shape}
@@ -14,7 +14,6 @@ Provides Assembly routines for the ECSW Assembly
 import numpy as np
 
 from amfe.assembly.structural_assembly import StructuralAssembly
-from amfe.assembly.tools import fill_csr_matrix
 
 __all__ = [
     'EcswAssembly'
@@ -34,7 +33,7 @@ class EcswAssembly(StructuralAssembly):
         dtype = float, array containing the nonzero weights for ECSW Assembly
     """
 
-    def __init__(self, weights, indices):
+    def __init__(self, weights, indices, no_of_workers=1, executor='thread'):
         """
 
         Parameters
@@ -45,13 +44,17 @@ class EcswAssembly(StructuralAssembly):
             dtype = int, localization indices of the elements that have zero weights. Example: Assume, the elements
             [ele1, ele2, ele3, ele4, ele5] are passed, but only ele1, ele4 and ele5 have nonzero weights.
             Then the indices array is np.array([0, 3, 4], dtype=int)
+        no_of_workers : int, optional
+            Number of workers for the parallel evaluation of the elements. Default: 1 (serial evaluation)
+        executor : {'thread', 'process'}, optional
+            Kind of the worker pool. Default: 'thread'
         """
-        super().__init__()
+        super().__init__(no_of_workers, executor)
         self.weights = np.array(weights)
         self.indices = np.array(indices, dtype=int)
 
     def assemble_k_and_f(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., K_csr=None,
-                         f_glob=None):
+                         f_glob=None, reference_geometry=None, plan=None):
         """
         Assemble the tangential stiffness matrix and nonliner internal or external force vector.
 
@@ -76,6 +79,11 @@ class EcswAssembly(StructuralAssembly):
             A preallocated csr_matrix can be passed for faster assembly
         f_glob : numpy.array (optional)
             A preallocated numpy.array can be passede for faster assembly
+        reference_geometry : dict (optional)
+            Reference geometry of all passed elements computed by compute_reference_geometry
+        plan : AssemblyPlan (optional)
+            Assembly plan of all passed elements. It is not used, the weighted elements are grouped
+            separately.
 
         Returns
         --------
@@ -99,22 +107,128 @@ class EcswAssembly(StructuralAssembly):
 
         K_csr.data[:] = 0.0
         f_glob[:] = 0.0
+        if len(self.indices) == 0:
+            return K_csr, f_glob
 
-        # loop over all elements
-        # (i - element index, indices - DOF indices of the element)
-        for weight, index in zip(self.weights, self.indices):
-            # X - undeformed positions of the i-th element
-            X_local = nodes[connectivities[index], :].reshape(-1)
-            # displacements of the i-th element
-            u_local = dofvalues[elements2dofs[index]]
-            # computation of the element tangential stiffness matrix and nonlinear force
-            K_local, f_local = ele_objects[index].k_and_f_int(X_local, u_local, t)
-            # adding the local force to the global one
-            f_glob[elements2dofs[index]] += weight*f_local
-            # this is equal to K_csr[globaldofindices, globaldofindices] += K_local
-            fill_csr_matrix(K_csr.indptr, K_csr.indices, K_csr.data, weight*K_local, elements2dofs[index])
+        elements2dofs_ecsw = [elements2dofs[index] for index in self.indices]
+        elements2dofs_flat, scatter_map = self._get_scatter_map(K_csr, elements2dofs_ecsw)
+        K_vals = np.empty(len(scatter_map))
+        f_vals = np.empty(len(elements2dofs_flat))
+        # evaluate the weighted local values of the elements with nonzero weights, they are scattered into K_csr and
+        # f_glob afterwards
+        self._compute_k_and_f_values(nodes, [ele_objects[index] for index in self.indices],
+                                     [connectivities[index] for index in self.indices], elements2dofs_ecsw, dofvalues,
+                                     t, K_vals, f_vals, self.weights, reference_geometry, self.indices)
+
+        # this is equal to K_csr[globaldofindices, globaldofindices] += weight*K_local for all elements
+        K_csr.data[:] = np.bincount(scatter_map, weights=K_vals, minlength=K_csr.nnz)
+        f_glob += np.bincount(elements2dofs_flat, weights=f_vals, minlength=len(f_glob))
         return K_csr, f_glob
 
+    def assemble_m_k_f(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., M_csr=None,
+                       K_csr=None, f_glob=None, reference_geometry=None, plan=None):
+        """
+        Assemble the mass matrix, the tangential stiffness matrix and the nonlinear internal force vector.
+
+        The mass matrix is assembled by all passed elements, the stiffness matrix and the force vector only by the
+        weighted elements of the reduced mesh.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        M_csr : csr_matrix (optional)
+            A preallocated csr_matrix for the mass matrix can be passed for faster assembly
+        K_csr : csr_matrix (optional)
+            A preallocated csr_matrix for the stiffness matrix can be passed for faster assembly
+        f_glob : numpy.array (optional)
+            A preallocated numpy.array can be passed for faster assembly
+        reference_geometry : dict (optional)
+            Reference geometry of all passed elements computed by compute_reference_geometry
+        plan : AssemblyPlan (optional)
+            Assembly plan of all passed elements. It is only used for the mass matrix, the weighted elements are
+            grouped separately.
+
+        Returns
+        --------
+        M : csr_matrix
+            global mass matrix
+        K : csr_matrix
+            global stiffness matrix
+        f : ndarray
+            global internal force vector
+        """
+        M_csr = self.assemble_m(nodes, ele_objects, connectivities, elements2dofs, dofvalues, t, M_csr, plan=plan)
+        K_csr, f_glob = self.assemble_k_and_f(nodes, ele_objects, connectivities, elements2dofs, dofvalues, t, K_csr,
+                                              f_glob, reference_geometry)
+        return M_csr, K_csr, f_glob
+
+    def assemble_f_int(self, nodes, ele_objects, connectivities, elements2dofs, dofvalues=None, t=0., f_glob=None,
+                       reference_geometry=None, plan=None):
+        """
+        Assemble the nonlinear internal force vector without computing the tangential stiffness matrix.
+
+        Parameters
+        ----------
+        nodes : ndarray
+            Node Coordinates
+        ele_objects : ndarray
+            Ndarray with Element objects that shall be assembled
+        connectivities : list of ndarrays
+            Connectivity of the elements mapping to the indices of nodes ndarray
+        elements2dofs : list of ndarrays
+            Mapping the elements to their global dofs
+        dofvalues : ndarray
+            current values of all dofs (at time t)
+        t : float
+            time. Default: 0.
+        f_glob : numpy.array (optional)
+            A preallocated numpy.array can be passed for faster assembly
+        reference_geometry : dict (optional)
+            Reference geometry of all passed elements computed by compute_reference_geometry
+        plan : AssemblyPlan (optional)
+            Assembly plan of all passed elements. It is not used, the weighted elements are grouped
+            separately.
+
+        Returns
+        --------
+        f : ndarray
+            global internal force vector
+
+        """
+
+        if dofvalues is None:
+            maxdof = np.max(np.concatenate(elements2dofs))
+            dofvalues = np.zeros(maxdof + 1)
+
+        if f_glob is None:
+            f_glob = np.zeros(len(dofvalues), dtype=float)
+
+        f_glob[:] = 0.0
+        if len(self.indices) == 0:
+            return f_glob
+
+        elements2dofs_ecsw = [elements2dofs[index] for index in self.indices]
+        elements2dofs_flat = np.concatenate(elements2dofs_ecsw)
+        f_vals = np.empty(len(elements2dofs_flat))
+        self._compute_f_values(nodes, [ele_objects[index] for index in self.indices],
+                               [connectivities[index] for index in self.indices], elements2dofs_ecsw, dofvalues, t,
+                               f_vals, self.weights, reference_geometry, self.indices)
+
+        # this is equal to f_glob[globaldofindices] += weight*f_local for all elements
+        f_glob += np.bincount(elements2dofs_flat, weights=f_vals, minlength=len(f_glob))
+        return f_glob
+
     def assemble_k_f_S_E(self, nodes, ele_objects, connectivities, elements2dofs, elements_on_node, dofvalues=None,
                          t=0, K_csr=None, f_glob=None):
         """
@@ -172,6 +286,16 @@ class EcswAssembly(StructuralAssembly):
         S = np.zeros((no_of_nodes, 6))
         E = np.zeros((no_of_nodes, 6))
 
+        if len(self.indices) == 0:
+            return K_csr, f_glob, S, E
+
+        elements2dofs_flat, scatter_map = self._get_scatter_map(K_csr, [elements2dofs[index]
+                                                                       for index in self.indices])
+        K_vals = np.empty(len(scatter_map))
+        f_vals = np.empty(len(elements2dofs_flat))
+        k_start = 0
+        f_start = 0
+
         # Loop over all elements
         # (i - element index, indices - DOF indices of the element)
         for weight, index in zip(self.weights, self.indices):
@@ -181,14 +305,19 @@ class EcswAssembly(StructuralAssembly):
             u_local = dofvalues[elements2dofs[index]]
             # computation of the element tangential stiffness matrix and nonlinear force
             K_local, f_local, S_local, E_local = ele_objects[index].k_f_S_E_int(X_local, u_local, t)
-            # adding the local force to the global one
-            f_glob[elements2dofs[index]] += weight*f_local
-            # this is equal to K_csr[globaldofindices, globaldofindices] += K_local
-            fill_csr_matrix(K_csr.indptr, K_csr.indices, K_csr.data, weight*K_local, elements2dofs[index])
+            # store the weighted local values, they are scattered into K_csr and f_glob after the loop
+            K_vals[k_start:k_start + K_local.size] = weight*K_local.reshape(-1)
+            f_vals[f_start:f_start + f_local.size] = weight*f_local
+            k_start += K_local.size
+            f_start += f_local.size
             E[connectivities[index], :] += weight*E_local
             # QUESTION: SHALL THIS BE ALSO WEIGHTED?
             S[connectivities[index], :] += weight*S_local
 
+        # this is equal to K_csr[globaldofindices, globaldofindices] += weight*K_local for all elements
+        K_csr.data[:] = np.bincount(scatter_map, weights=K_vals, minlength=K_csr.nnz)
+        f_glob += np.bincount(elements2dofs_flat, weights=f_vals, minlength=len(f_glob))
+
         # Correct strains such, that average is taken at the elements
         E = np.divide(E.T, elements_on_node).T
         S = np.divide(S.T, elements_on_node).T
@@ -14,9 +14,53 @@ class NeumannBase:
     """
     ELEMENTFACTORY = {element[0]: element[2] for element in ELEPROTOTYPEHELPERLIST}
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, time_separable=False, **kwargs):
         self._boundary_element = None
-    
+        self._time_separable = time_separable
+
+    @property
+    def time_separable(self):
+        """
+        Flag if the load is a fixed spatial vector times an amplitude that only depends on time.
+
+        The spatial vector of a time separable condition is evaluated in the reference configuration, i.e. the load
+        does not follow the deformation of the surface. Hence, it can be assembled once and scaled by the amplitude.
+        """
+        return self._time_separable
+
+    def time_amplitude(self, t):
+        """
+        Returns the time dependent amplitude of a time separable Neumann condition
+
+        Parameters
+        ----------
+        t : float
+            time t
+
+        Returns
+        -------
+        amplitude : float
+            amplitude of the spatial load vector at time t
+        """
+        return self._amp(None, t)
+
+    def f_ext_spatial(self, X):
+        """
+        Returns the local spatial load vector of a time separable Neumann element, i.e. the local external force
+        vector in the reference configuration without the time amplitude
+
+        Parameters
+        ----------
+        X : numpy.array
+            node coordinates in reference domain as 1D array (reshape -1)
+
+        Returns
+        -------
+        f_spatial : numpy.array
+            local spatial load vector
+        """
+        return self._f_proj(self._boundary_element.f_mat(X, np.zeros_like(X)))
+
     def f_ext(self, X, u, t):
         """
         Returns the local external force vector of Neumann element
@@ -36,6 +80,8 @@ class NeumannBase:
             local external force vector
         """
         # no minus sign as force will be on the right hand side of eqn.
+        if self._time_separable:
+            return self.f_ext_spatial(X) * self._amp(u, t)
         return self._f_proj(self._boundary_element.f_mat(X, u)) * self._amp(u, t)
 
     def k_and_f_ext(self, X, u, t):
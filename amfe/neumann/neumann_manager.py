@@ -64,14 +64,14 @@ class NeumannManager:
 
     def write_mapping_key(self, fk, local_id):
         """
-        Write a foreign key info to a mapping element
+        Write foreign key infos to mapping elements
 
         Parameters
         ----------
-        fk : int
-            foreign key to a mapping class that contains mapping info
-        local_id : int
-            index of the neumann obj that shall get the new mapping info
+        fk : int or ndarray
+            foreign keys to a mapping class that contains mapping info
+        local_id : int or ndarray
+            indices of the neumann objs that shall get the new mapping info
 
         Returns
         -------
@@ -97,15 +97,15 @@ class NeumannManager:
         return values[:, 0], values[:, 1], values[:, 2]
 
     @staticmethod
-    def create_fixed_direction_neumann(direction, time_func=lambda t: 1):
+    def create_fixed_direction_neumann(direction, time_func=lambda t: 1, time_separable=False):
         direction = np.array(direction, dtype=float)
-        return FixedDirectionNeumann(direction, time_func)
+        return FixedDirectionNeumann(direction, time_func, time_separable)
 
     @staticmethod
     def create_normal_following_neumann(time_func=lambda t: 1):
         return NormalFollowingNeumann(time_func)
 
     @staticmethod
-    def create_projected_area_neumann(direction, time_func=lambda t: 1):
+    def create_projected_area_neumann(direction, time_func=lambda t: 1, time_separable=False):
         direction = np.array(direction, dtype=float)
-        return ProjectedAreaNeumann(direction, time_func)
+        return ProjectedAreaNeumann(direction, time_func, time_separable)
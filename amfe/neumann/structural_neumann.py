@@ -13,7 +13,7 @@ class FixedDirectionNeumann(NeumannBase):
     """
     Class for a Neumann condition that has a fixed direction and a constant force/area ratio (fixed traction)
     """
-    def __init__(self, direction, time_func=lambda t: 1):
+    def __init__(self, direction, time_func=lambda t: 1, time_separable=False):
         """
 
         Parameters
@@ -22,8 +22,11 @@ class FixedDirectionNeumann(NeumannBase):
             direction of the force
         time_func : function
              pointer to function with signature  float func(float: t)
+        time_separable : bool
+            if True, the load is evaluated in the reference configuration and scaled by time_func. Then it is assembled
+            only once. Default: False (the load acts on the deformed surface)
         """
-        super().__init__(direct=direction, time_func=time_func)
+        super().__init__(direct=direction, time_func=time_func, time_separable=time_separable)
         self._direction = direction
         self._time_func = time_func
 
@@ -63,7 +66,7 @@ class ProjectedAreaNeumann(NeumannBase):
 
     i.e. the area of the surface projected on the direction
     """
-    def __init__(self, direction, time_func=lambda t: 1):
+    def __init__(self, direction, time_func=lambda t: 1, time_separable=False):
         """
 
         Parameters
@@ -72,8 +75,11 @@ class ProjectedAreaNeumann(NeumannBase):
             direction of the force
         time_func : function
              pointer to function with signature  float func(float: t)
+        time_separable : bool
+            if True, the load is evaluated in the reference configuration and scaled by time_func. Then it is assembled
+            only once. Default: False (the shadow area of the deformed surface is used)
         """
-        super().__init__(direction=direction, time_func=time_func)
+        super().__init__(direction=direction, time_func=time_func, time_separable=time_separable)
         self._direction = direction
         self._time_func = time_func
 
@@ -21,9 +21,16 @@ import numpy as np
 from copy import copy
 
 from amfe.linalg import vector_norm
+from amfe.linalg.linearsolvers import ScipySparseLULinearSolver
+from .tools import new_state_version, call_with_state_version
 
 __all__ = [
     'IntegratorBase',
+    'CentralDifference',
+    'LinearGeneralizedAlpha',
+    'LinearNewmarkBeta',
+    'LinearWBZAlpha',
+    'LinearHHTAlpha',
     'NonlinearStaticIntegrator',
     'GeneralizedAlpha',
     'NewmarkBeta',
@@ -49,12 +56,110 @@ class IntegratorBase:
         raise NotImplementedError('Step function was not implemented for subclass')
 
 
+class CentralDifference(IntegratorBase):
+    def __init__(self, M, f_int, f_ext, D=None):
+        """
+        Explicit central difference integration scheme with lumped mass matrix.
+
+        Every step needs one evaluation of the forces and an element-wise division by the lumped masses, no system
+        of equations is solved. The scheme is only conditionally stable, the timestep must be smaller than the critical
+        timestep, see StructuralComponent.critical_timestep.
+
+        Parameters
+        ----------
+        M : callable
+            Mass function, signature M(q, dq, t). It may return the diagonal of a lumped mass matrix as 1-D ndarray
+            or a mass matrix, which is lumped by row summation. The mass is assumed to be constant and is only
+            evaluated in the first call.
+        f_int : callable
+            Internal restoring force function, signature f_int(q, dq, t)
+        f_ext : callable
+            External force function, signature f_ext(q, dq, t)
+        D : callable, optional
+            Linear viscous damping matrix, signature D(q, dq, t). The damping forces are evaluated with the velocity
+            at the midstep. Default: no damping
+
+        Notes
+        -----
+        The scheme is implemented in its velocity form with half-step velocities:
+
+            dq_{n+1/2} = dq_n + dt/2 * ddq_n
+            q_{n+1} = q_n + dt * dq_{n+1/2}
+            ddq_{n+1} = M^{-1} (f_ext - f_int - D dq_{n+1/2})
+            dq_{n+1} = dq_{n+1/2} + dt/2 * ddq_{n+1}
+
+        References
+        ----------
+           [1]  T. Belytschko, W.K. Liu and B. Moran (2000): Nonlinear finite elements for continua and structures.
+                ISBN 978-0-471-98774-1.
+        """
+        super().__init__()
+        self.M = M
+        self.f_int = f_int
+        self.f_ext = f_ext
+        self.D = D
+        self._m_inv = None
+
+    def _get_inverse_mass(self, q, dq, t):
+        if self._m_inv is None:
+            m = self.M(q, dq, t)
+            if not (isinstance(m, np.ndarray) and m.ndim == 1):
+                m = np.asarray(m.sum(axis=1)).ravel()
+            if np.any(m <= 0.0):
+                raise ValueError('The lumped mass matrix has zero or negative entries. Use HRZ lumping for higher '
+                                 'order elements')
+            self._m_inv = 1 / m
+        return self._m_inv
+
+    def get_acceleration(self, t0, q0, dq0):
+        """
+        Return the acceleration at the given state. Thus, the integrator can be used as its own acceleration
+        initializer.
+        """
+        f = self.f_ext(q0, dq0, t0) - self.f_int(q0, dq0, t0)
+        if self.D is not None:
+            f -= self.D(q0, dq0, t0) @ dq0
+        return self._get_inverse_mass(q0, dq0, t0) * f
+
+    def step(self, t_n, q_n, dq_n, ddq_n):
+        """
+        Stepper method for the explicit solution of one time-step.
+
+        Parameters
+        ----------
+        t_n : float
+        q_n : ndarray
+        dq_n : ndarray
+        ddq_n : ndarray
+
+        Returns
+        -------
+        t_n+1 : float
+        q_n+1 : ndarray
+        dq_n+1 : ndarray
+        ddq_n+1 : ndarray
+        """
+        self._t_n = t_n
+        self._q_n = q_n
+        self._dq_n = dq_n
+        self._ddq_n = ddq_n
+
+        dq_half = dq_n + 0.5 * self.dt * ddq_n
+        self._t_p = t_n + self.dt
+        self._q_p = q_n + self.dt * dq_half
+        self._ddq_p = self.get_acceleration(self._t_p, self._q_p, dq_half)
+        self._dq_p = dq_half + 0.5 * self.dt * self._ddq_p
+
+        return self._t_p, self._q_p, self._dq_p, self._ddq_p
+
+
 class LinearIntegrator(IntegratorBase):
     def __init__(self):
         super().__init__()
-        self.linear_solver_func = None
+        self.linear_solver = ScipySparseLULinearSolver()
         self.linear_solver_kwargs = dict()
         self._S = None
+        self._factorized_S = None
 
     def step(self, t_n, q_n, dq_n, ddq_n):
         """
@@ -77,12 +182,24 @@ class LinearIntegrator(IntegratorBase):
 
         print('Solution of time-step ', t_n, ' started...')
         A, b = self.get_A_b(q_n, dq_n, ddq_n, t_n)
-        ddq = self.linear_solver_func(A, b, **self.linear_solver_kwargs)
+        ddq = self._solve(A, b)
         self.set_correction(ddq)
 
         # Return the new solution
         return self._t_p, self._q_p, self._dq_p, self._ddq_p
 
+    def _solve(self, A, b):
+        """
+        Solves A x = b. Linear solvers that can reuse their factorization only factorize A if it is another matrix
+        object than in the former call.
+        """
+        if hasattr(self.linear_solver, 'factorize'):
+            if A is not self._factorized_S:
+                self.linear_solver.factorize(A, **self.linear_solver_kwargs)
+                self._factorized_S = A
+            return self.linear_solver.solve(A, b, reuse_factorization=True, **self.linear_solver_kwargs)
+        return self.linear_solver.solve(A, b, **self.linear_solver_kwargs)
+
     def set_correction(self, ddq):
         self._ddq_p = ddq
 
@@ -90,6 +207,179 @@ class LinearIntegrator(IntegratorBase):
         raise NotImplementedError('get_A_b is not implemented')
 
 
+class LinearGeneralizedAlpha(LinearIntegrator):
+    def __init__(self, M, f_ext, K, D, alpha_m=0.4210526315789474, alpha_f=0.4736842105263158,
+                 beta=0.27700831024930755, gamma=0.5526315789473684):
+        """
+        Generalized-alpha integration scheme for linear systems.
+
+        The matrices M, D and K are assumed to be constant and are evaluated once in the first step. The effective
+        matrix S = (1 - alpha_m) M + (1 - alpha_f) gamma dt D + (1 - alpha_f) beta dt^2 K is factorized once for
+        each timestep size, thus every step only needs one evaluation of the external forces, some matrix vector
+        products and a solve with the stored factorization.
+
+        Parameters
+        ----------
+        M : callable
+            Mass Matrix function, signature M(q, dq, t)
+        f_ext : callable
+            External force function, signature, f_ext(q, dq, t)
+        K : callable
+            Stiffness matrix function, signature K(q, dq, t). The internal forces are K q.
+        D : callable
+            Linear viscous damping matrix, signature D(q, dq, t)
+        alpha_m : float
+            Mass-type matrix shifting-factor. Default value is calculated from rho_inf.
+        alpha_f : float
+            Internal-forces shifting-factor. Default value is calculated from rho_inf.
+        beta : float
+            Newmark-parameter. Default value is calculated from alpha_m and alpha_f.
+        gamma : float
+            Newmark-parameter. Default value is calculated from alpha_m and alpha_f.
+
+        Notes
+        -----
+        The parameters are the same as for the nonlinear GeneralizedAlpha scheme. The new acceleration solves
+
+            S ddq_p = f_ext(t_f) - alpha_m M ddq_n - D dq_f* - K q_f*
+
+        where q_f* and dq_f* are the alpha_f-midsteps of the Newmark predictors.
+        """
+        super().__init__()
+        self.M = M
+        self.f_ext = f_ext
+        self.K = K
+        self.D = D
+
+        # Set timeintegration parameters
+        self.alpha_m = alpha_m
+        self.alpha_f = alpha_f
+        self.beta = beta
+        self.gamma = gamma
+
+        self._matrices = None
+        self._S_parameters = None
+
+    @staticmethod
+    def _get_midstep(alpha, x_n, x_p):
+        return (1 - alpha) * x_p + alpha * x_n
+
+    def _get_matrices(self, q, dq, t):
+        if self._matrices is None:
+            # copies, such that preallocated matrices of the system may be reassembled elsewhere
+            self._matrices = tuple(A.copy() for A in (self.M(q, dq, t), self.D(q, dq, t), self.K(q, dq, t)))
+        return self._matrices
+
+    def get_A_b(self, q_n, dq_n, ddq_n, t_n):
+        """
+        Return the effective matrix and the right hand side for the new acceleration
+        """
+        M, D, K = self._get_matrices(q_n, dq_n, t_n)
+        parameters = (self.dt, self.alpha_m, self.alpha_f, self.beta, self.gamma)
+        if self._S is None or parameters != self._S_parameters:
+            self._S = (1 - self.alpha_m) * M + (1 - self.alpha_f) * self.gamma * self.dt * D + \
+                (1 - self.alpha_f) * self.beta * self.dt ** 2 * K
+            self._S_parameters = parameters
+
+        self._t_n = t_n
+        self._q_n = q_n
+        self._dq_n = dq_n
+        self._ddq_n = ddq_n
+
+        # Newmark predictors without the contribution of the new acceleration
+        self._t_p = t_n + self.dt
+        self._q_p = q_n + self.dt * dq_n + self.dt ** 2 * (0.5 - self.beta) * ddq_n
+        self._dq_p = dq_n + self.dt * (1 - self.gamma) * ddq_n
+
+        t_f = self._get_midstep(self.alpha_f, t_n, self._t_p)
+        q_f = self._get_midstep(self.alpha_f, q_n, self._q_p)
+        dq_f = self._get_midstep(self.alpha_f, dq_n, self._dq_p)
+
+        b = self.f_ext(q_f, dq_f, t_f) - self.alpha_m * (M @ ddq_n) - D @ dq_f - K @ q_f
+        return self._S, b
+
+    def set_correction(self, ddq):
+        """
+        Correct variables by the new acceleration
+        """
+        self._ddq_p = ddq
+        self._q_p = self._q_p + self.beta * self.dt ** 2 * ddq
+        self._dq_p = self._dq_p + self.gamma * self.dt * ddq
+
+
+class LinearNewmarkBeta(LinearGeneralizedAlpha):
+    def __init__(self, M, f_ext, K, D, beta=0.25, gamma=0.5):
+        """
+        Newmark-beta integration scheme for linear systems, see NewmarkBeta and LinearGeneralizedAlpha.
+
+        Parameters
+        ----------
+        M : callable
+            Mass Matrix function, signature M(q, dq, t)
+        f_ext : callable
+            External force function, signature, f_ext(q, dq, t)
+        K : callable
+            Stiffness matrix function, signature K(q, dq, t)
+        D : callable
+            Linear viscous damping matrix, signature D(q, dq, t)
+        beta : float
+            Default value beta = 1/4.
+        gamma : float
+            Default value gamma = 1/2.
+        """
+        super().__init__(M, f_ext, K, D, 0.0, 0.0, beta, gamma)
+
+
+class LinearWBZAlpha(LinearGeneralizedAlpha):
+    def __init__(self, M, f_ext, K, D, rho_inf=0.9):
+        """
+        WBZ-alpha integration scheme for linear systems, see WBZAlpha and LinearGeneralizedAlpha.
+
+        Parameters
+        ----------
+        M : callable
+            Mass Matrix function, signature M(q, dq, t)
+        f_ext : callable
+            External force function, signature, f_ext(q, dq, t)
+        K : callable
+            Stiffness matrix function, signature K(q, dq, t)
+        D : callable
+            Linear viscous damping matrix, signature D(q, dq, t)
+        rho_inf : float
+            High frequency spectral radius. 0 <= rho_inf <= 1. Default value rho_inf = 0.9.
+        """
+        alpha_m = (rho_inf - 1) / (rho_inf + 1)
+        alpha_f = 0.0
+        beta = 0.25 * (1 - alpha_m) ** 2
+        gamma = 0.5 - alpha_m
+        super().__init__(M, f_ext, K, D, alpha_m, alpha_f, beta, gamma)
+
+
+class LinearHHTAlpha(LinearGeneralizedAlpha):
+    def __init__(self, M, f_ext, K, D, rho_inf=0.9):
+        """
+        HHT-alpha integration scheme for linear systems, see HHTAlpha and LinearGeneralizedAlpha.
+
+        Parameters
+        ----------
+        M : callable
+            Mass Matrix function, signature M(q, dq, t)
+        f_ext : callable
+            External force function, signature, f_ext(q, dq, t)
+        K : callable
+            Stiffness matrix function, signature K(q, dq, t)
+        D : callable
+            Linear viscous damping matrix, signature D(q, dq, t)
+        rho_inf : float
+            High frequency spectral radius. 1/2 <= rho_inf <= 1. Default value rho_inf = 0.9.
+        """
+        alpha_m = 0.0
+        alpha_f = (1 - rho_inf) / (1 + rho_inf)
+        beta = 0.25 * (1 + alpha_f) ** 2
+        gamma = 0.5 + alpha_f
+        super().__init__(M, f_ext, K, D, alpha_m, alpha_f, beta, gamma)
+
+
 class NonlinearIntegrator(IntegratorBase):
     def __init__(self):
         super().__init__()
@@ -99,6 +389,10 @@ class NonlinearIntegrator(IntegratorBase):
         self._rtol = 0.0
         self._atol = 1e-8
         self._rtol_scaling = 0.0
+        self._state_version = new_state_version()
+        # iterations and residual of the last step and flag if the nonlinear solver converged
+        self.iteration_info = None
+        self.converged = True
 
     @property
     def nonlinear_solver_options(self):
@@ -117,6 +411,22 @@ class NonlinearIntegrator(IntegratorBase):
         self._atol = dic.pop('atol', self._atol)
         self._nonlinear_solver_options = dic
 
+    def _get_state_version(self, q_p, tag):
+        """
+        Returns the version token of the state with the tag (e.g. the mid-step 'm' or 'f') belonging to q_p.
+
+        The version is an explicit counter that is bumped on every change of the state of the integrator, i.e. by
+        each prediction and correction. If q_p differs from the predicted or corrected displacements, e.g. because
+        the nonlinear solver has changed it inplace without calling set_correction, None is returned and the
+        functions are evaluated without cache.
+        """
+        if q_p is not self._q_p and not np.array_equal(q_p, self._q_p):
+            return None
+        return self._state_version, tag
+
+    def _new_state_version(self):
+        self._state_version = new_state_version()
+
     def newton_callback(self, x_p, res):
             # Call user defined callbacks
             for additional_callback in self._additional_callbacks:
@@ -156,6 +466,8 @@ class NonlinearIntegrator(IntegratorBase):
 
         # Correct all states with the new solution
         self.set_correction(q_p)
+        self.iteration_info = iteration_info
+        self.converged = iteration_info[1] <= nonlinear_solver_options['atol']
 
         # Print out Info:
         print('Time: {0:3.6f}, iterations: {1:3d}, residual: {2:6.3E}.'.format(self._t_p, iteration_info[0], iteration_info[1]))
@@ -188,12 +500,14 @@ class NonlinearStaticIntegrator(NonlinearIntegrator):
         
     def residual(self, q_p):
         zero_array = np.zeros_like(q_p)
-        f_ext = self._f_ext(q_p, zero_array, self._t_p)
-        res = - self._f_int(q_p, zero_array, self._t_p) + f_ext
+        state_version = self._get_state_version(q_p, 'p')
+        f_ext = call_with_state_version(self._f_ext, q_p, zero_array, self._t_p, state_version)
+        res = - call_with_state_version(self._f_int, q_p, zero_array, self._t_p, state_version) + f_ext
         return res
         
     def jacobian(self, q_p):
-        return -self._K(q_p, self._dq_p, self._t_p)
+        state_version = self._get_state_version(q_p, 'p')
+        return -call_with_state_version(self._K, q_p, self._dq_p, self._t_p, state_version)
     
     def set_prediction(self, q_n, dq_n, ddq_n, t_n):
         zero_array = np.zeros_like(q_n)
@@ -207,12 +521,16 @@ class NonlinearStaticIntegrator(NonlinearIntegrator):
         self._dq_p = zero_array
         self._ddq_p = zero_array
 
-        self._rtol_scaling = vector_norm(self._f_int(self._q_p, self._dq_p, self._t_p))
+        self._new_state_version()
+        self._rtol_scaling = vector_norm(call_with_state_version(self._f_int, self._q_p, self._dq_p, self._t_p,
+                                                                 self._get_state_version(self._q_p, 'p')))
         return
     
     def set_correction(self, q_p):
-        self._q_p = q_p
+        # copy, such that inplace changes of q_p are not taken for the corrected state
+        self._q_p = q_p.copy()
         self._t_p = self._t_n + self.dt
+        self._new_state_version()
         return
 
 
@@ -276,6 +594,8 @@ class GeneralizedAlpha(NonlinearIntegrator):
         self.f_ext = f_ext
         self.K = K
         self.D = D
+        # Optional function handle M_K_and_f_int(q, dq, t) returning M, K and f_int of one combined evaluation
+        self.M_K_and_f_int = None
 
         # Set timeintegration parameters
         self.alpha_m = alpha_m
@@ -286,6 +606,11 @@ class GeneralizedAlpha(NonlinearIntegrator):
     @staticmethod
     def _get_midstep(alpha, x_n, x_p):
         return (1 - alpha) * x_p + alpha * x_n
+
+    def _use_combined_evaluation(self):
+        # M is evaluated at the alpha_m-midstep and K, f_int at the alpha_f-midstep, thus one combined evaluation
+        # is only possible if both midsteps coincide
+        return self.M_K_and_f_int is not None and self.alpha_m == self.alpha_f
                 
     def residual(self, q_p):
         """
@@ -301,10 +626,15 @@ class GeneralizedAlpha(NonlinearIntegrator):
         q_f = self._get_midstep(self.alpha_f, self._q_n, q_p)
         dq_f = self._get_midstep(self.alpha_f, self._dq_n, self._dq_p)
 
-        M = self.M(q_m, dq_m, t_m)
-        D = self.D(q_f, dq_f, t_f)
-        f_int_f = self.f_int(q_f, dq_f, t_f)
-        f_ext_f = self.f_ext(q_f, dq_f, t_f)
+        state_version_m = self._get_state_version(q_p, 'm')
+        state_version_f = self._get_state_version(q_p, 'f')
+        if self._use_combined_evaluation():
+            M, _, f_int_f = call_with_state_version(self.M_K_and_f_int, q_f, dq_f, t_f, state_version_f)
+        else:
+            M = call_with_state_version(self.M, q_m, dq_m, t_m, state_version_m)
+            f_int_f = call_with_state_version(self.f_int, q_f, dq_f, t_f, state_version_f)
+        D = call_with_state_version(self.D, q_f, dq_f, t_f, state_version_f)
+        f_ext_f = call_with_state_version(self.f_ext, q_f, dq_f, t_f, state_version_f)
 
         res = f_ext_f - M @ ddq_m - D @ dq_f - f_int_f
         return res
@@ -321,9 +651,14 @@ class GeneralizedAlpha(NonlinearIntegrator):
         q_f = self._get_midstep(self.alpha_f, self._q_n, q_p)
         dq_f = self._get_midstep(self.alpha_f, self._dq_n, self._dq_p)
 
-        M = self.M(q_m, dq_m, t_m)
-        D = self.D(q_f, dq_f, t_f)
-        K = self.K(q_f, dq_f, t_f)
+        state_version_m = self._get_state_version(q_p, 'm')
+        state_version_f = self._get_state_version(q_p, 'f')
+        if self._use_combined_evaluation():
+            M, K, _ = call_with_state_version(self.M_K_and_f_int, q_f, dq_f, t_f, state_version_f)
+        else:
+            M = call_with_state_version(self.M, q_m, dq_m, t_m, state_version_m)
+            K = call_with_state_version(self.K, q_f, dq_f, t_f, state_version_f)
+        D = call_with_state_version(self.D, q_f, dq_f, t_f, state_version_f)
 
         Jac = -(1 - self.alpha_m) / (self.beta * self.dt ** 2) * M - (1 - self.alpha_f) * self.gamma / (
                 self.beta * self.dt) * D - (1 - self.alpha_f) * K
@@ -344,7 +679,9 @@ class GeneralizedAlpha(NonlinearIntegrator):
         self._ddq_p = np.zeros_like(self._q_p)
         self._t_p = t_n + self.dt
 
-        self._rtol_scaling = vector_norm(self.f_int(self._q_p, self._dq_p, self._t_p))
+        self._new_state_version()
+        self._rtol_scaling = vector_norm(call_with_state_version(self.f_int, self._q_p, self._dq_p, self._t_p,
+                                                                 self._get_state_version(self._q_p, 'p')))
         return
     
     def set_correction(self, q_p):
@@ -356,6 +693,7 @@ class GeneralizedAlpha(NonlinearIntegrator):
         self._q_p[:] = q_p[:]
         self._dq_p += self.gamma / (self.beta * self.dt) * delta_q_p
         self._ddq_p += 1 / (self.beta * self.dt ** 2) * delta_q_p
+        self._new_state_version()
         return
 # Not tested yet    
 
@@ -12,14 +12,16 @@ Solver-module to solve nonlinear boundary value problems.
 import logging
 import numpy as np
 from scipy.sparse import issparse
-from amfe.linalg.linearsolvers import ScipySparseLinearSolver
+from amfe.linalg.linearsolvers import ScipySparseLinearSolver, ScipySparseLULinearSolver
 
 from .tools import MemoizeJac
 
 from ..linalg.norms import vector_norm
 
 __all__ = [
-    'NewtonRaphson'
+    'NewtonRaphson',
+    'LBFGS',
+    'Broyden',
 ]
 
 abort_statement = '''
@@ -34,11 +36,16 @@ class NewtonRaphson:
     """
     Class for solving nonlinear boundary value problem with a classical Newton-Raphson technique.
     It requires evaluation of the residuals' first derivative in every iteration.
+
+    In the modified Newton mode the Jacobian is only evaluated and factorized if the refactorization policy
+    demands it, otherwise the factorization of the linear solver is reused.
     """
     def __init__(self):
         self._options = dict()
         self.logger = logging.getLogger('amfe.solver.nonlinear_solver.NewtonRaphson')
         self.callback = None
+        # Jacobian belonging to the factorization of the linear solver in modified Newton mode
+        self._Jac = None
         return
 
     def set_options(self, options):
@@ -59,17 +66,45 @@ class NewtonRaphson:
                 Flag if condition number is evaluated and printed in each iteration
             verbose : bool
                 Flag for verbose mode
-            
+            modified_newton : bool
+                Flag for modified Newton mode, i.e. the factorization of the Jacobian is reused until the
+                refactorization policy demands a new one. The linear solver must provide a factorize method and
+                accept the reuse_factorization keyword (e.g. ScipySparseLULinearSolver, PardisoLinearSolver).
+                Default: False
+            refactorization_interval : int or None
+                Modified Newton: refactorize at least every refactorization_interval iterations.
+                None: no periodic refactorization (default)
+            refactorization_ratio : float or None
+                Modified Newton: refactorize if the ratio of the current and the former residual norm exceeds
+                refactorization_ratio, i.e. if the convergence stagnates. None: no check. Default: 0.5.
+                The default matches the default maxiter of 10: with a contraction worse than 0.5 per iteration,
+                ten iterations reduce the residual by less than 0.5**10 = 1e-3, which does not reach the usual
+                tolerances. Raise it together with maxiter for fewer factorizations
+            refactorize_each_solve : bool
+                Modified Newton: refactorize in the first iteration of each call of solve, i.e. once per time step.
+                If False, the factorization of the former call is reused. Default: True
+
         Returns
         -------
         None
         """
         options.setdefault('atol', 1.0e-08)
         options.setdefault('maxiter', 10)
-        options.setdefault('linear_solver', ScipySparseLinearSolver())
+        options.setdefault('modified_newton', False)
+        if options['modified_newton']:
+            options.setdefault('linear_solver', ScipySparseLULinearSolver())
+        else:
+            options.setdefault('linear_solver', ScipySparseLinearSolver())
         options.setdefault('linear_solver_kwargs', dict())
         options.setdefault('track_condition_number', False)
         options.setdefault('verbose', False)
+        options.setdefault('refactorization_interval', None)
+        options.setdefault('refactorization_ratio', 0.5)
+        options.setdefault('refactorize_each_solve', True)
+
+        if options['modified_newton'] and not hasattr(options['linear_solver'], 'factorize'):
+            raise ValueError('The modified Newton mode needs a linear solver that can reuse its factorization, '
+                             'e.g. ScipySparseLULinearSolver or PardisoLinearSolver')
 
         self._options = options
 
@@ -120,10 +155,13 @@ class NewtonRaphson:
             args = (args, )
 
         # Check if jac is callable and convert to MemoizeJac if jac is true
+        # The memoized jacobian is identified by the iteration number instead of comparing the solution arrays
+        state_kwargs = dict()
         if not callable(jac):
             if bool(jac):
                 residual = MemoizeJac(residual)
                 jac = residual.derivative
+                state_kwargs = {'state_version': 0}
             else:
                 jac = None
 
@@ -146,11 +184,17 @@ class NewtonRaphson:
         # Initialize
         iteration = 0
         q = x0.copy()
-        res = residual(q, *args)
+        res = residual(q, *args, **state_kwargs)
         res_abs = self._abs(res)
         if self._options['verbose']:
             print('Iteration: {0:3d}, residual: {1:6.3E}'.format(iteration, res_abs))
 
+        modified_newton = self._options['modified_newton']
+        if modified_newton and self._options['refactorize_each_solve']:
+            self._Jac = None
+        iterations_since_factorization = 0
+        stagnating = False
+
         while res_abs > self._options['atol']:
             iteration += 1
             if self._options['verbose']:
@@ -161,12 +205,29 @@ class NewtonRaphson:
                 print(abort_statement)
                 return q, (iteration, res_abs)
 
-            # Update jacobian
-            Jac = jac(q, *args)
+            if modified_newton:
+                interval = self._options['refactorization_interval']
+                refactorize = self._Jac is None or stagnating or \
+                    (interval is not None and iterations_since_factorization >= interval)
+            else:
+                refactorize = True
+
+            if refactorize:
+                # Update jacobian
+                Jac = jac(q, *args, **state_kwargs)
+                iterations_since_factorization = 0
+                if modified_newton:
+                    self._Jac = Jac
+            else:
+                Jac = self._Jac
+            iterations_since_factorization += 1
 
             # solve for correction
             if np.isscalar(Jac):
                 delta_q = 1/Jac * -res
+            elif modified_newton:
+                delta_q = -self._options['linear_solver'].solve(Jac, res, reuse_factorization=not refactorize,
+                                                                **self._options['linear_solver_kwargs'])
             else:
                 delta_q = -self._options['linear_solver'].solve(Jac, res, **self._options['linear_solver_kwargs'])
 
@@ -178,8 +239,13 @@ class NewtonRaphson:
                 self.callback(q, res)
 
             # Update residual
-            res = residual(q, *args)
+            if state_kwargs:
+                state_kwargs['state_version'] = iteration
+            res = residual(q, *args, **state_kwargs)
+            res_abs_old = res_abs
             res_abs = self._abs(res)
+            ratio = self._options['refactorization_ratio']
+            stagnating = ratio is not None and res_abs > ratio * res_abs_old
 
             # end of Newton-Raphson iteration loop
             if self._options['track_condition_number']:
@@ -195,3 +261,283 @@ class NewtonRaphson:
                 if self._options['verbose']:
                     print('Iteration: {0:3d}, residual: {1:6.3E}.'.format(iteration, res_abs))
         return q, (iteration, res_abs)
+
+
+class QuasiNewtonBase:
+    """
+    Base class for quasi-Newton solvers of nonlinear boundary value problems.
+
+    The Jacobian is only evaluated and factorized at the start of each solve (and after a restart). The further
+    iterations need residual evaluations only, the inverse Jacobian is approximated by updates of the initial
+    factorization with the last steps and residual differences.
+    """
+    def __init__(self):
+        self._options = dict()
+        self.logger = logging.getLogger('amfe.solver.nonlinear_solver.' + type(self).__name__)
+        self.callback = None
+        self._Jac = None
+        return
+
+    def set_options(self, options):
+        """
+        Optional method to change convergence-properties during runtime.
+
+        Parameters
+        ----------
+        options: dict()
+            options dictionary can have following keys:
+            atol : float
+                absolute tolerance
+            maxiter : int
+                maximum number of iterations
+            memory : int
+                maximum number of stored updates. Default: 20
+            linear_solver : instance of one of the included linear solver classes
+                linear solver that can reuse its factorization, e.g. ScipySparseLULinearSolver or
+                PardisoLinearSolver. Default: ScipySparseLULinearSolver
+            restart_ratio : float or None
+                restart with a new Jacobian at the current solution if the ratio of the current and the former
+                residual norm exceeds restart_ratio. None: no restarts. Default: 1.0
+            verbose : bool
+                Flag for verbose mode
+
+        Returns
+        -------
+        None
+        """
+        options.setdefault('atol', 1.0e-08)
+        options.setdefault('maxiter', 50)
+        options.setdefault('memory', 20)
+        options.setdefault('linear_solver', ScipySparseLULinearSolver())
+        options.setdefault('linear_solver_kwargs', dict())
+        options.setdefault('restart_ratio', 1.0)
+        options.setdefault('verbose', False)
+
+        if not hasattr(options['linear_solver'], 'factorize'):
+            raise ValueError('Quasi-Newton solvers need a linear solver that can reuse its factorization, '
+                             'e.g. ScipySparseLULinearSolver or PardisoLinearSolver')
+
+        self._options = options
+
+        return
+
+    def solve(self, residual, x0, args=(), jac=None, tol=None, callback=None, options=None):
+        """
+        Iteration loop of the quasi-Newton solver for nonlinear problems.
+
+        Parameters
+        ----------
+        residual : function
+            provides the current residual of the problem dependant of the current solution
+            signature def residual(q), return ndarray
+        x0 : ndarray
+            initial solution array
+        args : tuple
+            extra arguments for call of residual and jac
+        jac : {function, bool}
+            provides the current jacobian of the problem w.r.t. the current solution
+            def jac(q) return ndarray,
+            if jac is boolean and True it is assumed that the residual function also provides the Jacobian
+        tol : float
+            tolerance (if not already set in options)
+        callback : function, optional
+            Optional callback function. It is called AFTER every iteration as callback(x, f), where x is the
+            current solution  and f the corresponding residual
+        options : dict
+            further options
+
+        Returns
+        -------
+        q : ndarray
+            solution
+        iteration : int
+            iterations, needed to find the solution
+        """
+        # Convert args to tuple
+        if not isinstance(args, tuple):
+            args = (args, )
+
+        state_kwargs = dict()
+        if not callable(jac):
+            if bool(jac):
+                residual = MemoizeJac(residual)
+                jac = residual.derivative
+                state_kwargs = {'state_version': 0}
+            else:
+                raise ValueError('Quasi-Newton solvers need a jacobian for the initial factorization')
+
+        # Parse options
+        if options is None:
+            options = dict()
+        if tol is not None:
+            options.setdefault('atol', tol)
+        self.set_options(options)
+
+        # Set callback function
+        self.callback = callback
+
+        # Initialize
+        iteration = 0
+        q = x0.copy()
+        res = residual(q, *args, **state_kwargs)
+        res_abs = NewtonRaphson._abs(res)
+        if self._options['verbose']:
+            print('Iteration: {0:3d}, residual: {1:6.3E}'.format(iteration, res_abs))
+
+        restart = True
+        while res_abs > self._options['atol']:
+            iteration += 1
+
+            # catch failing convergence
+            if iteration > self._options['maxiter']:
+                print(abort_statement)
+                return q, (iteration, res_abs)
+
+            if restart:
+                self._Jac = jac(q, *args, **state_kwargs)
+                if not np.isscalar(self._Jac):
+                    self._options['linear_solver'].factorize(self._Jac, **self._options['linear_solver_kwargs'])
+                self._reset_memory()
+                restart = False
+
+            # solve for correction
+            delta_q = -self._apply_inverse(res)
+
+            # correct variables
+            q += delta_q
+
+            # Call callback
+            if callback is not None:
+                self.callback(q, res)
+
+            # Update residual
+            if state_kwargs:
+                state_kwargs['state_version'] = iteration
+            res_old = res
+            res = residual(q, *args, **state_kwargs)
+            res_abs_old = res_abs
+            res_abs = NewtonRaphson._abs(res)
+
+            ratio = self._options['restart_ratio']
+            if ratio is not None and res_abs > ratio * res_abs_old:
+                restart = True
+            else:
+                self._update(np.ravel(delta_q), np.ravel(res - res_old))
+
+            if self._options['verbose']:
+                print('Iteration: {0:3d}, residual: {1:6.3E}.'.format(iteration, res_abs))
+        return q, (iteration, res_abs)
+
+    def _apply_initial_inverse(self, r):
+        """
+        Returns the product of the inverse initial Jacobian and r by means of the stored factorization
+        """
+        if np.isscalar(self._Jac):
+            return r / self._Jac
+        return self._options['linear_solver'].solve(self._Jac, r, reuse_factorization=True,
+                                                    **self._options['linear_solver_kwargs'])
+
+    def _reset_memory(self):
+        pass
+
+    def _apply_inverse(self, r):
+        """
+        Returns the product of the approximated inverse Jacobian and the residual r
+        """
+        pass
+
+    def _update(self, s, y):
+        """
+        Updates the approximation by the step s and the residual difference y
+        """
+        pass
+
+
+class LBFGS(QuasiNewtonBase):
+    """
+    Limited-memory BFGS solver for nonlinear boundary value problems with symmetric Jacobians.
+
+    The inverse Jacobian is approximated by the two-loop recursion with the factorized initial Jacobian as
+    initial matrix. The initial Jacobian may be positive or negative definite, e.g. -K for the residuals of the
+    integrators. The curvature condition of the updates is checked against its sign.
+    """
+    def __init__(self):
+        super().__init__()
+        self._s = []
+        self._y = []
+        self._rho = []
+        self._curvature_sign = None
+
+    def _reset_memory(self):
+        self._s = []
+        self._y = []
+        self._rho = []
+        self._curvature_sign = None
+
+    def _apply_inverse(self, r):
+        shape = np.shape(r)
+        q = np.array(r, dtype=float).ravel()
+        alphas = []
+        for s, y, rho in zip(reversed(self._s), reversed(self._y), reversed(self._rho)):
+            alpha = rho * s.dot(q)
+            q -= alpha * y
+            alphas.append(alpha)
+        z = np.ravel(self._apply_initial_inverse(q))
+        for s, y, rho, alpha in zip(self._s, self._y, self._rho, reversed(alphas)):
+            beta = rho * y.dot(z)
+            z += s * (alpha - beta)
+        return z.reshape(shape)
+
+    def _update(self, s, y):
+        if self._curvature_sign is None:
+            # the definiteness of the initial Jacobian, the updates keep it for steps with sign*y^T s > 0
+            sJs = s.dot(np.ravel(self._Jac * s if np.isscalar(self._Jac) else self._Jac.dot(s)))
+            if sJs == 0.0:
+                return
+            self._curvature_sign = np.sign(sJs)
+        ys = y.dot(s)
+        # skip updates that violate the curvature condition
+        if self._curvature_sign * ys <= 1e-14 * np.linalg.norm(y) * np.linalg.norm(s):
+            return
+        if len(self._s) == self._options['memory']:
+            del self._s[0], self._y[0], self._rho[0]
+        self._s.append(s)
+        self._y.append(y)
+        self._rho.append(1.0 / ys)
+
+
+class Broyden(QuasiNewtonBase):
+    """
+    Limited-memory Broyden solver for general nonlinear boundary value problems.
+
+    The inverse Jacobian is approximated by the product form of the good Broyden update
+    H_k+1 = (I + u_k s_k^T) H_k with the factorized initial Jacobian as H_0.
+    """
+    def __init__(self):
+        super().__init__()
+        self._s = []
+        self._u = []
+
+    def _reset_memory(self):
+        self._s = []
+        self._u = []
+
+    def _apply_inverse(self, r):
+        shape = np.shape(r)
+        z = np.array(np.ravel(self._apply_initial_inverse(np.ravel(r))), dtype=float)
+        for s, u in zip(self._s, self._u):
+            z += u * s.dot(z)
+        return z.reshape(shape)
+
+    def _update(self, s, y):
+        Hy = np.ravel(self._apply_inverse(y))
+        sHy = s.dot(Hy)
+        # skip updates that would make the approximation singular
+        if abs(sHy) <= 1e-14 * np.linalg.norm(s) * np.linalg.norm(Hy):
+            return
+        # the product form cannot drop single updates, hence the updates restart if the memory is full
+        if len(self._s) == self._options['memory']:
+            self._reset_memory()
+            return
+        self._s.append(s)
+        self._u.append((s - Hy) / sHy)
@@ -9,11 +9,15 @@
 Abstract super class of all solvers.
 """
 
+import logging
+import numpy as np
 from copy import deepcopy
+from functools import partial
 from time import time
 from amfe.linalg.linearsolvers import *
+from amfe.linalg.preconditioners import *
 from amfe.solver.nonlinear_solver import *
-from amfe.solver.translators import MechanicalSystem
+from amfe.solver.translators import MechanicalSystem, create_near_nullspace_from_component
 from amfe.solver.initializer import *
 from amfe.component import StructuralComponent
 from amfe.solver.integrator import *
@@ -105,6 +109,200 @@ class TransientSolver(Solver):
         return t, q, dq, ddq
 
 
+class AdaptiveTransientSolver(TransientSolver):
+    """
+    Transient solver with adaptive timestep size for the integrators of the Newmark family (GeneralizedAlpha,
+    NewmarkBeta, WBZAlpha, HHTAlpha and their linear versions).
+
+    The local error of each step is estimated by the Zienkiewicz-Xie estimate
+
+        e = (beta - 1/6) dt^2 (ddq_n+1 - ddq_n)
+
+    and the step is accepted if norm(e) <= atol + rtol * norm(q_n+1). The next timestep size is chosen by
+    dt_new = dt * safety * (1/err)^(1/3), limited to [min_factor, max_factor] * dt and [dt_min, dt_max].
+    Predicted ratios within the dead band keep the timestep size unchanged, thus the linear integrators do not
+    factorize their iteration matrix after every step. Steps whose Newton iteration did not converge are rejected
+    and repeated with a reduced timestep size, steps which needed more than newton_target_iterations iterations do
+    not increase the timestep size.
+
+    Parameters
+    ----------
+    integrator : GeneralizedAlpha or LinearGeneralizedAlpha
+        integrator of the Newmark family, its dt is the initial timestep size
+    accelerationinitializer : object
+        object with method get_acceleration(t0, q0, dq0)
+    rtol : float
+        relative tolerance of the local error. Default: 1e-3
+    atol : float
+        absolute tolerance of the local error. Default: 1e-12
+    dt_min : float or None
+        minimal timestep size. Steps with dt_min are accepted regardless of their error, a RuntimeError is raised if
+        their Newton iteration does not converge. None: 1e-8 * (t_end - t0). Default: None
+    dt_max : float
+        maximal timestep size. Default: inf
+    safety : float
+        safety factor of the timestep size prediction. Default: 0.9
+    min_factor, max_factor : float
+        limits of the ratio of subsequent timestep sizes. Default: 0.2, 2.0
+    newton_target_iterations : int or None
+        number of Newton iterations above which the timestep size is not increased. Default: 4
+    dead_band : tuple of float
+        interval of predicted ratios of subsequent timestep sizes that keep the timestep size. Default: (1.0, 1.2)
+
+    References
+    ----------
+       [1]  O.C. Zienkiewicz and Y.M. Xie (1991): A simple error estimator and adaptive time stepping procedure for
+            dynamic analysis. Earthquake Engineering and Structural Dynamics 20(9) 871--887.
+            DOI: 10.1002/eqe.4290200906.
+    """
+    def __init__(self, integrator, accelerationinitializer, rtol=1e-3, atol=1e-12, dt_min=None, dt_max=np.inf,
+                 safety=0.9, min_factor=0.2, max_factor=2.0, newton_target_iterations=4, dead_band=(1.0, 1.2)):
+        super().__init__(integrator, accelerationinitializer)
+        if dt_min is not None and not dt_min > 0.0:
+            raise ValueError('The minimal timestep size must be positive')
+        self.logger = logging.getLogger('amfe.solver.solver.AdaptiveTransientSolver')
+        self.rtol = rtol
+        self.atol = atol
+        self.dt_min = dt_min
+        self.dt_max = dt_max
+        self.safety = safety
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.newton_target_iterations = newton_target_iterations
+        self.dead_band = dead_band
+        self.dt_history = []
+        self.no_of_rejected_steps = 0
+
+    def solve(self, write_callback, t0, q0, dq0, t_end, t_eval=None):
+        """
+        Solves the transient problem with adaptive timestep sizes
+
+        Parameters
+        ----------
+        write_callback : callable
+            callback write_callback(t, q, dq, ddq) for the output
+        t0 : float
+            initial time
+        q0, dq0 : ndarray
+            initial displacements and velocities
+        t_end : float
+            end time
+        t_eval : array_like, optional
+            times of the output, the states are interpolated between the accepted steps (dense output).
+            Default: output at every accepted step
+
+        Returns
+        -------
+        None
+        """
+        t_clock_start = time()
+        for state in self._march(t0, q0, dq0, t_end, t_eval):
+            write_callback(*state)
+        t_clock_end = time()
+        print('Time for solving problem: {0:6.3f} seconds.'.format(t_clock_end - t_clock_start))
+        return
+
+    async def solve_async(self, write_callback, t0, q0, dq0, t_end, t_eval=None):
+        t_clock_start = time()
+        for state in self._march(t0, q0, dq0, t_end, t_eval):
+            await write_callback(*state)
+        t_clock_end = time()
+        print('Time for solving problem: {0:6.3f} seconds.'.format(t_clock_end - t_clock_start))
+        return
+
+    def _march(self, t0, q0, dq0, t_end, t_eval):
+        """
+        Generator of the output states
+        """
+        t, q, dq, ddq = self._initialize(t0, q0, dq0)
+        if t_eval is None:
+            yield t, q, dq, ddq
+        else:
+            t_eval = np.sort(np.asarray(t_eval, dtype=float))
+            t_eval = t_eval[(t_eval >= t0) & (t_eval <= t_end)]
+            for t_out in t_eval[t_eval == t0]:
+                yield t_out, q, dq, ddq
+            t_eval = t_eval[t_eval > t0]
+
+        self.dt_history = []
+        self.no_of_rejected_steps = 0
+        dt_min = 1e-8 * (t_end - t0) if self.dt_min is None else self.dt_min
+        dt = min(max(self._integrator.dt, dt_min), self.dt_max)
+        while t < t_end:
+            # the last step ends at t_end, a short remainder is avoided by two equal last steps
+            dt_step = min(dt, t_end - t)
+            if 0.0 < t_end - t - dt < self.min_factor * dt:
+                dt_step = 0.5 * (t_end - t)
+            self._integrator.dt = dt_step
+            t_p, q_p, dq_p, ddq_p = self._integrator.step(t, q, dq, ddq)
+            converged = getattr(self._integrator, 'converged', True)
+            error = self._error(q_p, ddq, ddq_p, dt_step)
+
+            at_minimum = dt_step <= dt_min
+            if not converged or error > 1.0:
+                if not at_minimum:
+                    self.no_of_rejected_steps += 1
+                    if converged:
+                        factor = max(self.min_factor, self.safety * error ** (-1/3))
+                    else:
+                        factor = 0.5
+                    dt = max(dt_step * factor, dt_min)
+                    continue
+                if not converged:
+                    raise RuntimeError('The Newton iteration of the step at t = {} with the minimal timestep size {} '
+                                       'did not converge'.format(t, dt_step))
+                self.logger.warning('Step at t = {} with the minimal timestep size accepted with error {}'
+                                    .format(t, error))
+            if not t_p > t:
+                raise RuntimeError('The timestep size {} does not advance the time t = {}'.format(dt_step, t))
+
+            # accept the step and predict the next timestep size
+            if t_eval is not None:
+                output = t_eval[t_eval <= t_p]
+                for t_out in output:
+                    yield self._interpolate(t_out, t, q, dq, ddq, t_p, q_p, dq_p, ddq_p)
+                t_eval = t_eval[t_eval > t_p]
+            else:
+                yield t_p, q_p, dq_p, ddq_p
+            self.dt_history.append(dt_step)
+            t, q, dq, ddq = t_p, q_p, dq_p, ddq_p
+
+            factor = self.max_factor if error == 0.0 else self.safety * error ** (-1/3)
+            iteration_info = getattr(self._integrator, 'iteration_info', None)
+            if self.newton_target_iterations is not None and iteration_info is not None \
+                    and iteration_info[0] > self.newton_target_iterations:
+                factor = min(factor, 1.0)
+            factor = min(max(factor, self.min_factor), self.max_factor)
+            if self.dead_band[0] <= factor <= self.dead_band[1]:
+                factor = 1.0
+            dt = min(max(dt_step * factor, dt_min), self.dt_max)
+
+    def _error(self, q_p, ddq_n, ddq_p, dt):
+        """
+        Returns the ratio of the Zienkiewicz-Xie local error estimate and the tolerance
+        """
+        error = np.linalg.norm((self._integrator.beta - 1/6) * dt ** 2 * (ddq_p - ddq_n))
+        tolerance = self.atol + self.rtol * np.linalg.norm(q_p)
+        if error == 0.0:
+            return 0.0
+        return error / tolerance
+
+    @staticmethod
+    def _interpolate(t, t_n, q_n, dq_n, ddq_n, t_p, q_p, dq_p, ddq_p):
+        """
+        Returns the state at t by cubic Hermite interpolation of the displacements and velocities and linear
+        interpolation of the accelerations between the steps n and p
+        """
+        h = t_p - t_n
+        s = (t - t_n) / h
+        q = (2*s**3 - 3*s**2 + 1) * q_n + (s**3 - 2*s**2 + s) * h * dq_n + (-2*s**3 + 3*s**2) * q_p + \
+            (s**3 - s**2) * h * dq_p
+        dq = (6*s**2 - 6*s) / h * q_n + (3*s**2 - 4*s + 1) * dq_n + (6*s - 6*s**2) / h * q_p + \
+            (3*s**2 - 2*s) * dq_p
+        ddq = (1 - s) * ddq_n + s * ddq_p
+        return t, q, dq, ddq
+
+
 class SolverFactory:
     analysis_types = ['static',
                       'transient',
@@ -112,11 +310,23 @@ class SolverFactory:
                       ]
 
     linear_solvers = {'scipy-sparse': ScipySparseLinearSolver(),
+                      'scipy-splu': ScipySparseLULinearSolver(),
                       'pardiso': PardisoLinearSolver(),
                       'scipy-cg': ScipyConjugateGradientLinearSolver(),
+                      'scipy-pcg': PreconditionedConjugateGradientLinearSolver(),
+                      'scipy-minres': PreconditionedMinresLinearSolver(),
+                      'scipy-gmres': PreconditionedGmresLinearSolver(),
                       }
 
-    nonlinear_solvers = {'newton': NewtonRaphson()
+    preconditioners = {'jacobi': JacobiPreconditioner,
+                       'block-jacobi': BlockJacobiPreconditioner,
+                       'ilu': ILUPreconditioner,
+                       'amg': SmoothedAggregationPreconditioner,
+                       }
+
+    nonlinear_solvers = {'newton': NewtonRaphson(),
+                         'lbfgs': LBFGS(),
+                         'broyden': Broyden(),
                          }
 
     acceleration_intializers = ['zero',
@@ -125,7 +335,8 @@ class SolverFactory:
 
     def __init__(self):
 
-        self.integrators = {'genalpha': self._create_integrator_object_genalpha
+        self.integrators = {'genalpha': self._create_integrator_object_genalpha,
+                            'centraldifference': self._create_integrator_object_centraldifference
                             }
 
         self._solver = None
@@ -134,6 +345,10 @@ class SolverFactory:
         self._integrator = None
         self._linear_solver = None
         self._linear_solver_kwargs = dict()
+        self._preconditioner = None
+        self._preconditioner_kwargs = dict()
+        self._preconditioner_component = None
+        self._preconditioner_constraint_formulation = None
         self._no_of_timesteps = None
         self._dt_initial = None
         self._nonlinear_solver = None
@@ -143,6 +358,10 @@ class SolverFactory:
         self._newton_track_condition_number = False
         self._newton_verbose = False
         self._newton_callback = None
+        self._newton_modified = False
+        self._newton_refactorization_interval = None
+        self._newton_refactorization_ratio = 0.5
+        self._newton_refactorize_each_solve = True
         self._acceleration_initializer = None
         self._acceleration_initializer_linear_solver = None
         self._system = None
@@ -151,7 +370,12 @@ class SolverFactory:
         self._beta = None
         self._gamma = None
         self._rho_inf = None
+        self._mass_lumping = 'row_sum'
+        # fraction of the estimated critical timestep used by explicit integrators if no timestep size is set
+        self._critical_timestep_factor = 0.9
         self._async = False
+        self._adaptive_time_stepping = False
+        self._adaptive_time_stepping_options = dict()
         return
 
     # --------------------------------------- SETTER METHODS ---------------------------------------------------------
@@ -178,6 +402,12 @@ class SolverFactory:
         if key in self.integrators:
             self._integrator = key
 
+    def set_mass_lumping(self, method):
+        if method in ('row_sum', 'hrz'):
+            self._mass_lumping = method
+        else:
+            raise ValueError('Unknown lumping method {}. Choose \'row_sum\' or \'hrz\''.format(method))
+
     def set_linear_solver(self, key):
         if key in self.linear_solvers:
             self._linear_solver = key
@@ -185,10 +415,66 @@ class SolverFactory:
     def set_linear_solver_option(self, key, value):
         self._linear_solver_kwargs.update({key: value})
 
+    def set_linear_solver_preconditioner(self, key, structural_component=None, constraint_formulation=None,
+                                         **kwargs):
+        """
+        Sets the preconditioner of the preconditioned Krylov linear solvers
+
+        The near nullspace and the nodal dofs of the 'amg' preconditioner and the blocks of the 'block-jacobi'
+        preconditioner are built from the mesh and the mapping of the structural component and mapped through the
+        constraint formulation, see create_near_nullspace_from_component, unless they are given in kwargs.
+
+        Parameters
+        ----------
+        key : str {'jacobi', 'block-jacobi', 'ilu', 'amg'}
+            preconditioner, the amg preconditioner is a smoothed aggregation multigrid
+        structural_component : amfe.component.StructuralComponent, optional
+            Structural component the system has been created from. Default: the system if it is a
+            StructuralComponent
+        constraint_formulation : amfe.constraint.ConstraintFormulation, optional
+            Constraint formulation of the system, e.g. returned by create_constrained_mechanical_system_from_component.
+            Default: None (unconstrained system)
+        kwargs : dict
+            options passed to the constructor of the preconditioner, e.g. near_nullspace=rigid_body_modes(nodes)
+            for 'amg' or block_size=3 for 'block-jacobi'
+
+        Returns
+        -------
+        None
+        """
+        if key in self.preconditioners:
+            self._preconditioner = key
+            self._preconditioner_kwargs = kwargs
+            self._preconditioner_component = structural_component
+            self._preconditioner_constraint_formulation = constraint_formulation
+        else:
+            raise ValueError('Unknown preconditioner {}'.format(key))
+
     def set_nonlinear_solver(self, key):
         if key in self.nonlinear_solvers:
             self._nonlinear_solver = key
 
+    def set_adaptive_time_stepping(self, flag, **options):
+        """
+        Switches the adaptive timestep size control of implicit transient solvers on or off
+
+        Parameters
+        ----------
+        flag : bool
+            flag for adaptive time stepping, the timestep size set by set_timestep_size is the initial one
+        options : dict
+            options of the AdaptiveTransientSolver, e.g. rtol, atol, dt_min, dt_max, max_factor
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(flag, bool):
+            self._adaptive_time_stepping = flag
+            self._adaptive_time_stepping_options = options
+        else:
+            raise ValueError('flag must be boolean')
+
     def set_large_deflection(self, flag):
         if isinstance(flag, bool):
             self._large_deflection = flag
@@ -213,6 +499,51 @@ class SolverFactory:
     def set_newton_callback(self, func):
         self._newton_callback = func
 
+    def set_newton_modified(self, flag):
+        if isinstance(flag, bool):
+            self._newton_modified = flag
+        else:
+            raise ValueError('flag must be boolean')
+        return
+
+    def set_newton_refactorization_interval(self, no):
+        self._newton_refactorization_interval = no
+
+    def set_newton_refactorization_ratio(self, ratio):
+        """
+        Sets the residual ratio of the modified Newton mode above which the Jacobian is refactorized, see
+        NewtonRaphson.set_options. Default: 0.5, which matches the default maximum of 10 Newton iterations
+
+        Parameters
+        ----------
+        ratio : float or None
+            ratio of the current and the former residual norm, None to switch the check off
+
+        Returns
+        -------
+        None
+        """
+        self._newton_refactorization_ratio = ratio
+
+    def set_newton_refactorize_each_solve(self, flag):
+        """
+        Sets if the modified Newton mode refactorizes the Jacobian in the first iteration of each solve, i.e. once
+        per time step, or reuses the factorization of the former solve
+
+        Parameters
+        ----------
+        flag : bool
+            flag for a refactorization in each solve. Default: True
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(flag, bool):
+            self._newton_refactorize_each_solve = flag
+        else:
+            raise ValueError('flag must be boolean')
+
     def set_newton_track_condition_number(self, flag):
         if isinstance(flag, bool):
             self._newton_track_condition_number = flag
@@ -252,7 +583,7 @@ class SolverFactory:
     # ---------------------------------------- 2nd level DISTINGUISH ANALYSIS TYPE -----------------------------------
     def _create_static_solver(self):
         integrator = self._create_integrator_object_nonlinear_static()
-        linear_solver = deepcopy(self.linear_solvers[self._linear_solver])
+        linear_solver = self._create_linear_solver()
         linear_solver_kwargs = self._linear_solver_kwargs
         nonlinear_solver, nonlinear_solver_options = self._create_newton_solver(linear_solver, linear_solver_kwargs)
         integrator.nonlinear_solver_func = nonlinear_solver.solve
@@ -263,8 +594,10 @@ class SolverFactory:
         return TransientSolver(integrator, accelerationinitializer)
 
     def _create_transient_solver(self):
+        if self._integrator == 'centraldifference':
+            return self._create_explicit_transient_solver()
 
-        linear_solver = deepcopy(self.linear_solvers[self._linear_solver])
+        linear_solver = self._create_linear_solver()
         linear_solver_kwargs = self._linear_solver_kwargs
         if self._large_deflection is not None:
             if self._large_deflection:
@@ -274,6 +607,30 @@ class SolverFactory:
         else:
             raise ValueError('The large_deflection flag has not been set. Call set_large_deflection')
 
+    def _create_linear_solver(self):
+        linear_solver = deepcopy(self.linear_solvers[self._linear_solver])
+        if self._preconditioner is not None:
+            if not hasattr(linear_solver, 'preconditioner'):
+                raise ValueError('The linear solver {} cannot be preconditioned'.format(self._linear_solver))
+            linear_solver.preconditioner = self.preconditioners[self._preconditioner](
+                **self._get_preconditioner_kwargs())
+        return linear_solver
+
+    def _get_preconditioner_kwargs(self):
+        kwargs = dict(self._preconditioner_kwargs)
+        component = self._preconditioner_component
+        if component is None and isinstance(self._system, StructuralComponent):
+            component = self._system
+        if component is None:
+            return kwargs
+        if self._preconditioner == 'amg' and 'near_nullspace' not in kwargs and 'nodal_dofs' not in kwargs:
+            kwargs['near_nullspace'], kwargs['nodal_dofs'] = create_near_nullspace_from_component(
+                component, self._preconditioner_constraint_formulation)
+        elif self._preconditioner == 'block-jacobi' and 'blocks' not in kwargs and 'block_size' not in kwargs:
+            kwargs['blocks'] = create_near_nullspace_from_component(
+                component, self._preconditioner_constraint_formulation)[1]
+        return kwargs
+
     def _create_newton_solver(self, linear_solver, linear_solver_kwargs):
         if self._nonlinear_solver is not None:
             nonlinear_solver = deepcopy(self.nonlinear_solvers[self._nonlinear_solver])
@@ -284,6 +641,10 @@ class SolverFactory:
                                         'maxiter': self._newton_maxiter,
                                         'track_condition_number': self._newton_track_condition_number,
                                         'verbose': self._newton_verbose,
+                                        'modified_newton': self._newton_modified,
+                                        'refactorization_interval': self._newton_refactorization_interval,
+                                        'refactorization_ratio': self._newton_refactorization_ratio,
+                                        'refactorize_each_solve': self._newton_refactorize_each_solve,
                                         }
             if self._newton_callback is not None:
                 nonlinear_solver_options.update({'callback': self._newton_callback})
@@ -298,14 +659,42 @@ class SolverFactory:
                 integrator.nonlinear_solver_func = nonlinear_solver.solve
                 integrator.nonlinear_solver_options = nonlinear_solver_options
                 integrator.dt = self._dt_initial
-                accelerationinitializer = self._create_acceleration_initializer(linear_solver, linear_solver_kwargs)
+                # own linear solver, such that a reused factorization or preconditioner does not belong to M
+                accelerationinitializer = self._create_acceleration_initializer(self._create_linear_solver(),
+                                                                                linear_solver_kwargs)
             else:
                 raise ValueError('This kind of integrator is not implemented yet')
             # Create Solver Object
-            return TransientSolver(integrator, accelerationinitializer)
+            return self._create_transient_solver_object(integrator, accelerationinitializer)
 
     def _create_linear_transient_solver(self, linear_solver, linear_solver_kwargs):
-        return
+        if self._integrator == 'genalpha':
+            integrator = self._create_integrator_object_linear_genalpha()
+            integrator.linear_solver = linear_solver
+            integrator.linear_solver_kwargs = linear_solver_kwargs
+            integrator.dt = self._dt_initial
+            accelerationinitializer = self._create_acceleration_initializer(self._create_linear_solver(),
+                                                                            linear_solver_kwargs)
+        else:
+            raise ValueError('This kind of integrator is not implemented yet')
+        return self._create_transient_solver_object(integrator, accelerationinitializer)
+
+    def _create_transient_solver_object(self, integrator, accelerationinitializer):
+        if self._adaptive_time_stepping:
+            return AdaptiveTransientSolver(integrator, accelerationinitializer,
+                                           **self._adaptive_time_stepping_options)
+        return TransientSolver(integrator, accelerationinitializer)
+
+    def _create_explicit_transient_solver(self):
+        integrator = self._create_integrator_object_centraldifference()
+        if self._dt_initial is not None:
+            integrator.dt = self._dt_initial
+        elif hasattr(self._system, 'critical_timestep'):
+            integrator.dt = self._critical_timestep_factor * self._system.critical_timestep()
+        else:
+            raise ValueError('The timestep size has not been set. Call set_timestep_size')
+        # The initial acceleration follows from the lumped mass matrix without solving a system of equations
+        return TransientSolver(integrator, integrator)
 
     def _create_acceleration_initializer(self, linear_solver, linear_solver_kwargs):
         if self._acceleration_initializer is not None:
@@ -326,6 +715,8 @@ class SolverFactory:
     def _create_integrator_object_genalpha(self):
         integrator = GeneralizedAlpha(self._system.M, self._system.f_int, self._system.f_ext, self._system.K,
                                       self._system.D)
+        if hasattr(self._system, 'M_K_and_f_int'):
+            integrator.M_K_and_f_int = self._system.M_K_and_f_int
         if self._alpha_f is not None:
             integrator.alpha_f = self._alpha_f
         if self._alpha_m is not None:
@@ -336,6 +727,32 @@ class SolverFactory:
             integrator.gamma = self._gamma
         return integrator
 
+    def _create_integrator_object_linear_genalpha(self):
+        integrator = LinearGeneralizedAlpha(self._system.M, self._system.f_ext, self._system.K, self._system.D)
+        if self._alpha_f is not None:
+            integrator.alpha_f = self._alpha_f
+        if self._alpha_m is not None:
+            integrator.alpha_m = self._alpha_m
+        if self._beta is not None:
+            integrator.beta = self._beta
+        if self._gamma is not None:
+            integrator.gamma = self._gamma
+        return integrator
+
+    def _create_integrator_object_centraldifference(self):
+        if isinstance(self._system, StructuralComponent):
+            if self._system.constraints.no_of_constraints > 0:
+                raise ValueError('The lumped mass of a StructuralComponent is unconstrained. Create the system with '
+                                 'create_constrained_mechanical_system_from_component(..., mass_lumping=\'{}\') '
+                                 'to apply the constraints'.format(self._mass_lumping))
+            M = partial(self._system.M_lumped, method=self._mass_lumping)
+        elif self._mass_lumping == 'row_sum':
+            M = self._system.M
+        else:
+            raise ValueError('HRZ lumping needs the element mass matrices. Set an unconstrained StructuralComponent '
+                             'as system or create the system with mass_lumping=\'hrz\'')
+        return CentralDifference(M, self._system.f_int, self._system.f_ext, self._system.D)
+
     def _create_integrator_object_nonlinear_static(self):
         integrator = NonlinearStaticIntegrator(self._system.f_int, self._system.f_ext, self._system.K)
         return integrator
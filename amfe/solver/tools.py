@@ -1,13 +1,82 @@
 
 
+from functools import lru_cache
+from inspect import signature
+from itertools import count
+
 import numpy as np
 
 __all__ = ['MemoizeJac',
            'MemoizeStiffness',
            'MemoizeConstant',
+           'new_state_version',
+           'call_with_state_version',
            ]
 
 
+_state_versions = count()
+
+
+def new_state_version():
+    """
+    Returns a new unique state version token.
+
+    A state version identifies one state (q, dq, t) of a system. Functions that accept a state_version keyword
+    may return the cached result of a former call with the same token instead of comparing the state vectors.
+
+    Returns
+    -------
+    state_version : int
+        unique token
+    """
+    return next(_state_versions)
+
+
+@lru_cache(maxsize=256)
+def _function_accepts_state_version(function):
+    try:
+        return 'state_version' in signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _accepts_state_version(func):
+    # bound methods are created anew on every attribute access, hence the signature is cached for the function
+    function = getattr(func, '__func__', func)
+    try:
+        return _function_accepts_state_version(function)
+    except TypeError:
+        # unhashable callable
+        return _function_accepts_state_version.__wrapped__(function)
+
+
+def call_with_state_version(func, q, dq, t, state_version=None):
+    """
+    Call func(q, dq, t) and pass the state_version if func accepts it as keyword.
+
+    Parameters
+    ----------
+    func : callable
+        function with signature func(q, dq, t) or func(q, dq, t, state_version=None)
+    q : ndarray
+        displacements
+    dq : ndarray
+        velocities
+    t : float
+        time
+    state_version : hashable, optional
+        token identifying the state (q, dq, t)
+
+    Returns
+    -------
+    result
+        return value of func
+    """
+    if state_version is not None and _accepts_state_version(func):
+        return func(q, dq, t, state_version=state_version)
+    return func(q, dq, t)
+
+
 class MemoizeJac(object):
     """ Decorator that caches the value gradient of function each time it
     is called. """
@@ -15,18 +84,23 @@ class MemoizeJac(object):
         self.fun = fun
         self.jac = None
         self.x = None
+        self.state_version = None
 
-    def __call__(self, x, *args):
-        self.x = np.asarray(x).copy()
+    def __call__(self, x, *args, state_version=None):
+        # with a state version the state does not need to be stored for comparisons
+        self.x = np.asarray(x).copy() if state_version is None else None
+        self.state_version = state_version
         fg = self.fun(x, *args)
         self.jac = fg[1]
         return fg[0]
 
-    def derivative(self, x, *args):
-        if self.jac is not None and np.alltrue(x == self.x):
+    def derivative(self, x, *args, state_version=None):
+        if state_version is not None:
+            if self.jac is not None and state_version == self.state_version:
+                return self.jac
+        elif self.jac is not None and self.x is not None and np.alltrue(x == self.x):
             return self.jac
-        else:
-            self(x, *args)
+        self(x, *args, state_version=state_version)
         return self.jac
 
 
@@ -51,20 +125,29 @@ class MemoizeStiffness(object):
         self.dq = None
         self.ddq = None
         self.t = None
+        self.state_version = None
 
-    def __call__(self, q, dq, t, *args):
-        self.q = np.asarray(q).copy()
-        self.dq = np.asarray(dq).copy()
+    def __call__(self, q, dq, t, *args, state_version=None):
+        # with a state version the state does not need to be stored for comparisons
+        if state_version is None:
+            self.q = np.asarray(q).copy()
+            self.dq = np.asarray(dq).copy()
+        else:
+            self.q = None
+            self.dq = None
         self.t = t
+        self.state_version = state_version
 
         fg = self.fun(q, dq, t, *args)
         self.jac = fg[0]
         return fg[1]
 
-    def derivative(self, q, dq, t, *args):
-        if self.jac is not None and t == self.t and np.alltrue(q == self.q)\
+    def derivative(self, q, dq, t, *args, state_version=None):
+        if state_version is not None:
+            if self.jac is not None and state_version == self.state_version:
+                return self.jac
+        elif self.jac is not None and self.q is not None and t == self.t and np.alltrue(q == self.q)\
                 and np.alltrue(dq == self.dq):
             return self.jac
-        else:
-            self(q, dq, t, *args)
+        self(q, dq, t, *args, state_version=state_version)
         return self.jac
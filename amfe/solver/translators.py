@@ -18,7 +18,10 @@ f_int()
 dimension
 """
 import numpy as np
+from scipy.sparse import diags
+from scipy.sparse.linalg import splu
 
+from amfe.linalg.preconditioners import rigid_body_modes
 from amfe.solver.tools import MemoizeStiffness, MemoizeConstant
 from amfe.constraint.constraint_formulation_boolean_elimination import BooleanEliminationConstraintFormulation
 from amfe.constraint.constraint_formulation_lagrange_multiplier import SparseLagrangeMultiplierConstraintFormulation
@@ -30,6 +33,7 @@ __all__ = [
     'create_constrained_mechanical_system_from_component',
     '_create_constraint_formulation',
     'create_mechanical_system_from_structural_component',
+    'create_near_nullspace_from_component',
 ]
 
 
@@ -46,29 +50,102 @@ class MechanicalSystem:
         K = \frac{\partial (f_{int} - f_{ext}}{\partial x}
         D = \frac{\partial (f_{int} - f_{ext}}{\partial \dot x}
     """
-    def __init__(self, dimension, M_func, D_func, K_func, f_ext_func, f_int_func):
-
+    def __init__(self, dimension, M_func, D_func, K_func, f_ext_func, f_int_func, K_and_f_int_func=None,
+                 M_K_and_f_int_func=None):
+        """
+        Parameters
+        ----------
+        dimension : int
+            number of dofs
+        M_func, D_func, K_func, f_ext_func, f_int_func : callable
+            functions with signature func(q, dq, t) returning M, D, K, f_ext and f_int
+        K_and_f_int_func : callable, optional
+            function with signature func(q, dq, t) returning K and f_int of one combined evaluation. If it is passed,
+            K and f_int of a versioned state are computed by one call of this function.
+        M_K_and_f_int_func : callable, optional
+            function with signature func(q, dq, t) returning M, K and f_int of one combined evaluation. If it is
+            passed, M_K_and_f_int computes all three entities by one call of this function.
+
+        Notes
+        -----
+        All methods accept an optional state_version token (see amfe.solver.tools.new_state_version). Results of
+        calls with a state_version are cached and returned for further calls with the same token without any
+        evaluation. Calls without a state_version are always evaluated.
+
+        The cached results are not copied. They are the objects returned by the functions, which are often the
+        preallocated matrices and vectors of a component that are overwritten by the next evaluation. Therefore every
+        call without a state_version clears the cache, and callers must copy results they want to keep or modify.
+        """
         self._dimension = dimension
         self._M_func = M_func
         self._K_func = K_func
         self._f_ext_func = f_ext_func
         self._f_int_func = f_int_func
         self._D_func = D_func
+        self._K_and_f_int_func = K_and_f_int_func
+        self._M_K_and_f_int_func = M_K_and_f_int_func
+        self._cache = dict()
+
+    def _evaluate(self, name, func, q, dq, t, state_version):
+        if state_version is None:
+            # the evaluation may overwrite the shared objects of the cached results
+            self._cache = dict()
+            return func(q, dq, t)
+        cached_version, value = self._cache.get(name, (None, None))
+        if cached_version is None or cached_version != state_version:
+            value = func(q, dq, t)
+            self._cache[name] = (state_version, value)
+        return value
+
+    def clear_cache(self):
+        """
+        Clear the cached evaluations of all state versions.
+        """
+        self._cache = dict()
+
+    def M(self, q, dq, t, state_version=None):
+        return self._evaluate('M', self._M_func, q, dq, t, state_version)
+
+    def D(self, q, dq, t, state_version=None):
+        return self._evaluate('D', self._D_func, q, dq, t, state_version)
+
+    def f_ext(self, q, dq, t, state_version=None):
+        return self._evaluate('f_ext', self._f_ext_func, q, dq, t, state_version)
 
-    def M(self, q, dq, t):
-        return self._M_func(q, dq, t)
+    def f_int(self, q, dq, t, state_version=None):
+        if state_version is not None and self._K_and_f_int_func is not None:
+            return self.K_and_f_int(q, dq, t, state_version)[1]
+        return self._evaluate('f_int', self._f_int_func, q, dq, t, state_version)
 
-    def D(self, q, dq, t):
-        return self._D_func(q, dq, t)
+    def K(self, q, dq, t, state_version=None):
+        if state_version is not None and self._K_and_f_int_func is not None:
+            return self.K_and_f_int(q, dq, t, state_version)[0]
+        return self._evaluate('K', self._K_func, q, dq, t, state_version)
 
-    def f_ext(self, q, dq, t):
-        return self._f_ext_func(q, dq, t)
+    def K_and_f_int(self, q, dq, t, state_version=None):
+        """
+        Returns K and f_int of one state, computed in one combined evaluation if a K_and_f_int_func is available.
+        """
+        if self._K_and_f_int_func is None:
+            return self.K(q, dq, t, state_version), self.f_int(q, dq, t, state_version)
+        return self._evaluate('K_and_f_int', self._K_and_f_int_func, q, dq, t, state_version)
 
-    def f_int(self, q, dq, t):
-        return self._f_int_func(q, dq, t)
+    def M_K_and_f_int(self, q, dq, t, state_version=None):
+        """
+        Returns M, K and f_int of one state, computed in one combined evaluation if a M_K_and_f_int_func is
+        available.
 
-    def K(self, q, dq, t):
-        return self._K_func(q, dq, t)
+        The results of a versioned combined evaluation are also cached for the calls of M, K and f_int with the same
+        state_version.
+        """
+        if self._M_K_and_f_int_func is None:
+            K, f_int = self.K_and_f_int(q, dq, t, state_version)
+            return self.M(q, dq, t, state_version), K, f_int
+        M, K, f_int = self._evaluate('M_K_and_f_int', self._M_K_and_f_int_func, q, dq, t, state_version)
+        if state_version is not None:
+            self._cache['M'] = (state_version, M)
+            self._cache['K_and_f_int'] = (state_version, (K, f_int))
+        return M, K, f_int
 
     @property
     def dimension(self):
@@ -169,7 +246,7 @@ class MulticomponentMechanicalSystem:
 
 
 def create_mechanical_system_from_structural_component(structural_component, constant_mass=False,
-                                                       constant_damping=False):
+                                                       constant_damping=False, mass_lumping=None):
     """
     Create a MechanicalSystem Object from a structural component
 
@@ -181,16 +258,24 @@ def create_mechanical_system_from_structural_component(structural_component, con
         flag if the mass is constant
     constant_damping : bool
         flag indicating if damping matrix is constant
+    mass_lumping : {None, 'row_sum', 'hrz'}, optional
+        If given, the mass matrix of the system is the (constant) lumped mass matrix of the component, assembled with
+        the given lumping technique, see StructuralComponent.M_lumped. Default: None (consistent mass matrix)
 
     Returns
     -------
     system : MechanicalSystem
         Created MechanicalSystem object describing the Structural Component
     """
-    if constant_mass:
+    if mass_lumping is not None:
+        M = MemoizeConstant(_lumped_mass_function(structural_component, mass_lumping))
+        M_K_and_f_int = None
+    elif constant_mass:
         M = MemoizeConstant(structural_component.M)
+        M_K_and_f_int = None
     else:
         M = structural_component.M
+        M_K_and_f_int = structural_component.M_K_and_f_int
 
     if constant_damping:
         D = MemoizeConstant(structural_component.D)
@@ -203,13 +288,13 @@ def create_mechanical_system_from_structural_component(structural_component, con
 
     dimension = structural_component.mapping.no_of_dofs
 
-    system = MechanicalSystem(dimension, M, D, K, f_ext, f_int)
+    system = MechanicalSystem(dimension, M, D, K, f_ext, f_int, structural_component.K_and_f_int, M_K_and_f_int)
     return system
 
 
 def create_constrained_mechanical_system_from_component(structural_component, constant_mass=False,
                                                         constant_damping=False, constraint_formulation='boolean',
-                                                        **formulation_options):
+                                                        mass_lumping=None, **formulation_options):
     """
     Create a mechanical system from a component where the constraints are applied by a constraint formulation
 
@@ -223,6 +308,10 @@ def create_constrained_mechanical_system_from_component(structural_component, co
         Flag indicating if damping matrix is constant
     constraint_formulation : str {'boolean', 'lagrange', 'nullspace_elimination'}
         String describing the constraint formulation that shall be used
+    mass_lumping : {None, 'row_sum', 'hrz'}, optional
+        If given, the lumped mass matrix of the component is passed through the constraint formulation instead of the
+        consistent one. With the boolean elimination the constrained lumped mass matrix stays diagonal.
+        Default: None (consistent mass matrix)
     formulation_options : dict
         options passed to the set_options method of the constraint formulation
 
@@ -231,7 +320,8 @@ def create_constrained_mechanical_system_from_component(structural_component, co
     system : amfe.solver.translators.MechanicalSystem
     formulation : amfe.constraint.ConstraintFormulation
     """
-    system_unconstrained = create_mechanical_system_from_structural_component(structural_component)
+    system_unconstrained = create_mechanical_system_from_structural_component(structural_component,
+                                                                              mass_lumping=mass_lumping)
     constraint_formulation = _create_constraint_formulation(system_unconstrained, structural_component,
                                                             constraint_formulation, **formulation_options)
 
@@ -251,11 +341,88 @@ def create_constrained_mechanical_system_from_component(structural_component, co
 
     dimension = constraint_formulation.dimension
 
-    system = MechanicalSystem(dimension, M, D, K, f_ext, f_int)
+    system = MechanicalSystem(dimension, M, D, K, f_ext, f_int, constraint_formulation.K_and_f_int)
 
     return system, constraint_formulation
 
 
+def create_near_nullspace_from_component(structural_component, constraint_formulation=None):
+    """
+    Create the near nullspace and the nodal dofs of a system created from a structural component, e.g. for the
+    SmoothedAggregationPreconditioner
+
+    The near nullspace consists of the rigid body modes of the nodes of the mesh of the component. The modes and the
+    nodal dofs are mapped from the global dofs of the mapping of the component to the dofs of the system of the
+    constraint formulation: the boolean elimination drops the constrained dofs, the nullspace elimination projects the
+    modes onto the nullspace of B and the lagrange multiplier formulation appends zero rows for the multipliers.
+
+    Parameters
+    ----------
+    structural_component : amfe.component.StructuralComponent
+        Structural component the system has been created from
+    constraint_formulation : amfe.constraint.ConstraintFormulation, optional
+        Constraint formulation of the system, see create_constrained_mechanical_system_from_component.
+        Default: None (system of the unconstrained component)
+
+    Returns
+    -------
+    near_nullspace : ndarray
+        rigid body modes, shape (dimension, 3) in 2D and (dimension, 6) in 3D
+    nodal_dofs : ndarray
+        dofs of the system of the displacements of each node, shape (no_of_nodes, 2) in 2D and (no_of_nodes, 3) in
+        3D, -1 for dofs that are not part of the system
+    """
+    mesh = structural_component.mesh
+    mapping = structural_component.mapping
+    fields = ['ux', 'uy', 'uz'][:mesh.nodes.shape[1]]
+    nodal_dofs = mapping.nodal2global.reindex(index=mesh.nodes_df.index, columns=fields, fill_value=-1).values
+    nodal_dofs = np.asarray(nodal_dofs, dtype=int)
+    no_of_dofs = mapping.no_of_dofs
+    near_nullspace = rigid_body_modes(mesh.nodes, nodal_dofs, no_of_dofs)
+
+    if constraint_formulation is None:
+        return near_nullspace, nodal_dofs
+    elif isinstance(constraint_formulation, BooleanEliminationConstraintFormulation):
+        free_dofs = constraint_formulation.free_dofs
+        # the additional last entry maps the unmapped nodal dofs -1 to -1
+        system_dofs = np.full(no_of_dofs + 1, -1, dtype=int)
+        system_dofs[free_dofs] = np.arange(len(free_dofs))
+        return near_nullspace[free_dofs], system_dofs[nodal_dofs]
+    elif isinstance(constraint_formulation, NullspaceConstraintFormulation):
+        B = structural_component.B(np.zeros(no_of_dofs), 0.0)
+        if B.shape[0] > 0:
+            # orthogonal projection onto the nullspace of B
+            BBT = splu((B @ B.T).tocsc())
+            near_nullspace = near_nullspace - B.T @ BBT.solve(B @ near_nullspace)
+        return near_nullspace, nodal_dofs
+    elif isinstance(constraint_formulation, SparseLagrangeMultiplierConstraintFormulation):
+        no_of_multipliers = constraint_formulation.dimension - no_of_dofs
+        return np.vstack((near_nullspace, np.zeros((no_of_multipliers, near_nullspace.shape[1])))), nodal_dofs
+    else:
+        raise ValueError('Unknown constraint formulation {}'.format(type(constraint_formulation).__name__))
+
+
+def _lumped_mass_function(structural_component, method):
+    """
+    Internal method that wraps the lumped mass vector of a structural component into a sparse diagonal matrix function
+
+    Parameters
+    ----------
+    structural_component : amfe.component.StructuralComponent
+        Structural component providing M_lumped
+    method : {'row_sum', 'hrz'}
+        Lumping technique, see StructuralComponent.M_lumped
+
+    Returns
+    -------
+    M : callable
+        Function with signature M(q, dq, t) returning the lumped mass matrix in sparse CSR format
+    """
+    def M(q, dq, t):
+        return diags(structural_component.M_lumped(q, dq, t, method=method), format='csr')
+    return M
+
+
 def _create_constraint_formulation(mechanical_system, component, formulation, **formulation_options):
     """
     Internal method that creates a constraint formulation for a mechanical system combined with the constraints
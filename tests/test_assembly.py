@@ -6,13 +6,16 @@ from scipy.sparse import csr_matrix
 from numpy.random import randint
 import numpy as np
 from scipy import rand
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
 from amfe.assembly.assembly import Assembly
 from amfe.assembly import StructuralAssembly
-from amfe.assembly.tools import get_index_of_csr_data, fill_csr_matrix
+from amfe.mor.hyper_red.ecsw_assembly import EcswAssembly
+from amfe.element import Tri3, Quad4
+from amfe.material import KirchhoffMaterial
+from amfe.assembly.tools import get_index_of_csr_data, fill_csr_matrix, get_csr_pattern, get_csr_scatter_map
 
 
 class AssemblyToolsTest(TestCase):
@@ -53,6 +56,39 @@ class AssemblyToolsTest(TestCase):
 
         assert_array_equal(A_actual.A, A_desired.A)
 
+    def test_get_csr_pattern(self):
+        elements2dofs = [np.array([0, 1, 4, 5], dtype=int), np.array([2, 3], dtype=int),
+                         np.array([4, 5, 6, 1], dtype=int)]
+        indptr, indices = get_csr_pattern(7, elements2dofs)
+
+        dense_desired = np.zeros((7, 7), dtype=bool)
+        for dofs in elements2dofs:
+            dense_desired[np.ix_(dofs, dofs)] = True
+        A_desired = csr_matrix(dense_desired)
+
+        assert_array_equal(indptr, A_desired.indptr)
+        assert_array_equal(indices, A_desired.indices)
+
+    def test_get_csr_scatter_map(self):
+        elements2dofs = [np.array([0, 1, 4, 5], dtype=int), np.array([2, 3], dtype=int),
+                         np.array([4, 5, 6, 1], dtype=int)]
+        indptr, indices = get_csr_pattern(7, elements2dofs)
+        scatter_map = get_csr_scatter_map(indptr, indices, elements2dofs)
+
+        K_locals = [rand(4, 4), rand(2, 2), rand(4, 4)]
+        data_actual = np.bincount(scatter_map, weights=np.concatenate([K.reshape(-1) for K in K_locals]),
+                                  minlength=len(indices))
+        A_actual = csr_matrix((data_actual, indices, indptr), shape=(7, 7))
+
+        A_desired = np.zeros((7, 7))
+        for dofs, K in zip(elements2dofs, K_locals):
+            A_desired[np.ix_(dofs, dofs)] += K
+        np.testing.assert_allclose(A_actual.A, A_desired)
+
+        # scatter map must not be computed for entries that are not preallocated
+        with self.assertRaises(ValueError):
+            get_csr_scatter_map(indptr, indices, [np.array([0, 2], dtype=int)])
+
     def test_base_class(self):
         class DummyObserver:
             def __init__(self, number):
@@ -146,6 +182,19 @@ class StructuralAssemblyTest(TestCase):
         assert_array_equal(C_csr_actual.indptr, C_csr_desired.indptr)
         assert_array_equal(C_csr_actual.indices, C_csr_desired.indices)
 
+    def test_preallocate_csr_different_element_sizes(self):
+        no_of_dofs = 6
+        elements2global = [np.array([0, 1, 2, 3], dtype=int), np.array([4, 5], dtype=int)]
+        C_csr_actual = self.asm.preallocate(no_of_dofs, elements2global)
+
+        C_csr_desired = np.zeros((6, 6))
+        C_csr_desired[0:4, 0:4] = 1.0
+        C_csr_desired[4:, 4:] = 1.0
+        C_csr_desired = csr_matrix(C_csr_desired)
+        assert_array_equal(C_csr_actual.indptr, C_csr_desired.indptr)
+        assert_array_equal(C_csr_actual.indices, C_csr_desired.indices)
+        assert_array_equal(C_csr_actual.data, np.zeros(20))
+
     def test_assemble_m(self):
 
         asm = StructuralAssembly()
@@ -238,6 +287,273 @@ class StructuralAssemblyTest(TestCase):
         self.assertFalse(memory_K_global_data_after == memory_K_global_data_before)
         self.assertTrue(memory_f_global_after == memory_f_global_before)
 
+    def test_assemble_k_and_f_element_groups(self):
+        # mix of real elements with different shapes and materials that are evaluated group-wise
+        material_1 = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1)
+        material_2 = KirchhoffMaterial(E=30, nu=1/3, rho=1, thickness=2)
+        tri3_1 = Tri3(material_1)
+        tri3_2 = Tri3(material_2)
+        quad4 = Quad4(material_1)
+        nodes = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0], [1.0, 1.0], [2.0, 1.1]])
+        ele_obj = np.array([tri3_1, quad4, tri3_2, tri3_1], dtype=object)
+        connectivities = [np.array([0, 1, 4]), np.array([1, 2, 5, 4]), np.array([0, 4, 3]), np.array([3, 4, 5])]
+        element2dofs = [np.array([2*node + i for node in connectivity for i in range(2)])
+                        for connectivity in connectivities]
+        dofvalues = 0.1*rand(12)
+        K_global = self.asm.preallocate(12, element2dofs)
+
+        K_global, f_global = self.asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                       K_csr=K_global)
+
+        K_global_desired = np.zeros((12, 12))
+        f_global_desired = np.zeros(12)
+        for ele, connectivity, dofs in zip(ele_obj, connectivities, element2dofs):
+            K_local, f_local = ele.k_and_f_int(nodes[connectivity].reshape(-1), dofvalues[dofs])
+            K_global_desired[np.ix_(dofs, dofs)] += K_local
+            f_global_desired[dofs] += f_local
+        assert_allclose(K_global.todense(), K_global_desired)
+        assert_allclose(f_global, f_global_desired)
+
+    def test_assemble_m_k_f(self):
+        material_1 = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1)
+        material_2 = KirchhoffMaterial(E=30, nu=1/3, rho=2, thickness=2)
+        nodes = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0], [1.0, 1.0], [2.0, 1.1]])
+        ele_obj = np.array([Tri3(material_1), Quad4(material_1), Tri3(material_2)], dtype=object)
+        connectivities = [np.array([0, 1, 4]), np.array([1, 2, 5, 4]), np.array([0, 4, 3])]
+        element2dofs = [np.array([2*node + i for node in connectivity for i in range(2)])
+                        for connectivity in connectivities]
+        dofvalues = 0.1*rand(12)
+
+        M_desired = self.asm.assemble_m(nodes, ele_obj, connectivities, element2dofs, dofvalues)
+        K_desired, f_desired = self.asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues)
+
+        M_global = self.asm.preallocate(12, element2dofs)
+        K_global = self.asm.preallocate(12, element2dofs)
+        f_global = np.zeros(12)
+        M_actual, K_actual, f_actual = self.asm.assemble_m_k_f(nodes, ele_obj, connectivities, element2dofs,
+                                                               dofvalues, M_csr=M_global, K_csr=K_global,
+                                                               f_glob=f_global)
+        self.assertIs(M_actual, M_global)
+        self.assertIs(K_actual, K_global)
+        self.assertIs(f_actual, f_global)
+        assert_allclose(M_actual.todense(), M_desired.todense())
+        assert_allclose(K_actual.todense(), K_desired.todense())
+        assert_allclose(f_actual, f_desired)
+
+        # without preallocated matrices
+        M_actual, K_actual, f_actual = self.asm.assemble_m_k_f(nodes, ele_obj, connectivities, element2dofs,
+                                                               dofvalues)
+        assert_allclose(M_actual.todense(), M_desired.todense())
+        assert_allclose(K_actual.todense(), K_desired.todense())
+        assert_allclose(f_actual, f_desired)
+
+    def test_assembly_plan(self):
+        material_1 = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1)
+        material_2 = KirchhoffMaterial(E=30, nu=1/3, rho=2, thickness=2)
+        nodes = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0], [1.0, 1.0], [2.0, 1.1]])
+        tri3_1 = Tri3(material_1)
+        ele_obj = np.array([tri3_1, Quad4(material_1), Tri3(material_2), tri3_1], dtype=object)
+        connectivities = [np.array([0, 1, 4]), np.array([1, 2, 5, 4]), np.array([0, 4, 3]), np.array([3, 4, 5])]
+        element2dofs = [np.array([2*node + i for node in connectivity for i in range(2)])
+                        for connectivity in connectivities]
+        dofvalues = 0.1*rand(12)
+
+        plan = self.asm.create_plan(ele_obj, connectivities, element2dofs)
+        self.assertEqual(plan.no_of_elements, 4)
+        self.assertEqual(len(plan.groups), 3)
+        for (_, positions, _, _), group_connectivities, group_dofs in zip(plan.groups, plan.group_connectivities,
+                                                                          plan.group_dofs):
+            assert_array_equal(group_connectivities, [connectivities[i] for i in positions])
+            assert_array_equal(group_dofs, [element2dofs[i] for i in positions])
+
+        K_desired, f_desired = self.asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues)
+        M_desired = self.asm.assemble_m(nodes, ele_obj, connectivities, element2dofs, dofvalues)
+        m_desired = self.asm.assemble_m_lumped(nodes, ele_obj, connectivities, element2dofs, dofvalues)
+
+        K_global = self.asm.preallocate(12, element2dofs)
+        f_global = np.zeros(12)
+        for _ in range(2):
+            K_actual, f_actual = self.asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                           K_csr=K_global, f_glob=f_global, plan=plan)
+            assert_allclose(K_actual.todense(), K_desired.todense())
+            assert_allclose(f_actual, f_desired)
+        # the scatter map is cached in the plan
+        self.assertIs(plan._scatter_maps[id(K_global.indices)][0], K_global.indices)
+        assert_allclose(self.asm.assemble_f_int(nodes, ele_obj, connectivities, element2dofs, dofvalues, plan=plan),
+                        f_desired)
+        assert_allclose(self.asm.assemble_m(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                            plan=plan).todense(), M_desired.todense())
+        assert_allclose(self.asm.assemble_m_lumped(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                   plan=plan), m_desired)
+
+        empty_plan = self.asm.create_plan(np.array([], dtype=object), [], [])
+        self.assertEqual(empty_plan.no_of_elements, 0)
+        self.assertEqual(empty_plan.groups, [])
+
+    def test_assemble_k_and_f_reference_geometry(self):
+        material = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1)
+        tri3 = Tri3(material)
+        quad4 = Quad4(material)
+        nodes = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0], [1.0, 1.0], [2.0, 1.1]])
+        ele_obj = np.array([tri3, quad4, tri3, tri3], dtype=object)
+        connectivities = [np.array([0, 1, 4]), np.array([1, 2, 5, 4]), np.array([0, 4, 3]), np.array([3, 4, 5])]
+        element2dofs = [np.array([2*node + i for node in connectivity for i in range(2)])
+                        for connectivity in connectivities]
+        dofvalues = 0.1*rand(12)
+
+        reference_geometry = self.asm.compute_reference_geometry(nodes, ele_obj, connectivities, element2dofs)
+        self.assertEqual(len(reference_geometry), 2)
+        B0_tilde, det_w = reference_geometry[id(tri3)][2:]
+        self.assertEqual(B0_tilde.shape, (3, 1, 3, 2))
+        # det(J)*w equals the areas of the triangles
+        assert_allclose(det_w, [[0.5], [0.5], [0.05]])
+
+        K_desired, f_desired = self.asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                         K_csr=self.asm.preallocate(12, element2dofs))
+        K_actual, f_actual = self.asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                       K_csr=self.asm.preallocate(12, element2dofs),
+                                                       reference_geometry=reference_geometry)
+        assert_allclose(K_actual.todense(), K_desired.todense())
+        assert_allclose(f_actual, f_desired)
+
+        # subset of the elements like in the ECSW assembly
+        indices = np.array([3, 1])
+        weights = np.array([2.0, 0.5])
+        asm_ecsw = EcswAssembly(weights, indices)
+        K_desired, f_desired = asm_ecsw.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                         K_csr=self.asm.preallocate(12, element2dofs))
+        K_actual, f_actual = asm_ecsw.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                       K_csr=self.asm.preallocate(12, element2dofs),
+                                                       reference_geometry=reference_geometry)
+        assert_allclose(K_actual.todense(), K_desired.todense())
+        assert_allclose(f_actual, f_desired)
+
+    def test_assemble_f_int(self):
+        material = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1)
+        tri3 = Tri3(material)
+        quad4 = Quad4(material)
+        nodes = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0], [1.0, 1.0], [2.0, 1.1]])
+        ele_obj = np.array([tri3, quad4, tri3, tri3], dtype=object)
+        connectivities = [np.array([0, 1, 4]), np.array([1, 2, 5, 4]), np.array([0, 4, 3]), np.array([3, 4, 5])]
+        element2dofs = [np.array([2*node + i for node in connectivity for i in range(2)])
+                        for connectivity in connectivities]
+        dofvalues = 0.1*rand(12)
+
+        _, f_desired = self.asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                 K_csr=self.asm.preallocate(12, element2dofs))
+        f_global = np.ones(12)
+        f_actual = self.asm.assemble_f_int(nodes, ele_obj, connectivities, element2dofs, dofvalues, f_glob=f_global)
+        self.assertIs(f_actual, f_global)
+        assert_allclose(f_actual, f_desired)
+
+        reference_geometry = self.asm.compute_reference_geometry(nodes, ele_obj, connectivities, element2dofs)
+        f_actual = self.asm.assemble_f_int(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                           reference_geometry=reference_geometry)
+        assert_allclose(f_actual, f_desired)
+
+        asm_ecsw = EcswAssembly(np.array([2.0, 0.5]), np.array([3, 1]))
+        _, f_desired = asm_ecsw.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                 K_csr=self.asm.preallocate(12, element2dofs))
+        f_actual = asm_ecsw.assemble_f_int(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                           reference_geometry=reference_geometry)
+        assert_allclose(f_actual, f_desired)
+
+    def test_assemble_m_lumped(self):
+        material = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1)
+        tri3 = Tri3(material)
+        quad4 = Quad4(material)
+        nodes = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0], [1.0, 1.0], [2.0, 1.1]])
+        ele_obj = np.array([tri3, quad4, tri3, tri3], dtype=object)
+        connectivities = [np.array([0, 1, 4]), np.array([1, 2, 5, 4]), np.array([0, 4, 3]), np.array([3, 4, 5])]
+        element2dofs = [np.array([2*node + i for node in connectivity for i in range(2)])
+                        for connectivity in connectivities]
+
+        M = self.asm.assemble_m(nodes, ele_obj, connectivities, element2dofs, np.zeros(12),
+                                M_csr=self.asm.preallocate(12, element2dofs))
+        m_row_sum = self.asm.assemble_m_lumped(nodes, ele_obj, connectivities, element2dofs)
+        assert_allclose(m_row_sum, np.asarray(M.sum(axis=1)).ravel())
+
+        m_global = np.ones(12)
+        m_hrz = self.asm.assemble_m_lumped(nodes, ele_obj, connectivities, element2dofs, m_glob=m_global,
+                                           method='hrz')
+        self.assertIs(m_hrz, m_global)
+        # total mass in x and y direction
+        M_dense = M.todense()
+        assert_allclose(np.sum(m_hrz[0::2]), np.sum(M_dense[0::2, 0::2]))
+        assert_allclose(np.sum(m_hrz[1::2]), np.sum(M_dense[1::2, 1::2]))
+
+    def test_parallel_assembly(self):
+        # structured mesh of Tri3 and Quad4 elements
+        nx, ny = 6, 4
+        x, y = np.meshgrid(np.linspace(0, 1, nx + 1), np.linspace(0, 1, ny + 1))
+        nodes = np.column_stack((x.ravel(), y.ravel()))
+        material = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1)
+        tri3 = Tri3(material)
+        quad4 = Quad4(material)
+        ele_obj = []
+        connectivities = []
+        for j in range(ny):
+            for i in range(nx):
+                n0 = j*(nx + 1) + i
+                n1, n2, n3 = n0 + 1, n0 + nx + 2, n0 + nx + 1
+                if i < nx // 2:
+                    ele_obj.extend([tri3, tri3])
+                    connectivities.extend([np.array([n0, n1, n2]), np.array([n0, n2, n3])])
+                else:
+                    ele_obj.append(quad4)
+                    connectivities.append(np.array([n0, n1, n2, n3]))
+        ele_obj = np.array(ele_obj, dtype=object)
+        element2dofs = [np.array([2*node + i for node in connectivity for i in range(2)])
+                        for connectivity in connectivities]
+        no_of_dofs = 2*nodes.shape[0]
+        dofvalues = 0.01*rand(no_of_dofs)
+
+        asm_serial = StructuralAssembly()
+        K_desired, f_desired = asm_serial.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                           K_csr=asm_serial.preallocate(no_of_dofs, element2dofs))
+        M_desired = asm_serial.assemble_m(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                          M_csr=asm_serial.preallocate(no_of_dofs, element2dofs))
+        m_hrz_desired = asm_serial.assemble_m_lumped(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                     method='hrz')
+
+        for executor in ('thread', 'process'):
+            asm = StructuralAssembly(no_of_workers=3, executor=executor)
+            asm.MIN_ELEMENTS_PER_PARTITION = 4
+            K_actual, f_actual = asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                                      K_csr=asm.preallocate(no_of_dofs, element2dofs))
+            M_actual = asm.assemble_m(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                                      M_csr=asm.preallocate(no_of_dofs, element2dofs))
+            m_actual = asm.assemble_m_lumped(nodes, ele_obj, connectivities, element2dofs, dofvalues)
+            m_hrz_actual = asm.assemble_m_lumped(nodes, ele_obj, connectivities, element2dofs, dofvalues, method='hrz')
+            asm.shutdown()
+            assert_allclose(K_actual.todense(), K_desired.todense())
+            assert_allclose(f_actual, f_desired)
+            assert_allclose(M_actual.todense(), M_desired.todense())
+            assert_allclose(m_actual, np.asarray(M_desired.sum(axis=1)).ravel())
+            assert_allclose(m_hrz_actual, m_hrz_desired)
+
+        # the process pool receives the element objects once and is only recreated for new element objects
+        asm = StructuralAssembly(no_of_workers=3, executor='process')
+        asm.MIN_ELEMENTS_PER_PARTITION = 4
+        asm.assemble_k_and_f(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                             K_csr=asm.preallocate(no_of_dofs, element2dofs))
+        pool = asm._executor
+        asm.assemble_m(nodes, ele_obj, connectivities, element2dofs, dofvalues,
+                       M_csr=asm.preallocate(no_of_dofs, element2dofs))
+        self.assertIs(asm._executor, pool)
+        stiff_material = KirchhoffMaterial(E=120, nu=1/4, rho=1, thickness=1)
+        stiff_ele_obj = np.array([Tri3(stiff_material) if isinstance(ele, Tri3) else Quad4(stiff_material)
+                                  for ele in ele_obj], dtype=object)
+        K_stiff, f_stiff = asm.assemble_k_and_f(nodes, stiff_ele_obj, connectivities, element2dofs, dofvalues,
+                                                K_csr=asm.preallocate(no_of_dofs, element2dofs))
+        self.assertIsNot(asm._executor, pool)
+        asm.shutdown()
+        assert_allclose(K_stiff.todense(), 2*K_desired.todense())
+        assert_allclose(f_stiff, 2*f_desired)
+
+        with self.assertRaises(ValueError):
+            StructuralAssembly(no_of_workers=2, executor='gpu')
+
     def test_assemble_k_f_S_E(self):
         asm = StructuralAssembly()
         ele_obj = np.array([self.ele, self.ele], dtype=object)
@@ -8,6 +8,7 @@ from numpy.testing import assert_array_equal
 
 from amfe.component.structural_component import StructuralComponent
 from copy import deepcopy
+from types import SimpleNamespace
 
 
 class StructuralComponentTest(TestCase):
@@ -26,8 +27,12 @@ class StructuralComponentTest(TestCase):
             def __init__(self):
                 pass
 
+            def create_plan(self, ele_objects, connectivities, elements2dofs):
+                return SimpleNamespace(ele_objects=ele_objects, connectivities=connectivities,
+                                       elements2dofs=elements2dofs)
+
             def assemble_k_and_f(self, nodes, ele_objects, connectivities, elements2dofs,
-                                 dofvalues=None, t=0., C_csr=None, f_glob=None):
+                                 dofvalues=None, t=0., C_csr=None, f_glob=None, plan=None):
                 if C_csr is None:
                     C_csr = np.array([[10, -5, 0], [-5, 10, -5], [0, -5, 10]])
                 else:
@@ -63,6 +68,10 @@ class StructuralComponentTest(TestCase):
             def get_nodeids_by_nodeidxs(self, nodeidxs):
                 return np.arange(0, 3)
 
+            @property
+            def iconnectivity(self):
+                return None
+
             def get_iconnectivity_by_elementids(self, elementids):
                 return None
                 
@@ -77,6 +86,10 @@ class StructuralComponentTest(TestCase):
             def get_dofs_by_nodeids(self, nodeids):
                 return np.arange(0, 3)
             
+            @property
+            def elements2global_blocks(self):
+                return []
+
             def get_dofs_by_ids(self, ids):
                 return None
 
@@ -9,6 +9,7 @@
 
 from unittest import TestCase
 from numpy.testing import assert_array_equal
+from scipy.sparse import issparse
 
 from amfe.component.component_connector import *
 
@@ -74,12 +75,20 @@ class DummyMesh:
     def no_of_elements(self):
         return 0
 
+    @property
+    def nodes(self):
+        return self.nodes_df.values
+
     def get_nodeid_by_coordinates(self, x, y, z=None, epsilon=1e-12):
         nodeid = (self.nodes_df[['x', 'y']] - (x, y)).apply(np.linalg.norm, axis=1).idxmin()
         if np.linalg.norm(self.nodes_df.loc[nodeid, ['x', 'y']] - (x, y)) > epsilon:
             nodeid = None
         return nodeid
 
+    def get_nodeids_by_coordinates(self, coordinates, epsilon=1e-12):
+        nodeids = [self.get_nodeid_by_coordinates(x, y, epsilon=epsilon) for x, y in coordinates]
+        return np.array([-1 if nodeid is None else nodeid for nodeid in nodeids], dtype=int)
+
 
 class DummyMesh2(DummyMesh):
     def __init__(self, dimension):
@@ -314,7 +323,8 @@ class ComponentConnectorTest(TestCase):
 
         B_desired = np.hstack((B_desired_1, B_desired_2, B_desired_3, np.zeros((12, 8))))
 
-        assert_array_equal(B_actual, B_desired)
+        self.assertTrue(issparse(B_actual))
+        assert_array_equal(B_actual.toarray(), B_desired)
 
 
 class MeshTyingTest(TestCase):
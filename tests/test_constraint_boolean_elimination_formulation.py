@@ -207,3 +207,37 @@ class BooleanEliminationFormulationTest(TestCase):
         L_desired = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=float)
         L_actual = formulation.L
         assert_array_equal(L_actual.todense(), L_desired)
+
+    def test_reduction_by_index_slicing(self):
+        K_values = {'K': csr_matrix(np.array([[4, -1, 0, 0, -2], [-1, 4, -1, 0, 0], [0, -1, 4, -1, 0],
+                                              [0, 0, -1, 4, -1], [-2, 0, 0, -1, 4]], dtype=float))}
+
+        def h_q(u, du, t):
+            return K_values['K']
+
+        def B(u, t):
+            return csr_matrix(np.array([[0, 0, 0, 1, 0], [0, 1, 0, 0, 0]], dtype=float))
+
+        def g(u, t):
+            return np.array([u[3], u[1]], dtype=float)
+
+        formulation = BooleanEliminationConstraintFormulation(5, self.M_func, self.h_func, B, self.p_func,
+                                                              h_q, self.h_dq_func, g_func=g)
+        assert_array_equal(formulation.free_dofs, np.array([0, 2, 4]))
+        x = np.array([1.0, 2.0, 3.0])
+        assert_array_equal(formulation.u(x, 0.0), np.array([1.0, 0.0, 2.0, 0.0, 3.0]))
+        L = formulation.L
+
+        K_1 = formulation.K(x, x, 0.0)
+        assert_array_equal(K_1.todense(), L.T.dot(K_values['K']).dot(L).todense())
+
+        # Same sparsity pattern: the preallocated reduced matrix is filled in place
+        K_values['K'] = 2.0 * K_values['K']
+        K_2 = formulation.K(x, x, 0.0)
+        self.assertIs(K_2, K_1)
+        assert_array_equal(K_2.todense(), L.T.dot(K_values['K']).dot(L).todense())
+
+        # Changed sparsity pattern: the reduction map is recomputed
+        K_values['K'] = csr_matrix(np.diag([1.0, 2.0, 3.0, 4.0, 5.0]))
+        K_3 = formulation.K(x, x, 0.0)
+        assert_array_equal(K_3.todense(), np.diag([1.0, 3.0, 5.0]))
@@ -224,6 +224,10 @@ class PendulumConstraintTest(TestCase):
         x = np.array([0.0, 0.0, 0.0, 0.0])
         K_actual = formulation.K(x, x, 0.0).todense()
 
+        # K neglects the derivative of the nullspace L w.r.t. x, thus L is kept fixed for the finite differences
+        L_0 = formulation.L(x, 0.0)
+        formulation.L = lambda x, t: L_0
+
         K_finite_difference = np.zeros_like(K_actual)
 
         for i in range(len(x)):
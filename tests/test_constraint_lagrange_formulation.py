@@ -274,3 +274,41 @@ class SparseLagrangeFormulationTest(TestCase):
 
         assert_allclose(K_pen_2 - scale1 * KBTB, K_pen_4 - scale2 * KBTB)
         assert_allclose(F_pen_2 - scale1 * FBTg, F_pen_4 - scale2 * FBTg)
+
+    def test_K_preallocated(self):
+        x = np.arange(self.formulation.dimension, dtype=float)
+        dx = x.copy()
+        B = self.B_holo_func(x[:self.no_of_dofs_unconstrained], 0.0)
+        K_raw_desired = self.K_unconstr.toarray()
+
+        def K_desired(K_raw, penalty, scaling):
+            return spvstack((sphstack((K_raw + penalty * scaling * B.T.dot(B), scaling * B.T)),
+                             sphstack((scaling * B, csr_matrix((1, 1)))))).toarray()
+
+        self.formulation.set_options(scaling=2.0, penalty=3.0)
+        K_1 = self.formulation.K(x, dx, 0.0)
+        assert_allclose(K_1.toarray(), K_desired(self.K_unconstr, 3.0, 2.0))
+
+        # The same matrix is filled in place if the sparsity pattern does not change
+        self.K_unconstr.data *= 2.0
+        K_2 = self.formulation.K(x, dx, 0.0)
+        self.assertIs(K_2, K_1)
+        assert_allclose(K_2.toarray(), K_desired(self.K_unconstr, 3.0, 2.0))
+        # The unconstrained stiffness matrix is not changed by the penalization
+        assert_array_equal(self.K_unconstr.toarray(), 2.0 * K_raw_desired)
+
+        # A changed sparsity pattern leads to a new preallocation
+        self.K_unconstr = csr_matrix(np.diag([1.0, 2.0, 3.0]))
+        self.formulation.set_options(penalty=None)
+        K_3 = self.formulation.K(x, dx, 0.0)
+        assert_allclose(K_3.toarray(), K_desired(self.K_unconstr, 0.0, 2.0))
+
+    def test_M_preallocated(self):
+        x = np.arange(self.formulation.dimension, dtype=float)
+        dx = x.copy()
+        M_1 = self.formulation.M(x, dx, 0.0)
+        self.M_unconstr.data *= 2.0
+        M_2 = self.formulation.M(x, dx, 0.0)
+        self.assertIs(M_2, M_1)
+        assert_array_equal(M_2.toarray()[:3, :3], self.M_unconstr.toarray())
+        assert_array_equal(M_2.toarray()[3, :], np.zeros(4))
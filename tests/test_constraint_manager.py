@@ -47,6 +47,13 @@ class ConstraintManagerTest(TestCase):
         self._add_two_dirichlet_constraints()
         self.assertEqual(self.cm.no_of_constraints, 2)
 
+    def test_renumber_dofs(self):
+        self._add_two_dirichlet_constraints()
+        self.cm.renumber_dofs(np.array([3, 0, 1, 2]))
+        assert_array_equal(np.concatenate(self.cm._dofidxs()), np.array([1, 0]))
+        with self.assertRaises(ValueError):
+            self.cm.renumber_dofs(np.array([0, -1, 2, 1]))
+
     def test_no_of_dofs_unconstrained(self):
         self.assertEqual(self.cm.no_of_dofs_unconstrained, 3)
         self.cm.no_of_dofs_unconstrained = 1
@@ -131,6 +138,42 @@ class ConstraintManagerTest(TestCase):
         B_desired = np.array([[0, 0, 1], [0, 1, 0]], dtype=float)
         assert_array_equal(B_desired, B.todense())
 
+    def test_constant_B_is_cached(self):
+        self._initalization_for_g_b_test()
+        equal_displacement = self.cm.create_equal_displacement_constraint()
+        self.cm.add_constraint('Equal', equal_displacement, [0, 2], [])
+        u = np.array([0.1, 0.2, 0.3], dtype=float)
+        X = np.arange(9).reshape(-1, 3)
+        t = 0.0
+        g, B = self.cm.g_and_B(X, u, t)
+        B_desired = np.array([[0, 0, 1], [0, 1, 0], [-1, 0, 1]], dtype=float)
+        assert_array_equal(B_desired, B.todense())
+        assert_allclose(g, np.array([0.3, 0.2, 0.2]))
+        # All constraints have a constant B, such that the same B is returned again
+        self.assertIs(self.cm.B(X, 2.0 * u, 1.0), B)
+        assert_allclose(self.cm.g(X, 2.0 * u, 1.0), np.array([0.6, 0.4, 0.4]))
+        assert_array_equal(self.cm.b(X, u, t), np.zeros(3))
+        assert_array_equal(self.cm.a(X, u, u, t), np.zeros(3))
+        # Changing the number of unconstrained dofs invalidates the cached B
+        self.cm.no_of_dofs_unconstrained = 4
+        B_new = self.cm.B(X, np.append(u, 0.0), t)
+        self.assertIsNot(B_new, B)
+        self.assertEqual(B_new.shape, (3, 4))
+
+    def test_non_constant_B_is_assembled_in_place(self):
+        self.cm.no_of_dofs_unconstrained = 4
+        fixed_distance = self.cm.create_fixed_distance_constraint()
+        self.cm.add_constraint('Distance', fixed_distance, np.array([0, 1, 2, 3], dtype=int),
+                               np.array([0, 1, 2, 3], dtype=int))
+        X = np.array([0.0, 0.0, 1.0, 0.0])
+        B = self.cm.B(X, np.zeros(4), 0.0)
+        scaling = B.toarray()[0, 2]
+        assert_allclose(B.toarray(), scaling * np.array([[-1.0, 0.0, 1.0, 0.0]]))
+        # B is not constant, the preallocated B is filled with the values of the new state
+        _, B_new = self.cm.g_and_B(X, np.array([0.0, 0.0, -1.0, 1.0]), 0.0)
+        self.assertIs(B_new, B)
+        assert_allclose(B_new.toarray(), scaling * np.array([[0.0, -1.0, 0.0, 1.0]]), atol=1e-12)
+
 
 class PendulumConstraintManagerTest(TestCase):
         """
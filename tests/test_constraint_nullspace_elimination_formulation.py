@@ -148,3 +148,26 @@ class TestNullspaceConstraintFormulation(TestCase):
         L_desired = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=float)
         L_actual = formulation.L(x, 0.0)
         assert_array_equal(L_actual.todense(), L_desired)
+
+    def test_L_is_cached(self):
+        x = np.arange(self.formulation.dimension, dtype=float)
+        L_1 = self.formulation.L(x, 0.0)
+        self.assertIsInstance(L_1, csr_matrix)
+        assert_array_equal(L_1.todense(), np.array([[0, 0], [1, 0], [0, 1]], dtype=float))
+        # B does not change, thus L is not recomputed
+        self.assertIs(self.formulation.L(x + 1.0, 1.0), L_1)
+
+        # L is recomputed if B changes
+        B_values = {'B': csr_matrix(np.array([[1, 0, 0]], dtype=float))}
+
+        def B(u, t):
+            return B_values['B']
+
+        formulation = NullspaceConstraintFormulation(self.no_of_dofs_unconstrained, self.M_func,
+                                                     self.h_func, B, self.p_func, self.h_q_func,
+                                                     self.h_dq_func, g_func=self.g_holo_func)
+        L_1 = formulation.L(x, 0.0)
+        B_values['B'] = csr_matrix(np.array([[0, 1, -1]], dtype=float))
+        L_2 = formulation.L(x, 0.0)
+        self.assertIsNot(L_2, L_1)
+        assert_array_equal((B_values['B'] @ L_2).todense(), np.zeros((1, 2)))
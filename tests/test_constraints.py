@@ -6,6 +6,7 @@
 from unittest import TestCase, skip
 import numpy as np
 from numpy.testing import assert_array_equal, assert_allclose
+from scipy.sparse import csr_matrix
 
 from amfe.constraint.tools import *
 from amfe.constraint.constraint import *
@@ -46,6 +47,39 @@ class TestConstraintTools(TestCase):
         self.assertFalse(actual_tol1)
         self.assertTrue(actual_tol2)
 
+    def test_sparse_null_space(self):
+        # Dirichlet rows only: L selects the free dofs
+        B_dirichlet = csr_matrix(np.array([[0, 1, 0, 0], [0, 0, 0, 2]], dtype=float))
+        L_desired = np.array([[1, 0], [0, 0], [0, 1], [0, 0]], dtype=float)
+        L_actual = sparse_null_space(B_dirichlet)
+        self.assertIsInstance(L_actual, csr_matrix)
+        assert_array_equal(L_actual.toarray(), L_desired)
+
+        # Dirichlet, coupling and linearly dependent rows
+        B = csr_matrix(np.array([[1, 0, 0, 0, 0, 0],
+                                 [0, -1, 1, 0, 0, 0],
+                                 [1, 0, 0, 2, 1, 0],
+                                 [0, -2, 2, 0, 0, 0]], dtype=float))
+        L_actual = sparse_null_space(B)
+        self.assertIsInstance(L_actual, csr_matrix)
+        self.assertEqual(L_actual.shape, (6, 3))
+        assert_allclose((B @ L_actual).toarray(), np.zeros((4, 3)), atol=1e-14)
+        self.assertEqual(np.linalg.matrix_rank(L_actual.toarray()), 3)
+
+    def test_sparse_null_space_independent_blocks(self):
+        # chains of ties u_3k - u_3k+1 = 0, u_3k+1 - u_3k+2 = 0 that do not couple with each other
+        no_of_chains = 50
+        rows = np.repeat(np.arange(2 * no_of_chains), 2)
+        columns = np.array([[3 * k + i, 3 * k + i + 1] for k in range(no_of_chains) for i in range(2)]).ravel()
+        data = np.tile([1.0, -1.0], 2 * no_of_chains)
+        B = csr_matrix((data, (rows, columns)), shape=(2 * no_of_chains, 3 * no_of_chains + 1))
+        L_actual = sparse_null_space(B)
+        self.assertEqual(L_actual.shape, (3 * no_of_chains + 1, no_of_chains + 1))
+        assert_allclose((B @ L_actual).toarray(), 0.0, atol=1e-14)
+        self.assertEqual(np.linalg.matrix_rank(L_actual.toarray()), no_of_chains + 1)
+        # every dof depends on the independent coordinate of its own chain only
+        assert_array_equal(np.diff(L_actual.indptr), np.ones(3 * no_of_chains + 1))
+
 
 class TestNonholonomicBase(TestCase):
     def setUp(self):
@@ -171,6 +205,21 @@ class TestDirichletConstraint(TestCase):
             assert_allclose(B_1 * self.ddU1(self.t) + a_1, a_desired)
             assert_allclose(B_2 * self.ddU2(self.t) + a_2, a_desired)
 
+    def test_batch(self):
+        X = np.zeros((4, 0))
+        u = self.u_local.reshape(-1, 1)
+        du = self.du_local.reshape(-1, 1)
+        for constraint in (self.constraint_1, self.constraint_2):
+            assert_allclose(constraint.g_batch(X, u, self.t),
+                            np.array([constraint.g(X_i, u_i, self.t) for X_i, u_i in zip(X, u)]))
+            assert_allclose(constraint.B_batch(X, u, self.t),
+                            np.array([constraint.B(X_i, u_i, self.t) for X_i, u_i in zip(X, u)]))
+            assert_allclose(constraint.b_batch(X, u, self.t),
+                            np.array([constraint.b(X_i, u_i, self.t) for X_i, u_i in zip(X, u)]))
+            assert_allclose(constraint.a_batch(X, u, du, self.t),
+                            np.array([constraint.a(X_i, u_i, du_i, self.t) for X_i, u_i, du_i in zip(X, u, du)]))
+        self.assertTrue(DirichletConstraint.CONSTANT_B)
+
 
 class TestFixedDistanceConstraint(TestCase):
     def setUp(self):
@@ -525,6 +574,21 @@ class TestEqualDisplacementConstraint(TestCase):
         a_1 = self.constraint_1.a(self.X_local, self.u_local_1, self.u_local_1, self.t)
         assert_array_equal(a_1, np.array([0.0], ndmin=1))
 
+    def test_batch(self):
+        X = np.zeros((3, 0))
+        u = np.array([self.u_local_1, self.u_local_2, self.u_local_3])
+        du = np.array([self.du_local, self.u_local_1, self.u_local_3])
+        constraint = self.constraint_1
+        assert_allclose(constraint.g_batch(X, u, self.t),
+                        np.array([constraint.g(X_i, u_i, self.t) for X_i, u_i in zip(X, u)]))
+        assert_allclose(constraint.B_batch(X, u, self.t),
+                        np.array([constraint.B(X_i, u_i, self.t) for X_i, u_i in zip(X, u)]))
+        assert_allclose(constraint.b_batch(X, u, self.t),
+                        np.array([constraint.b(X_i, u_i, self.t) for X_i, u_i in zip(X, u)]))
+        assert_allclose(constraint.a_batch(X, u, du, self.t),
+                        np.array([constraint.a(X_i, u_i, du_i, self.t) for X_i, u_i, du_i in zip(X, u, du)]))
+        self.assertTrue(EqualDisplacementConstraint.CONSTANT_B)
+
 
 @skip("temporarily disabled")
 class TestFixedDistanceToPlaneConstraint(TestCase):
@@ -171,6 +171,21 @@ class Tet10Test(ElementTest):
     def test_jacobi(self):
         self.jacobi_test_element(rtol=2E-3)
 
+    def test_lumped_mass(self):
+        M = self.my_element.m_int(self.X, self.u, t=0)
+        m_row_sum = self.my_element.m_lumped_int(self.X, self.u, t=0)
+        m_hrz = self.my_element.m_lumped_int(self.X, self.u, t=0, method='hrz')
+        assert_allclose(m_row_sum, np.sum(M, axis=1))
+        # both techniques preserve the mass in every direction
+        for direction in range(3):
+            assert_allclose(np.sum(m_hrz[direction::3]), np.sum(M[direction::3, direction::3]))
+            assert_allclose(np.sum(m_row_sum[direction::3]), np.sum(M[direction::3, direction::3]))
+        # row summing gives negative masses at the corner nodes of quadratic tetrahedra, HRZ does not
+        self.assertTrue(np.all(m_row_sum[:12] < 0.0))
+        self.assertTrue(np.all(m_hrz > 0.0))
+        with self.assertRaises(ValueError):
+            self.my_element.m_lumped_int(self.X, self.u, t=0, method='unknown')
+
 class Hexa8Test(ElementTest):
     def setUp(self):
         self.initialize_element(Hexa8, X_hexa8)
@@ -303,6 +318,123 @@ class MaterialTest2dPlaneStress(unittest.TestCase):
 
 
 #%%
+class ElementBatchTest(unittest.TestCase):
+    '''
+    Compare the batched evaluation of the elements with the evaluation element by element.
+    '''
+    def setUp(self):
+        self.no_of_elements = 5
+        self.kirchhoff = KirchhoffMaterial(E=60, nu=1/4, rho=1, thickness=1.5)
+        self.neo = NeoHookean(mu=40, kappa=100, rho=1, thickness=1.5)
+
+    @nose.tools.nottest
+    def batch_test_element(self, element, X_def):
+        no_of_dofs = len(X_def)
+        X = X_def + 0.1*sp.rand(self.no_of_elements, no_of_dofs)
+        u = 0.1*sp.rand(self.no_of_elements, no_of_dofs)
+        for material in (self.kirchhoff, self.neo):
+            my_element = element(material)
+            K, f = my_element.k_and_f_int_batch(X, u, t=0)
+            f_only = my_element.f_int_batch(X, u, t=0)
+            self.assertEqual(K.shape, (self.no_of_elements, no_of_dofs, no_of_dofs))
+            self.assertEqual(f.shape, (self.no_of_elements, no_of_dofs))
+            assert_allclose(f_only, f, rtol=1E-10, atol=1E-10)
+            for i in range(self.no_of_elements):
+                K_desired, f_desired = my_element.k_and_f_int(X[i], u[i], t=0)
+                assert_allclose(K[i], K_desired, rtol=1E-10, atol=1E-10)
+                assert_allclose(f[i], f_desired, rtol=1E-10, atol=1E-10)
+                assert_allclose(my_element.f_int(X[i], u[i], t=0), f_desired, rtol=1E-10, atol=1E-10)
+            M, K_m, f_m = my_element.m_k_and_f_int_batch(X, u, t=0)
+            assert_allclose(K_m, K, rtol=1E-10, atol=1E-10)
+            assert_allclose(f_m, f, rtol=1E-10, atol=1E-10)
+            assert_allclose(my_element.m_int_batch(X, u, t=0), M, rtol=1E-12)
+            m_row_sum = my_element.m_lumped_int_batch(X, u, t=0)
+            m_hrz = my_element.m_lumped_int_batch(X, u, t=0, method='hrz')
+            for i in range(self.no_of_elements):
+                assert_allclose(M[i], my_element.m_int(X[i], u[i], t=0), rtol=1E-10, atol=1E-12)
+                assert_allclose(m_row_sum[i], my_element.m_lumped_int(X[i], u[i], t=0), rtol=1E-10, atol=1E-12)
+                assert_allclose(m_hrz[i], my_element.m_lumped_int(X[i], u[i], t=0, method='hrz'), rtol=1E-10,
+                                atol=1E-12)
+
+    def test_tri3(self):
+        self.batch_test_element(Tri3, X_tri3)
+
+    def test_tri6(self):
+        self.batch_test_element(Tri6, X_tri6)
+
+    def test_quad4(self):
+        self.batch_test_element(Quad4, X_quad4)
+
+    def test_quad8(self):
+        self.batch_test_element(Quad8, X_quad8)
+
+    def test_tet4(self):
+        self.batch_test_element(Tet4, X_tet4)
+
+    def test_tet10(self):
+        self.batch_test_element(Tet10, X_tet10)
+
+    def test_hexa8(self):
+        self.batch_test_element(Hexa8, X_hexa8)
+
+    def test_hexa20(self):
+        self.batch_test_element(Hexa20, X_hexa20)
+
+    def test_element_without_gauss_data(self):
+        # elements without gauss point data fall back to the evaluation element by element
+        my_material = BeamMaterial(120, 80, 1000.0, 4.0, 23.0, 34.0, 132.0, (0.0, 0.0, 1E23))
+        my_element = LinearBeam3D(my_material)
+        X = np.array([X_linear_beam, 2*X_linear_beam])
+        u = sp.rand(2, 12)
+        K, f = my_element.k_and_f_int_batch(X, u, t=0)
+        f_only = my_element.f_int_batch(X, u, t=0)
+        for i in range(2):
+            K_desired, f_desired = my_element.k_and_f_int(X[i], u[i], t=0)
+            assert_allclose(K[i], K_desired)
+            assert_allclose(f[i], f_desired)
+            assert_allclose(f_only[i], f_desired)
+        M = my_element.m_int_batch(X, u, t=0)
+        for i in range(2):
+            assert_allclose(M[i], my_element.m_int(X[i], u[i], t=0))
+
+    def test_f_int_keeps_overloaded_tensors(self):
+        # elements with fortran overloaded tensor routines evaluate a single element with them
+        calls = []
+
+        class OverloadedTri3(Tri3):
+            _compute_tensors_python = Tri3._compute_tensors
+
+            def _compute_tensors(self, X, u, t):
+                calls.append(t)
+                self._compute_tensors_python(X, u, t)
+
+        X = X_tri3 + 0.1*sp.rand(6)
+        u = 0.1*sp.rand(6)
+        f = OverloadedTri3(self.kirchhoff).f_int(X, u, t=0.5)
+        self.assertEqual(calls, [0.5])
+        assert_allclose(f, Tri3(self.kirchhoff).f_int_batch(X[np.newaxis], u[np.newaxis], t=0.5)[0],
+                        rtol=1E-10, atol=1E-10)
+
+    def test_material_batch(self):
+        F = np.eye(3) + 0.1*sp.rand(4, 2, 3, 3)
+        E = 1/2*(np.swapaxes(F, -1, -2) @ F - np.eye(3))
+        for material in (self.kirchhoff, self.neo):
+            S, S_v, C_SE = material.S_Sv_and_C_batch(E)
+            S_2d, S_v_2d, C_SE_2d = material.S_Sv_and_C_2d_batch(E[..., :2, :2])
+            self.assertEqual(S.shape, (4, 2, 3, 3))
+            self.assertEqual(C_SE_2d.shape, (4, 2, 3, 3))
+            for i in range(4):
+                for j in range(2):
+                    S_desired, S_v_desired, C_SE_desired = material.S_Sv_and_C(E[i, j])
+                    assert_allclose(S[i, j], S_desired)
+                    assert_allclose(S_v[i, j], S_v_desired)
+                    assert_allclose(C_SE[i, j], C_SE_desired)
+                    S_desired, S_v_desired, C_SE_desired = material.S_Sv_and_C_2d(E[i, j, :2, :2])
+                    assert_allclose(S_2d[i, j], S_desired)
+                    assert_allclose(S_v_2d[i, j], S_v_desired)
+                    assert_allclose(C_SE_2d[i, j], C_SE_desired)
+
+
 class BoundaryElementTest(unittest.TestCase):
     def setUp(self):
         pass
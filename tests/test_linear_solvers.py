@@ -12,6 +12,8 @@ import numpy.linalg
 import numpy
 
 from amfe.linalg.linearsolvers import *
+from amfe.linalg.linearsolvers import PreconditionedKrylovLinearSolverBase
+from amfe.linalg.preconditioners import JacobiPreconditioner, ILUPreconditioner
 
 
 class TestPardisoSolver(TestCase):
@@ -82,3 +84,84 @@ class TestResidualbasedConjugateGradient(TestCase):
 
         res = numpy.linalg.norm(A.dot(x1) - b) / scipy.sparse.linalg.norm(A)
         self.assertLess(res, 10 ** (-1))
+
+
+class TestPardisoFactorizationReuse(TestCase):
+    def setUp(self):
+        self.A = scipy.sparse.csr_matrix(numpy.array([[4, -2, 0, 0], [-2, 4, -2, 0], [0, -2, 4, -1], [0, 0, -1, 1]],
+                                                     dtype=float))
+        self.b = numpy.array([1.4, 1.2, 0.8, 1.1])
+        self.solver = PardisoLinearSolver()
+
+    def tearDown(self):
+        self.solver.release()
+
+    def test_reuse_symbolic_analysis(self):
+        self.solver.solve(self.A, self.b)
+        wrapper = self.solver.wrapper_class
+        # same pattern, other values: the wrapper and thus the symbolic analysis are kept
+        A2 = 2.0 * self.A
+        x = self.solver.solve(A2, self.b)
+        self.assertIs(self.solver.wrapper_class, wrapper)
+        numpy.testing.assert_allclose(A2.dot(x), self.b, atol=1e-13)
+        # other pattern: new analysis
+        A3 = self.A + scipy.sparse.csr_matrix(([0.5], ([0], [3])), shape=(4, 4))
+        x = self.solver.solve(A3, self.b)
+        self.assertIsNot(self.solver.wrapper_class, wrapper)
+        numpy.testing.assert_allclose(A3.dot(x), self.b, atol=1e-13)
+
+    def test_solve_only(self):
+        self.solver.factorize(self.A)
+        x = self.solver.solve(None, self.b, reuse_factorization=True)
+        numpy.testing.assert_allclose(self.A.dot(x), self.b, atol=1e-13)
+        x = self.solver.solve(2.0 * self.A, 2.0 * self.b, reuse_factorization=True)
+        numpy.testing.assert_allclose(self.A.dot(x), 2.0 * self.b, atol=1e-13)
+
+    def test_symmetric(self):
+        x = self.solver.solve(self.A, self.b, mtype='spd')
+        x = self.solver.solve(3.0 * self.A, self.b, mtype='spd')
+        numpy.testing.assert_allclose(3.0 * self.A.dot(x), self.b, atol=1e-13)
+
+    def test_release(self):
+        self.solver.solve(self.A, self.b)
+        self.solver.release()
+        self.assertIsNone(self.solver.wrapper_class)
+        x = self.solver.solve(self.A, self.b)
+        numpy.testing.assert_allclose(self.A.dot(x), self.b, atol=1e-13)
+
+
+class TestScipySparseLUSolver(TestCase):
+    def test_solve(self):
+        A = scipy.sparse.csr_matrix(numpy.array([[4, -2, 0, 0], [-2, 4, -2, 0], [0, -2, 4, -1], [0, 0, -1, 1]],
+                                                dtype=float))
+        b = numpy.array([1.4, 1.2, 0.8, 1.1])
+        solver = ScipySparseLULinearSolver()
+        x1 = solver.solve(A, b)
+        numpy.testing.assert_allclose(A.dot(x1), b, atol=1e-13)
+        # solve-only mode reuses the factors of A
+        x2 = solver.solve(2.0 * A, b, reuse_factorization=True)
+        numpy.testing.assert_allclose(x2, x1)
+        x3 = solver.solve(2.0 * A, b)
+        numpy.testing.assert_allclose(x3, 0.5 * x1)
+        solver.release()
+        x4 = solver.solve(A, b, reuse_factorization=True)
+        numpy.testing.assert_allclose(x4, x1)
+
+
+class TestPreconditionedKrylovSolvers(TestCase):
+    def test_solve(self):
+        A = scipy.sparse.csr_matrix(numpy.array([[4, -2, 0, 0], [-2, 4, -2, 0], [0, -2, 4, -1], [0, 0, -1, 1]],
+                                                dtype=float))
+        b = numpy.array([1.4, 1.2, 0.8, 1.1])
+        for solver_class in (PreconditionedConjugateGradientLinearSolver, PreconditionedMinresLinearSolver,
+                             PreconditionedGmresLinearSolver):
+            for preconditioner in (None, JacobiPreconditioner(), ILUPreconditioner()):
+                solver = solver_class(preconditioner)
+                x = solver.solve(A, b, tol=1e-12)
+                self.assertEqual(solver.info, 0)
+                numpy.testing.assert_allclose(A.dot(x), b, atol=1e-10)
+
+    def test_base_class_not_implemented(self):
+        A = scipy.sparse.identity(3, format='csr')
+        with self.assertRaises(NotImplementedError):
+            PreconditionedKrylovLinearSolverBase().solve(A, numpy.ones(3))
@@ -4,13 +4,18 @@
 #
 
 from unittest import TestCase
+import time
 import numpy as np
 import pandas as pd
 from numpy.testing import assert_array_equal
 from pandas.testing import assert_frame_equal
 
 
+from scipy.sparse import csr_matrix, identity
+from scipy.sparse.linalg import splu
+
 from amfe.mapping import StandardMapping
+from amfe.linalg.ordering import compute_ordering
 
 
 class TestMapping(TestCase):
@@ -38,8 +43,8 @@ class TestMapping(TestCase):
 
         self.callbackinfo = dict()
 
-    def callback(self, localid, args):
-        self.callbackinfo.update({args: localid})
+    def callback(self, localids, args):
+        self.callbackinfo.update(zip(args, localids))
 
     def tearDown(self):
         pass
@@ -108,3 +113,136 @@ class TestMapping(TestCase):
         mapping.elements2global = dataframe
         for actual, desired in zip(mapping.elements2global, elements2global_desired):
             assert_array_equal(actual, desired)
+
+    def test_callbacks_are_called_in_bulk(self):
+        calls = []
+
+        def other_callback(localids, args):
+            calls.append((localids, args))
+
+        mapping = StandardMapping()
+        mapping.update_mapping(self.fields, self.nodeids, self.connectivity, self.dofs_by_element,
+                               [other_callback, self.callback], self.callbackargs)
+        self.assertEqual(len(calls), 1)
+        assert_array_equal(calls[0][0], np.array([0]))
+        assert_array_equal(calls[0][1], np.array([1]))
+        self.assertEqual(self.callbackinfo, {5: 1})
+
+    def test_elements2global_blocks(self):
+        connectivity = np.array([[1, 2, 3], [2, 4, 3], [4, 3, 1]], dtype=int)
+        dofs_by_element = [self.dofs_by_element[1]]*3
+        mapping = StandardMapping()
+        mapping.update_mapping(self.fields, self.nodeids, connectivity, dofs_by_element,
+                               [self.callback]*3, [1, 5, 7])
+
+        self.assertEqual(len(mapping.elements2global_blocks), 1)
+        ids, global_dofs = mapping.elements2global_blocks[0]
+        assert_array_equal(ids, np.array([0, 1, 2]))
+        global_dofs_desired = np.array([[0, 1, 2, 3, 4, 5],
+                                        [2, 3, 6, 7, 4, 5],
+                                        [6, 7, 4, 5, 0, 1]], dtype=int)
+        assert_array_equal(global_dofs, global_dofs_desired)
+        for actual, desired in zip(mapping.elements2global, global_dofs_desired):
+            assert_array_equal(actual, desired)
+        self.assertEqual(mapping.no_of_dofs, 8)
+        self.assertEqual(mapping.nodal2global.loc[4, 'T'], -1)
+
+    def test_unknown_nodeids(self):
+        mapping = StandardMapping()
+        connectivity = np.array([np.array([1, 2, 3], dtype=int), np.array([2, 5, 3], dtype=int)], dtype=object)
+        with self.assertRaises(KeyError):
+            mapping.update_mapping(self.fields, self.nodeids, connectivity, self.dofs_by_element,
+                                   self.callbacks, self.callbackargs)
+
+    def test_reorder(self):
+        mapping = StandardMapping()
+        mapping.update_mapping(self.fields, self.nodeids, self.connectivity, self.dofs_by_element, self.callbacks,
+                               self.callbackargs)
+        nodal2global_old = mapping.nodal2global.values.copy()
+        elements2global_old = [dofs.copy() for dofs in mapping.elements2global]
+        new_dofs = mapping.reorder('rcm')
+
+        assert_array_equal(np.sort(new_dofs), np.arange(11))
+        nodal2global_desired = np.where(nodal2global_old >= 0, new_dofs[nodal2global_old], -1)
+        assert_array_equal(mapping.nodal2global.values, nodal2global_desired)
+        for actual, old in zip(mapping.elements2global, elements2global_old):
+            assert_array_equal(actual, new_dofs[old])
+        # the dofs of each node are numbered consecutively
+        for row in mapping.nodal2global.values:
+            dofs = row[row >= 0]
+            assert_array_equal(dofs, np.arange(dofs[0], dofs[0] + len(dofs)))
+        self.assertEqual(mapping.no_of_dofs, 11)
+
+    def test_ordering_in_update_mapping(self):
+        connectivity = np.array([[i, i + 1, i + 10] for i in range(1, 10)] +
+                                [[i + 1, i + 11, i + 10] for i in range(1, 10)], dtype=int)
+        np.random.seed(1)
+        connectivity = connectivity[np.random.permutation(len(connectivity))]
+        nodeids = np.arange(1, 21)
+        dofs_by_element = [self.dofs_by_element[1]]*len(connectivity)
+
+        def bandwidth(mapping):
+            return max(np.ptp(dofs) for dofs in mapping.elements2global)
+
+        mapping = StandardMapping()
+        mapping.update_mapping(('ux', 'uy'), nodeids, connectivity, dofs_by_element,
+                               [self.callback]*len(connectivity), np.arange(len(connectivity)))
+        bandwidth_natural = bandwidth(mapping)
+        for method in ['rcm', 'minimum_degree', 'nested_dissection']:
+            mapping = StandardMapping(ordering=method)
+            self.assertEqual(mapping.ordering, method)
+            mapping.update_mapping(('ux', 'uy'), nodeids, connectivity, dofs_by_element,
+                                   [self.callback]*len(connectivity), np.arange(len(connectivity)))
+            assert_array_equal(np.sort(mapping.nodal2global.values.reshape(-1)), np.arange(40))
+            if method == 'rcm':
+                self.assertLess(bandwidth(mapping), bandwidth_natural)
+
+        with self.assertRaises(ValueError):
+            mapping.reorder('unknown')
+
+
+class TestOrdering(TestCase):
+    def setUp(self):
+        # 5-point stencil graph of a 12 x 12 grid in a random numbering
+        n = 12
+        grid = np.arange(n*n).reshape(n, n)
+        rows = np.concatenate((grid[:, :-1].reshape(-1), grid[:-1, :].reshape(-1)))
+        columns = np.concatenate((grid[:, 1:].reshape(-1), grid[1:, :].reshape(-1)))
+        np.random.seed(0)
+        shuffle = np.random.permutation(n*n)
+        self.graph = csr_matrix((np.ones(len(rows)), (shuffle[rows], shuffle[columns])), shape=(n*n, n*n))
+
+    def _fill(self, order):
+        laplacian = self.graph + self.graph.T
+        matrix = (laplacian + 5*identity(laplacian.shape[0])).tocsc()[order][:, order]
+        lu = splu(matrix.tocsc(), permc_spec='NATURAL', diag_pivot_thresh=0.0)
+        return lu.L.nnz
+
+    def test_orderings_are_permutations(self):
+        for method in ['rcm', 'minimum_degree', 'nested_dissection']:
+            order = compute_ordering(self.graph, method)
+            assert_array_equal(np.sort(order), np.arange(self.graph.shape[0]))
+
+    def test_orderings_reduce_fill(self):
+        fill_natural = self._fill(np.arange(self.graph.shape[0]))
+        for method in ['rcm', 'minimum_degree', 'nested_dissection']:
+            self.assertLess(self._fill(compute_ordering(self.graph, method)), fill_natural)
+
+    def test_minimum_degree_timing(self):
+        # nodal graph of a quad mesh with 300 x 300 elements
+        n = 300
+        nodes = np.arange((n+1)*(n+1)).reshape(n+1, n+1)
+        connectivity = np.stack((nodes[:-1, :-1], nodes[1:, :-1], nodes[1:, 1:], nodes[:-1, 1:]), axis=-1)
+        rows = np.repeat(np.arange(n*n), 4)
+        incidence = csr_matrix((np.ones(len(rows)), (rows, connectivity.reshape(-1))))
+        graph = incidence.T @ incidence
+
+        start = time.perf_counter()
+        order = compute_ordering(graph, 'minimum_degree')
+        duration = time.perf_counter() - start
+        assert_array_equal(np.sort(order), np.arange(graph.shape[0]))
+        self.assertLess(duration, 5.0)
+
+    def test_unknown_ordering(self):
+        with self.assertRaises(ValueError):
+            compute_ordering(self.graph, 'unknown')
@@ -177,6 +177,25 @@ class TestMesh(TestCase):
         actual = self.testmesh3d.get_nodeid_by_coordinates(x, y, z)
         self.assertEqual(actual, desired)
 
+    def test_get_nodeids_by_coordinates(self):
+        # 2d case
+        coordinates = np.array([[2.0, 0.0], [500.0, 0.0], [2.0, 0.0]])
+        desired = np.array([5, -1, 5], dtype=int)
+        actual = self.testmesh.get_nodeids_by_coordinates(coordinates)
+        assert_array_equal(actual, desired)
+        for coordinate, nodeid in zip(self.testmesh.nodes, self.testmesh.nodes_df.index):
+            self.assertEqual(self.testmesh.get_nodeids_by_coordinates(coordinate)[0],
+                             self.testmesh.get_nodeid_by_coordinates(*coordinate))
+
+        # 3d case
+        coordinates = np.array([[2.0, 0.0, 1.0], [500.0, 0.0, 1.0]])
+        actual = self.testmesh3d.get_nodeids_by_coordinates(coordinates)
+        assert_array_equal(actual, np.array([5, -1], dtype=int))
+
+        # big tolerance
+        actual = self.testmesh.get_nodeids_by_coordinates(np.array([[500.0, 0.0]]), epsilon=np.inf)
+        assert_array_equal(actual, np.array([5], dtype=int))
+
     def test_get_nodeids_by_x_coordinates(self):
         x = 2.0
         epsilon = 0.1
@@ -551,6 +570,36 @@ class TestMesh(TestCase):
         for actual_arr, desired_arr in zip(actual, desired):
             assert_array_equal(desired_arr, actual_arr)
 
+    def test_iconnectivity_arrays(self):
+        offsets, indices = self.testmesh.iconnectivity_csr
+        assert_array_equal(offsets, np.array([0, 3, 6, 10, 12, 14]))
+        assert_array_equal(indices, np.array([4, 5, 2, 2, 1, 4, 0, 1, 2, 3, 3, 0, 4, 5]))
+
+        elementidxs, iconnectivity = self.testmesh.get_iconnectivity_by_shape('Tri3')
+        assert_array_equal(elementidxs, np.array([0, 1]))
+        assert_array_equal(iconnectivity, np.array([[4, 5, 2], [2, 1, 4]]))
+        elementidxs, iconnectivity = self.testmesh.get_iconnectivity_by_shape('Tet4')
+        self.assertEqual(len(elementidxs), 0)
+
+        assert_array_equal(self.testmesh.get_iconnectivity_by_elementids([3, 1])[0], np.array([0, 1, 2, 3]))
+        assert_array_equal(self.testmesh.get_iconnectivity_by_elementids(3), np.array([0, 1, 2, 3]))
+
+        # the cache is updated after changing the mesh
+        new_node = self.testmesh.add_node([3.0, 0.0], node_id=0)
+        self.assertEqual(self.testmesh.get_nodeidxs_by_nodeids([new_node])[0], 6)
+        el_df = self.testmesh.el_df.copy()
+        el_df.at[1, 'connectivity'] = np.array([0, 6, 3])
+        self.testmesh.el_df = el_df
+        assert_array_equal(self.testmesh.get_iconnectivity_by_elementids([1])[0], np.array([6, 5, 2]))
+        elementidxs, iconnectivity = self.testmesh.get_iconnectivity_by_shape('Tri3')
+        assert_array_equal(iconnectivity, np.array([[6, 5, 2], [2, 1, 4]]))
+
+    def test_get_nodeidxs_by_unknown_nodeids(self):
+        with self.assertRaises(KeyError):
+            self.testmesh.get_nodeidxs_by_nodeids(np.array([1, 7]))
+        with self.assertRaises(KeyError):
+            self.testmesh.get_elementidxs_by_elementids([0])
+
 
 class TestPartitionedMesh(TestCase):
     def setUp(self):
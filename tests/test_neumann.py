@@ -63,6 +63,24 @@ class NeumannTest(TestCase):
         f_ext_actual = neumann.f_ext(X, u, t)
         desired_f = np.array([0.47140452, -0.47140452, 0.47140452, -0.47140452])
         np.testing.assert_allclose(f_ext_actual, desired_f, rtol=1E-6, atol=1E-7)
+
+    def test_time_separable_neumann(self):
+        X = np.array([0.0, 0.0, 2.0, 0.0])
+        u = np.array([0.0, 0.0, 1.0, 0.5])
+        time_func = lambda t: 3.0 * t
+        for neumann_class in (FixedDirectionNeumann, ProjectedAreaNeumann):
+            neumann = neumann_class(self.test_direct / np.sqrt(2), time_func, time_separable=True)
+            neumann.set_element('straight_line')
+            self.assertTrue(neumann.time_separable)
+            f_spatial = neumann.f_ext_spatial(X)
+            # the load of a time separable condition is evaluated in the reference configuration
+            assert_allclose(neumann.f_ext(X, u, 2.0), 6.0 * f_spatial)
+            assert_allclose(neumann.time_amplitude(2.0), 6.0)
+            neumann_following = neumann_class(self.test_direct / np.sqrt(2), time_func)
+            neumann_following.set_element('straight_line')
+            self.assertFalse(neumann_following.time_separable)
+            assert_allclose(neumann_following.f_ext(X, np.zeros(4), 2.0), 6.0 * f_spatial)
+        self.assertFalse(NormalFollowingNeumann(time_func).time_separable)
         
 
 class TestNeumannManager(TestCase):
@@ -11,8 +11,10 @@ Tests for nonlinear solver module
 from unittest import TestCase
 import numpy as np
 from numpy.testing import assert_
+from scipy.sparse import csr_matrix, diags
 
-from amfe.solver.nonlinear_solver import NewtonRaphson
+from amfe.linalg.linearsolvers import ScipySparseLinearSolver, ScipySparseLULinearSolver
+from amfe.solver.nonlinear_solver import NewtonRaphson, LBFGS, Broyden
 
 
 # The following function F for testing nonlinear solvers is similar to
@@ -43,3 +45,103 @@ class NonlinearTest(TestCase):
         options = {'maxiter': 200, 'atol': atol}
         x, _ = solver.solve(F, x0, (), jac, options=options)
         assert_(np.absolute(F(x)).max() < atol)
+
+    def test_modified_newton(self):
+        K = csr_matrix(np.array([[4, -2, 0], [-2, 4, -2], [0, -2, 4]], dtype=float))
+        f = np.array([1.0, 0.5, 2.0])
+        jacobian_calls = [0]
+
+        def residual(x):
+            return K.dot(x) + 0.1 * x ** 3 - f
+
+        def jacobian(x):
+            jacobian_calls[0] += 1
+            return K + diags(0.3 * x ** 2)
+
+        x0 = np.zeros(3)
+        x_full, (iterations_full, _) = NewtonRaphson().solve(residual, x0, jac=jacobian,
+                                                              options={'atol': 1e-10, 'maxiter': 50})
+        calls_full = jacobian_calls[0]
+
+        jacobian_calls[0] = 0
+        solver = NewtonRaphson()
+        options = {'atol': 1e-10, 'maxiter': 50, 'modified_newton': True, 'refactorization_ratio': None}
+        x, (iterations, res_abs) = solver.solve(residual, x0, jac=jacobian, options=options)
+        self.assertLess(res_abs, 1e-10)
+        np.testing.assert_allclose(x, x_full, atol=1e-9)
+        self.assertEqual(jacobian_calls[0], 1)
+        self.assertGreater(iterations, iterations_full)
+
+        # refactorization in every iteration equals the full Newton method
+        jacobian_calls[0] = 0
+        options = {'atol': 1e-10, 'maxiter': 50, 'modified_newton': True, 'refactorization_interval': 1}
+        x, (iterations, _) = NewtonRaphson().solve(residual, x0, jac=jacobian, options=options)
+        self.assertEqual(iterations, iterations_full)
+        self.assertEqual(jacobian_calls[0], calls_full)
+
+        # the factorization of the former call is reused
+        jacobian_calls[0] = 0
+        options = {'atol': 1e-10, 'maxiter': 50, 'modified_newton': True, 'refactorization_ratio': None,
+                   'refactorize_each_solve': False, 'linear_solver': ScipySparseLULinearSolver()}
+        solver = NewtonRaphson()
+        solver.solve(residual, x0, jac=jacobian, options=options)
+        solver.solve(residual, x0, jac=jacobian, options=options)
+        self.assertEqual(jacobian_calls[0], 1)
+
+        with self.assertRaises(ValueError):
+            NewtonRaphson().solve(residual, x0, jac=jacobian,
+                                  options={'modified_newton': True, 'linear_solver': ScipySparseLinearSolver()})
+
+
+class QuasiNewtonTest(TestCase):
+    def setUp(self):
+        self.f = np.array([1.0, 0.5, 2.0])
+        self.jacobian_calls = 0
+
+    def _solve(self, solver, K):
+        def residual(x):
+            return K.dot(x) + 0.1 * x ** 3 - self.f
+
+        def jacobian(x):
+            self.jacobian_calls += 1
+            return K + diags(0.3 * x ** 2)
+
+        x, (iterations, res_abs) = solver.solve(residual, np.zeros(3), jac=jacobian, options={'atol': 1e-10})
+        self.assertLess(res_abs, 1e-10)
+        self.assertLess(np.linalg.norm(residual(x)), 1e-10)
+        return iterations
+
+    def test_lbfgs(self):
+        K = csr_matrix(np.array([[4, -2, 0], [-2, 4, -2], [0, -2, 4]], dtype=float))
+        self._solve(LBFGS(), K)
+        self.assertEqual(self.jacobian_calls, 1)
+
+    def test_lbfgs_negative_definite(self):
+        # residual and Jacobian in the sign convention of the integrators: f_ext - f_int(x) and -K(x)
+        K = csr_matrix(np.array([[4, -2, 0], [-2, 4, -2], [0, -2, 4]], dtype=float))
+
+        def residual(x):
+            return self.f - K.dot(x) - 0.1 * x ** 3
+
+        def jacobian(x):
+            self.jacobian_calls += 1
+            return -K - diags(0.3 * x ** 2)
+
+        solver = LBFGS()
+        x, (iterations, res_abs) = solver.solve(residual, np.zeros(3), jac=jacobian, options={'atol': 1e-10})
+        self.assertLess(np.linalg.norm(residual(x)), 1e-10)
+        self.assertEqual(self.jacobian_calls, 1)
+        # the updates are accepted and give the same iterations as for the positive definite problem
+        self.assertGreater(len(solver._s), 0)
+        self.assertTrue(all(rho < 0.0 for rho in solver._rho))
+        self.jacobian_calls = 0
+        self.assertEqual(self._solve(LBFGS(), K), iterations)
+
+    def test_broyden(self):
+        K = csr_matrix(np.array([[4, -1, 0], [-2, 4, -1], [0, -3, 4]], dtype=float))
+        self._solve(Broyden(), K)
+        self.assertEqual(self.jacobian_calls, 1)
+
+    def test_linear_solver_without_factorization(self):
+        with self.assertRaises(ValueError):
+            LBFGS().set_options({'linear_solver': ScipySparseLinearSolver()})
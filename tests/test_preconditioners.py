@@ -0,0 +1,137 @@
+#
+# Copyright (c) 2018 TECHNICAL UNIVERSITY OF MUNICH, DEPARTMENT OF MECHANICAL ENGINEERING, CHAIR OF APPLIED MECHANICS,
+# BOLTZMANNSTRASSE 15, 85748 GARCHING/MUNICH, GERMANY, RIXEN@TUM.DE.
+#
+# Distributed under 3-Clause BSD license. See LICENSE file for more information.
+#
+"""
+Tests for preconditioners
+"""
+
+from unittest import TestCase
+from itertools import product
+import numpy as np
+from numpy.testing import assert_allclose
+from scipy.sparse import coo_matrix, csr_matrix, diags, identity, kron
+
+from amfe.linalg.preconditioners import *
+from amfe.linalg.preconditioners import PreconditionerBase
+from amfe.linalg.linearsolvers import PreconditionedConjugateGradientLinearSolver
+
+
+def truss_grid(n):
+    """
+    Returns the nodes and the stiffness matrix of a 3D truss grid of n x n x n nodes with bars between all nodes
+    with a distance of at most sqrt(3)
+    """
+    nodes = np.array(list(product(range(n), repeat=3)), dtype=float)
+    rows, columns, values = [], [], []
+    for i, j in product(range(len(nodes)), repeat=2):
+        d = nodes[j] - nodes[i]
+        length = np.linalg.norm(d)
+        if i < j and length < 1.8:
+            e = d / length
+            k = np.outer(e, e) / length
+            dofs_i = np.arange(3*i, 3*i + 3)
+            dofs_j = np.arange(3*j, 3*j + 3)
+            for a, b, sign in ((dofs_i, dofs_i, 1), (dofs_j, dofs_j, 1), (dofs_i, dofs_j, -1), (dofs_j, dofs_i, -1)):
+                rows.append(np.repeat(a, 3))
+                columns.append(np.tile(b, 3))
+                values.append(sign * k.ravel())
+    K = coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+                   shape=(3*len(nodes), 3*len(nodes))).tocsr()
+    return nodes, K
+
+
+class PreconditionerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.nodes, cls.K_free = truss_grid(6)
+        # clamp the nodes at x = 0
+        free_nodes = np.flatnonzero(cls.nodes[:, 0] > 0)
+        cls.free_dofs = (3 * free_nodes[:, None] + np.arange(3)).ravel()
+        cls.K = csr_matrix(cls.K_free[cls.free_dofs][:, cls.free_dofs])
+        cls.b = np.random.RandomState(1).rand(cls.K.shape[0])
+
+    def _iterations(self, preconditioner):
+        solver = PreconditionedConjugateGradientLinearSolver(preconditioner)
+        iterations = []
+        x = solver.solve(self.K, self.b, tol=1e-10, callback=lambda xk: iterations.append(1))
+        assert_allclose(self.K.dot(x), self.b, atol=1e-8 * np.linalg.norm(self.b))
+        return len(iterations)
+
+    def test_rigid_body_modes(self):
+        modes = rigid_body_modes(self.nodes)
+        self.assertEqual(modes.shape, (self.K_free.shape[0], 6))
+        assert_allclose(self.K_free.dot(modes), 0.0, atol=1e-10)
+        self.assertEqual(np.linalg.matrix_rank(modes), 6)
+
+    def test_preconditioners_reduce_iterations(self):
+        no_of_iterations = self._iterations(None)
+        for preconditioner in (JacobiPreconditioner(), BlockJacobiPreconditioner(), ILUPreconditioner()):
+            self.assertLess(self._iterations(preconditioner), no_of_iterations)
+
+    def test_smoothed_aggregation(self):
+        near_nullspace = rigid_body_modes(self.nodes)[self.free_dofs]
+        preconditioner = SmoothedAggregationPreconditioner(near_nullspace, max_coarse=100)
+        no_of_iterations = self._iterations(preconditioner)
+        self.assertGreater(preconditioner.no_of_levels, 1)
+        self.assertLess(no_of_iterations, self._iterations(BlockJacobiPreconditioner()))
+        # the preconditioner is symmetric
+        x, y = np.random.RandomState(2).rand(2, self.K.shape[0])
+        self.assertAlmostEqual(x.dot(preconditioner.solve(y)), y.dot(preconditioner.solve(x)))
+
+    def test_aggregation(self):
+        # 2D Laplacian of a 40 x 40 grid with two dofs per node
+        n = 40
+        grid = np.arange(n*n).reshape(n, n)
+        rows = np.concatenate((grid[:, :-1].ravel(), grid[:-1, :].ravel()))
+        columns = np.concatenate((grid[:, 1:].ravel(), grid[1:, :].ravel()))
+        graph = coo_matrix((-np.ones(len(rows)), (rows, columns)), shape=(n*n, n*n))
+        graph = graph + graph.T
+        laplacian = csr_matrix(graph - diags(np.asarray(graph.sum(axis=1)).ravel()))
+        A = csr_matrix(kron(laplacian, identity(2)))
+        nodal_dofs = np.arange(2*n*n).reshape(n*n, 2)
+        aggregates, no_of_aggregates = SmoothedAggregationPreconditioner()._aggregate(A, nodal_dofs)
+        sizes = np.bincount(aggregates, minlength=no_of_aggregates)
+        self.assertEqual(len(sizes), no_of_aggregates)
+        self.assertGreater(sizes.min(), 0)
+        self.assertLess(no_of_aggregates, n*n / 3)
+        # every node of an aggregate with more than one node has a neighbour in its aggregate
+        adjacency = csr_matrix(graph)
+        for node in np.flatnonzero(sizes[aggregates] > 1):
+            neighbours = adjacency.indices[adjacency.indptr[node]:adjacency.indptr[node+1]]
+            self.assertIn(aggregates[node], aggregates[neighbours])
+
+    def test_block_jacobi(self):
+        blocks = np.array([[0, 1, -1], [2, 3, 4]])
+        A = csr_matrix(np.array([[4., 1., 0., 0., 1., 0.],
+                                 [1., 3., 0., 1., 0., 0.],
+                                 [0., 0., 5., 1., 0., 0.],
+                                 [0., 1., 1., 6., 2., 0.],
+                                 [1., 0., 0., 2., 7., 0.],
+                                 [0., 0., 0., 0., 0., 2.]]))
+        preconditioner = BlockJacobiPreconditioner(blocks=blocks)
+        preconditioner.update(A)
+        r = np.arange(1.0, 7.0)
+        desired = np.concatenate((np.linalg.solve(A[:2, :2].toarray(), r[:2]),
+                                  np.linalg.solve(A[2:5, 2:5].toarray(), r[2:5]), [r[5] / 2.0]))
+        assert_allclose(preconditioner.solve(r), desired)
+
+    def test_reuse(self):
+        preconditioner = JacobiPreconditioner()
+        solver = PreconditionedConjugateGradientLinearSolver(preconditioner)
+        solver.solve(self.K, self.b)
+        solver.solve(1.1 * self.K, self.b)
+        self.assertEqual(preconditioner.no_of_builds, 1)
+        solver.solve(self.K, self.b, rebuild_preconditioner=True)
+        self.assertEqual(preconditioner.no_of_builds, 2)
+        preconditioner.update(self.K[:3, :3])
+        self.assertEqual(preconditioner.no_of_builds, 3)
+
+    def test_base_class_not_implemented(self):
+        preconditioner = PreconditionerBase()
+        with self.assertRaises(NotImplementedError):
+            preconditioner.update(self.K)
+        with self.assertRaises(NotImplementedError):
+            preconditioner.solve(self.b)
@@ -6,11 +6,15 @@ Test for testing the solvers
 import unittest
 import numpy as np
 import scipy as sp
+import scipy.linalg
+import scipy.sparse
 import nose
 import re
 
 from numpy.testing import assert_allclose, assert_almost_equal
 import amfe
+import amfe.linalg
+import amfe.solver
 
 
 def read_grf(file):
@@ -101,6 +105,400 @@ class SolversTest(unittest.TestCase):
         pass
 
 
+class CentralDifferenceTest(unittest.TestCase):
+    def setUp(self):
+        # two degrees of freedom spring mass chain
+        self.M = np.array([[2.0, 0.0], [0.0, 1.0]])
+        self.K = np.array([[6.0, -2.0], [-2.0, 4.0]])
+        self.m = np.diag(self.M)
+
+    def f_int(self, q, dq, t):
+        return self.K @ q
+
+    def f_ext(self, q, dq, t):
+        return np.zeros(2)
+
+    def D(self, q, dq, t):
+        return np.zeros((2, 2))
+
+    def test_free_vibration(self):
+        q0 = np.array([1.0, 0.0])
+        dq0 = np.zeros(2)
+        integrator = amfe.solver.CentralDifference(lambda q, dq, t: self.m, self.f_int, self.f_ext, self.D)
+        integrator.dt = 1e-3
+
+        t, q, dq = 0.0, q0, dq0
+        ddq = integrator.get_acceleration(t, q, dq)
+        assert_allclose(ddq, -np.linalg.solve(self.M, self.K @ q0))
+        for _ in range(1000):
+            t, q, dq, ddq = integrator.step(t, q, dq, ddq)
+
+        # modal solution
+        omega_squared, Phi = sp.linalg.eigh(self.K, self.M)
+        eta0 = Phi.T @ self.M @ q0
+        q_desired = Phi @ (eta0 * np.cos(np.sqrt(omega_squared) * t))
+        assert_allclose(t, 1.0)
+        assert_allclose(q, q_desired, atol=1e-5)
+
+    def test_matrix_mass_is_lumped_by_row_sum(self):
+        integrator = amfe.solver.CentralDifference(lambda q, dq, t: sp.sparse.csr_matrix(self.M), self.f_int,
+                                                   self.f_ext)
+        q = np.array([1.0, 0.5])
+        assert_allclose(integrator.get_acceleration(0.0, q, np.zeros(2)), -(self.K @ q) / self.m)
+
+    def test_solver_factory(self):
+        system = amfe.solver.MechanicalSystem(2, lambda q, dq, t: sp.sparse.csr_matrix(self.M), self.D,
+                                              lambda q, dq, t: self.K, self.f_ext, self.f_int)
+        solfac = amfe.solver.SolverFactory()
+        solfac.set_system(system)
+        solfac.set_analysis_type('transient')
+        solfac.set_integrator('centraldifference')
+        solfac.set_dt_initial(1e-3)
+        solver = solfac.create_solver()
+
+        solution = amfe.solver.AmfeSolution()
+        solver.solve(solution.write_timestep, 0.0, np.array([1.0, 0.0]), np.zeros(2), 0.0095)
+        self.assertEqual(len(solution.t), 11)
+
+        solfac.set_mass_lumping('hrz')
+        with self.assertRaises(ValueError):
+            solfac.create_solver()
+
+
+
+class LinearGeneralizedAlphaTest(unittest.TestCase):
+    def setUp(self):
+        # two degrees of freedom spring mass chain with damping and a harmonic force
+        self.M = np.array([[2.0, 0.0], [0.0, 1.0]])
+        self.K = np.array([[6.0, -2.0], [-2.0, 4.0]])
+        self.D = 0.01 * self.K
+
+    def f_ext(self, q, dq, t):
+        return np.array([0.0, np.sin(3.0 * t)])
+
+    def _integrate(self, integrator, no_of_steps=20):
+        integrator.dt = 0.05
+        t, q, dq = 0.0, np.array([0.5, 0.0]), np.zeros(2)
+        ddq = np.linalg.solve(self.M, self.f_ext(q, dq, t) - self.K @ q)
+        for _ in range(no_of_steps):
+            t, q, dq, ddq = integrator.step(t, q, dq, ddq)
+        return t, q, dq, ddq
+
+    def test_linear_equals_nonlinear_scheme(self):
+        M = lambda q, dq, t: self.M
+        K = lambda q, dq, t: self.K
+        D = lambda q, dq, t: self.D
+        f_int = lambda q, dq, t: self.K @ q
+        for nonlinear_class, linear_class in ((amfe.solver.GeneralizedAlpha, amfe.solver.LinearGeneralizedAlpha),
+                                              (amfe.solver.NewmarkBeta, amfe.solver.LinearNewmarkBeta),
+                                              (amfe.solver.WBZAlpha, amfe.solver.LinearWBZAlpha),
+                                              (amfe.solver.HHTAlpha, amfe.solver.LinearHHTAlpha)):
+            nonlinear_integrator = nonlinear_class(M, f_int, self.f_ext, K, D)
+            nonlinear_integrator.nonlinear_solver_func = amfe.solver.NewtonRaphson().solve
+            nonlinear_integrator.nonlinear_solver_options = {'rtol': 0.0, 'atol': 1e-12}
+            desired = self._integrate(nonlinear_integrator)
+            actual = self._integrate(linear_class(M, self.f_ext, K, D))
+            for x_actual, x_desired in zip(actual, desired):
+                assert_allclose(x_actual, x_desired, atol=1e-10)
+
+    def test_factorization_is_reused(self):
+        class CountingSolver(amfe.linalg.ScipySparseLULinearSolver):
+            no_of_factorizations = 0
+
+            def factorize(self, A, **kwargs):
+                CountingSolver.no_of_factorizations += 1
+                super().factorize(A, **kwargs)
+
+        calls = {'K': 0}
+
+        def K(q, dq, t):
+            calls['K'] += 1
+            return sp.sparse.csr_matrix(self.K)
+
+        integrator = amfe.solver.LinearGeneralizedAlpha(lambda q, dq, t: sp.sparse.csr_matrix(self.M), self.f_ext, K,
+                                                        lambda q, dq, t: sp.sparse.csr_matrix(self.D))
+        integrator.linear_solver = CountingSolver()
+        self._integrate(integrator)
+        self.assertEqual(CountingSolver.no_of_factorizations, 1)
+        self.assertEqual(calls['K'], 1)
+        # a new timestep size needs a new factorization
+        integrator.dt = 0.1
+        integrator.step(0.0, np.zeros(2), np.zeros(2), np.zeros(2))
+        self.assertEqual(CountingSolver.no_of_factorizations, 2)
+
+    def test_solver_factory(self):
+        system = amfe.solver.MechanicalSystem(2, lambda q, dq, t: sp.sparse.csr_matrix(self.M),
+                                              lambda q, dq, t: sp.sparse.csr_matrix(self.D),
+                                              lambda q, dq, t: sp.sparse.csr_matrix(self.K), self.f_ext,
+                                              lambda q, dq, t: self.K @ q)
+        solfac = amfe.solver.SolverFactory()
+        solfac.set_system(system)
+        solfac.set_analysis_type('transient')
+        solfac.set_integrator('genalpha')
+        solfac.set_large_deflection(False)
+        solfac.set_linear_solver('scipy-splu')
+        solfac.set_dt_initial(0.05)
+        solver = solfac.create_solver()
+        self.assertIsInstance(solver._integrator, amfe.solver.LinearGeneralizedAlpha)
+
+        solution = amfe.solver.AmfeSolution()
+        solver.solve(solution.write_timestep, 0.0, np.array([0.5, 0.0]), np.zeros(2), 0.999)
+        self.assertEqual(len(solution.t), 21)
+        assert_allclose(solution.q[-1], self._integrate(amfe.solver.LinearGeneralizedAlpha(
+            system.M, self.f_ext, system.K, system.D))[1], atol=1e-12)
+
+
+class AdaptiveTransientSolverTest(unittest.TestCase):
+    def setUp(self):
+        # damped oscillator with a smoothed step load: short transient followed by a quasi-static period
+        self.M = np.array([[1.0]])
+        self.K = np.array([[100.0]])
+        self.D = np.array([[2.0]])
+
+    def f_ext(self, q, dq, t):
+        return np.array([100.0 * (1.0 - np.exp(-20.0 * t))])
+
+    def _create_solver(self, adaptive, dt, **options):
+        system = amfe.solver.MechanicalSystem(1, lambda q, dq, t: self.M, lambda q, dq, t: self.D,
+                                              lambda q, dq, t: self.K, self.f_ext, lambda q, dq, t: self.K @ q)
+        solfac = amfe.solver.SolverFactory()
+        solfac.set_system(system)
+        solfac.set_analysis_type('transient')
+        solfac.set_integrator('genalpha')
+        solfac.set_large_deflection(False)
+        solfac.set_linear_solver('scipy-splu')
+        solfac.set_dt_initial(dt)
+        solfac.set_adaptive_time_stepping(adaptive, **options)
+        return solfac.create_solver()
+
+    def _exact(self, t):
+        # particular solution of the exponential load plus homogeneous solution with q(0) = dq(0) = 0
+        q_static = 1.0
+        q_exp = -100.0 / (400.0 - 40.0 + 100.0)
+        omega_d = np.sqrt(100.0 - 1.0)
+        a = -(q_static + q_exp)
+        b = (a + 20.0 * q_exp) / omega_d
+        return q_static + q_exp * np.exp(-20.0 * t) + np.exp(-t) * (a * np.cos(omega_d * t) + b * np.sin(omega_d * t))
+
+    def test_adaptive_time_stepping(self):
+        solver = self._create_solver(True, 1e-3, rtol=1e-4)
+        self.assertIsInstance(solver, amfe.solver.solver.AdaptiveTransientSolver)
+        solution = amfe.solver.AmfeSolution()
+        solver.solve(solution.write_timestep, 0.0, np.zeros(1), np.zeros(1), 10.0)
+        t = np.array(solution.t)
+        q = np.array(solution.q)[:, 0]
+        self.assertAlmostEqual(t[-1], 10.0)
+        assert_allclose(q, self._exact(t), atol=1e-2)
+        # the timestep size grows in the quasi-static period
+        self.assertLess(len(t), 10.0 / 1e-3 / 10)
+        self.assertGreater(max(solver.dt_history), 10 * min(solver.dt_history))
+
+    def test_dense_output(self):
+        solver = self._create_solver(True, 1e-3, rtol=1e-4)
+        solution = amfe.solver.AmfeSolution()
+        t_eval = np.linspace(0.0, 2.0, 41)
+        solver.solve(solution.write_timestep, 0.0, np.zeros(1), np.zeros(1), 2.0, t_eval)
+        assert_allclose(solution.t, t_eval)
+        assert_allclose(np.array(solution.q)[:, 0], self._exact(t_eval), atol=1e-2)
+
+    def test_rejection(self):
+        # the initial timestep size is too large for the tolerance
+        solver = self._create_solver(True, 0.5, rtol=1e-4)
+        solution = amfe.solver.AmfeSolution()
+        solver.solve(solution.write_timestep, 0.0, np.zeros(1), np.zeros(1), 1.0)
+        self.assertGreater(solver.no_of_rejected_steps, 0)
+        self.assertLess(solver.dt_history[0], 0.5)
+
+    def test_newton_failure_is_rejected(self):
+        M = lambda q, dq, t: np.eye(1)
+        D = lambda q, dq, t: np.zeros((1, 1))
+        K = lambda q, dq, t: np.array([[1.0 + 300.0 * q[0] ** 2]])
+        f_int = lambda q, dq, t: q + 100.0 * q ** 3
+        f_ext = lambda q, dq, t: np.zeros(1)
+        integrator = amfe.solver.GeneralizedAlpha(M, f_int, f_ext, K, D)
+        integrator.nonlinear_solver_func = amfe.solver.NewtonRaphson().solve
+        integrator.nonlinear_solver_options = {'rtol': 0.0, 'atol': 1e-10, 'maxiter': 3}
+        integrator.dt = 1.0
+        initializer = amfe.solver.initializer.NullAccelerationInitializer()
+        solver = amfe.solver.solver.AdaptiveTransientSolver(integrator, initializer, rtol=1e-2)
+        solution = amfe.solver.AmfeSolution()
+        solver.solve(solution.write_timestep, 0.0, np.array([1.0]), np.zeros(1), 0.5)
+        self.assertGreater(solver.no_of_rejected_steps, 0)
+        self.assertTrue(integrator.converged)
+        self.assertAlmostEqual(solution.t[-1], 0.5)
+
+    def test_newton_failure_at_minimal_timestep(self):
+        M = lambda q, dq, t: np.eye(1)
+        D = lambda q, dq, t: np.zeros((1, 1))
+        K = lambda q, dq, t: np.array([[1.0 + 300.0 * q[0] ** 2]])
+        f_int = lambda q, dq, t: q + 100.0 * q ** 3
+        f_ext = lambda q, dq, t: np.zeros(1)
+        integrator = amfe.solver.GeneralizedAlpha(M, f_int, f_ext, K, D)
+        integrator.nonlinear_solver_func = amfe.solver.NewtonRaphson().solve
+        # the Newton iteration never converges
+        integrator.nonlinear_solver_options = {'rtol': 0.0, 'atol': 0.0, 'maxiter': 1}
+        integrator.dt = 1.0
+        initializer = amfe.solver.initializer.NullAccelerationInitializer()
+        solver = amfe.solver.solver.AdaptiveTransientSolver(integrator, initializer)
+        solution = amfe.solver.AmfeSolution()
+        with self.assertRaises(RuntimeError):
+            solver.solve(solution.write_timestep, 0.0, np.array([1.0]), np.zeros(1), 0.5)
+        self.assertGreater(solver.no_of_rejected_steps, 0)
+
+        with self.assertRaises(ValueError):
+            amfe.solver.solver.AdaptiveTransientSolver(integrator, initializer, dt_min=0.0)
+
+    def test_dead_band(self):
+        # timestep sizes within the dead band are kept, thus the linear integrator factorizes less often
+        solver = self._create_solver(True, 1e-3, rtol=1e-4)
+        solution = amfe.solver.AmfeSolution()
+        solver.solve(solution.write_timestep, 0.0, np.zeros(1), np.zeros(1), 10.0)
+        self.assertLess(len(set(solver.dt_history)), 0.75 * len(solver.dt_history))
+
+        solver = self._create_solver(True, 1e-3, rtol=1e-4, dead_band=(1.0, 1.0))
+        solver.solve(amfe.solver.AmfeSolution().write_timestep, 0.0, np.zeros(1), np.zeros(1), 10.0)
+        self.assertGreater(len(set(solver.dt_history)), 0.75 * len(solver.dt_history))
+
+
+class GeneralizedAlphaStateVersionTest(unittest.TestCase):
+    def setUp(self):
+        # two degrees of freedom chain with cubic springs
+        self.M = np.array([[2.0, 0.0], [0.0, 1.0]])
+        self.K_lin = np.array([[6.0, -2.0], [-2.0, 4.0]])
+        self.no_of_K_and_f_int_calls = 0
+
+    def K_and_f_int(self, q, dq, t):
+        self.no_of_K_and_f_int_calls += 1
+        K = self.K_lin + np.diag(3.0 * q ** 2)
+        return K, self.K_lin @ q + q ** 3
+
+    def _integrate(self, system):
+        integrator = amfe.solver.GeneralizedAlpha(system.M, system.f_int, system.f_ext, system.K, system.D)
+        integrator.dt = 0.05
+        integrator.nonlinear_solver_func = amfe.solver.NewtonRaphson().solve
+        integrator.nonlinear_solver_options = {'rtol': 1e-10, 'atol': 1e-10}
+        t, q, dq = 0.0, np.array([0.5, 0.0]), np.zeros(2)
+        ddq = -np.linalg.solve(self.M, self.K_and_f_int(q, dq, t)[1])
+        for _ in range(10):
+            t, q, dq, ddq = integrator.step(t, q, dq, ddq)
+        return q.copy()
+
+    def test_combined_evaluation_per_state(self):
+        def K(q, dq, t):
+            return self.K_and_f_int(q, dq, t)[0]
+
+        def f_int(q, dq, t):
+            return self.K_and_f_int(q, dq, t)[1]
+
+        M = lambda q, dq, t: self.M
+        D = lambda q, dq, t: np.zeros((2, 2))
+        f_ext = lambda q, dq, t: np.zeros(2)
+
+        self.no_of_K_and_f_int_calls = 0
+        q_separate = self._integrate(amfe.solver.MechanicalSystem(2, M, D, K, f_ext, f_int))
+        no_of_calls_separate = self.no_of_K_and_f_int_calls
+
+        self.no_of_K_and_f_int_calls = 0
+        q_combined = self._integrate(amfe.solver.MechanicalSystem(2, M, D, K, f_ext, f_int, self.K_and_f_int))
+        no_of_calls_combined = self.no_of_K_and_f_int_calls
+
+        assert_allclose(q_combined, q_separate)
+        self.assertLess(no_of_calls_combined, no_of_calls_separate)
+
+    def test_inplace_change_of_state(self):
+        M = lambda q, dq, t: self.M
+        D = lambda q, dq, t: np.zeros((2, 2))
+        f_ext = lambda q, dq, t: np.zeros(2)
+        K = lambda q, dq, t: self.K_and_f_int(q, dq, t)[0]
+        f_int = lambda q, dq, t: self.K_and_f_int(q, dq, t)[1]
+        system = amfe.solver.MechanicalSystem(2, M, D, K, f_ext, f_int, self.K_and_f_int)
+        integrator = amfe.solver.GeneralizedAlpha(system.M, system.f_int, system.f_ext, system.K, system.D)
+        integrator.dt = 0.05
+        integrator.set_prediction(np.array([0.5, 0.0]), np.zeros(2), np.zeros(2), 0.0)
+
+        q = integrator._q_p.copy()
+        res = integrator.residual(q).copy()
+        no_of_calls = self.no_of_K_and_f_int_calls
+        assert_allclose(integrator.residual(q), res)
+        self.assertEqual(self.no_of_K_and_f_int_calls, no_of_calls)
+        # an inplace change without set_correction is not taken for the cached state
+        q += 0.1
+        self.assertFalse(np.allclose(integrator.residual(q), res))
+        self.assertGreater(self.no_of_K_and_f_int_calls, no_of_calls)
+
+    def test_modified_newton(self):
+        K = lambda q, dq, t: self.K_and_f_int(q, dq, t)[0]
+        f_int = lambda q, dq, t: self.K_and_f_int(q, dq, t)[1]
+        M = lambda q, dq, t: self.M
+        D = lambda q, dq, t: np.zeros((2, 2))
+        f_ext = lambda q, dq, t: np.zeros(2)
+        system = amfe.solver.MechanicalSystem(2, M, D, K, f_ext, f_int)
+
+        q_full = self._integrate(system)
+        integrator = amfe.solver.GeneralizedAlpha(system.M, system.f_int, system.f_ext, system.K, system.D)
+        integrator.dt = 0.05
+        integrator.nonlinear_solver_func = amfe.solver.NewtonRaphson().solve
+        integrator.nonlinear_solver_options = {'rtol': 1e-10, 'atol': 1e-10, 'maxiter': 30, 'modified_newton': True}
+        t, q, dq = 0.0, np.array([0.5, 0.0]), np.zeros(2)
+        ddq = -np.linalg.solve(self.M, self.K_and_f_int(q, dq, t)[1])
+        for _ in range(10):
+            t, q, dq, ddq = integrator.step(t, q, dq, ddq)
+        assert_allclose(q, q_full, atol=1e-8)
+
+    def test_modified_newton_solver_factory(self):
+        solfac = amfe.solver.SolverFactory()
+        solfac.set_nonlinear_solver('newton')
+        solfac.set_newton_modified(True)
+        solfac.set_newton_refactorize_each_solve(False)
+        solfac.set_newton_refactorization_ratio(0.8)
+        _, options = solfac._create_newton_solver(amfe.linalg.linearsolvers.ScipySparseLULinearSolver(), dict())
+        self.assertTrue(options['modified_newton'])
+        self.assertFalse(options['refactorize_each_solve'])
+        self.assertEqual(options['refactorization_ratio'], 0.8)
+        with self.assertRaises(ValueError):
+            solfac.set_newton_refactorize_each_solve(1)
+
+    def test_combined_mass_evaluation_newmark(self):
+        calls = {'M': 0, 'M_K_and_f_int': 0}
+
+        def M(q, dq, t):
+            calls['M'] += 1
+            return self.M
+
+        def M_K_and_f_int(q, dq, t):
+            calls['M_K_and_f_int'] += 1
+            K, f_int = self.K_and_f_int(q, dq, t)
+            return self.M, K, f_int
+
+        D = lambda q, dq, t: np.zeros((2, 2))
+        f_ext = lambda q, dq, t: np.zeros(2)
+        system = amfe.solver.MechanicalSystem(2, M, D, None, f_ext, None, self.K_and_f_int, M_K_and_f_int)
+
+        def integrate(integrator):
+            integrator.dt = 0.05
+            integrator.nonlinear_solver_func = amfe.solver.NewtonRaphson().solve
+            integrator.nonlinear_solver_options = {'rtol': 1e-10, 'atol': 1e-10}
+            t, q, dq = 0.0, np.array([0.5, 0.0]), np.zeros(2)
+            ddq = -np.linalg.solve(self.M, self.K_and_f_int(q, dq, t)[1])
+            for _ in range(10):
+                t, q, dq, ddq = integrator.step(t, q, dq, ddq)
+            return q.copy()
+
+        integrator = amfe.solver.NewmarkBeta(system.M, system.f_int, system.f_ext, system.K, system.D)
+        q_separate = integrate(integrator)
+        self.assertEqual(calls['M_K_and_f_int'], 0)
+        no_of_states = calls['M']
+
+        calls = {'M': 0, 'M_K_and_f_int': 0}
+        system.clear_cache()
+        integrator = amfe.solver.NewmarkBeta(system.M, system.f_int, system.f_ext, system.K, system.D)
+        integrator.M_K_and_f_int = system.M_K_and_f_int
+        q_combined = integrate(integrator)
+
+        assert_allclose(q_combined, q_separate)
+        # mass, stiffness and internal force of every state are computed in one combined evaluation
+        self.assertEqual(calls, {'M': 0, 'M_K_and_f_int': no_of_states})
+
 if __name__ == '__main__':
     st = SolversTest()
     st.setUp()
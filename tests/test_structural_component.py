@@ -4,7 +4,7 @@
 from unittest import TestCase
 import numpy as np
 from scipy.linalg import norm
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_array_equal
 from copy import deepcopy
 
 from amfe.io.tools import amfe_dir
@@ -13,6 +13,8 @@ from amfe.io.mesh.writer import AmfeMeshConverter
 from amfe.material import KirchhoffMaterial
 from amfe.component.structural_component import StructuralComponent
 from amfe.mesh import Mesh
+from amfe.solver import SolverFactory, create_constrained_mechanical_system_from_component, \
+    create_near_nullspace_from_component
 
 
 class StructuralComponentTest(TestCase):
@@ -51,7 +53,275 @@ class StructuralComponentTest(TestCase):
 
         assert_allclose(2*f_ext, f_ext_2)
 
+    def test_f_ext_time_separable(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q_0 = np.zeros(no_of_dofs)
+        q = 0.01 * np.arange(no_of_dofs)
+        f_ext_desired = self.my_comp.f_ext(q_0, q_0, 1.0).copy()
+
+        my_comp = StructuralComponent(self.mesh)
+        my_comp.assign_material(KirchhoffMaterial(), ['left', 'right'], 'S')
+        neumann_bc = my_comp.neumann.create_fixed_direction_neumann((1, 0), lambda t: self.amp*t, time_separable=True)
+        my_comp.assign_neumann('Right force', neumann_bc, ['right_boundary'])
+        assert_allclose(my_comp.f_ext(q_0, q_0, 1.0), f_ext_desired)
+        # the loads are assembled once in the reference configuration and scaled in all further calls
+        neumann_objects, loads = my_comp._get_time_separable_neumann_loads()
+        assert_allclose(my_comp.f_ext(q, q_0, 2.0), 2.0 * f_ext_desired)
+        self.assertIs(my_comp._get_time_separable_neumann_loads()[1], loads)
+
     def test_fields(self):
         fields_actual = self.my_comp.fields
         fields_desired = ['ux', 'uy']
         self.assertListEqual(fields_actual, fields_desired)
+
+    def test_cache_reference_geometry(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = 0.01*np.random.rand(no_of_dofs)
+        dq = np.zeros(no_of_dofs)
+        K_desired, f_desired = self.my_comp.K_and_f_int(q, dq, 0.0)
+        K_desired = K_desired.copy()
+        f_desired = f_desired.copy()
+        M_desired = self.my_comp.M(q, dq, 0.0).todense()
+
+        self.my_comp.cache_reference_geometry = True
+        self.assertTrue(self.my_comp.cache_reference_geometry)
+        self.assertEqual(sum(len(geometry[1]) for geometry in self.my_comp._reference_geometry.values()),
+                         self.my_comp.no_of_elements)
+        K_actual, f_actual = self.my_comp.K_and_f_int(q, dq, 0.0)
+        assert_allclose(K_actual.todense(), K_desired.todense())
+        assert_allclose(f_actual, f_desired)
+        assert_allclose(self.my_comp.f_int(q, dq, 0.0), f_desired)
+        assert_allclose(self.my_comp.M(q, dq, 0.0).todense(), M_desired)
+
+        # reassigning materials updates the cache
+        my_material = KirchhoffMaterial(E=1E9)
+        self.my_comp.assign_material(my_material, ['left'], 'S')
+        self.assertEqual(sum(len(geometry[1]) for geometry in self.my_comp._reference_geometry.values()),
+                         self.my_comp.no_of_elements)
+        K_actual, f_actual = self.my_comp.K_and_f_int(q, dq, 0.0)
+        self.my_comp.cache_reference_geometry = False
+        self.assertIsNone(self.my_comp._reference_geometry)
+        K_desired, f_desired = self.my_comp.K_and_f_int(q, dq, 0.0)
+        assert_allclose(K_actual.todense(), K_desired.todense())
+        assert_allclose(f_actual, f_desired)
+
+    def test_m_lumped_and_critical_timestep(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = dq = np.zeros(no_of_dofs)
+        M = self.my_comp.M(q, dq, 0.0)
+        m_row_sum = self.my_comp.M_lumped(q, dq, 0.0)
+        self.assertEqual(m_row_sum.shape, (no_of_dofs,))
+        assert_allclose(m_row_sum, np.asarray(M.sum(axis=1)).ravel())
+        m_hrz = self.my_comp.M_lumped(q, dq, 0.0, method='hrz')
+        assert_allclose(np.sum(m_hrz), np.sum(m_row_sum))
+
+        nodes = self.my_comp.mesh.nodes
+        connectivities = self.my_comp.mesh.get_iconnectivity_by_elementids(
+            self.my_comp._ele_obj_df['fk_mesh'].values)
+        min_distance = min(np.linalg.norm(nodes[i] - nodes[j]) for connectivity in connectivities
+                           for i in connectivity for j in connectivity if i != j)
+        wave_speed = KirchhoffMaterial().wave_speed
+        assert_allclose(self.my_comp.critical_timestep(), min_distance / wave_speed)
+
+    def test_constrained_lumped_mass(self):
+        fixed_dofs = self.my_comp.mapping.nodal2global.loc[[13, 14, 15], 'ux'].values
+        dirichlet = self.my_comp.constraints.create_dirichlet_constraint()
+        for dof in fixed_dofs:
+            self.my_comp.assign_constraint('Dirichlet', dirichlet, np.array([dof], dtype=int))
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = dq = np.zeros(no_of_dofs)
+        m_hrz = self.my_comp.M_lumped(q, dq, 0.0, method='hrz')
+
+        system, formulation = create_constrained_mechanical_system_from_component(self.my_comp, mass_lumping='hrz')
+        free_dofs = np.setdiff1d(np.arange(no_of_dofs), fixed_dofs)
+        x = np.zeros(system.dimension)
+        M = system.M(x, x, 0.0)
+        self.assertEqual(M.shape, (len(free_dofs), len(free_dofs)))
+        assert_allclose(M.todense(), np.diag(m_hrz[free_dofs]))
+
+        # the unconstrained lumped mass of the component must not be used with constraints
+        solfac = SolverFactory()
+        solfac.set_system(self.my_comp)
+        solfac.set_analysis_type('transient')
+        solfac.set_integrator('centraldifference')
+        solfac.set_dt_initial(1e-3)
+        with self.assertRaises(ValueError):
+            solfac.create_solver()
+        solfac.set_system(system)
+        solfac.set_mass_lumping('hrz')
+        with self.assertRaises(ValueError):
+            solfac.create_solver()
+        solfac.set_mass_lumping('row_sum')
+        solfac.create_solver()
+
+    def test_near_nullspace(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = np.zeros(no_of_dofs)
+        near_nullspace, nodal_dofs = create_near_nullspace_from_component(self.my_comp)
+        self.assertEqual(near_nullspace.shape, (no_of_dofs, 3))
+        self.assertEqual(nodal_dofs.shape, (self.mesh.no_of_nodes, 2))
+        K = self.my_comp.K(q, q, 0.0)
+        assert_allclose(K @ near_nullspace, 0.0, atol=1e-12 * abs(K).max())
+
+        fixed_dofs = self.my_comp.mapping.nodal2global.loc[[13, 14, 15], 'ux'].values
+        dirichlet = self.my_comp.constraints.create_dirichlet_constraint()
+        for dof in fixed_dofs:
+            self.my_comp.assign_constraint('Dirichlet', dirichlet, np.array([dof], dtype=int))
+        system, formulation = create_constrained_mechanical_system_from_component(self.my_comp)
+        near_nullspace_constrained, nodal_dofs_constrained = create_near_nullspace_from_component(self.my_comp,
+                                                                                                  formulation)
+        self.assertEqual(near_nullspace_constrained.shape, (system.dimension, 3))
+        assert_allclose(near_nullspace_constrained, near_nullspace[formulation.free_dofs])
+        mapped = nodal_dofs_constrained >= 0
+        assert_array_equal(formulation.free_dofs[nodal_dofs_constrained[mapped]], nodal_dofs[mapped])
+        assert_array_equal(np.sort(nodal_dofs[~mapped]), np.sort(fixed_dofs))
+
+        solfac = SolverFactory()
+        solfac.set_system(system)
+        solfac.set_linear_solver('scipy-pcg')
+        solfac.set_linear_solver_preconditioner('amg', structural_component=self.my_comp,
+                                                constraint_formulation=formulation)
+        preconditioner = solfac._create_linear_solver().preconditioner
+        assert_allclose(preconditioner.near_nullspace, near_nullspace_constrained)
+        assert_array_equal(preconditioner.nodal_dofs, nodal_dofs_constrained)
+
+    def test_m_k_and_f_int(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = 0.01 * np.arange(no_of_dofs)
+        dq = 0.1 * np.ones(no_of_dofs)
+        self.my_comp.apply_rayleigh_damping(1e-1, 1e-4, linearized=False)
+
+        M_desired = self.my_comp.M(q, dq, 0.0).todense()
+        K_desired = self.my_comp.K(q, dq, 0.0).todense()
+        f_desired = self.my_comp.f_int(q, dq, 0.0).copy()
+
+        M_actual, K_actual, f_actual = self.my_comp.M_K_and_f_int(q, dq, 0.0)
+        assert_allclose(M_actual.todense(), M_desired)
+        assert_allclose(K_actual.todense(), K_desired)
+        assert_allclose(f_actual, f_desired)
+
+    def test_assembly_plan(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = 0.01 * np.arange(no_of_dofs)
+        K_desired = self.my_comp.K(q, q, 0.0).todense()
+        plan = self.my_comp._get_assembly_plan()
+        self.assertIs(self.my_comp._get_assembly_plan(), plan)
+        assert_allclose(self.my_comp.K(q, q, 0.0).todense(), K_desired)
+        self.assertIs(self.my_comp._get_assembly_plan(), plan)
+
+        # renumbering the dofs invalidates the plan
+        new_dofs = self.my_comp.reorder('rcm')
+        plan_reordered = self.my_comp._get_assembly_plan()
+        self.assertIsNot(plan_reordered, plan)
+        for dofs_old, dofs_new in zip(plan.elements2dofs, plan_reordered.elements2dofs):
+            assert_array_equal(new_dofs[dofs_old], dofs_new)
+
+        # a new material assignment invalidates the plan
+        self.my_comp.assign_material(KirchhoffMaterial(E=1.0), ['left'], 'S')
+        self.assertIsNot(self.my_comp._get_assembly_plan(), plan_reordered)
+        self.assertEqual(self.my_comp._get_assembly_plan().no_of_elements, self.my_comp.no_of_elements)
+
+    def test_reorder(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = 0.01 * np.arange(no_of_dofs)
+        K_desired, f_desired = self.my_comp.K_and_f_int(q, q, 0.0)
+        K_desired = K_desired.todense()
+        f_desired = f_desired.copy()
+        M_desired = self.my_comp.M(q, q, 0.0).todense()
+
+        new_dofs = self.my_comp.reorder('rcm')
+        self.assertFalse(np.array_equal(new_dofs, np.arange(no_of_dofs)))
+        q_new = np.empty_like(q)
+        q_new[new_dofs] = q
+        K_actual, f_actual = self.my_comp.K_and_f_int(q_new, q_new, 0.0)
+        assert_allclose(K_actual.todense()[np.ix_(new_dofs, new_dofs)], K_desired)
+        assert_allclose(f_actual[new_dofs], f_desired)
+        assert_allclose(self.my_comp.M(q_new, q_new, 0.0).todense()[np.ix_(new_dofs, new_dofs)], M_desired)
+
+        # a reordering on the mapping directly renews the preallocated matrices as well
+        new_dofs_2 = self.my_comp.mapping.reorder('minimum_degree')
+        q_new_2 = np.empty_like(q)
+        q_new_2[new_dofs_2[new_dofs]] = q
+        K_actual = self.my_comp.K(q_new_2, q_new_2, 0.0).todense()
+        assert_allclose(K_actual[np.ix_(new_dofs_2[new_dofs], new_dofs_2[new_dofs])], K_desired)
+
+    def test_reorder_with_constraints(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = np.zeros(no_of_dofs)
+        fixed_dofs = self.my_comp.mapping.nodal2global.loc[[13, 14, 15], 'ux'].values
+        dirichlet = self.my_comp.constraints.create_dirichlet_constraint()
+        for dof in fixed_dofs:
+            self.my_comp.assign_constraint('Dirichlet', dirichlet, np.array([dof], dtype=int))
+        B_desired = self.my_comp.B(q, 0.0).todense()
+
+        # the constraints follow the new numbering of the dofs
+        new_dofs = self.my_comp.reorder('rcm')
+        assert_allclose(self.my_comp.B(q, 0.0).todense()[:, new_dofs], B_desired)
+        new_dofs_2 = self.my_comp.mapping.reorder('minimum_degree')
+        assert_allclose(self.my_comp.B(q, 0.0).todense()[:, new_dofs_2[new_dofs]], B_desired)
+        self.my_comp.ordering = None
+        self.my_comp.ordering = 'rcm'
+        assert_array_equal(self.my_comp.mapping.nodal2global.loc[[13, 14, 15], 'ux'].values,
+                           np.nonzero(self.my_comp.B(q, 0.0).todense())[1])
+
+    def test_ordering(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q = np.zeros(no_of_dofs)
+        K_desired = self.my_comp.K(q, q, 0.0).todense()
+        nodal2global = self.my_comp.mapping.nodal2global.copy()
+
+        self.my_comp.ordering = 'rcm'
+        self.assertEqual(self.my_comp.ordering, 'rcm')
+        self.assertEqual(self.my_comp.mapping.ordering, 'rcm')
+        new_dofs = np.empty(no_of_dofs, dtype=int)
+        new_dofs[nodal2global.values.ravel()] = self.my_comp.mapping.nodal2global.loc[nodal2global.index,
+                                                                                      nodal2global.columns].values.ravel()
+        K_actual = self.my_comp.K(q, q, 0.0).todense()
+        assert_allclose(K_actual[np.ix_(new_dofs, new_dofs)], K_desired)
+
+        self.my_comp.ordering = None
+        assert_array_equal(self.my_comp.mapping.nodal2global.values, nodal2global.values)
+        assert_allclose(self.my_comp.K(q, q, 0.0).todense(), K_desired)
+
+        with self.assertRaises(ValueError):
+            self.my_comp.ordering = 'unknown'
+        self.assertIsNone(self.my_comp.ordering)
+        assert_allclose(self.my_comp.K(q, q, 0.0).todense(), K_desired)
+
+    def test_rayleigh_damping(self):
+        no_of_dofs = self.my_comp.constraints.no_of_dofs_unconstrained
+        q_0 = np.zeros(no_of_dofs)
+        q = 0.01 * np.arange(no_of_dofs)
+        dq = 0.1 * np.ones(no_of_dofs)
+        alpha, beta = 1e-1, 1e-4
+
+        D = self.my_comp.D(q, dq, 0.0)
+        self.assertEqual(D.nnz, 0)
+
+        self.my_comp.apply_rayleigh_damping(alpha, beta)
+        D_desired = (alpha * self.my_comp.M(q_0, q_0, 0.0) + beta * self.my_comp.K(q_0, q_0, 0.0)).todense()
+        K_desired = self.my_comp.K(q, dq, 0.0).todense()
+        f_desired = self.my_comp._assemble_f_int(q, 0.0).copy()
+
+        # the linearized damping matrix is assembled once and does not alter the tangential stiffness matrix
+        K_actual, f_actual = self.my_comp.K_and_f_int(q, dq, 0.0)
+        assert_allclose(K_actual.todense(), K_desired)
+        assert_allclose(f_actual, f_desired + D_desired.A @ dq)
+        D = self.my_comp.D(q, dq, 0.0)
+        assert_allclose(D.todense(), D_desired)
+        self.assertIs(self.my_comp.D(2*q, dq, 1.0), D)
+        assert_allclose(self.my_comp.f_int(q, dq, 0.0), f_desired + D_desired.A @ dq)
+
+        # explicit refresh at a new reference state
+        self.my_comp.update_damping(q)
+        D_q = (alpha * self.my_comp.M(q, dq, 0.0) + beta * self.my_comp.K(q, dq, 0.0)).todense()
+        assert_allclose(self.my_comp.D(q_0, dq, 0.0).todense(), D_q)
+
+        # damping evaluated at the current state
+        self.my_comp.apply_rayleigh_damping(alpha, beta, linearized=False)
+        assert_allclose(self.my_comp.D(q, dq, 0.0).todense(), D_q)
+        assert_allclose(self.my_comp.K_and_f_int(q, dq, 0.0)[1], f_desired + D_q.A @ dq)
+
+        self.my_comp.apply_no_damping()
+        self.assertIsNone(self.my_comp.rayleigh_damping)
+        self.assertEqual(self.my_comp.D(q, dq, 0.0).nnz, 0)
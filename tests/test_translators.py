@@ -5,6 +5,7 @@ Test for testing the translator-module
 from unittest import TestCase
 import numpy as np
 from amfe.solver.translators import *
+from amfe.solver.tools import call_with_state_version, _function_accepts_state_version
 from numpy.testing import assert_array_equal
 
 
@@ -43,6 +44,9 @@ class TranslatorsTest(TestCase):
             def K_and_f_int(self, q, dq, t):
                 return self.K(q, dq, t), self.f_int(q, dq, t)
 
+            def M_K_and_f_int(self, q, dq, t):
+                return self.M(q, dq, t), self.K(q, dq, t), self.f_int(q, dq, t)
+
             def f_ext(self, q, dq, t):
                 return np.array([0., 0., 1])
 
@@ -74,3 +78,92 @@ class TranslatorsTest(TestCase):
         assert_array_equal(f_ext_desired, translator.f_ext(u, du, t))
         assert_array_equal(f_int_desired, translator.f_int(u, du, t))
 
+
+    def test_state_version_cache(self):
+        calls = {'K_and_f_int': 0, 'M': 0}
+
+        def K_and_f_int(q, dq, t):
+            calls['K_and_f_int'] += 1
+            return self.structural_component.K_and_f_int(q, dq, t)
+
+        def M(q, dq, t):
+            calls['M'] += 1
+            return self.structural_component.M(q, dq, t)
+
+        component = self.structural_component
+        system = MechanicalSystem(3, M, component.D, component.K, component.f_ext, component.f_int, K_and_f_int)
+        u = np.array([0.05, 0.1, 0.15])
+        du = np.zeros_like(u)
+
+        f_int = system.f_int(u, du, 0.0, state_version=1)
+        K = system.K(u, du, 0.0, state_version=1)
+        system.M(u, du, 0.0, state_version=1)
+        system.M(u, du, 0.0, state_version=1)
+        assert_array_equal(K, component.K(u, du, 0.0))
+        assert_array_equal(f_int, component.f_int(u, du, 0.0))
+        self.assertEqual(calls, {'K_and_f_int': 1, 'M': 1})
+
+        # a new version is evaluated again, calls without version are not cached
+        assert_array_equal(system.f_int(2*u, du, 0.0, state_version=2), component.f_int(2*u, du, 0.0))
+        system.M(u, du, 0.0)
+        system.M(u, du, 0.0)
+        self.assertEqual(calls, {'K_and_f_int': 2, 'M': 3})
+
+        system.clear_cache()
+        system.K(2*u, du, 0.0, state_version=2)
+        self.assertEqual(calls['K_and_f_int'], 3)
+
+    def test_shared_results_are_not_cached(self):
+        # the function returns a preallocated array that is overwritten by every evaluation
+        f_preallocated = np.zeros(3)
+
+        def f_int(q, dq, t):
+            f_preallocated[:] = 2.0 * q
+            return f_preallocated
+
+        component = self.structural_component
+        system = MechanicalSystem(3, component.M, component.D, component.K, component.f_ext, f_int)
+        u = np.array([0.05, 0.1, 0.15])
+        du = np.zeros_like(u)
+        system.f_int(u, du, 0.0, state_version=1)
+        system.f_int(2*u, du, 0.0)
+        assert_array_equal(system.f_int(u, du, 0.0, state_version=1), 2.0 * u)
+
+    def test_call_with_state_version(self):
+        component = self.structural_component
+        system = MechanicalSystem(3, component.M, component.D, component.K, component.f_ext, component.f_int)
+        u = np.array([0.05, 0.1, 0.15])
+        du = np.zeros_like(u)
+
+        _function_accepts_state_version.cache_clear()
+        for _ in range(3):
+            assert_array_equal(call_with_state_version(system.M, u, du, 0.0, state_version=1),
+                               component.M(u, du, 0.0))
+            call_with_state_version(component.M, u, du, 0.0, state_version=1)
+        self.assertEqual(system._cache['M'][0], 1)
+        # the signature of each function is inspected once
+        self.assertEqual(_function_accepts_state_version.cache_info().misses, 2)
+
+    def test_combined_mass_stiffness_cache(self):
+        calls = {'M_K_and_f_int': 0}
+
+        def M_K_and_f_int(q, dq, t):
+            calls['M_K_and_f_int'] += 1
+            return self.structural_component.M_K_and_f_int(q, dq, t)
+
+        component = self.structural_component
+        system = MechanicalSystem(3, component.M, component.D, component.K, component.f_ext, component.f_int,
+                                  component.K_and_f_int, M_K_and_f_int)
+        u = np.array([0.05, 0.1, 0.15])
+        du = np.zeros_like(u)
+
+        M, K, f_int = system.M_K_and_f_int(u, du, 0.0, state_version=1)
+        assert_array_equal(M, component.M(u, du, 0.0))
+        assert_array_equal(K, component.K(u, du, 0.0))
+        assert_array_equal(f_int, component.f_int(u, du, 0.0))
+        # the separate entities of the same state version are taken from the combined evaluation
+        self.assertIs(system.M(u, du, 0.0, state_version=1), M)
+        self.assertIs(system.K(u, du, 0.0, state_version=1), K)
+        self.assertIs(system.f_int(u, du, 0.0, state_version=1), f_int)
+        system.M_K_and_f_int(u, du, 0.0, state_version=1)
+        self.assertEqual(calls['M_K_and_f_int'], 1)